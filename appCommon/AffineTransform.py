@@ -0,0 +1,182 @@
+# ############################################################
+# FlatCAM: 2D Post-processing for Manufacturing              #
+# http://flatcam.org                                         #
+# MIT Licence                                                #
+# ############################################################
+
+"""
+Affine transformations of the geometry of the FlatCAM objects.
+
+A transformation is a 3x3 matrix (homogeneous coordinates) so the scale, offset, mirror, rotate and skew operations
+can be chained into one matrix with compose() and applied in one pass. transform_geometry() collects the coordinates
+of all the geometries found in a (nested) structure of lists, tuples and dictionaries into one array, applies the
+matrix to the array and puts the transformed coordinates back in a structure of the same shape.
+
+With Shapely 2 the coordinates of all the geometries are read, transformed and written back by one
+shapely.transform() call. The older Shapely versions have no bulk transform so each geometry is transformed by
+shapely.affinity.affine_transform(), once, with the chained matrix.
+"""
+
+from math import sin, cos, tan, radians
+
+import numpy as np
+
+from shapely.affinity import affine_transform
+from shapely.geometry.base import BaseGeometry
+
+try:
+    # Shapely 2
+    from shapely import transform as shapely_transform
+except ImportError:
+    shapely_transform = None
+
+
+def identity_matrix():
+    return np.identity(3)
+
+
+def translate_matrix(dx, dy):
+    """
+    :param dx:      offset on the X axis
+    :param dy:      offset on the Y axis
+    :return:        3x3 affine matrix
+    """
+    return np.array([[1.0, 0.0, dx], [0.0, 1.0, dy], [0.0, 0.0, 1.0]])
+
+
+def around_point(matrix, point):
+    """
+    Moves the origin of a linear transformation in the given point.
+
+    :param matrix:  3x3 affine matrix that uses (0, 0) as origin
+    :param point:   (x, y) the new origin; None for (0, 0)
+    :return:        3x3 affine matrix
+    """
+    if point is None:
+        return matrix
+    px, py = point
+    return translate_matrix(px, py) @ matrix @ translate_matrix(-px, -py)
+
+
+def scale_matrix(xfactor, yfactor, point=None):
+    """
+    Same as shapely.affinity.scale(geo, xfactor, yfactor, origin=point)
+
+    :param xfactor: scale factor on the X axis
+    :param yfactor: scale factor on the Y axis
+    :param point:   (x, y) origin of the scaling; None for (0, 0)
+    :return:        3x3 affine matrix
+    """
+    matrix = np.array([[xfactor, 0.0, 0.0], [0.0, yfactor, 0.0], [0.0, 0.0, 1.0]], dtype=float)
+    return around_point(matrix, point)
+
+
+def mirror_matrix(axis, point):
+    """
+    Same as the mirror() methods of the FlatCAM objects.
+
+    :param axis:    "X" or "Y", the axis parallel to the mirror line
+    :param point:   (x, y) point on the mirror line
+    :return:        3x3 affine matrix
+    """
+    xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
+    return scale_matrix(xscale, yscale, point)
+
+
+def rotate_matrix(angle, point=None):
+    """
+    Same as shapely.affinity.rotate(geo, angle, origin=point)
+
+    :param angle:   the angle in degrees; positive angles are counter-clockwise
+    :param point:   (x, y) center of the rotation; None for (0, 0)
+    :return:        3x3 affine matrix
+    """
+    angle = radians(angle)
+    c, s = cos(angle), sin(angle)
+    matrix = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+    return around_point(matrix, point)
+
+
+def skew_matrix(angle_x, angle_y, point=None):
+    """
+    Same as shapely.affinity.skew(geo, angle_x, angle_y, origin=point)
+
+    :param angle_x: the shear angle for the X axis, in degrees
+    :param angle_y: the shear angle for the Y axis, in degrees
+    :param point:   (x, y) origin of the skew; None for (0, 0)
+    :return:        3x3 affine matrix
+    """
+    matrix = np.array([[1.0, tan(radians(angle_x)), 0.0], [tan(radians(angle_y)), 1.0, 0.0], [0.0, 0.0, 1.0]])
+    return around_point(matrix, point)
+
+
+def compose(*matrices):
+    """
+    Chains the transformations into one.
+
+    :param matrices:    3x3 affine matrices in the order in which they are applied
+    :return:            3x3 affine matrix
+    """
+    result = identity_matrix()
+    for matrix in matrices:
+        result = np.asarray(matrix, dtype=float) @ result
+    return result
+
+
+def transform_points(coords, matrix):
+    """
+    :param coords:  Nx2 array of coordinates
+    :param matrix:  3x3 affine matrix
+    :return:        Nx2 array of transformed coordinates
+    """
+    coords = np.asarray(coords, dtype=float)
+    return coords[:, :2] @ matrix[:2, :2].T + matrix[:2, 2]
+
+
+def transform_geometry(geometry, matrix):
+    """
+    Applies an affine transformation to all the geometries in a structure, in one pass.
+
+    :param geometry:    a Shapely geometry or a (nested) list, tuple or dict of geometries; what is not a geometry
+                        (None, numbers, strings) is kept as it is
+    :param matrix:      3x3 affine matrix
+    :return:            a structure of the same shape with the transformed geometries
+    """
+    leaves = []
+    _collect_leaves(geometry, leaves)
+    if not leaves:
+        return geometry
+
+    if shapely_transform is not None:
+        geoms = np.empty(len(leaves), dtype=object)
+        geoms[:] = leaves
+        new_leaves = shapely_transform(geoms, lambda coords: transform_points(coords, matrix))
+    else:
+        # Shapely < 2 has no bulk transform; one call for each geometry, with the chained matrix
+        coefficients = [matrix[0, 0], matrix[0, 1], matrix[1, 0], matrix[1, 1], matrix[0, 2], matrix[1, 2]]
+        new_leaves = [affine_transform(geo, coefficients) for geo in leaves]
+
+    return _replace_leaves(geometry, iter(new_leaves))
+
+
+def _collect_leaves(geometry, leaves):
+    if isinstance(geometry, BaseGeometry):
+        leaves.append(geometry)
+    elif isinstance(geometry, (list, tuple)):
+        for geo in geometry:
+            _collect_leaves(geo, leaves)
+    elif isinstance(geometry, dict):
+        for geo in geometry.values():
+            _collect_leaves(geo, leaves)
+
+
+def _replace_leaves(geometry, new_leaves):
+    if isinstance(geometry, BaseGeometry):
+        return next(new_leaves)
+    if isinstance(geometry, list):
+        return [_replace_leaves(geo, new_leaves) for geo in geometry]
+    if isinstance(geometry, tuple):
+        return tuple(_replace_leaves(geo, new_leaves) for geo in geometry)
+    if isinstance(geometry, dict):
+        return {key: _replace_leaves(geo, new_leaves) for key, geo in geometry.items()}
+    return geometry
@@ -0,0 +1,319 @@
+# ############################################################
+# FlatCAM: 2D Post-processing for Manufacturing              #
+# http://flatcam.org                                         #
+# MIT Licence                                                #
+# ############################################################
+
+"""
+Autolevelling engine used by CNCJobObject.autolevell_gcode().
+
+The heights measured in the probe points are made into an interpolant once: a bilinear interpolant over the grid of
+the probe points (GridHeightMap) or a linear interpolant over the Delaunay triangulation of the probe points, the dual
+of their Voronoi diagram (DelaunayHeightMap). Both take arrays of coordinates and return an array of heights.
+
+level_gcode() tokenizes the G-Code with the G-Code parsing engine, forward fills the modal position, splits the long
+feed moves into segments no longer than the limits of CNCjob.segment() and adds the height of the surface to the Z of
+every move, for all the moves in one pass.
+"""
+
+import re
+import logging
+
+import numpy as np
+from shapely.geometry import MultiPoint
+from shapely.ops import triangulate
+
+from appParsers.ParseGCode import GenericDialect, COL_G, COL_X, COL_Y, COL_Z, _fill_forward
+
+log = logging.getLogger('base')
+
+# the motion modes that move to the X, Y, Z of the line
+MOTION_CODES = (0.0, 1.0, 2.0, 3.0)
+# the maximum number of query points in the arrays made by the interpolants, to keep the memory used bounded
+CHUNK_SIZE = 65536
+# the Z word of a line
+Z_WORD_RE = re.compile(r'Z\s*[\+\-]?(?:\d+\.?\d*|\.\d+)')
+
+
+class GridHeightMap:
+    """
+    Bilinear interpolant of heights measured on a grid of probe points. The grid lines do not have to be evenly
+    spaced. Outside the grid the heights of the grid border are used: linear interpolation along the nearest edge and
+    the height of the nearest corner beyond it.
+    """
+
+    def __init__(self, points):
+        """
+
+        :param points:  the (x, y, height) of the probe points; they must make a complete grid
+        """
+        points = np.asarray(points, dtype=float).reshape((-1, 3))
+        if len(points) == 0:
+            raise ValueError("There are no probe points.")
+
+        self.xs, col = self._grid_lines(points[:, 0])
+        self.ys, row = self._grid_lines(points[:, 1])
+
+        self.heights = np.full((len(self.ys), len(self.xs)), np.nan)
+        self.heights[row, col] = points[:, 2]
+        if np.isnan(self.heights).any():
+            raise ValueError("The probe points do not make a complete grid.")
+
+        # a single grid line is made into a band of 2 lines with the same heights
+        if len(self.xs) == 1:
+            self.xs = np.append(self.xs, self.xs[0] + 1.0)
+            self.heights = np.repeat(self.heights, 2, axis=1)
+        if len(self.ys) == 1:
+            self.ys = np.append(self.ys, self.ys[0] + 1.0)
+            self.heights = np.repeat(self.heights, 2, axis=0)
+
+        # the distance between the probe points
+        self.spacing = min(np.diff(self.xs).min(), np.diff(self.ys).min())
+
+    @staticmethod
+    def _grid_lines(values):
+        """
+        Groups the coordinates of the probe points into grid lines. The coordinates of a grid line may differ by
+        rounding errors, less than a thousandth of the grid size.
+
+        :param values:  the X or Y coordinates of the probe points
+        :return:        the coordinates of the grid lines and the grid line of each probe point
+        """
+        order = np.argsort(values, kind='stable')
+        sorted_values = values[order]
+        tolerance = max((sorted_values[-1] - sorted_values[0]) * 1e-3, 1e-9)
+
+        line_of_sorted = np.concatenate(([0], np.cumsum(np.diff(sorted_values) > tolerance)))
+        lines = np.bincount(line_of_sorted, weights=sorted_values) / np.bincount(line_of_sorted)
+
+        line_of_value = np.empty(len(values), dtype=np.int64)
+        line_of_value[order] = line_of_sorted
+        return lines, line_of_value
+
+    def __call__(self, x, y):
+        """
+        The heights of the surface.
+
+        :param x:   array of X coordinates
+        :param y:   array of Y coordinates
+        :return:    array of heights
+        """
+        x = np.clip(np.asarray(x, dtype=float), self.xs[0], self.xs[-1])
+        y = np.clip(np.asarray(y, dtype=float), self.ys[0], self.ys[-1])
+
+        i = np.clip(np.searchsorted(self.xs, x, side='right') - 1, 0, len(self.xs) - 2)
+        j = np.clip(np.searchsorted(self.ys, y, side='right') - 1, 0, len(self.ys) - 2)
+        tx = (x - self.xs[i]) / (self.xs[i + 1] - self.xs[i])
+        ty = (y - self.ys[j]) / (self.ys[j + 1] - self.ys[j])
+
+        h = self.heights
+        return (h[j, i] * (1 - tx) + h[j, i + 1] * tx) * (1 - ty) + (h[j + 1, i] * (1 - tx) + h[j + 1, i + 1] * tx) * ty
+
+
+class DelaunayHeightMap:
+    """
+    Linear interpolant of heights measured in any probe points, over their Delaunay triangulation. Outside the
+    triangulation the height of the nearest probe point is used, which is the height of its Voronoi cell.
+    """
+
+    def __init__(self, points):
+        """
+
+        :param points:  the (x, y, height) of the probe points
+        """
+        points = np.asarray(points, dtype=float).reshape((-1, 3))
+        if len(points) == 0:
+            raise ValueError("There are no probe points.")
+
+        self.points = points
+        self.triangles = np.empty((0, 3), dtype=np.int64)
+
+        index = {(x, y): idx for idx, (x, y) in enumerate(points[:, :2].tolist())}
+        if len(points) >= 3:
+            triangles = [[index.get(xy, -1) for xy in tri.exterior.coords[:3]]
+                         for tri in triangulate(MultiPoint(points[:, :2].tolist()))]
+            self.triangles = np.array([tri for tri in triangles if min(tri) >= 0], dtype=np.int64).reshape((-1, 3))
+
+        # the inverse of the matrix of the edges of each triangle, to get the barycentric coordinates
+        corners = points[self.triangles, :2]
+        self.origins = corners[:, 0]
+        edges = np.stack((corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=2)
+        determinants = edges[:, 0, 0] * edges[:, 1, 1] - edges[:, 0, 1] * edges[:, 1, 0]
+        valid = np.abs(determinants) > 1e-12
+        self.triangles, self.origins, edges = self.triangles[valid], self.origins[valid], edges[valid]
+        self.inverses = np.linalg.inv(edges) if len(edges) else np.empty((0, 2, 2))
+
+        self._make_buckets()
+
+        # the distance between the probe points
+        if len(self.triangles):
+            tri_edges = points[self.triangles[:, [1, 2, 0]], :2] - points[self.triangles, :2]
+            self.spacing = float(np.median(np.hypot(tri_edges[..., 0], tri_edges[..., 1])))
+        else:
+            extent = np.ptp(points[:, :2], axis=0).max()
+            self.spacing = float(extent) if extent > 0 else 1.0
+
+    def _make_buckets(self):
+        """
+        Makes a uniform grid of buckets over the triangulation; each bucket has the triangles whose bounds overlap
+        it, so a point is tested only against the few triangles of its bucket.
+        """
+        if len(self.triangles) == 0:
+            self.bucket_starts = np.zeros(1, dtype=np.int64)
+            return
+
+        corners = self.points[self.triangles, :2]
+        mins, maxs = corners.min(axis=1), corners.max(axis=1)
+        self.grid_min = mins.min(axis=0)
+        extent = np.maximum(maxs.max(axis=0) - self.grid_min, 1e-9)
+        self.cell = float(np.sqrt(extent[0] * extent[1] / len(self.triangles))) or float(extent.max())
+        self.grid_shape = np.maximum(np.ceil(extent / self.cell).astype(np.int64), 1)
+
+        first = np.clip(((mins - self.grid_min) // self.cell).astype(np.int64), 0, self.grid_shape - 1)
+        last = np.clip(((maxs - self.grid_min) // self.cell).astype(np.int64), 0, self.grid_shape - 1)
+        spans = last - first + 1
+
+        # the (bucket, triangle) pairs
+        counts = spans[:, 0] * spans[:, 1]
+        tri_of_pair = np.repeat(np.arange(len(self.triangles)), counts)
+        rank = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        bucket_x = first[tri_of_pair, 0] + rank % spans[tri_of_pair, 0]
+        bucket_y = first[tri_of_pair, 1] + rank // spans[tri_of_pair, 0]
+        buckets = bucket_y * self.grid_shape[0] + bucket_x
+
+        order = np.argsort(buckets, kind='stable')
+        self.bucket_triangles = tri_of_pair[order]
+        self.bucket_starts = np.searchsorted(buckets[order], np.arange(self.grid_shape[0] * self.grid_shape[1] + 1))
+
+    def __call__(self, x, y):
+        """
+        The heights of the surface.
+
+        :param x:   array of X coordinates
+        :param y:   array of Y coordinates
+        :return:    array of heights
+        """
+        xy = np.column_stack((np.ravel(x), np.ravel(y))).astype(float)
+        heights = np.empty(len(xy))
+        for start in range(0, len(xy), CHUNK_SIZE):
+            heights[start:start + CHUNK_SIZE] = self._heights(xy[start:start + CHUNK_SIZE])
+        return heights.reshape(np.shape(x))
+
+    def _heights(self, xy):
+        heights = np.full(len(xy), np.nan)
+
+        if len(self.triangles):
+            cells = np.floor((xy - self.grid_min) / self.cell).astype(np.int64)
+            inside = np.all((cells >= 0) & (cells < self.grid_shape), axis=1)
+            buckets = np.where(inside, cells[:, 1] * self.grid_shape[0] + cells[:, 0], 0)
+            starts = np.where(inside, self.bucket_starts[buckets], 0)
+            counts = np.where(inside, self.bucket_starts[buckets + 1] - starts, 0)
+
+            # each point is tested against the k-th triangle of its bucket, for all the points at once
+            for k in range(int(counts.max()) if len(counts) else 0):
+                candidates = np.flatnonzero((counts > k) & np.isnan(heights))
+                if len(candidates) == 0:
+                    break
+                tri = self.bucket_triangles[starts[candidates] + k]
+                l1, l2 = np.einsum('nij,nj->ni', self.inverses[tri], xy[candidates] - self.origins[tri]).T
+                l0 = 1.0 - l1 - l2
+                found = (l0 >= -1e-9) & (l1 >= -1e-9) & (l2 >= -1e-9)
+                z = self.points[self.triangles[tri[found]], 2]
+                heights[candidates[found]] = z[:, 0] * l0[found] + z[:, 1] * l1[found] + z[:, 2] * l2[found]
+
+        # outside of the triangulation: the height of the nearest probe point
+        outside = np.flatnonzero(np.isnan(heights))
+        if len(outside):
+            distances = ((xy[outside, None, :] - self.points[None, :, :2]) ** 2).sum(axis=2)
+            heights[outside] = self.points[np.argmin(distances, axis=1), 2]
+        return heights
+
+
+def level_gcode(parts, height_map, seg_x=0.0, seg_y=0.0, decimals=4):
+    """
+    Adds the height of the surface to the Z of the moves of a G-Code program. The feed moves (G1) longer than the
+    segment limits are split, like by CNCjob.segment(), so the tool follows the surface between the probe points.
+    The program can be given in parts (the G-Code of each tool); the position at the end of a part is the start of
+    the next one.
+
+    :param parts:       the parts of the G-Code program
+    :type parts:        list
+    :param height_map:  the interpolant of the surface heights, GridHeightMap or DelaunayHeightMap
+    :param seg_x:       the maximum length of a segment on the X axis; 0 for no limit
+    :type seg_x:        float
+    :param seg_y:       the maximum length of a segment on the Y axis; 0 for no limit
+    :type seg_y:        float
+    :param decimals:    the decimals of the coordinates written in the G-Code
+    :type decimals:     int
+    :return:            the levelled parts
+    :rtype:             list
+    """
+    parts = [part.replace('\r\n', '\n').replace('\r', '\n') for part in parts]
+    text = '\n'.join(parts)
+    lines = text.split('\n')
+    table = GenericDialect().tokenize(text)
+
+    g_codes = table[:, COL_G]
+    if np.any(g_codes == 91.0):
+        raise ValueError("The incremental positioning (G91) is not supported.")
+
+    # the modal state after each line; the lines with another G code (G38.2, G92, ...) do not move
+    motion = _fill_forward(np.where(np.isin(g_codes, MOTION_CODES), g_codes, np.nan), 0.0)
+    x = _fill_forward(table[:, COL_X], 0.0)
+    y = _fill_forward(table[:, COL_Y], 0.0)
+    z = _fill_forward(table[:, COL_Z], np.nan)
+
+    present = ~np.isnan(table[:, [COL_X, COL_Y, COL_Z]])
+    move_rows = np.flatnonzero(present.any(axis=1) & (np.isnan(g_codes) | np.isin(g_codes, MOTION_CODES)) &
+                               ~np.isnan(z))
+    if len(move_rows) == 0:
+        return parts
+
+    new_z = z[move_rows] + height_map(x[move_rows], y[move_rows])
+
+    # the feed moves that are split into segments, starting from the end of the previous line
+    prev_x, prev_y, prev_z = x[move_rows - 1], y[move_rows - 1], z[move_rows - 1]
+    prev_x[move_rows == 0] = np.nan
+    dx, dy = x[move_rows] - prev_x, y[move_rows] - prev_y
+    steps = np.ones(len(move_rows), dtype=np.int64)
+    with np.errstate(invalid='ignore'):
+        if seg_x > 0:
+            steps = np.maximum(steps, np.nan_to_num(np.ceil(np.abs(dx) / seg_x), nan=1).astype(np.int64))
+        if seg_y > 0:
+            steps = np.maximum(steps, np.nan_to_num(np.ceil(np.abs(dy) / seg_y), nan=1).astype(np.int64))
+    split = (steps > 1) & (motion[move_rows] == 1.0) & ~np.isnan(prev_z) & present[move_rows, :2].any(axis=1)
+    steps[~split] = 1
+
+    # the points inside the split moves
+    owner = np.repeat(np.arange(len(move_rows)), steps - 1)
+    t = (np.arange(len(owner)) - np.repeat(np.cumsum(steps - 1) - (steps - 1), steps - 1) + 1) / steps[owner]
+    seg_x_pts = prev_x[owner] + dx[owner] * t
+    seg_y_pts = prev_y[owner] + dy[owner] * t
+    seg_z_pts = prev_z[owner] + (z[move_rows][owner] - prev_z[owner]) * t + height_map(seg_x_pts, seg_y_pts)
+
+    template = 'G1 X%.{d}f Y%.{d}f Z%.{d}f\n'.format(d=decimals)
+    segments = (template * len(owner)) % tuple(np.column_stack((seg_x_pts, seg_y_pts, seg_z_pts)).ravel().tolist())
+    segments = segments.split('\n')
+    seg_starts = (np.cumsum(steps - 1) - (steps - 1)).tolist()
+
+    z_format = 'Z%.{d}f'.format(d=decimals)
+    for idx, (row, height, nr_steps) in enumerate(zip(move_rows.tolist(), new_z.tolist(), steps.tolist())):
+        line = lines[row]
+        z_word = z_format % height
+        line, count = Z_WORD_RE.subn(z_word, line, count=1)
+        if count == 0:
+            comment = line.find(';')
+            line = line + ' ' + z_word if comment < 0 else line[:comment].rstrip() + ' ' + z_word + ' ' + line[comment:]
+        if nr_steps > 1:
+            line = '\n'.join(segments[seg_starts[idx]:seg_starts[idx] + nr_steps - 1]) + '\n' + line
+        lines[row] = line
+
+    levelled = []
+    start = 0
+    for part in parts:
+        stop = start + part.count('\n') + 1
+        levelled.append('\n'.join(lines[start:stop]))
+        start = stop
+    return levelled
+
+
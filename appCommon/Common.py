@@ -14,12 +14,13 @@ from PyQt5 import QtCore
 
 from shapely.geometry import Polygon, Point, LineString
 from shapely.ops import unary_union
+from shapely.strtree import STRtree
 
 from appGUI.VisPyVisuals import ShapeCollection
 from appTool import AppTool
 
-from copy import deepcopy
 import collections
+from operator import itemgetter
 
 import numpy as np
 # from voronoi import Voronoi
@@ -271,6 +272,11 @@ class ExclusionAreas(QtCore.QObject):
         '''
         self.exclusion_areas_storage = []
 
+        # the exclusion areas buffered with the tool radius, for each (tool diameter, units), made once and used by
+        # travel_coordinates() for all the travels of a job. It is rebuilt when the shapes in the storage change.
+        self.buffered_areas = {}
+        self.buffered_areas_shapes = ()
+
         self.mouse_is_dragging = False
 
         self.solid_geometry = []
@@ -730,32 +736,37 @@ class ExclusionAreas(QtCore.QObject):
 
         # Travel lines: rapids. Should not pass through Exclusion areas
         travel_line = LineString([start_point, end_point])
+
+        areas, buffered_shapes, outlines, tree = self.get_buffered_areas(tooldia)
+
+        # only the areas whose bounds intersect the travel line are candidates
+        hits = strtree_query(tree, travel_line)
+        if not hits:
+            return [[None, end_point]]
+
         origin_point = Point(start_point)
 
-        buffered_storage = []
-        # add a little something to the half diameter, to make sure that we really don't enter in the exclusion zones
-        buffered_distance = (tooldia / 2.0) + (0.1 if self.app.defaults['units'] == 'MM' else 0.00393701)
+        # the Exclusion areas are processed from the closest to the start_point to the farthest. After an area is
+        # avoided the travel line changes and the farther areas are looked up again for the new travel line
+        distances = {}
 
-        for area in self.exclusion_areas_storage:
-            new_area = deepcopy(area)
-            new_area['shape'] = area['shape'].buffer(buffered_distance, join_style=2)
-            buffered_storage.append(new_area)
+        def sort_key(area_idx):
+            if area_idx not in distances:
+                distances[area_idx] = origin_point.distance(buffered_shapes[area_idx])
+            return distances[area_idx], area_idx
 
-        # sort the Exclusion areas from the closest to the start_point to the farthest
-        tmp = []
-        for area in buffered_storage:
-            dist = Point(start_point).distance(area['shape'])
-            tmp.append((dist, area))
-        tmp.sort(key=lambda k: k[0])
+        last_key = None
+        while True:
+            candidates = sorted(key for key in map(sort_key, hits) if last_key is None or key > last_key)
 
-        sorted_area_storage = [k[1] for k in tmp]
+            for key in candidates:
+                area = areas[key[1]]
+                area_shape = buffered_shapes[key[1]]
+                outline = outlines[key[1]]
+                if not travel_line.intersects(outline):
+                    continue
 
-        # process the ordered exclusion areas list
-        for area in sorted_area_storage:
-            outline = area['shape'].exterior
-            if travel_line.intersects(outline):
                 intersection_pts = travel_line.intersection(outline)
-
                 if isinstance(intersection_pts, Point):
                     # it's just a touch, continue
                     continue
@@ -828,9 +839,9 @@ class ExclusionAreas(QtCore.QObject):
                         except IndexError:
                             continue
 
-                        if not start_line.crosses(area['shape']):
+                        if not start_line.crosses(area_shape):
                             close_start_points.append(vertex_points[i])
-                        if not end_line.crosses(area['shape']):
+                        if not end_line.crosses(area_shape):
                             close_end_points.append(vertex_points[i])
 
                     closest_point_entry = nearest_point(entry_pt, close_start_points)
@@ -891,10 +902,68 @@ class ExclusionAreas(QtCore.QObject):
                 # create a new LineString to test again for possible other Exclusion zones
                 last_pt_in_path = path_coords[-1][1]
                 travel_line = LineString([last_pt_in_path, end_point])
+                last_key = key
+                hits = strtree_query(tree, travel_line)
+                break
+            else:
+                # no more Exclusion areas on the way
+                break
 
         ret_list.append([None, end_point])
         return ret_list
 
+    def get_buffered_areas(self, tooldia):
+        """
+        The Exclusion areas buffered with the tool radius (plus a small clearance) and a spatial index of them. They are
+        made once for each tool diameter and units and reused until the Exclusion areas change.
+
+        :param tooldia:     The tool diameter used and which generates the travel lines
+        :type tooldia:      float
+        :return:            a tuple: the Exclusion areas (dicts from the storage), their buffered shapes, the outlines
+                            of the buffered shapes and a STRtree of the buffered shapes
+        :rtype:             tuple
+        """
+        # the shapes are immutable therefore a change in the storage is a change of the shapes
+        storage_shapes = tuple(map(itemgetter('shape'), self.exclusion_areas_storage))
+        if storage_shapes != self.buffered_areas_shapes:
+            self.buffered_areas = {}
+            self.buffered_areas_shapes = storage_shapes
+
+        units = self.app.defaults['units']
+        key = (tooldia, units)
+        if key not in self.buffered_areas:
+            # add a little something to the half diameter, to make sure that we really don't enter in the exclusion
+            # zones
+            buffered_distance = (tooldia / 2.0) + (0.1 if units == 'MM' else 0.00393701)
+
+            areas = list(self.exclusion_areas_storage)
+            buffered_shapes = [area['shape'].buffer(buffered_distance, join_style=2) for area in areas]
+            outlines = [shape.exterior for shape in buffered_shapes]
+            tree = STRtree(buffered_shapes) if buffered_shapes else None
+            self.buffered_areas[key] = (areas, buffered_shapes, outlines, tree)
+
+        return self.buffered_areas[key]
+
+
+def strtree_query(tree, geometry):
+    """
+    The indexes of the shapes in a STRtree whose bounds intersect the bounds of the geometry.
+
+    :param tree:        a STRtree or None when there are no shapes
+    :type tree:         STRtree
+    :param geometry:    Shapely geometry
+    :type geometry:     BaseGeometry
+    :return:            list of indexes of the shapes used to make the STRtree
+    :rtype:             list
+    """
+    if tree is None:
+        return []
+    # Shapely 2.0 returns the indexes from query(); Shapely 1.8 returns the geometries and the indexes are
+    # returned by query_items()
+    if hasattr(tree, 'query_items'):
+        return list(tree.query_items(geometry))
+    return tree.query(geometry).tolist()
+
 
 def farthest_point(origin, points_list):
     """
@@ -0,0 +1,177 @@
+# ############################################################
+# FlatCAM: 2D Post-processing for Manufacturing              #
+# http://flatcam.org                                         #
+# MIT Licence                                                #
+# ############################################################
+
+"""
+Export engine for the Gerber code made by GerberObject.write_gerber_code().
+
+The coordinates are not formatted one by one: the coordinates of each path, region contour or set of flashes are
+queued as an array. When enough coordinates are queued, all of them are converted to fixed point integers with NumPy
+and their lines ("X..Y..D0n*") are made in one go as a matrix of characters, whose not needed characters (suppressed
+zeros, missing minus signs) are masked out; they are written to the file together with the text that was queued
+between them. The memory used is bounded by the chunk size, whatever the size of the exported object.
+"""
+
+import numpy as np
+
+# powers of 10 that fit in int64, used to find the number of digits of the coordinates and to extract them
+POWERS_OF_10 = 10 ** np.arange(19, dtype=np.int64)
+
+
+class GerberWriter:
+    """
+    Writes Gerber code to a file like object, formatting the coordinates in bulk.
+    """
+
+    # the number of queued coordinates that makes the writer format them and write them to the file
+    chunk_size = 65536
+
+    def __init__(self, fp, whole, fract, zeros='L', factor=1):
+        """
+
+        :param fp:          file like object (with a write() method) where the Gerber code is written
+        :param whole:       how many digits in the whole part of coordinates
+        :param fract:       how many decimals in coordinates
+        :param zeros:       the zero suppression: 'L' (leading zeros are suppressed) or 'T' (trailing zeros are
+                            suppressed, the coordinates have all the digits of the whole part)
+        :param factor:      factor to be applied onto the coordinates
+        """
+        self.fp = fp
+        self.scale = 10 ** fract
+        self.factor = factor
+        # the minimum number of digits of a coordinate: the decimals and one digit of the whole part ('L') or all the
+        # digits of the whole part ('T')
+        self.min_digits = whole + fract if zeros == 'T' else fract + 1
+
+        # queued text and coordinate runs; a run is queued as its index in the runs coordinates and flash flags
+        self._items = []
+        self._coords = []
+        self._flash = []
+        self._nr_coords = 0
+
+    def write(self, text):
+        """
+        Queues Gerber code.
+
+        :param text:    Gerber code
+        :type text:     str
+        """
+        self._items.append(text)
+
+        if len(self._items) >= self.chunk_size:
+            self.flush()
+
+    def path(self, coords):
+        """
+        Queues a path: a move to the first point (D02) and a draw to each next point (D01). The consecutive points
+        that are the same after the conversion to the Gerber format are written once, but a path always has at least
+        one draw.
+
+        :param coords:  the (x, y) coordinates of the points, a coordinate sequence or an array
+        """
+        self._queue(coords, False)
+
+    def flash(self, coords):
+        """
+        Queues a flash (D03) of the current aperture at each point.
+
+        :param coords:  the (x, y) coordinates of the points, a coordinate sequence or an array
+        """
+        self._queue(coords, True)
+
+    def flush(self):
+        """
+        Formats the queued coordinates and writes them, with the queued text, to the file.
+        """
+        if not self._items:
+            return
+
+        if self._coords:
+            lengths = np.array([len(points) for points in self._coords])
+            points = np.rint(np.concatenate(self._coords) * self.factor * self.scale).astype(np.int64)
+
+            # the run of each point; the first point of a path is a move, the next ones are draws, except the points
+            # that are the same as the previous one
+            run = np.repeat(np.arange(len(lengths)), lengths)
+            first = np.zeros(len(points), dtype=bool)
+            first[np.cumsum(lengths) - lengths] = True
+            flash = np.array(self._flash)[run]
+            keep = first | flash
+            keep[1:] |= np.any(points[1:] != points[:-1], axis=1)
+
+            # a path whose draws are all the same point as the move (a zero length path or a path shorter than the
+            # resolution) keeps its last draw, so it is still drawn as a dot of the aperture
+            last = np.cumsum(lengths) - 1
+            nr_draws = np.bincount(run[keep & ~first], minlength=len(lengths))
+            keep[last[(nr_draws == 0) & (lengths > 1) & ~np.array(self._flash)]] = True
+
+            codes = np.where(flash, ord('3'), np.where(first, ord('2'), ord('1'))).astype(np.uint8)
+            block, offsets = self.format_lines(points[keep], codes[keep])
+
+            # the lines of each run
+            run_lines = np.searchsorted(run[keep], np.arange(len(lengths) + 1)).tolist()
+            parts = [block[offsets[run_lines[item]]:offsets[run_lines[item + 1]]] if isinstance(item, int) else item
+                     for item in self._items]
+        else:
+            parts = self._items
+
+        self.fp.write(''.join(parts))
+
+        self._items = []
+        self._coords = []
+        self._flash = []
+        self._nr_coords = 0
+
+    def format_lines(self, points, codes):
+        """
+        Makes the lines "X<x>Y<y>D0<code>*" of the points.
+
+        :param points:  (N, 2) array of the integer coordinates
+        :param codes:   (N, ) array of the D codes as ASCII digits
+        :return:        the text of the lines and the offset of each line in it, followed by the length of the text
+        :rtype:         tuple
+        """
+        nr_points = len(points)
+        negative = points < 0
+        values = np.abs(points)
+
+        # the digits of each coordinate, without the suppressed zeros
+        nr_digits = np.maximum(np.searchsorted(POWERS_OF_10[1:], values, side='right') + 1, self.min_digits)
+        width = int(nr_digits.max()) if nr_points else 1
+        digits = (values[:, :, None] // POWERS_OF_10[width - 1::-1]) % 10 + ord('0')
+        digits_kept = np.arange(width) >= (width - nr_digits)[:, :, None]
+
+        # a line is a row of characters: letter, minus sign and digits for X and Y, followed by "D0<code>*\n"
+        field = width + 2
+        chars = np.empty((nr_points, 2 * field + 5), dtype=np.uint8)
+        kept = np.ones(chars.shape, dtype=bool)
+        for axis, letter in enumerate('XY'):
+            start = axis * field
+            chars[:, start] = ord(letter)
+            chars[:, start + 1] = ord('-')
+            kept[:, start + 1] = negative[:, axis]
+            chars[:, start + 2:start + field] = digits[:, axis]
+            kept[:, start + 2:start + field] = digits_kept[:, axis]
+        chars[:, -5:] = np.frombuffer(b'D0 *\n', dtype=np.uint8)
+        chars[:, -3] = codes
+
+        offsets = np.zeros(nr_points + 1, dtype=np.int64)
+        np.cumsum(kept.sum(axis=1), out=offsets[1:])
+        return chars[kept].tobytes().decode('ascii'), offsets.tolist()
+
+    def _queue(self, coords, flash):
+        points = np.asarray(coords, dtype=float)
+        if points.size == 0:
+            return
+        if points.ndim != 2 or points.shape[1] != 2:
+            points = points.reshape((len(points), -1))[:, :2]
+
+        self._items.append(len(self._coords))
+        self._coords.append(points)
+        self._flash.append(flash)
+        self._nr_coords += len(points)
+
+        if self._nr_coords >= self.chunk_size:
+            self.flush()
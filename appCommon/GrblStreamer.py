@@ -0,0 +1,282 @@
+# ############################################################
+# FlatCAM: 2D Post-processing for Manufacturing              #
+# http://flatcam.org                                         #
+# MIT Licence                                                #
+# ############################################################
+
+"""
+Streaming of G-Code to a GRBL controller with the character counting flow control.
+
+GRBL answers each line with 'ok' or 'error:<n>' when the line is taken out of its serial receive buffer (128 bytes).
+The streamer counts the characters of the lines sent and not answered yet and sends the next lines as long as they fit
+in the receive buffer, so the controller always has the next lines to parse instead of waiting for a round trip after
+each line. The real time commands (feed hold, cycle start, status report, soft reset) are single characters that GRBL
+handles as soon as they arrive; they are not counted.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+
+log = logging.getLogger('base')
+
+# GRBL real time commands
+FEED_HOLD = b'!'
+CYCLE_START = b'~'
+STATUS_REPORT = b'?'
+SOFT_RESET = b'\x18'
+
+
+class GrblStreamer:
+    """
+    Sends G-Code to a GRBL controller from a background thread, keeping the controller receive buffer full.
+    """
+
+    def __init__(self, port, gcode, rx_buffer_size=128, on_progress=None, on_message=None, progress_interval=0.5):
+        """
+
+        :param port:                the serial port of the controller, open, with a read timeout (pyserial Serial)
+        :param gcode:               the G-Code to be sent
+        :type gcode:                str
+        :param rx_buffer_size:      the size of the serial receive buffer of the controller
+        :type rx_buffer_size:       int
+        :param on_progress:         called with the status (see status()) every progress_interval seconds and at the end
+        :param on_message:          called with the line number and the text of each answer that is not 'ok', like
+                                    the errors, the alarms or the probing results ('[PRB:x,y,z:1]')
+        :param progress_interval:   the time between the calls of on_progress, in seconds
+        """
+        self.port = port
+        self.rx_buffer_size = rx_buffer_size
+        self.on_progress = on_progress
+        self.on_message = on_message
+        self.progress_interval = progress_interval
+
+        # the lines without comments and blanks, encoded, and their line number in the G-Code
+        self.lines = []
+        self.line_numbers = []
+        for nr, line in enumerate(gcode.splitlines(), start=1):
+            line = self.clean_line(line)
+            if line:
+                self.lines.append((line + '\n').encode('ascii', errors='replace'))
+                self.line_numbers.append(nr)
+
+        # the lines sent and not answered yet: (index, length)
+        self.in_flight = deque()
+        self.in_flight_bytes = 0
+        self.sent = 0
+        self.done = 0
+        self.done_bytes = 0
+
+        # list of (line number, text) of the answers that are not 'ok'
+        self.messages = []
+        self.errors = []
+        self.state = 'idle'
+
+        self._paused = threading.Event()
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._t_start = None
+        self._t_stop = None
+
+    @staticmethod
+    def clean_line(line):
+        """
+        Removes the comments and the blanks of a G-Code line. GRBL counts every character that it receives, so what
+        it does not need is not sent.
+
+        :param line:    G-Code line
+        :type line:     str
+        :return:        the line without comments and blanks
+        :rtype:         str
+        """
+        line = line.partition(';')[0]
+        while '(' in line:
+            start = line.find('(')
+            stop = line.find(')', start)
+            line = line[:start] if stop < 0 else line[:start] + line[stop + 1:]
+        return ''.join(line.split())
+
+    def start(self):
+        """
+        Starts the streaming in a background thread.
+        """
+        self.state = 'running'
+        self._t_start = time.perf_counter()
+        self._thread = threading.Thread(target=self.run, name='GrblStreamer', daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        """
+        Waits for the end of the streaming.
+
+        :param timeout: the maximum time to wait, in seconds; None to wait for the end
+        :return:        True if the streaming ended
+        :rtype:         bool
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def pause(self):
+        """
+        Stops sending new lines; the controller executes the lines that it already has.
+        """
+        self._paused.set()
+        if self.state == 'running':
+            self.state = 'paused'
+
+    def resume(self):
+        """
+        Resumes sending the lines after pause() or feed_hold().
+        """
+        self._paused.clear()
+        if self.state in ('paused', 'hold'):
+            self.state = 'running'
+
+    def feed_hold(self):
+        """
+        Stops the motion of the machine right away (GRBL feed hold) and stops sending new lines.
+        """
+        self._paused.set()
+        self.write_realtime(FEED_HOLD)
+        self.state = 'hold'
+
+    def cycle_start(self):
+        """
+        Resumes the motion after a feed hold (GRBL cycle start) and the sending of the lines.
+        """
+        self.write_realtime(CYCLE_START)
+        self.resume()
+
+    def stop(self, reset=False):
+        """
+        Stops the streaming.
+
+        :param reset:   if True a soft reset is sent so the controller drops the lines that it did not execute yet
+        :type reset:    bool
+        """
+        self._stop.set()
+        if reset:
+            self.write_realtime(SOFT_RESET)
+        self.wait()
+
+    def write_realtime(self, command):
+        """
+        Sends a GRBL real time command, without waiting for the lines sent before it.
+
+        :param command: single character command (FEED_HOLD, CYCLE_START, STATUS_REPORT or SOFT_RESET)
+        :type command:  bytes
+        """
+        with self._write_lock:
+            self.port.write(command)
+
+    def status(self):
+        """
+        The progress of the streaming.
+
+        :return:    dictionary with: 'state', 'lines_total', 'lines_sent', 'lines_done', 'line_nr' (the line number in
+                    the G-Code of the last line done), 'queue_lines' and 'queue_bytes' (the lines sent and not answered
+                    yet), 'errors', 'elapsed' (seconds), 'lines_per_sec' and 'bytes_per_sec'
+        :rtype:     dict
+        """
+        if self._t_start is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._t_stop or time.perf_counter()) - self._t_start
+
+        return {
+            'state':            self.state,
+            'lines_total':      len(self.lines),
+            'lines_sent':       self.sent,
+            'lines_done':       self.done,
+            'line_nr':          self.line_numbers[self.done - 1] if self.done else 0,
+            'queue_lines':      len(self.in_flight),
+            'queue_bytes':      self.in_flight_bytes,
+            'errors':           len(self.errors),
+            'elapsed':          elapsed,
+            'lines_per_sec':    self.done / elapsed if elapsed > 0 else 0.0,
+            'bytes_per_sec':    self.done_bytes / elapsed if elapsed > 0 else 0.0
+        }
+
+    def run(self):
+        """
+        The streaming loop: sends the lines that fit in the receive buffer of the controller and reads the answers.
+        """
+        received = b''
+        t_progress = time.perf_counter()
+
+        try:
+            while not self._stop.is_set():
+                if not self._paused.is_set():
+                    self._send_lines()
+
+                # the read waits for the port timeout if there is nothing to read
+                received += self.port.read(max(1, self.port.in_waiting))
+                if b'\n' in received:
+                    *answers, received = received.split(b'\n')
+                    for answer in answers:
+                        self._process_answer(answer.decode('ascii', errors='replace').strip())
+
+                if self.done == len(self.lines) or self.state == 'alarm':
+                    break
+
+                if self.on_progress is not None and time.perf_counter() - t_progress >= self.progress_interval:
+                    t_progress = time.perf_counter()
+                    self.on_progress(self.status())
+        except Exception as e:
+            log.debug("GrblStreamer.run() --> %s" % str(e))
+            self.state = 'failed'
+
+        self._t_stop = time.perf_counter()
+        if self.state not in ('alarm', 'failed'):
+            self.state = 'finished' if self.done == len(self.lines) else 'stopped'
+        if self.on_progress is not None:
+            self.on_progress(self.status())
+
+    def _send_lines(self):
+        chunk = []
+        while self.sent < len(self.lines):
+            length = len(self.lines[self.sent])
+            # a line longer than the buffer is sent alone, GRBL answers it with an error
+            if self.in_flight and self.in_flight_bytes + length > self.rx_buffer_size:
+                break
+            chunk.append(self.lines[self.sent])
+            self.in_flight.append((self.sent, length))
+            self.in_flight_bytes += length
+            self.sent += 1
+
+        if chunk:
+            with self._write_lock:
+                self.port.write(b''.join(chunk))
+
+    def _process_answer(self, answer):
+        if not answer:
+            return
+
+        if answer == 'ok' or answer.startswith('error'):
+            if not self.in_flight:
+                # answer to a line that was not sent by the streamer
+                return
+            idx, length = self.in_flight.popleft()
+            self.in_flight_bytes -= length
+            self.done += 1
+            self.done_bytes += length
+            if answer == 'ok':
+                return
+            self.errors.append((self.line_numbers[idx], answer))
+            line_nr = self.line_numbers[idx]
+        else:
+            # the answers that are not 'ok' belong to the oldest line not answered yet
+            line_nr = self.line_numbers[self.in_flight[0][0]] if self.in_flight else 0
+            if answer.startswith('ALARM'):
+                self.state = 'alarm'
+
+        self.messages.append((line_nr, answer))
+        if self.on_message is not None:
+            self.on_message(line_nr, answer)
@@ -0,0 +1,242 @@
+# ############################################################
+# FlatCAM: 2D Post-processing for Manufacturing              #
+# http://flatcam.org                                         #
+# MIT Licence                                                #
+# ############################################################
+
+"""
+Panels: copies of a source geometry placed in an array, with the source geometry stored once.
+
+A Panel holds the offsets of the copies (the instances). A panelized FlatCAM object holds the geometry of the source
+object, shared with it, and its Panel (see camlib.Geometry.set_panel()). The bounds of the panel are the source bounds
+moved by the offsets and the plot draws the source shapes at each offset, so making a panel, drawing it and showing it
+in the UI do not copy the geometry. The geometry of all the instances is made by expand(), for the whole object and
+one instance at a time, when something else reads or changes it: the editors, the G-Code generation, the export, the
+project save (see camlib.Geometry.materialize_panel()).
+"""
+
+import weakref
+from copy import deepcopy
+
+import numpy as np
+
+from appCommon.AffineTransform import transform_geometry, translate_matrix
+
+# the keys of the tool and aperture dictionaries that hold geometry: the solid geometry of the Geometry and Excellon
+# tools, the drills and the slots of the Excellon tools and the geometry of the Gerber apertures
+GEOMETRY_KEYS = ('solid_geometry', 'drills', 'slots', 'geometry')
+
+
+class Panel(object):
+
+    def __init__(self, offsets, source_bounds):
+        """
+        :param offsets:         (dx, dy) of each instance; an Nx2 array
+        :param source_bounds:   (xmin, ymin, xmax, ymax) of the source geometry
+        """
+        self.offsets = np.asarray(offsets, dtype=float).reshape((-1, 2))
+        self.source_bounds = tuple(source_bounds)
+
+        # weak references to the tool and aperture dictionaries (PanelDict) that hold source geometry
+        self._dicts = []
+
+    @classmethod
+    def grid(cls, rows, columns, step_x, step_y, source_bounds):
+        """
+        A panel of rows x columns instances. The instances are ordered by rows, starting with the bottom row, and in a
+        row from left to right.
+
+        :param rows:            number of rows
+        :param columns:         number of columns
+        :param step_x:          distance between the columns
+        :param step_y:          distance between the rows
+        :param source_bounds:   (xmin, ymin, xmax, ymax) of the source geometry
+        :return:                Panel
+        """
+        col_idx, row_idx = np.meshgrid(np.arange(columns), np.arange(rows))
+        offsets = np.column_stack((col_idx.ravel() * step_x, row_idx.ravel() * step_y))
+        return cls(offsets, source_bounds)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def bounds(self):
+        """
+        :return:    (xmin, ymin, xmax, ymax) of all the instances
+        """
+        xmin, ymin, xmax, ymax = self.source_bounds
+        dx, dy = self.offsets[:, 0], self.offsets[:, 1]
+        return xmin + dx.min(), ymin + dy.min(), xmax + dx.max(), ymax + dy.max()
+
+    def expand(self, geometry):
+        """
+        The geometry of all the instances.
+
+        :param geometry:    source geometry: a Shapely geometry or a list of geometries (or of dicts and tuples of
+                            geometries, like the Gerber apertures geometry and the Excellon slots)
+        :return:            list with the elements of the source list (or the source geometry) moved for each
+                            instance, one instance after the other; None if the source geometry is None
+        """
+        if geometry is None:
+            return None
+
+        expanded = []
+        for instance in instances(geometry if isinstance(geometry, list) else [geometry], self.offsets):
+            expanded += instance
+        return expanded
+
+    def count(self, geometry):
+        """
+        :param geometry:    source geometry
+        :return:            number of elements of the list that expand() makes from the source geometry
+        """
+        if geometry is None:
+            return 0
+        try:
+            return len(geometry) * len(self)
+        except TypeError:
+            return len(self)
+
+    def share(self, storage, owner):
+        """
+        Makes the dictionary of a tool or an aperture of the panel from the one of the source object. The values of
+        the geometry keys are shared with the source, the other values are copied.
+
+        :param storage: tool or aperture dictionary of the source object
+        :param owner:   the panelized object
+        :return:        PanelDict
+        """
+        data = {key: copy_structure(value) if key in GEOMETRY_KEYS else deepcopy(value)
+                for key, value in dict.items(storage)}
+        panel_dict = PanelDict(data, owner)
+        self._dicts.append(weakref.ref(panel_dict))
+        return panel_dict
+
+    def dicts(self):
+        """
+        :return:    the tool and aperture dictionaries of the panel that are still used
+        """
+        return [panel_dict for panel_dict in (ref() for ref in self._dicts) if panel_dict is not None]
+
+
+class PanelDict(dict):
+
+    def __init__(self, data, owner):
+        """
+        A tool or an aperture dictionary of a panelized object. While the panel is pending, the values of the
+        geometry keys are the source geometry: reading or changing them expands the whole object first. The other
+        values (tool diameter, aperture size, parameters) are used as they are.
+
+        :param data:    the values of the dictionary
+        :param owner:   the panelized object; None when the panel was expanded
+        """
+        dict.__init__(self, data)
+        self.owner = owner
+
+    def _expand(self, key=None):
+        owner = self.owner
+        if owner is not None and (key is None or key in GEOMETRY_KEYS):
+            owner.materialize_panel()
+
+    def __getitem__(self, key):
+        self._expand(key)
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        self._expand(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._expand(key)
+        dict.__delitem__(self, key)
+
+    def __iter__(self):
+        # it iterates the keys like dict.__iter__() but it is not a no-op: when a dict subclass overrides __iter__(),
+        # dict(d), {**d} and other.update(d) copy it through keys() and __getitem__() instead of reading the stored
+        # values directly, so these copies expand the panel and get the geometry of all the instances
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        self._expand(key)
+        return dict.get(self, key, default)
+
+    def pop(self, key, *args):
+        self._expand(key)
+        return dict.pop(self, key, *args)
+
+    def setdefault(self, key, default=None):
+        self._expand(key)
+        return dict.setdefault(self, key, default)
+
+    def popitem(self):
+        self._expand()
+        return dict.popitem(self)
+
+    def update(self, *args, **kwargs):
+        self._expand()
+        dict.update(self, *args, **kwargs)
+
+    def items(self):
+        self._expand()
+        return dict.items(self)
+
+    def values(self):
+        self._expand()
+        return dict.values(self)
+
+    def copy(self):
+        self._expand()
+        return dict(dict.items(self))
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        owner = self.owner
+        if owner is not None and owner.panel is not None:
+            with owner.panel_lock:
+                # the copy of a dictionary of a pending panel is pending too
+                if owner.panel is not None:
+                    return owner.panel.share(self, owner)
+        return deepcopy(dict(dict.items(self)), memo)
+
+    def __reduce__(self):
+        return dict, (self.copy(),)
+
+    def __eq__(self, other):
+        self._expand()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        self._expand()
+        return dict.__ne__(self, other)
+
+    def __repr__(self):
+        self._expand()
+        return dict.__repr__(self)
+
+
+def instances(geometry, offsets):
+    """
+    :param geometry:    a Shapely geometry or a (nested) list, tuple or dict of geometries
+    :param offsets:     (dx, dy) of each instance; an Nx2 array
+    :return:            list with a moved copy of the geometry for each offset
+    """
+    return [transform_geometry(geometry, translate_matrix(dx, dy)) for dx, dy in offsets]
+
+
+def copy_structure(geometry):
+    """
+    Copies the lists, tuples and dicts of a geometry structure; the Shapely geometries, which are not changed in place,
+    are shared.
+
+    :param geometry:    a Shapely geometry or a (nested) list, tuple or dict of geometries
+    :return:            a structure of the same shape
+    """
+    if isinstance(geometry, list):
+        return [copy_structure(geo) for geo in geometry]
+    if isinstance(geometry, tuple):
+        return tuple(copy_structure(geo) for geo in geometry)
+    if isinstance(geometry, dict):
+        return {key: copy_structure(geo) for key, geo in geometry.items()}
+    return geometry
@@ -0,0 +1,539 @@
+# ############################################################
+# FlatCAM: 2D Post-processing for Manufacturing              #
+# http://flatcam.org                                         #
+# MIT Licence                                                #
+# ############################################################
+
+"""
+Ordering engine for the drill holes (and the other point like jobs) of a CNCJob, used by the optimization types of
+CNCjob.optimized_travelling_salesman(), CNCjob.optimized_ortools_basic() and CNCjob.optimized_ortools_meta().
+
+The order is an open path that starts in a given point and visits all the points once. It is made in three steps:
+
+- the points are bucketed in a uniform grid (PointGrid) which gives the k nearest neighbours of each point and the
+  nearest point not yet visited, without comparing each point with all the others;
+- a greedy nearest neighbour path is built with the grid;
+- the path is refined with 2-opt and Or-opt moves, looked for only between a point and its nearest neighbours,
+  until no move shortens the path or the time budget is spent.
+
+For OR-tools the nearest neighbours are a sparse candidate graph: each node can be followed only by its neighbours
+and by its neighbours in the refined path, which is also the first solution. The distances are computed when the
+solver asks for them, so no N x N matrix is made.
+"""
+
+import math
+import time
+import logging
+import platform
+from collections import deque
+
+import numpy as np
+
+if platform.architecture()[0] == '64bit':
+    from ortools.constraint_solver import pywrapcp
+    from ortools.constraint_solver import routing_enums_pb2
+
+log = logging.getLogger('base')
+
+# how many nearest neighbours are kept for each point
+NEIGHBOURS = 8
+# OR-tools works with integer distances; they are the real distances multiplied by this factor
+DISTANCE_SCALE = 10000
+# above this number of points OR-tools is not used: restricting its variables to the candidate graph takes a time
+# that grows with the square of the number of points, and the solver can no longer shorten the path in seconds
+ORTOOLS_MAX_POINTS = 10000
+
+
+class PointGrid:
+    """
+    Uniform grid of buckets over a set of points. The cell is sized such that on average a few points fall into it.
+    """
+
+    # maximum number of candidate neighbours evaluated in one NumPy call, to keep the memory used bounded
+    chunk_size = 4000000
+
+    def __init__(self, coords, points_per_cell=4.0):
+        """
+
+        :param coords:              (N, 2) array of X, Y coordinates
+        :param points_per_cell:     the average number of points in a cell
+        """
+        self.coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        nr_points = len(self.coords)
+
+        self.min = self.coords.min(axis=0)
+        span = self.coords.max(axis=0) - self.min
+
+        # when the points are on a line the area is zero and the cell is sized on the length of the line
+        if span[0] > 0 and span[1] > 0:
+            cell = math.sqrt(span[0] * span[1] * points_per_cell / nr_points)
+        else:
+            cell = max(span[0], span[1]) * points_per_cell / nr_points
+        if cell <= 0:
+            cell = 1.0
+        # for points spread very unevenly, limit the number of (mostly empty) cells
+        while ((span[0] // cell) + 1) * ((span[1] // cell) + 1) > 4 * nr_points + 16:
+            cell *= 2
+        self.cell = cell
+
+        self.nx = int(span[0] // cell) + 1
+        self.ny = int(span[1] // cell) + 1
+
+        cells_xy = ((self.coords - self.min) // cell).astype(np.int64)
+        self.cx = np.minimum(cells_xy[:, 0], self.nx - 1)
+        self.cy = np.minimum(cells_xy[:, 1], self.ny - 1)
+        cell_id = self.cy * self.nx + self.cx
+
+        # the points of each cell, padded with -1 up to the number of points in the fullest cell
+        order = np.argsort(cell_id, kind='stable')
+        counts = np.bincount(cell_id, minlength=self.nx * self.ny)
+        starts = np.cumsum(counts) - counts
+        rank = np.arange(nr_points) - starts[cell_id[order]]
+        self.depth = int(counts.max())
+        # the last row is an always empty cell, used for the cells outside the grid
+        self.slots = np.full((self.nx * self.ny + 1, self.depth), -1, dtype=np.int64)
+        self.slots[cell_id[order], rank] = order
+
+        self.counts = counts.reshape(self.ny, self.nx)
+
+    def _window_cells(self, cx, cy, radius):
+        """
+        The cells of the square windows of the given radius centered in the cells cx, cy. The cells outside the grid
+        are replaced by the empty cell.
+
+        :param cx:      (C,) array of cell columns
+        :param cy:      (C,) array of cell rows
+        :param radius:  radius of the window, in cells
+        :return:        (C, W) array of cell indexes
+        """
+        offsets = np.arange(-radius, radius + 1)
+        wx = cx[:, None, None] + offsets[None, None, :]
+        wy = cy[:, None, None] + offsets[None, :, None]
+        wx, wy = np.broadcast_arrays(wx, wy)
+        outside = (wx < 0) | (wx >= self.nx) | (wy < 0) | (wy >= self.ny)
+        cells = np.where(outside, self.nx * self.ny, wy * self.nx + wx)
+        return cells.reshape(len(cx), -1)
+
+    def neighbours(self, k=NEIGHBOURS):
+        """
+        The k nearest neighbours of each point, sorted by distance.
+
+        The neighbours are searched in a window of cells around the cell of each point, which is enlarged for the
+        points that are farther from their k-th neighbour than the window border.
+
+        :param k:   number of neighbours
+        :return:    (N, k) array of point indexes, -1 where a point has fewer than k neighbours
+        """
+        nr_points = len(self.coords)
+        k = min(k, nr_points - 1)
+        result = np.full((nr_points, max(k, 0)), -1, dtype=np.int64)
+        if k <= 0:
+            return result
+
+        todo = np.arange(nr_points)
+        radius = 1
+        max_radius = max(self.nx, self.ny)
+        while len(todo):
+            width = (2 * radius + 1) ** 2 * self.depth
+            step = max(1, self.chunk_size // width)
+            not_found = []
+            for i in range(0, len(todo), step):
+                pts = todo[i:i + step]
+                cand = self.slots[self._window_cells(self.cx[pts], self.cy[pts], radius)].reshape(len(pts), -1)
+
+                delta = self.coords[np.maximum(cand, 0)] - self.coords[pts][:, None, :]
+                dist = np.hypot(delta[..., 0], delta[..., 1])
+                dist[(cand < 0) | (cand == pts[:, None])] = np.inf
+
+                kk = min(k, dist.shape[1])
+                nearest = np.argpartition(dist, kk - 1, axis=1)[:, :kk] if kk < dist.shape[1] else \
+                    np.broadcast_to(np.arange(dist.shape[1]), (len(pts), dist.shape[1]))
+                near_dist = np.take_along_axis(dist, nearest, axis=1)
+                by_dist = np.argsort(near_dist, axis=1, kind='stable')
+                nearest = np.take_along_axis(nearest, by_dist, axis=1)
+                near_dist = np.take_along_axis(near_dist, by_dist, axis=1)
+
+                found = np.take_along_axis(cand, nearest, axis=1)
+                found[np.isinf(near_dist)] = -1
+                result[pts, :kk] = found
+
+                # the points outside the window are at least this far; if the k-th neighbour is farther, one of
+                # them may be nearer
+                if radius < max_radius:
+                    kth = near_dist[:, -1] if kk == k else np.full(len(pts), np.inf)
+                    not_found.append(pts[kth > radius * self.cell])
+            todo = np.concatenate(not_found) if not_found else np.empty(0, dtype=np.int64)
+            radius = min(radius * 2, max_radius)
+        return result
+
+    def nearest_free(self, index, free, free_counts):
+        """
+        The nearest point to the point with the given index, out of the points not yet visited.
+
+        :param index:           index of the point
+        :param free:            (N,) boolean array, True for the points not yet visited
+        :param free_counts:     (ny, nx) array with the number of points not yet visited in each cell
+        :return:                index of the nearest point or None if all the points are visited
+        """
+        x, y = self.coords[index]
+        cx, cy = self.cx[index], self.cy[index]
+        max_radius = max(self.nx, self.ny)
+
+        # enlarge the window until it has a free point
+        radius = 1
+        while free_counts[max(cy - radius, 0):cy + radius + 1, max(cx - radius, 0):cx + radius + 1].sum() == 0:
+            if radius >= max_radius:
+                return None
+            radius *= 2
+
+        while True:
+            cells = self._window_cells(np.array([cx]), np.array([cy]), radius)
+            cand = self.slots[cells].ravel()
+            cand = cand[cand >= 0]
+            cand = cand[free[cand]]
+            dist = np.hypot(self.coords[cand, 0] - x, self.coords[cand, 1] - y)
+            best = int(np.argmin(dist))
+            # the points outside the window can be nearer only if the best one is farther than the window border
+            if dist[best] <= radius * self.cell or radius >= max_radius:
+                return int(cand[best])
+            radius = min(int(dist[best] // self.cell) + 1, max_radius)
+
+
+def path_length(coords, path):
+    """
+    The length of the open path that visits the points in the given order.
+
+    :param coords:  (N, 2) array of X, Y coordinates
+    :param path:    sequence of point indexes
+    :return:        the length
+    :rtype:         float
+    """
+    pts = np.asarray(coords, dtype=float)[np.asarray(path, dtype=np.int64)]
+    return float(np.hypot(*np.diff(pts, axis=0).T).sum())
+
+
+def nearest_neighbour_path(grid, neighbours, start=0):
+    """
+    Greedy path: from each point go to the nearest point not yet visited.
+
+    The nearest free point is the first free one in the neighbours list of the current point; only when all the
+    neighbours are visited the grid is searched.
+
+    :param grid:        PointGrid of the points
+    :param neighbours:  (N, k) array of the nearest neighbours of each point, as made by PointGrid.neighbours()
+    :param start:       index of the first point
+    :return:            (N,) array of point indexes
+    """
+    nr_points = len(grid.coords)
+    free = np.ones(nr_points, dtype=bool)
+    free_counts = grid.counts.copy()
+    cx = grid.cx.tolist()
+    cy = grid.cy.tolist()
+    near = neighbours.tolist()
+
+    path = [start]
+    current = start
+    free[start] = False
+    free_counts[cy[start], cx[start]] -= 1
+    for __ in range(nr_points - 1):
+        for nxt in near[current]:
+            if nxt >= 0 and free[nxt]:
+                break
+        else:
+            nxt = grid.nearest_free(current, free, free_counts)
+        path.append(nxt)
+        free[nxt] = False
+        free_counts[cy[nxt], cx[nxt]] -= 1
+        current = nxt
+    return np.array(path, dtype=np.int64)
+
+
+def refine_path(coords, path, neighbours, time_limit=None):
+    """
+    Shorten an open path with 2-opt moves (reverse a part of the path) and Or-opt moves (move a run of up to 3
+    points elsewhere in the path). The first point of the path is kept in place. Only the moves that link a point to
+    one of its nearest neighbours are tried; the points are checked from a queue and a point is checked again only
+    when one of its links is changed.
+
+    :param coords:      (N, 2) array of X, Y coordinates
+    :param path:        (N,) array of point indexes, the path to refine
+    :param neighbours:  (N, k) array of the nearest neighbours of each point
+    :param time_limit:  time budget in seconds or None to refine until no move shortens the path
+    :return:            (N,) array of point indexes, the refined path
+    """
+    tour = np.array(path, dtype=np.int64)
+    nr_points = len(tour)
+    if nr_points < 4:
+        return tour
+
+    pos = np.empty(nr_points, dtype=np.int64)
+    pos[tour] = np.arange(nr_points)
+    xs = np.asarray(coords, dtype=float)[:, 0].tolist()
+    ys = np.asarray(coords, dtype=float)[:, 1].tolist()
+    near = [[c for c in row if c >= 0] for row in neighbours.tolist()]
+    hypot = math.hypot
+    last = nr_points - 1
+    eps = 1e-9
+
+    def dist(a, b):
+        return hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    queue = deque(tour.tolist())
+    queued = [True] * nr_points
+
+    def push(*nodes):
+        for node in nodes:
+            if not queued[node]:
+                queued[node] = True
+                queue.append(node)
+
+    def reverse(i, j):
+        # reverse the part of the path between the positions i and j, both included
+        seg = tour[i:j + 1][::-1].copy()
+        tour[i:j + 1] = seg
+        pos[seg] = np.arange(i, j + 1)
+
+    def move_run(p, length, q, flip):
+        # move the run of points that starts at the position p after the point at the position q (outside the run)
+        run = tour[p:p + length]
+        if flip:
+            run = run[::-1]
+        if q < p:
+            lo, hi = q + 1, p + length
+            new = np.concatenate((run, tour[q + 1:p]))
+        else:
+            lo, hi = p, q + 1
+            new = np.concatenate((tour[p + length:q + 1], run))
+        tour[lo:hi] = new
+        pos[new] = np.arange(lo, hi)
+
+    def two_opt(a):
+        p = int(pos[a])
+        # a keeps its place and its next point changes
+        if p < last:
+            b = int(tour[p + 1])
+            d_ab = dist(a, b)
+            for c in near[a]:
+                d_ac = dist(a, c)
+                if d_ac >= d_ab - eps:
+                    break
+                q = int(pos[c])
+                if q > p:
+                    # a -> c ... b -> d
+                    if q == last:
+                        delta = d_ac - d_ab
+                    else:
+                        d = int(tour[q + 1])
+                        delta = d_ac + dist(b, d) - d_ab - dist(c, d)
+                    if delta < -eps:
+                        reverse(p + 1, q)
+                        push(a, b, c, *tour[q + 1:q + 2].tolist())
+                        return True
+                elif q < p:
+                    # c -> a ... e -> b
+                    e = int(tour[q + 1])
+                    delta = d_ac + dist(e, b) - d_ab - dist(c, e)
+                    if delta < -eps:
+                        reverse(q + 1, p)
+                        push(a, b, c, e)
+                        return True
+        # a keeps its place and its previous point changes
+        if p > 0:
+            b = int(tour[p - 1])
+            d_ab = dist(a, b)
+            for c in near[a]:
+                d_ac = dist(a, c)
+                if d_ac >= d_ab - eps:
+                    break
+                q = int(pos[c])
+                if q > p:
+                    # b -> e ... c -> a
+                    e = int(tour[q - 1])
+                    delta = d_ac + dist(b, e) - d_ab - dist(e, c)
+                    if delta < -eps:
+                        reverse(p, q - 1)
+                        push(a, b, c, e)
+                        return True
+                elif 0 < q < p:
+                    # e -> b ... a -> c
+                    e = int(tour[q - 1])
+                    delta = d_ac + dist(e, b) - d_ab - dist(e, c)
+                    if delta < -eps:
+                        reverse(q, p - 1)
+                        push(a, b, c, e)
+                        return True
+        return False
+
+    def or_opt(a):
+        p0 = int(pos[a])
+        for length in (1, 2, 3):
+            # the runs that have the point a at one end: starting in a or ending in a
+            for p in (p0, p0 - length + 1) if length > 1 else (p0,):
+                if p < 1 or p + length - 1 > last:
+                    continue
+                first, end = int(tour[p]), int(tour[p + length - 1])
+                prev = int(tour[p - 1])
+                nxt = int(tour[p + length]) if p + length <= last else None
+                removed = dist(prev, first)
+                if nxt is not None:
+                    removed += dist(end, nxt) - dist(prev, nxt)
+                if removed <= eps:
+                    continue
+                other = end if a == first else first
+                for c in near[a]:
+                    d_ac = dist(a, c)
+                    if d_ac >= removed - eps:
+                        break
+                    q = int(pos[c])
+                    if p <= q < p + length:
+                        continue
+
+                    # after c: c -> a ... other -> s
+                    if c == prev:
+                        s = nxt
+                    else:
+                        s = int(tour[q + 1]) if q < last else None
+                    added = d_ac if s is None else d_ac + dist(other, s) - dist(c, s)
+                    if added - removed < -eps:
+                        move_run(p, length, q, flip=(a != first))
+                        push(a, other, c, prev, *[n for n in (nxt, s) if n is not None])
+                        return True
+
+                    # before c: r -> other ... a -> c
+                    if q == 0:
+                        continue
+                    r = prev if c == nxt else int(tour[q - 1])
+                    added = d_ac + dist(r, other) - dist(r, c)
+                    if added - removed < -eps:
+                        move_run(p, length, int(pos[r]), flip=(a == first))
+                        push(a, other, c, r, prev)
+                        if nxt is not None:
+                            push(nxt)
+                        return True
+        return False
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    checked = 0
+    while queue:
+        a = queue.popleft()
+        queued[a] = False
+        if two_opt(a) or or_opt(a):
+            push(a)
+        checked += 1
+        if deadline is not None and not checked & 255 and time.perf_counter() > deadline:
+            log.debug("PathOptimizer.refine_path() --> time budget spent with %d points still queued" % len(queue))
+            break
+    return tour
+
+
+def optimized_path(coords, start=0, time_limit=None, k=NEIGHBOURS):
+    """
+    Order the points in a short open path: greedy nearest neighbour path refined with 2-opt and Or-opt moves.
+
+    :param coords:      (N, 2) array of X, Y coordinates
+    :param start:       index of the first point
+    :param time_limit:  time budget of the refinement, in seconds, or None for no limit
+    :param k:           number of nearest neighbours checked for each point
+    :return:            (N,) array of point indexes
+    """
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    if len(coords) < 3:
+        return np.array([start] + [i for i in range(len(coords)) if i != start], dtype=np.int64)
+
+    grid = PointGrid(coords)
+    neighbours = grid.neighbours(k)
+    path = nearest_neighbour_path(grid, neighbours, start)
+    return refine_path(coords, path, neighbours, time_limit=time_limit)
+
+
+def ortools_path(coords, start=0, time_limit=None, metaheuristic=False, k=NEIGHBOURS):
+    """
+    Order the points in a short open path with the OR-tools routing solver. The solver starts from the path made by
+    optimized_path() and works on a sparse candidate graph: a point can be followed only by one of its k nearest
+    neighbours or by its neighbours in that first path. For more than ORTOOLS_MAX_POINTS points the first path is
+    returned.
+
+    :param coords:          (N, 2) array of X, Y coordinates
+    :param start:           index of the first point
+    :param time_limit:      time limit in seconds, for making the first path and for the solver, or None for no limit
+    :param metaheuristic:   if True the Guided Local Search is used to go past the local minimum
+    :param k:               number of nearest neighbours of each point
+    :return:                list of point indexes, empty if the solver did not find a solution
+    :rtype:                 list
+    """
+    t_start = time.perf_counter()
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    nr_points = len(coords)
+    if nr_points < 3:
+        return optimized_path(coords, start).tolist()
+
+    grid = PointGrid(coords)
+    neighbours = grid.neighbours(k)
+    first_path = nearest_neighbour_path(grid, neighbours, start)
+    first_path = refine_path(coords, first_path, neighbours, time_limit=time_limit).tolist()
+    if nr_points > ORTOOLS_MAX_POINTS:
+        log.debug("PathOptimizer.ortools_path() --> %d points, OR-tools is not used" % nr_points)
+        return first_path
+
+    manager = pywrapcp.RoutingIndexManager(nr_points, 1, start)
+    routing = pywrapcp.RoutingModel(manager)
+    # the node of each routing index, looked up without calling the manager
+    index_to_node = [manager.IndexToNode(index) for index in range(routing.Size() + 1)]
+    node_to_index = [manager.NodeToIndex(node) for node in range(nr_points)]
+
+    xs = (coords[:, 0] * DISTANCE_SCALE).tolist()
+    ys = (coords[:, 1] * DISTANCE_SCALE).tolist()
+
+    def distance(from_index, to_index):
+        from_node = index_to_node[from_index]
+        to_node = index_to_node[to_index]
+        # the path is open: going back to the start point is free
+        if to_node == start:
+            return 0
+        return int(math.hypot(xs[from_node] - xs[to_node], ys[from_node] - ys[to_node]) + 0.5)
+
+    transit_callback_index = routing.RegisterTransitCallback(distance)
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+    # the sparse candidate graph: the possible next points of each point. It is symmetric because the moves of the
+    # solver reverse parts of the path.
+    candidates = [set() for __ in range(nr_points)]
+    for node, row in enumerate(neighbours.tolist()):
+        for other in row:
+            if other >= 0:
+                candidates[node].add(other)
+                candidates[other].add(node)
+    for node, other in zip(first_path[:-1], first_path[1:]):
+        candidates[node].add(other)
+        candidates[other].add(node)
+    end_index = routing.End(0)
+    for node, allowed in enumerate(candidates):
+        allowed.discard(start)
+        routing.NextVar(node_to_index[node]).SetValues([node_to_index[c] for c in allowed] + [end_index])
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    if metaheuristic:
+        search_parameters.local_search_metaheuristic = (
+            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH)
+    if time_limit:
+        # at least one second for the solver
+        remaining = max(time_limit - (time.perf_counter() - t_start), 1.0)
+        search_parameters.time_limit.FromMilliseconds(int(remaining * 1000))
+
+    routing.CloseModelWithParameters(search_parameters)
+    initial = routing.ReadAssignmentFromRoutes([first_path[1:]], True)
+    if not initial:
+        log.warning('OR-tools - The first path is not accepted.')
+        return first_path
+    assignment = routing.SolveFromAssignmentWithParameters(initial, search_parameters)
+    if not assignment:
+        log.warning('OR-tools - No solution found.')
+        return []
+
+    log.info("OR-tools - Total distance: %s" % str(assignment.ObjectiveValue() / DISTANCE_SCALE))
+    path = []
+    index = routing.Start(0)
+    while not routing.IsEnd(index):
+        path.append(index_to_node[index])
+        index = assignment.Value(routing.NextVar(index))
+    return path
@@ -0,0 +1,313 @@
+# ##########################################################
+# FlatCAM: 2D Post-processing for Manufacturing            #
+# MIT Licence                                              #
+# ##########################################################
+
+"""
+FlatCAM project archive.
+
+The project is stored in a ZIP container:
+
+* ``manifest.json`` - the format version, the app version, the project options and the list of objects
+* ``objs/NNNN.json`` - the serialized object, one stream for each object
+* ``objs/NNNN.wkb`` - the Shapely geometry of the object, as concatenated WKB records. The object stream
+  refers to them as ``{"__class__": "ShplWKB", "__inst__": [offset, length]}``; a LinearRing, that is written by
+  WKB as a LineString, is marked with a third element: ``[offset, length, "LinearRing"]``
+
+The objects are read from the archive one at a time, when they are requested, so only one object is kept in memory
+as raw data while the project is loaded.
+
+The size and the SHA-256 checksum of each stream are computed while the stream is written and are stored in the
+manifest. The archive is written into a temporary file that replaces the project file only after it was completely
+written, therefore a failed save does not damage the previously saved project.
+"""
+
+import os
+import hashlib
+import zipfile
+import simplejson as json
+
+from shapely import wkb as swkb
+from shapely.geometry import LinearRing
+from shapely.geometry.base import BaseGeometry
+
+from camlib import to_dict, dict2obj
+
+import logging
+
+log = logging.getLogger('base')
+
+# version of the project archive format; the uncompressed or LZMA compressed JSON projects are version 1
+PROJECT_FORMAT_VERSION = 2
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class ChecksumWriter:
+    """
+    Wraps a binary stream and computes the size and the SHA-256 checksum of the data written into it.
+    """
+
+    def __init__(self, stream):
+        """
+
+        :param stream:  binary stream where the data is written
+        """
+        self.stream = stream
+        self.size = 0
+        self.hash = hashlib.sha256()
+
+    def write(self, data):
+        self.stream.write(data)
+        self.hash.update(data)
+        self.size += len(data)
+
+    @property
+    def checksum(self):
+        return self.hash.hexdigest()
+
+
+class WKBEncoder:
+    """
+    JSON 'default' serializer that writes the Shapely geometry as WKB into a binary stream and replaces it in the
+    JSON with a reference to it. Everything else is serialized by camlib.to_dict().
+    """
+
+    def __init__(self, stream):
+        """
+
+        :param stream:  binary stream where the WKB records are written
+        """
+        self.stream = stream
+        self.offset = 0
+
+    def __call__(self, obj):
+        # the WKB format does not keep the type of the empty geometries therefore those are kept as WKT
+        if isinstance(obj, BaseGeometry) and not obj.is_empty:
+            data = swkb.dumps(obj)
+            ref = [self.offset, len(data)]
+            if isinstance(obj, LinearRing):
+                ref.append("LinearRing")
+            self.stream.write(data)
+            self.offset += len(data)
+            return {
+                "__class__": "ShplWKB",
+                "__inst__": ref
+            }
+        return to_dict(obj)
+
+
+class WKBDecoder:
+    """
+    JSON 'object_hook' deserializer, the counterpart of WKBEncoder.
+    """
+
+    def __init__(self, data):
+        """
+
+        :param data:    bytes holding the WKB records of an object
+        """
+        self.data = memoryview(data)
+
+    def __call__(self, d):
+        if d.get('__class__') == "ShplWKB" and '__inst__' in d:
+            ref = d['__inst__']
+            offset, length = ref[0], ref[1]
+            geo = swkb.loads(bytes(self.data[offset:offset + length]))
+            if len(ref) > 2 and ref[2] == "LinearRing":
+                geo = LinearRing(geo.coords)
+            return geo
+        return dict2obj(d)
+
+
+def is_project_archive(filename):
+    """
+    Check if the file is a project archive (the current format) or an old JSON project.
+
+    :param filename:    path to the project file
+    :return:            True if the file is a project archive
+    :rtype:             bool
+    """
+    try:
+        if not zipfile.is_zipfile(filename):
+            return False
+        with zipfile.ZipFile(filename, 'r') as zf:
+            return MANIFEST_NAME in zf.namelist()
+    except (IOError, OSError):
+        return False
+
+
+def write_project_archive(filename, objs, options, version, compressed=True, compression_level=3):
+    """
+    Write the project into a project archive.
+
+    :param filename:            path to the project file
+    :param objs:                iterable of objects serialized as dictionaries (by their to_dict() method); it can
+                                be a generator so the objects are serialized one by one
+    :param options:             the project options
+    :param version:             the application version
+    :param compressed:          if True the streams are Deflate compressed
+    :param compression_level:   the Deflate compression level, 0 ... 9
+    :return:                    the manifest
+    :rtype:                     dict
+    """
+    compression = zipfile.ZIP_DEFLATED if compressed else zipfile.ZIP_STORED
+
+    manifest = {
+        "format_version": PROJECT_FORMAT_VERSION,
+        "version": version,
+        "options": options,
+        "objs": []
+    }
+
+    # the archive is written in the same folder as the project file so the final rename is atomic
+    tmp_filename = filename + '.tmp'
+
+    try:
+        with zipfile.ZipFile(tmp_filename, 'w', compression=compression, allowZip64=True,
+                             compresslevel=int(compression_level)) as zf:
+            for nr, obj_dict in enumerate(objs):
+                stream_name = 'objs/%04d' % nr
+
+                # the geometry is written while the object is serialized; the JSON text is written after it
+                with zf.open(stream_name + '.wkb', 'w', force_zip64=True) as geo_stream:
+                    geo_writer = ChecksumWriter(geo_stream)
+                    obj_text = json.dumps(obj_dict, default=WKBEncoder(geo_writer))
+
+                with zf.open(stream_name + '.json', 'w', force_zip64=True) as obj_stream:
+                    obj_writer = ChecksumWriter(obj_stream)
+                    obj_writer.write(obj_text.encode('utf-8'))
+
+                manifest['objs'].append({
+                    "kind": obj_dict['kind'],
+                    "name": obj_dict['options']['name'],
+                    "stream": stream_name,
+                    "size": [obj_writer.size, geo_writer.size],
+                    "sha256": [obj_writer.checksum, geo_writer.checksum]
+                })
+
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, default=to_dict, indent=2))
+
+        os.replace(tmp_filename, filename)
+    except Exception:
+        try:
+            os.remove(tmp_filename)
+        except OSError:
+            pass
+        raise
+
+    return manifest
+
+
+def verify_project_archive(filename, manifest):
+    """
+    Check that the project archive holds every stream listed in the manifest, with the size recorded while it was
+    written. The streams are not decompressed and the objects are not deserialized.
+
+    :param filename:    path to the project file
+    :param manifest:    the manifest returned by write_project_archive()
+    :return:            True if the archive matches the manifest
+    :rtype:             bool
+    """
+    try:
+        with zipfile.ZipFile(filename, 'r') as zf:
+            sizes = {info.filename: info.file_size for info in zf.infolist()}
+    except (IOError, OSError, zipfile.BadZipFile) as err:
+        log.debug("ProjectArchive.verify_project_archive() --> %s" % str(err))
+        return False
+
+    if MANIFEST_NAME not in sizes:
+        return False
+
+    for entry in manifest['objs']:
+        obj_size, geo_size = entry['size']
+        if sizes.get(entry['stream'] + '.json') != obj_size or sizes.get(entry['stream'] + '.wkb') != geo_size:
+            log.debug("ProjectArchive.verify_project_archive() --> Stream mismatch: %s" % entry['stream'])
+            return False
+    return True
+
+
+class ProjectArchiveReader:
+    """
+    Reads a project archive. The manifest is read when the archive is opened and the objects are deserialized only
+    when they are iterated.
+
+    Usage::
+
+        with ProjectArchiveReader(filename) as reader:
+            options = reader.options
+            for obj_dict in reader.objects():
+                ...
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        # names of the objects that failed the checksum
+        self.failed = []
+        self.zf = zipfile.ZipFile(filename, 'r')
+
+        try:
+            self.manifest = json.loads(self.zf.read(MANIFEST_NAME).decode('utf-8'), object_hook=dict2obj)
+        except Exception:
+            self.zf.close()
+            raise
+
+        if self.manifest.get('format_version', 0) > PROJECT_FORMAT_VERSION:
+            log.warning("ProjectArchiveReader -> The project format version %s is newer than the supported one: %s" %
+                        (str(self.manifest.get('format_version')), str(PROJECT_FORMAT_VERSION)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.zf.close()
+
+    @property
+    def options(self):
+        return self.manifest['options']
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    def __len__(self):
+        return len(self.manifest['objs'])
+
+    def read_object(self, entry):
+        """
+        Deserialize one object.
+
+        :param entry:   an element of the manifest 'objs' list
+        :return:        the object as a dictionary, to be used by the object from_dict() method or None if the
+                        object streams do not match the checksums from the manifest
+        :rtype:         dict
+        """
+        stream_name = entry['stream']
+        obj_data = self.zf.read(stream_name + '.json')
+        geo_data = self.zf.read(stream_name + '.wkb')
+
+        if 'sha256' in entry:
+            if [hashlib.sha256(obj_data).hexdigest(), hashlib.sha256(geo_data).hexdigest()] != entry['sha256']:
+                log.error("ProjectArchiveReader.read_object() --> Checksum mismatch for the object: %s" %
+                          str(entry['name']))
+                return None
+
+        return json.loads(obj_data.decode('utf-8'), object_hook=WKBDecoder(geo_data))
+
+    def objects(self):
+        """
+        Generator of the project objects, deserialized one at a time. The objects that fail the checksum are skipped
+        and their names are stored in self.failed.
+
+        :return:    the objects as dictionaries
+        """
+        self.failed = []
+        for entry in self.manifest['objs']:
+            obj_dict = self.read_object(entry)
+            if obj_dict is None:
+                self.failed.append(entry['name'])
+                continue
+            yield obj_dict
@@ -4757,6 +4757,9 @@ class AppGeoEditor(QtCore.QObject):
                 new_geo = linemerge(new_geo)
             fcgeometry.solid_geometry.append(new_geo)
 
+        # the geometry was added to the object lists
+        fcgeometry.invalidate_bounds()
+
         self.deactivate()
 
     def update_options(self, obj):
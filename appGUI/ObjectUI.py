@@ -2579,6 +2579,25 @@ class CNCObjectUI(ObjectUI):
 
         grbl_send_grid.addLayout(hm_lay, 12, 0, 1, 2)
 
+        stream_lay = QtWidgets.QHBoxLayout()
+        # STREAM GCODE
+        self.grbl_stream_button = FCButton(_("Stream GCode"))
+        self.grbl_stream_button.setToolTip(
+            _("Will send the GCode of this object to the GRBL controller,\n"
+              "keeping its receive buffer full.\n"
+              "The Pause/Resume button does a feed hold.")
+        )
+        stream_lay.addWidget(self.grbl_stream_button, stretch=1)
+
+        self.grbl_stop_stream_button = QtWidgets.QToolButton()
+        self.grbl_stop_stream_button.setText(_("Stop"))
+        self.grbl_stop_stream_button.setToolTip(
+            _("Will stop sending the GCode and reset the GRBL controller.")
+        )
+        stream_lay.addWidget(self.grbl_stop_stream_button, stretch=0, alignment=Qt.AlignRight)
+
+        grbl_send_grid.addLayout(stream_lay, 14, 0, 1, 2)
+
         self.grbl_frame.hide()
         # #############################################################################################################
 
@@ -9,7 +9,7 @@ from PyQt5 import QtCore
 
 import logging
 from appGUI.VisPyCanvas import VisPyCanvas, Color
-from appGUI.VisPyVisuals import ShapeGroup, ShapeCollection, TextCollection, TextGroup, Cursor
+from appGUI.VisPyVisuals import ShapeGroup, ShapeCollection, TextCollection, TextGroup, Cursor, tessellation_cache
 from vispy.scene.visuals import InfiniteLine, Line, Rectangle, Text
 
 import gettext
@@ -31,6 +31,9 @@ class PlotCanvas(QtCore.QObject, VisPyCanvas):
     Class handling the plotting area in the application.
     """
 
+    # emitted when the view is zoomed, panned or resized
+    view_changed = QtCore.pyqtSignal()
+
     def __init__(self, container, fcapp):
         """
         The constructor configures the VisPy figure that
@@ -54,6 +57,9 @@ class PlotCanvas(QtCore.QObject, VisPyCanvas):
         # Parent container
         self.container = container
 
+        # memory for the triangulated shapes kept for the next plots, in MB
+        tessellation_cache.max_size = int(self.fcapp.defaults["global_tessellation_cache"]) * 1024 * 1024
+
         settings = QtCore.QSettings("Open Source", "FlatCAM")
         if settings.contains("theme"):
             theme = settings.value('theme', type=str)
@@ -204,8 +210,19 @@ class PlotCanvas(QtCore.QObject, VisPyCanvas):
 
         self.shape_collections = []
 
-        self.shape_collection = self.new_shape_collection()
+        # the shapes of the objects are drawn with the level of detail needed for the zoom level and only the shapes
+        # in the tiles of the view are drawn
+        self.shape_collection = self.new_shape_collection(lod=True, tiles=True)
         self.fcapp.pool_recreated.connect(self.on_pool_recreated)
+
+        # the level of detail and the tiles are updated once the zoom or the pan is done, not for each step
+        self.view_timer = QtCore.QTimer()
+        self.view_timer.setSingleShot(True)
+        self.view_timer.setInterval(150)
+        self.view_timer.timeout.connect(self.on_view_update)
+        self.view_changed.connect(self.view_timer.start)
+        self.view.camera.transform.changed.connect(self.on_view_changed)
+        self.events.resize.connect(self.on_view_changed)
         self.text_collection = self.new_text_collection()
 
         self.text_collection.enabled = True
@@ -548,6 +565,23 @@ class PlotCanvas(QtCore.QObject, VisPyCanvas):
     def on_pool_recreated(self, pool):
         self.shape_collection.pool = pool
 
+    def on_view_changed(self, event=None):
+        self.view_changed.emit()
+
+    def on_view_update(self):
+        """
+        Sets the size of a pixel and the view rectangle, in plot units, to the shape collection of the objects so the
+        shapes in view are drawn with the level of detail needed for the current zoom level.
+
+        :return: None
+        """
+        view_width = self.view.size[0]
+        if view_width <= 0:
+            return
+        rect = self.view.camera.rect
+        self.shape_collection.set_view(pixel_size=rect.width / view_width,
+                                       rect=(rect.left, rect.bottom, rect.right, rect.top))
+
 
 class CursorBig(QtCore.QObject):
     """
@@ -21,6 +21,8 @@ import logging
 
 import numpy as np
 
+from appCommon.Panel import instances
+
 import gettext
 import appTranslation as fcTranslate
 import builtins
@@ -1229,7 +1231,7 @@ class ShapeCollectionLegacy:
 
     def add(self, shape=None, color=None, face_color=None, alpha=None, visible=True,
             update=False, layer=1, tolerance=0.01, obj=None, gcode_parsed=None, tool_tolerance=None, tooldia=None,
-            linewidth=None):
+            linewidth=None, offsets=None):
         """
         This function will add shapes to the shape collection
 
@@ -1246,8 +1248,12 @@ class ShapeCollectionLegacy:
         :param tool_tolerance: just for compatibility with VIsPy canvas
         :param tooldia:
         :param linewidth: the width of the line
+        :param offsets: (dx, dy) of each instance of a panel; a moved copy of the shape is added for each offset
         :return:
         """
+        if offsets is not None:
+            shape = instances(shape, offsets)
+
         self._color = color if color is not None else "#006E20"
         # self._face_color = face_color if face_color is not None else "#BBF268"
         self._face_color = face_color
@@ -10,23 +10,144 @@ from vispy.visuals import CompoundVisual, LineVisual, MeshVisual, TextVisual, Ma
 from vispy.scene.visuals import VisualNode, generate_docstring, visuals
 from vispy.gloo import set_state
 from vispy.color import Color
-from shapely.geometry import Polygon, LineString, LinearRing
+from shapely.geometry import Polygon, LineString, LinearRing, MultiPolygon, MultiLineString
+from shapely import wkb as shapely_wkb
+from rtree import index as rtindex
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
 import threading
+import os
 import numpy as np
 from appGUI.VisPyTesselators import GLUTess
 
+# Shapely 2 extracts the coordinates of many geometries in one call
+try:
+    from shapely import get_coordinates, get_num_coordinates
+except ImportError:
+    get_coordinates = None
+    get_num_coordinates = None
+
+# the buffers made by the process pool are returned in a shared memory block (Python 3.8+)
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = None
+
+# Levels of detail: each coarser level is simplified with the tolerance multiplied by LOD_STEP
+LOD_LEVELS = 3
+LOD_STEP = 8
+
+# Viewport tiles: the number of tiles whose shapes are kept in the layers buffers after they leave the view
+TILES_CACHED = 32
+
+# Process pool: the number of shapes translated by one task
+BATCH_SIZE = 256
+
 
 class FlatCAMLineVisual(LineVisual):
     def __init__(self, pos=None, color=(0.5, 0.5, 0.5, 1), width=1, connect='strip', method='gl', antialias=False):
+        # set before the visual is frozen by its constructor
+        self._buffer = None
         LineVisual.__init__(self, pos=pos, color=color, width=width, connect=connect,
                             method=method, antialias=True)
 
     def clear_data(self):
+        self._buffer = None
         self._bounds = None
         self._pos = None
         self._changed['pos'] = True
         self.update()
 
+    def set_buffer(self, buffer, width):
+        """
+        Sets the data from a ShapeBuffer. Only the changed ranges of the buffer are uploaded if the buffer
+        was already uploaded and it was not reallocated.
+        :param buffer: ShapeBuffer
+            Line segments buffer
+        :param width: float
+            Line width
+        """
+        full, ranges = buffer.take_dirty()
+
+        if full or self._buffer is not buffer or self._pos is not buffer.pos or \
+                self._changed['pos'] or self._changed['color']:
+            self.set_data(pos=buffer.pos, color=buffer.colors, width=width, connect='segments')
+        else:
+            if width != self._width:
+                self.set_data(width=width)
+            for start, stop in ranges:
+                self._line_visual._pos_vbo.set_subdata(buffer.pos[start:stop], offset=start)
+                self._line_visual._color_vbo.set_subdata(buffer.colors[start:stop], offset=start)
+            self.update()
+
+        self._buffer = buffer
+
+    def _compute_bounds(self, axis, view):
+        if self._buffer is None:
+            return LineVisual._compute_bounds(self, axis, view)
+        return _buffer_bounds(self._buffer, axis)
+
+
+class FlatCAMMeshVisual(MeshVisual):
+    def __init__(self, *args, **kwargs):
+        # set before the visual is frozen by its constructor
+        self._buffer = None
+        MeshVisual.__init__(self, *args, **kwargs)
+
+    def clear_data(self):
+        self._buffer = None
+        self.set_data()
+
+    def set_buffer(self, buffer):
+        """
+        Sets the data from a ShapeBuffer holding the triangles vertices (3 vertices for each face). Only the
+        changed ranges of the buffer are uploaded if the buffer was already uploaded and it was not reallocated.
+        :param buffer: ShapeBuffer
+            Mesh vertices buffer
+        """
+        full, ranges = buffer.take_dirty()
+
+        if full or self._buffer is not buffer or self._data_changed:
+            set_state(polygon_offset_fill=False)
+            self.set_data(
+                vertices=buffer.pos,
+                faces=np.arange(len(buffer.pos), dtype=np.uint32).reshape((-1, 3)),
+                vertex_colors=buffer.colors
+            )
+        else:
+            colors_vbo = self.shared_program.vert['base_color']
+            for start, stop in ranges:
+                vertices = np.zeros((stop - start, 3), dtype=np.float32)
+                vertices[:, :2] = buffer.pos[start:stop]
+                self._vertices.set_subdata(vertices, offset=start)
+                colors_vbo.set_subdata(buffer.colors[start:stop], offset=start)
+            self.update()
+
+        self._buffer = buffer
+
+    def _compute_bounds(self, axis, view):
+        if self._buffer is None:
+            return MeshVisual._compute_bounds(self, axis, view)
+        return _buffer_bounds(self._buffer, axis)
+
+
+def _buffer_bounds(buffer, axis):
+    """
+    Bounds of the visible shapes of a ShapeBuffer, in the format used by the VisPy visuals
+    :param buffer: ShapeBuffer
+    :param axis: int
+        0 - X axis, 1 - Y axis, 2 - Z axis
+    :return: tuple
+        (min, max) or None if there are no visible shapes
+    """
+    bounds = buffer.bounds()
+    if bounds is None:
+        return None
+    if axis > 1:
+        return 0, 0
+    return bounds[axis], bounds[axis + 2]
+
 
 def _update_shape_buffers(data, triangulation='glu'):
     """
@@ -36,64 +157,153 @@ def _update_shape_buffers(data, triangulation='glu'):
     :param triangulation: str
         Triangulation engine
     """
-    mesh_vertices = []                                              # Vertices for mesh
-    mesh_tris = []                                                  # Faces for mesh
-    mesh_colors = []                                                # Face colors
-    line_pts = []                                                   # Vertices for line
-    line_colors = []                                                # Line color
+    return _set_shape_buffers(data, *_shape_buffers(data, triangulation))
 
+
+def _shape_buffers(data, triangulation='glu'):
+    """
+    Makes the buffers of a shape. When data['lod'] is set, the buffers of the coarser levels of detail are made too;
+    each level is simplified from the previous one with the tolerance multiplied by LOD_STEP.
+    :param data: dict
+        Input shape data
+    :param triangulation: str
+        Triangulation engine
+    :return: tuple
+        (line_pts, mesh_vertices, mesh_tris, lod_buffers, geo_bounds)
+    """
     geo, color, face_color, tolerance = data['geometry'], data['color'], data['face_color'], data['tolerance']
+    width = data.get('width')
+
+    simplified_geo = geo.simplify(tolerance) if tolerance and geo is not None and not geo.is_empty else geo
+    buffers = _geometry_buffers(geo, simplified_geo, color, face_color, width, triangulation)
+
+    lod_buffers = []
+    geo_bounds = geo.bounds if geo is not None and not geo.is_empty else None
+    if data.get('lod') and tolerance and geo_bounds is not None:
+        level_buffers = buffers
+        level_size = len(simplified_geo.wkb)
+        for level in range(1, LOD_LEVELS):
+            simplified_geo = simplified_geo.simplify(tolerance * LOD_STEP ** level)
+            # a level is made only if it has clearly less vertices than the previous one (the WKB size is
+            # proportional to the number of vertices), otherwise the previous level is used
+            if len(simplified_geo.wkb) < level_size * 0.75:
+                simpler_buffers = _geometry_buffers(geo, simplified_geo, color, face_color, width, triangulation)
+                # a level that lost its edges or its faces (triangulation error) is not used
+                if all(len(simpler_buf) > 0 or len(level_buf) == 0
+                       for simpler_buf, level_buf in zip(simpler_buffers, level_buffers)):
+                    level_buffers = simpler_buffers
+                    level_size = len(simplified_geo.wkb)
+            lod_buffers.append(level_buffers)
+
+    return buffers + (lod_buffers, geo_bounds)
+
+
+def _geometry_buffers(geo, simplified_geo, color, face_color, width, triangulation):
+    """
+    Translates Shapely geometry to line segments and mesh
+    :param geo: shapely.geometry
+        Shape geometry
+    :param simplified_geo: shapely.geometry
+        Shape geometry simplified for drawing
+    :param color: str, tuple
+        Line/edge color; the edges are made only if it is not None
+    :param face_color: str, tuple
+        Polygon face color; the faces are made only if it is not None
+    :param width: float
+        Width of the lines in plot units
+    :param triangulation: str
+        Triangulation engine
+    :return: tuple
+        Line segments vertices, mesh vertices and mesh faces
+    """
+    line_pts = np.empty((0, 2), dtype=np.float32)                   # Vertices for line
+    mesh_vertices = np.empty((0, 2), dtype=np.float32)              # Vertices for mesh
+    mesh_tris = np.empty((0, 3), dtype=np.uint32)                   # Faces for mesh
 
     if geo is not None and not geo.is_empty:
-        simplified_geo = geo.simplify(tolerance) if tolerance else geo      # Simplified shape
-        pts = []                                                            # Shape line points
-        tri_pts = []                                                        # Mesh vertices
-        tri_tris = []                                                       # Mesh faces
+        if type(geo) in (LineString, LinearRing, MultiLineString):
+            lines = simplified_geo.geoms if type(simplified_geo) == MultiLineString else [simplified_geo]
+            lines = [line for line in lines if not line.is_empty]
 
-        if type(geo) == LineString:
             # Prepare lines
-            pts = _linestring_to_segments(list(simplified_geo.coords))
+            if lines:
+                line_pts = _rings_to_segments(lines)
 
-        elif type(geo) == LinearRing:
-            # Prepare lines
-            pts = _linearring_to_segments(list(simplified_geo.coords))
+                # Prepare the faces of the lines drawn with a width
+                if width and face_color is not None:
+                    mesh_vertices, mesh_tris = _lines_to_stroke(lines, width)
+
+        elif type(geo) in (Polygon, MultiPolygon):
+            polygons = simplified_geo.geoms if type(simplified_geo) == MultiPolygon else [simplified_geo]
+            polygons = [polygon for polygon in polygons if type(polygon) == Polygon and not polygon.is_empty]
 
-        elif type(geo) == Polygon:
             # Prepare polygon faces
-            if face_color is not None:
+            if face_color is not None and polygons:
                 if triangulation == 'glu':
-                    gt = GLUTess()
-                    tri_tris, tri_pts = gt.triangulate(simplified_geo)
+                    try:
+                        mesh_vertices, mesh_tris = _triangulate(polygons)
+                    except (TypeError, ValueError) as e:
+                        # the tessellator returned new vertices (self intersections); the faces are not drawn
+                        print("VisPyVisuals._update_shape_buffers() --> Triangulation error. %s" % str(e))
                 else:
                     print("Triangulation type '%s' isn't implemented. Drawing only edges." % triangulation)
 
             # Prepare polygon edges
-            if color is not None:
-                pts = _linearring_to_segments(list(simplified_geo.exterior.coords))
-                for ints in simplified_geo.interiors:
-                    pts += _linearring_to_segments(list(ints.coords))
-
-        # Appending data for mesh
-        if len(tri_pts) > 0 and len(tri_tris) > 0:
-            mesh_tris += tri_tris
-            mesh_vertices += tri_pts
-            face_color_rgba = Color(face_color).rgba
-            # mesh_colors += [face_color_rgba] * (len(tri_tris) // 3)
-            mesh_colors += [face_color_rgba for __ in range(len(tri_tris) // 3)]
-
-        # Appending data for line
-        if len(pts) > 0:
-            line_pts += pts
-            colo_rgba = Color(color).rgba
-            # line_colors += [colo_rgba] * len(pts)
-            line_colors += [colo_rgba for __ in range(len(pts))]
+            if color is not None and polygons:
+                line_pts = _rings_to_segments([ring for polygon in polygons
+                                               for ring in [polygon.exterior] + list(polygon.interiors)])
+
+        if len(mesh_vertices) == 0 or len(mesh_tris) == 0:
+            mesh_vertices = np.empty((0, 2), dtype=np.float32)
+            mesh_tris = np.empty((0, 3), dtype=np.uint32)
+
+    return line_pts, mesh_vertices, mesh_tris
+
+
+def _set_shape_buffers(data, line_pts, mesh_vertices, mesh_tris, lod_buffers=(), geo_bounds=None):
+    """
+    Stores the buffers of a shape and their colors into the shape data. The buffers of a shape with offsets (the
+    instances of a panel) are repeated for each offset.
+    :param data: dict
+        Input shape data
+    :param line_pts: numpy.array
+        Line segments vertices
+    :param mesh_vertices: numpy.array
+        Mesh vertices
+    :param mesh_tris: numpy.array
+        Mesh faces
+    :param lod_buffers: list
+        (line_pts, mesh_vertices, mesh_tris) of each coarser level of detail
+    :param geo_bounds: tuple
+        Bounds of the geometry, used to find the shapes in view and the shapes smaller than a pixel; None if the
+        geometry is empty
+    """
+    # The instances of a panel: the buffers of the source shape are copied and moved for each instance
+    offsets = data.get('offsets')
+    instance_bounds = None
+    if offsets is not None:
+        instanced = {}
+        line_pts, mesh_vertices, mesh_tris = _instance_buffers((line_pts, mesh_vertices, mesh_tris), offsets,
+                                                               instanced)
+        lod_buffers = [_instance_buffers(level, offsets, instanced) for level in lod_buffers]
+        if geo_bounds is not None:
+            # the bounds of each instance go in the R-tree of the view and give the size of the shape; geo_bounds
+            # holds all of them
+            instance_bounds = np.asarray(geo_bounds, dtype=float) + np.tile(np.asarray(offsets, dtype=float), 2)
+            geo_bounds = tuple(np.concatenate((instance_bounds[:, :2].min(axis=0),
+                                               instance_bounds[:, 2:].max(axis=0))).tolist())
+
+    # Color for mesh and for line, one for the shape
+    data['mesh_color_rgba'] = _color_rgba(data['face_color']) if len(mesh_tris) > 0 else None
+    data['line_color_rgba'] = _color_rgba(data['color']) if len(line_pts) > 0 else None
 
     # Store buffers
     data['line_pts'] = line_pts
-    data['line_colors'] = line_colors
     data['mesh_vertices'] = mesh_vertices
     data['mesh_tris'] = mesh_tris
-    data['mesh_colors'] = mesh_colors
+    data['lod_buffers'] = lod_buffers
+    data['geo_bounds'] = geo_bounds
+    data['instance_bounds'] = instance_bounds
 
     # Clear shapely geometry
     del data['geometry']
@@ -101,30 +311,722 @@ def _update_shape_buffers(data, triangulation='glu'):
     return data
 
 
-def _linearring_to_segments(arr):
-    # Close linear ring
+def _instance_buffers(buffers, offsets, instanced=None):
+    """
+    Buffers of a shape drawn at several offsets (the instances of a panel)
+    :param buffers: tuple
+        Line segments vertices, mesh vertices and mesh faces of the shape
+    :param offsets: numpy.array
+        (dx, dy) of each instance
+    :param instanced: dict
+        The buffers already made, by id() of the source buffer, so the levels of detail that share the arrays of the
+        previous level share the instanced arrays too
+    :return: tuple
+        Line segments vertices, mesh vertices and mesh faces of all the instances
+    """
+    if instanced is None:
+        instanced = {}
+    line_pts, mesh_vertices, mesh_tris = buffers
+    shifts = np.asarray(offsets, dtype=np.float32)[:, None, :]
+
+    def instance(buf, make):
+        if id(buf) not in instanced:
+            instanced[id(buf)] = make(buf)
+        return instanced[id(buf)]
+
+    # the vertices are repeated for each instance and the faces of each instance use its own vertices
+    new_line_pts = instance(line_pts, lambda buf: (buf[None, :, :] + shifts).reshape((-1, 2)))
+    new_mesh_vertices = instance(mesh_vertices, lambda buf: (buf[None, :, :] + shifts).reshape((-1, 2)))
+    first_vertex = np.arange(len(shifts), dtype=np.uint32) * len(mesh_vertices)
+    new_mesh_tris = instance(mesh_tris, lambda buf: (buf[None, :, :] + first_vertex[:, None, None]).reshape((-1, 3)))
+    return new_line_pts, new_mesh_vertices, new_mesh_tris
+
+
+def _translate_batch(wkb_data, wkb_offsets, params, triangulation='glu'):
+    """
+    Makes the buffers of a batch of shapes, in a process of the pool. The geometries come as WKB and the buffers of
+    all the shapes go back packed in 2 arrays, so a batch needs one message each way and no Shapely object or Python
+    list of coordinates is pickled.
+    :param wkb_data: bytes
+        WKB of the geometries, one after another
+    :param wkb_offsets: numpy.array
+        Start of the WKB of each geometry in wkb_data, followed by the end of the last one
+    :param params: numpy.array
+        Row of each shape: the color is set, the face color is set, tolerance, width (NaN for None), levels of detail
+    :param triangulation: str
+        Triangulation engine
+    :return: tuple
+        The packed buffers made by _pack_buffers()
+    """
+    buffers = []
+    for i, (has_color, has_face_color, tolerance, width, lod) in enumerate(params):
+        data = {'geometry': shapely_wkb.loads(wkb_data[wkb_offsets[i]:wkb_offsets[i + 1]]),
+                'color': True if has_color else None, 'face_color': True if has_face_color else None,
+                'tolerance': None if np.isnan(tolerance) else float(tolerance),
+                'width': None if np.isnan(width) else float(width), 'lod': bool(lod)}
+        buffers.append(_shape_buffers(data, triangulation))
+    return _pack_buffers(buffers)
+
+
+def _pack_buffers(buffers):
+    """
+    Packs the buffers of many shapes into one array of vertices (line segments and mesh vertices) and one array of
+    mesh faces. The arrays are put in a shared memory block, that is released by _unpack_buffers().
+    :param buffers: list
+        (line_pts, mesh_vertices, mesh_tris, lod_buffers, geo_bounds) of each shape
+    :return: tuple
+        (block, counts, levels, bounds): block is (name, number of vertices, number of faces) of the shared memory
+        block or (vertices, faces) if shared memory is not available; counts has the number of line vertices, mesh
+        vertices and mesh faces of each level of detail of each shape, -1 for a level with the buffers of the previous
+        one; levels has the number of levels of each shape and bounds the bounds of each geometry, NaN if empty
+    """
+    counts = np.zeros((len(buffers), LOD_LEVELS, 3), dtype=np.int64)
+    levels = np.zeros(len(buffers), dtype=np.int64)
+    bounds = np.full((len(buffers), 4), np.nan)
+    vertices, faces = [], []
+
+    for i, (line_pts, mesh_vertices, mesh_tris, lod_buffers, geo_bounds) in enumerate(buffers):
+        shape_levels = [(line_pts, mesh_vertices, mesh_tris)] + list(lod_buffers)
+        levels[i] = len(shape_levels)
+        for j, level in enumerate(shape_levels):
+            if j > 0 and all(buf is previous for buf, previous in zip(level, shape_levels[j - 1])):
+                counts[i, j] = -1
+                continue
+            counts[i, j] = len(level[0]), len(level[1]), len(level[2])
+            vertices += level[:2]
+            faces.append(level[2])
+        if geo_bounds is not None:
+            bounds[i] = geo_bounds
+
+    vertices = np.concatenate(vertices).astype(np.float32, copy=False) if vertices else \
+        np.empty((0, 2), dtype=np.float32)
+    faces = np.concatenate(faces).astype(np.uint32, copy=False) if faces else np.empty((0, 3), dtype=np.uint32)
+
+    if shared_memory is None:
+        return (vertices, faces), counts, levels, bounds
+
+    block = shared_memory.SharedMemory(create=True, size=max(vertices.nbytes + faces.nbytes, 1))
+    block_vertices = np.ndarray(vertices.shape, dtype=np.float32, buffer=block.buf)
+    block_vertices[:] = vertices
+    block_faces = np.ndarray(faces.shape, dtype=np.uint32, buffer=block.buf, offset=vertices.nbytes)
+    block_faces[:] = faces
+    # the views must be released before the block is closed
+    del block_vertices, block_faces
+    block.close()
+    # the block is unlinked by the main process so the resource tracker of the pool process must not track it
+    if os.name == 'posix':
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return (block.name, len(vertices), len(faces)), counts, levels, bounds
+
+
+def _unpack_buffers(packed):
+    """
+    Unpacks the buffers made by _pack_buffers(). The shared memory block is copied once and released; the buffers of
+    the shapes are views of the copied arrays.
+    :param packed: tuple
+        The packed buffers made by _pack_buffers()
+    :return: list
+        (line_pts, mesh_vertices, mesh_tris, lod_buffers, geo_bounds) of each shape
+    """
+    block, counts, levels, bounds = packed
+
+    if isinstance(block[0], str):
+        name, nr_vertices, nr_faces = block
+        shared_block = shared_memory.SharedMemory(name=name)
+        try:
+            block_vertices = np.ndarray((nr_vertices, 2), dtype=np.float32, buffer=shared_block.buf)
+            block_faces = np.ndarray((nr_faces, 3), dtype=np.uint32, buffer=shared_block.buf,
+                                     offset=block_vertices.nbytes)
+            vertices, faces = block_vertices.copy(), block_faces.copy()
+            del block_vertices, block_faces
+        finally:
+            shared_block.close()
+            shared_block.unlink()
+    else:
+        vertices, faces = block
+
+    shapes = []
+    v = f = 0
+    for shape_counts, nr_levels, geo_bounds in zip(counts.tolist(), levels.tolist(), bounds.tolist()):
+        shape_levels = []
+        for nr_lines, nr_mesh, nr_tris in shape_counts[:nr_levels]:
+            if nr_lines < 0:
+                shape_levels.append(shape_levels[-1])
+                continue
+            shape_levels.append((vertices[v:v + nr_lines], vertices[v + nr_lines:v + nr_lines + nr_mesh],
+                                 faces[f:f + nr_tris]))
+            v += nr_lines + nr_mesh
+            f += nr_tris
+        geo_bounds = None if np.isnan(geo_bounds[0]) else tuple(geo_bounds)
+        shapes.append(shape_levels[0] + (shape_levels[1:], geo_bounds))
+    return shapes
+
+
+def _color_rgba(color):
+    """
+    RGBA values of a color. The values of the colors given as strings or tuples are remembered because the same few
+    colors are used by all the shapes of an object.
+    :param color: str, tuple
+        Color
+    :return: numpy.array
+        RGBA values
+    """
+    try:
+        return _hashable_color_rgba(color)
+    except TypeError:
+        return Color(color).rgba
+
+
+@lru_cache(maxsize=256)
+def _hashable_color_rgba(color):
+    rgba = Color(color).rgba
+    rgba.flags.writeable = False
+    return rgba
+
+
+def _triangulate(polygons):
+    """
+    Triangulates the polygons. The convex polygons without holes are triangulated as a fan, the others with the
+    GLU tessellator
+    :param polygons: list
+        List of Polygon
+    :return: numpy.array, numpy.array
+        Vertices and faces of the polygons mesh
+    """
+    vertices = []
+    faces = []
+    offset = 0
+
+    for polygon in polygons:
+        pts = _convex_ring(polygon)
+        if pts is not None:
+            tris = _FAN[:len(pts) - 2] if len(pts) - 2 <= len(_FAN) else _fan(len(pts))
+        else:
+            tri_tris, tri_pts = GLUTess().triangulate(polygon)
+            pts = np.asarray(tri_pts, dtype=np.float32).reshape((-1, 2))
+            tris = np.asarray(tri_tris, dtype=np.uint32).reshape((-1, 3))
+        faces.append(tris + offset)
+        vertices.append(pts)
+        offset += len(pts)
+
+    return np.concatenate(vertices), np.concatenate(faces)
+
+
+def _convex_ring(polygon):
+    """
+    Gets the vertices of a convex polygon without holes
+    :param polygon: Polygon
+        Polygon to check
+    :return: numpy.array
+        Vertices of the exterior, without the closing vertex, or None if the polygon has holes or it is not convex
+    """
+    if polygon.interiors:
+        return None
+    coords = np.asarray(polygon.exterior.coords)[:, :2]
+    if len(coords) < 4:
+        return None
+
+    # all the turns are to the same side and they make a single turn around
+    edges = np.diff(coords, axis=0)
+    next_edges = np.concatenate((edges[1:], edges[:1]))
+    cross = edges[:, 0] * next_edges[:, 1] - edges[:, 1] * next_edges[:, 0]
+    if cross.min() < 0 < cross.max():
+        return None
+    turn = np.arctan2(cross, (edges * next_edges).sum(axis=1)).sum()
+    if abs(abs(turn) - 2 * np.pi) > 1e-6:
+        return None
+    return coords[:-1].astype(np.float32)
+
+
+def _fan(count):
+    """
+    Faces of a fan triangulation of a convex polygon
+    :param count: int
+        Number of vertices of the polygon
+    :return: numpy.array
+        Faces (0, 1, 2), (0, 2, 3), ...
+    """
+    second = np.arange(1, count - 1, dtype=np.uint32)
+    return np.column_stack((np.zeros(count - 2, dtype=np.uint32), second, second + 1))
+
+
+# the fan faces of the polygons with up to 258 vertices
+_FAN = _fan(258)
+
+
+def _lines_to_stroke(lines, width):
+    """
+    Builds the faces of lines drawn with a width given in plot units: a quad over each segment and an octagon in each
+    vertex for the round joins and ends of the lines
+    :param lines: list
+        List of LineString or LinearRing
+    :param width: float
+        Width of the lines
+    :return: numpy.array, numpy.array
+        Vertices and faces of the lines mesh
+    """
+    coords, counts = _rings_coordinates(lines)
+    coords = np.asarray(coords, dtype=np.float64)
+    radius = width / 2.0
+
+    # segments: a segment starts in each vertex, except in the last vertex of each strip
+    starts = np.ones(len(coords), dtype=bool)
+    starts[np.cumsum(counts) - 1] = False
+    starts = np.flatnonzero(starts)
+
+    p0 = coords[starts]
+    p1 = coords[starts + 1]
+    direction = p1 - p0
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    length[length == 0] = np.inf                                    # zero length segments get a zero normal
+    normal = np.column_stack((-direction[:, 1], direction[:, 0])) * (radius / length)[:, None]
+
+    quad_vertices = np.stack((p0 + normal, p1 + normal, p1 - normal, p0 - normal), axis=1).reshape((-1, 2))
+    quad_tris = (np.arange(len(starts), dtype=np.uint32) * 4)[:, None, None] + \
+        np.array([[0, 1, 2], [0, 2, 3]], dtype=np.uint32)
+
+    # joins: an octagon triangulated as a fan
+    angles = np.arange(8) * (np.pi / 4)
+    octagon = np.column_stack((np.cos(angles), np.sin(angles))) * radius
+    join_vertices = (coords[:, None, :] + octagon).reshape((-1, 2))
+    fan = np.array([[0, k, k + 1] for k in range(1, 7)], dtype=np.uint32)
+    join_tris = (np.arange(len(coords), dtype=np.uint32) * 8 + len(quad_vertices))[:, None, None] + fan
+
+    vertices = np.concatenate((quad_vertices, join_vertices)).astype(np.float32)
+    faces = np.concatenate((quad_tris.reshape((-1, 3)), join_tris.reshape((-1, 3))))
+    return vertices, faces
+
+
+def _rings_coordinates(rings):
     """
-    Translates linear ring to line segments
-    :param arr: numpy.array
-        Array of linear ring vertices
+    Gets the coordinates of a list of line strings / linear rings as one array
+    :param rings: list
+        List of LineString or LinearRing
+    :return: numpy.array, numpy.array
+        Array of all the vertices and array of the number of vertices of each ring
+    """
+    if get_coordinates is not None:
+        return get_coordinates(rings), get_num_coordinates(rings)
+
+    coords = [np.asarray(ring.coords)[:, :2] for ring in rings]
+    return np.concatenate(coords), np.array([len(c) for c in coords])
+
+
+def _rings_to_segments(rings):
+    """
+    Translates line strips to line segments. The linear rings are closed so their segments are closed too.
+    :param rings: list
+        List of LineString or LinearRing
     :return: numpy.array
-        Line segments
+        Line segments, two vertices for each segment: [p0, p1, p1, p2, ...]
     """
-    if arr[0] != arr[-1]:
-        arr.append(arr[0])
+    coords, counts = _rings_coordinates(rings)
+    if len(coords) < 2:
+        return np.empty((0, 2), dtype=np.float32)
+
+    # a segment starts in each vertex, except in the last vertex of each strip
+    starts = np.ones(len(coords), dtype=bool)
+    starts[np.cumsum(counts) - 1] = False
+    starts = np.flatnonzero(starts)
 
-    return _linestring_to_segments(arr)
+    segments = np.empty((len(starts) * 2, 2), dtype=np.float32)
+    segments[0::2] = coords[starts]
+    segments[1::2] = coords[starts + 1]
+    return segments
 
 
-def _linestring_to_segments(arr):
+def _expand_colors(colors, counts):
     """
-    Translates line strip to segments
-    :param arr: numpy.array
-        Array of line strip vertices
+    Expands the shapes colors to one color for each vertex / face
+    :param colors: list
+        One RGBA color for each shape
+    :param counts: list
+        Number of vertices / faces of each shape
     :return: numpy.array
-        Line segments
+        Array of RGBA colors
     """
-    return [arr[i // 2] for i in range(0, len(arr) * 2)][1:-1]
+    return np.repeat(np.asarray(colors, dtype=np.float32).reshape((-1, 4)), counts, axis=0)
+
+
+class TessellationCache(object):
+    def __init__(self, max_size=128 * 1024 * 1024):
+        """
+        Cache of the buffers made by _update_shape_buffers() for the shapes of all the collections, so a shape that is
+        plotted again with the same geometry is not triangulated again. The buffers of a shape are found by a
+        fingerprint of its geometry, made from its WKB, together with the parameters that change the buffers
+        (tolerance, line width, what is drawn, levels of detail). The colors, the visibility and the offsets of the
+        panel instances are not part of the fingerprint.
+        The least recently used buffers are removed when their size is over max_size.
+        :param max_size: int
+            Maximum size of the cached buffers, in bytes. 0 disables the cache
+        """
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(data):
+        """
+        Fingerprint of the buffers that _update_shape_buffers() makes for a shape
+        :param data: dict
+            Input shape data
+        :return: tuple
+            The key of the shape buffers in the cache or None if the shape has no geometry
+        """
+        geo = data['geometry']
+        if geo is None or geo.is_empty:
+            return None
+        digest = hashlib.blake2b(geo.wkb, digest_size=16).digest()
+        return (digest, type(geo).__name__, data['tolerance'], data.get('width'),
+                data['color'] is not None, data['face_color'] is not None, bool(data.get('lod')))
+
+    def get(self, fingerprint):
+        """
+        Gets the buffers of a shape and marks them as the most recently used
+        :param fingerprint: tuple
+            The key made by fingerprint()
+        :return: tuple
+            (line_pts, mesh_vertices, mesh_tris, lod_buffers, geo_bounds) or None if the buffers are not in the cache
+        """
+        if fingerprint is None or self.max_size <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(fingerprint)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, fingerprint, buffers):
+        """
+        Stores the buffers of a shape made by _shape_buffers(). The buffers are made read-only because they are shared
+        by all the shapes with the same fingerprint. The buffers of the shapes of a panel are stored before they are
+        repeated for the instances, so they are shared with the panel source object.
+        :param fingerprint: tuple
+            The key made by fingerprint()
+        :param buffers: tuple
+            (line_pts, mesh_vertices, mesh_tris, lod_buffers, geo_bounds)
+        """
+        if fingerprint is None or self.max_size <= 0:
+            return
+
+        line_pts, mesh_vertices, mesh_tris, lod_buffers, __ = buffers
+        # the levels of detail that are not simpler share the arrays of the previous level
+        arrays = {id(buf): buf for buf in (line_pts, mesh_vertices, mesh_tris) +
+                  tuple(buf for level in lod_buffers for buf in level)}
+        size = sum(buf.nbytes for buf in arrays.values())
+        if size > self.max_size:
+            return
+        for buf in arrays.values():
+            buf.flags.writeable = False
+
+        with self._lock:
+            if fingerprint in self._entries:
+                self._entries.move_to_end(fingerprint)
+                return
+            self._entries[fingerprint] = (tuple(buffers), size)
+            self.size += size
+
+            # remove the least recently used buffers
+            while self.size > self.max_size:
+                __, (__, old_size) = self._entries.popitem(last=False)
+                self.size -= old_size
+
+    def clear(self):
+        """
+        Removes all the cached buffers
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+# the buffers cache of all the shape collections
+tessellation_cache = TessellationCache()
+
+
+class ShapeBatch(object):
+    def __init__(self, pool, data, keys, triangulation='glu'):
+        """
+        Shapes translated by one task of the process pool. The buffers are unpacked by the result thread of the pool
+        as soon as the task ends, so the shared memory block is released even if the shapes were removed meanwhile.
+        :param pool: multiprocessing.Pool
+            Process pool
+        :param data: dict
+            Shapes data of the collection
+        :param keys: list
+            Keys of the shapes to translate; their geometry is not empty
+        :param triangulation: str
+            Triangulation engine
+        """
+        self.keys = keys
+        self.buffers = {}
+        self.error = None
+
+        wkbs = [data[key]['geometry'].wkb for key in keys]
+        wkb_offsets = np.zeros(len(wkbs) + 1, dtype=np.int64)
+        np.cumsum([len(geo_wkb) for geo_wkb in wkbs], out=wkb_offsets[1:])
+        params = np.array([(data[key]['color'] is not None, data[key]['face_color'] is not None,
+                            np.nan if data[key]['tolerance'] is None else data[key]['tolerance'],
+                            np.nan if data[key].get('width') is None else data[key]['width'],
+                            bool(data[key].get('lod'))) for key in keys], dtype=np.float64)
+
+        self.result = pool.apply_async(_translate_batch, (b''.join(wkbs), wkb_offsets, params, triangulation),
+                                       callback=self._unpack)
+
+    def _unpack(self, packed):
+        try:
+            self.buffers = dict(zip(self.keys, _unpack_buffers(packed)))
+        except Exception as e:
+            self.error = e
+
+    def get(self, key):
+        """
+        Waits for the task and gets the buffers of a shape
+        :param key: int
+            Shape key
+        :return: tuple
+            (line_pts, mesh_vertices, mesh_tris, lod_buffers, geo_bounds)
+        """
+        self.result.get()
+        if self.error is not None:
+            raise self.error
+        return self.buffers[key]
+
+
+class ShapeBuffer(object):
+    def __init__(self, capacity=3072):
+        """
+        Persistent vertex and color buffer for the shapes of a layer.
+        Each shape owns a range of the buffer. The range of a removed shape is kept in a free list and reused by
+        the next shapes and the buffer is compacted when more than half of it is free. The hidden shapes and the free
+        ranges hold degenerated vertices with a transparent color. The changed ranges are recorded so only they
+        need to be uploaded.
+        :param capacity: int
+            Initial number of vertices; a multiple of 3 so the buffer can hold mesh faces
+        """
+        self.initial_capacity = capacity
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.colors = np.zeros((capacity, 4), dtype=np.float32)
+
+        self.size = 0                   # end of the used part of the buffer
+        self.ranges = {}                # key: [start, count, bounds of the shape or None if hidden]
+        self.free = []                  # free ranges [start, count] sorted by start
+        self.free_count = 0
+
+        self.dirty = []                 # changed ranges [start, stop]
+        self.reallocated = True         # the buffer must be uploaded entirely
+        self._bounds = None
+        self._bounds_valid = False
+
+    def __contains__(self, key):
+        return key in self.ranges
+
+    def add(self, key, count):
+        """
+        Reserves a range of the buffer for a shape
+        :param key: int
+            Shape key
+        :param count: int
+            Number of vertices of the shape
+        """
+        start = None
+        for i, (free_start, free_count) in enumerate(self.free):
+            if free_count >= count:
+                start = free_start
+                if free_count == count:
+                    del self.free[i]
+                else:
+                    self.free[i] = [free_start + count, free_count - count]
+                self.free_count -= count
+                break
+
+        if start is None:
+            start = self.size
+            if start + count > len(self.pos):
+                self._reallocate(max(2 * len(self.pos), start + count))
+            self.size += count
+
+        self.ranges[key] = [start, count, None]
+
+    def add_shapes(self, keys, pos, colors):
+        """
+        Appends many visible shapes at the end of the buffer
+        :param keys: list
+            Shapes keys
+        :param pos: list
+            Vertices of each shape
+        :param colors: list
+            RGBA color of each shape
+        """
+        counts = np.array([len(p) for p in pos])
+        starts = np.cumsum(counts) - counts
+        total = int(counts.sum())
+
+        if self.size + total > len(self.pos):
+            self._reallocate(max(2 * len(self.pos), self.size + total))
+
+        all_pos = np.concatenate(pos)
+        stop = self.size + total
+        self.pos[self.size:stop] = all_pos
+        self.colors[self.size:stop] = _expand_colors(colors, counts)
+        bounds = np.hstack((np.minimum.reduceat(all_pos, starts, axis=0), np.maximum.reduceat(all_pos, starts, axis=0)))
+
+        for key, start, count, shape_bounds in zip(keys, starts.tolist(), counts.tolist(), bounds):
+            self.ranges[key] = [self.size + start, count, shape_bounds]
+
+        self.dirty.append([self.size, stop])
+        self.size = stop
+        self._bounds_valid = False
+
+    def remove(self, key):
+        """
+        Frees the range of a shape
+        :param key: int
+            Shape key
+        """
+        start, count, __ = self.ranges.pop(key)
+        self.write(key=None, start=start, count=count)
+
+        # insert in the free list, merged with the neighbour free ranges
+        i = 0
+        while i < len(self.free) and self.free[i][0] < start:
+            i += 1
+        self.free.insert(i, [start, count])
+        if i + 1 < len(self.free) and start + count == self.free[i + 1][0]:
+            self.free[i][1] += self.free[i + 1][1]
+            del self.free[i + 1]
+        if i > 0 and self.free[i - 1][0] + self.free[i - 1][1] == start:
+            self.free[i - 1][1] += self.free[i][1]
+            del self.free[i]
+            i -= 1
+        self.free_count += count
+
+        # a free range at the end of the used part is released
+        if self.free[i][0] + self.free[i][1] == self.size:
+            self.size = self.free[i][0]
+            self.free_count -= self.free[i][1]
+            del self.free[i]
+
+        if self.free_count * 2 > self.size:
+            self._compact()
+
+    def write(self, key, pos=None, color=None, start=None, count=None):
+        """
+        Writes the vertices and the color of a shape in its range. Without vertices the shape is hidden.
+        :param key: int
+            Shape key
+        :param pos: numpy.array
+            Shape vertices
+        :param color: tuple
+            Shape RGBA color
+        :param start: int
+            Start of the range, used when the key is None
+        :param count: int
+            Size of the range, used when the key is None
+        """
+        if key is not None:
+            start, count, __ = self.ranges[key]
+
+        if pos is None:
+            self.pos[start:start + count] = 0
+            self.colors[start:start + count] = 0
+            bounds = None
+        else:
+            self.pos[start:start + count] = pos
+            self.colors[start:start + count] = color
+            bounds = np.concatenate((pos.min(axis=0), pos.max(axis=0)))
+
+        if key is not None:
+            self.ranges[key][2] = bounds
+        self._bounds_valid = False
+        self.dirty.append([start, start + count])
+
+    def write_color(self, key, color):
+        """
+        Writes the color of a visible shape
+        :param key: int
+            Shape key
+        :param color: tuple
+            Shape RGBA color
+        """
+        start, count, bounds = self.ranges[key]
+        if bounds is not None:
+            self.colors[start:start + count] = color
+            self.dirty.append([start, start + count])
+
+    def take_dirty(self):
+        """
+        Gets the changed ranges and clears them
+        :return: bool, list
+            True if the buffer must be uploaded entirely and the sorted and merged list of changed ranges
+        """
+        full = self.reallocated
+        ranges = []
+        for start, stop in sorted(self.dirty):
+            if ranges and start <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], stop)
+            else:
+                ranges.append([start, stop])
+
+        self.reallocated = False
+        self.dirty = []
+        return full, ranges
+
+    def bounds(self):
+        """
+        Bounds of the visible shapes
+        :return: numpy.array
+            [xmin, ymin, xmax, ymax] or None if there are no visible shapes
+        """
+        if not self._bounds_valid:
+            bounds = [r[2] for r in self.ranges.values() if r[2] is not None]
+            if bounds:
+                bounds = np.array(bounds)
+                self._bounds = np.concatenate((bounds[:, :2].min(axis=0), bounds[:, 2:].max(axis=0)))
+            else:
+                self._bounds = None
+            self._bounds_valid = True
+        return self._bounds
+
+    def _reallocate(self, capacity):
+        pos = np.zeros((capacity, 2), dtype=np.float32)
+        colors = np.zeros((capacity, 4), dtype=np.float32)
+        pos[:self.size] = self.pos[:self.size]
+        colors[:self.size] = self.colors[:self.size]
+        self.pos = pos
+        self.colors = colors
+        self.reallocated = True
+        self.dirty = []
+
+    def _compact(self):
+        used = self.size - self.free_count
+        capacity = max(self.initial_capacity, 2 * used)
+        pos = np.zeros((capacity, 2), dtype=np.float32)
+        colors = np.zeros((capacity, 4), dtype=np.float32)
+
+        new_start = 0
+        for key, rng in sorted(self.ranges.items(), key=lambda item: item[1][0]):
+            start, count = rng[0], rng[1]
+            pos[new_start:new_start + count] = self.pos[start:start + count]
+            colors[new_start:new_start + count] = self.colors[start:start + count]
+            rng[0] = new_start
+            new_start += count
+
+        self.pos = pos
+        self.colors = colors
+        self.size = new_start
+        self.free = []
+        self.free_count = 0
+        self.reallocated = True
+        self.dirty = []
 
 
 class ShapeGroup(object):
@@ -193,26 +1095,23 @@ class ShapeGroup(object):
         :param value: bool
         """
         self._visible = value
-        for i in self._indexes:
-            self._collection.data[i]['visible'] = value
+        self._collection.update_visibility(value, indexes=self._indexes)
 
         self._collection.redraw([])
 
     def update_visibility(self, state, indexes=None):
         if indexes:
-            for i in indexes:
-                if i in self._indexes:
-                    self._collection.data[i]['visible'] = state
+            group_indexes = set(self._indexes)
+            self._collection.update_visibility(state, indexes=[i for i in indexes if i in group_indexes])
         else:
-            for i in self._indexes:
-                self._collection.data[i]['visible'] = state
+            self._collection.update_visibility(state, indexes=self._indexes)
 
         self._collection.redraw([])
 
 
 class ShapeCollectionVisual(CompoundVisual):
 
-    def __init__(self, linewidth=1, triangulation='vispy', layers=3, pool=None, **kwargs):
+    def __init__(self, linewidth=1, triangulation='vispy', layers=3, pool=None, lod=False, tiles=False, **kwargs):
         """
         Represents collection of shapes to draw on VisPy scene
         :param linewidth: float
@@ -224,21 +1123,50 @@ class ShapeCollectionVisual(CompoundVisual):
         :param layers: int
             Layers count
             Each layer adds 2 visuals on VisPy scene. Be careful: more layers cause less fps
+        :param lod: bool
+            Make the levels of detail of the shapes; the level drawn and the shapes smaller than a pixel that are not
+            drawn are chosen by set_view()
+        :param tiles: bool
+            Draw only the shapes in the tiles of the view set by set_view(); the shapes of the last TILES_CACHED
+            tiles are kept in the layers buffers so panning back needs no update
         :param kwargs:
         """
         self.data = {}
         self.last_key = -1
 
+        # Levels of detail: the size of a pixel in plot units, rounded down to a power of 2
+        self._lod = lod
+        self._pixel_size = None
+
+        # Viewport tiles: R-tree of the bounds of the shapes, the loaded tiles (size, column, row) with the keys of
+        # their shapes, from the least recently used, and the number of loaded tiles each shape is in
+        self._tiles = tiles
+        self._index = None
+        self._index_size = 0
+        self._unindexed = []
+        self._loaded_tiles = OrderedDict()
+        self._tile_refs = {}
+
+        # the bounds of the visible shapes that are not in the layers buffers (smaller than a pixel or out of view)
+        self._undrawn = {}
+
         # Thread locks
         self.key_lock = threading.Lock()
         self.results_lock = threading.Lock()
         self.update_lock = threading.Lock()
 
-        # Process pool
+        # Process pool: the keys of the shapes waiting to be sent in a batch and the batch of each sent shape
         self.pool = pool
+        self.batch_lock = threading.Lock()
+        self._batch = []
         self.results = {}
 
-        self._meshes = [MeshVisual() for _ in range(0, layers)]
+        # Persistent buffers of each layer and the keys of the shapes whose buffers have to be updated
+        self._line_buffers = [ShapeBuffer() for _ in range(0, layers)]
+        self._mesh_buffers = [ShapeBuffer() for _ in range(0, layers)]
+        self._changed_keys = set()
+
+        self._meshes = [FlatCAMMeshVisual() for _ in range(0, layers)]
         # self._lines = [LineVisual(antialias=True) for _ in range(0, layers)]
         self._lines = [FlatCAMLineVisual(antialias=True) for _ in range(0, layers)]
 
@@ -260,7 +1188,7 @@ class ShapeCollectionVisual(CompoundVisual):
         self.freeze()
 
     def add(self, shape=None, color=None, face_color=None, alpha=None, visible=True,
-            update=False, layer=1, tolerance=0.01, linewidth=None):
+            update=False, layer=1, tolerance=0.01, linewidth=None, width=None, offsets=None):
         """
         Adds shape to collection
         :return:
@@ -282,6 +1210,10 @@ class ShapeCollectionVisual(CompoundVisual):
             Geometry simplifying tolerance
         :param linewidth: int
             Width of the line
+        :param width: float
+            Width of the lines in plot units. The lines are drawn with this width and filled with face_color
+        :param offsets: numpy.array
+            (dx, dy) of each instance of a panel; the shape is drawn at each offset and it is triangulated once
         :return: int
             Index of shape
         """
@@ -293,22 +1225,63 @@ class ShapeCollectionVisual(CompoundVisual):
 
         # Prepare data for translation
         self.data[key] = {'geometry': shape, 'color': color, 'alpha': alpha, 'face_color': face_color,
-                          'visible': visible, 'layer': layer, 'tolerance': tolerance}
+                          'visible': visible, 'layer': layer, 'tolerance': tolerance, 'width': width,
+                          'lod': self._lod, 'offsets': offsets}
+        self._changed_keys.add(key)
 
         if linewidth:
             self._line_width = linewidth
 
-        # Add data to process pool if pool exists
-        try:
-            self.results[key] = self.pool.map_async(_update_shape_buffers, [self.data[key]])
-        except Exception:
-            self.data[key] = _update_shape_buffers(self.data[key])
+        # Use the buffers of the same geometry if it was already translated, otherwise add data to the next batch
+        # for the process pool if pool exists
+        fingerprint = tessellation_cache.fingerprint(self.data[key])
+        buffers = tessellation_cache.get(fingerprint)
+        if buffers is not None:
+            self.data[key] = _set_shape_buffers(self.data[key], *buffers)
+        else:
+            self.data[key]['fingerprint'] = fingerprint
+            if self.pool is not None and fingerprint is not None:
+                with self.batch_lock:
+                    self._batch.append(key)
+                    full = len(self._batch) >= BATCH_SIZE
+                if full:
+                    self._submit_batch()
+            else:
+                buffers = _shape_buffers(self.data[key])
+                tessellation_cache.put(fingerprint, buffers)
+                self.data[key] = _set_shape_buffers(self.data[key], *buffers)
 
         if update:
             self.redraw()   # redraw() waits for pool process end
 
         return key
 
+    def _submit_batch(self):
+        """
+        Sends the shapes waiting in the batch to the process pool. The shapes are translated here if the pool
+        can't be used.
+        """
+        with self.batch_lock:
+            keys, self._batch = self._batch, []
+
+        # the shapes removed meanwhile are not sent
+        keys = [key for key in keys if key in self.data and 'geometry' in self.data[key]]
+        if not keys:
+            return
+
+        try:
+            batch = ShapeBatch(self.pool, self.data, keys)
+        except Exception:
+            for key in keys:
+                buffers = _shape_buffers(self.data[key])
+                tessellation_cache.put(self.data[key]['fingerprint'], buffers)
+                self.data[key] = _set_shape_buffers(self.data[key], *buffers)
+            return
+
+        with self.results_lock:
+            for key in keys:
+                self.results[key] = batch
+
     def remove(self, key, update=False):
         """
         Removes shape from collection
@@ -324,7 +1297,13 @@ class ShapeCollectionVisual(CompoundVisual):
         self.results_lock.release()
 
         # Remove data
-        del self.data[key]
+        self.update_lock.acquire(True)
+        data = self.data.pop(key)
+        self._changed_keys.discard(key)
+        self._undrawn.pop(key, None)
+        self._tile_refs.pop(key, None)
+        self._remove_buffers(key, data['layer'])
+        self.update_lock.release()
 
         if update:
             self.__update()
@@ -335,20 +1314,30 @@ class ShapeCollectionVisual(CompoundVisual):
         :param update: bool
             Set True to redraw collection
         """
+        self.update_lock.acquire(True)
         self.data.clear()
+        self._changed_keys.clear()
+        self._undrawn.clear()
+        # the loaded tiles are kept; the new shapes in them are found when they are drawn
+        self._index = None
+        self._unindexed = []
+        for keys in self._loaded_tiles.values():
+            keys.clear()
+        self._tile_refs.clear()
+        self._line_buffers = [ShapeBuffer() for _ in range(0, len(self._lines))]
+        self._mesh_buffers = [ShapeBuffer() for _ in range(0, len(self._meshes))]
+        self.update_lock.release()
+
         if update:
             self.__update()
 
     def update_visibility(self, state: bool, indexes=None) -> None:
         # Lock sub-visuals updates
         self.update_lock.acquire(True)
-        if indexes is None:
-            for k, data in list(self.data.items()):
+        for k in (list(self.data.keys()) if indexes is None else indexes):
+            if k in self.data and self.data[k]['visible'] != state:
                 self.data[k]['visible'] = state
-        else:
-            for k, data in list(self.data.items()):
-                if k in indexes:
-                    self.data[k]['visible'] = state
+                self._changed_keys.add(k)
 
         self.update_lock.release()
 
@@ -374,167 +1363,373 @@ class ShapeCollectionVisual(CompoundVisual):
             else:
                 new_line_color = None
 
-        mesh_colors = [[] for _ in range(0, len(self._meshes))]     # Face colors
-        line_colors = [[] for _ in range(0, len(self._meshes))]     # Line colors
-        line_pts = [[] for _ in range(0, len(self._lines))]         # Vertices for line
-
         # Lock sub-visuals updates
         self.update_lock.acquire(True)
-        # Merge shapes buffers
-
-        if indexes is None:
-            for k, data in list(self.data.items()):
-                if data['visible'] and 'line_pts' in data:
-                    if new_mesh_color and new_mesh_color != '':
-                        dim_mesh_tris = (len(data['mesh_tris']) // 3)
-                        if dim_mesh_tris != 0:
-                            try:
-                                mesh_colors[data['layer']] += [mesh_color_rgba] * dim_mesh_tris
-                                self.data[k]['face_color'] = new_mesh_color
-
-                                data['mesh_colors'] = [mesh_color_rgba for __ in range(len(data['mesh_colors']))]
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create mesh colors --> Data error. %s" % str(e))
-
-                    if new_line_color and new_line_color != '':
-                        dim_line_pts = (len(data['line_pts']))
-                        if dim_line_pts != 0:
-                            try:
-                                line_pts[data['layer']] += data['line_pts']
-                                line_colors[data['layer']] += [line_color_rgba] * dim_line_pts
-                                self.data[k]['color'] = new_line_color
-
-                                data['line_colors'] = [mesh_color_rgba for __ in range(len(data['line_colors']))]
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create line colors --> Data error. %s" % str(e))
-        else:
-            for k, data in list(self.data.items()):
-                if data['visible'] and 'line_pts' in data:
-                    dim_mesh_tris = (len(data['mesh_tris']) // 3)
-                    dim_line_pts = (len(data['line_pts']))
-
-                    if k in indexes:
-                        if new_mesh_color and new_mesh_color != '':
-                            if dim_mesh_tris != 0:
-                                try:
-                                    mesh_colors[data['layer']] += [mesh_color_rgba] * dim_mesh_tris
-                                    self.data[k]['face_color'] = new_mesh_color
-
-                                    data['mesh_colors'] = [mesh_color_rgba for __ in range(len(data['mesh_colors']))]
-                                except Exception as e:
-                                    print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                          "Create mesh colors --> Data error. %s" % str(e))
-                        if new_line_color and new_line_color != '':
-                            if dim_line_pts != 0:
-                                try:
-                                    line_pts[data['layer']] += data['line_pts']
-                                    line_colors[data['layer']] += [line_color_rgba] * dim_line_pts
-                                    self.data[k]['color'] = new_line_color
-
-                                    data['line_colors'] = [mesh_color_rgba for __ in range(len(data['line_colors']))]
-                                except Exception as e:
-                                    print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                          "Create line colors --> Data error. %s" % str(e))
-                    else:
-                        if dim_mesh_tris != 0:
-                            try:
-                                mesh_colors[data['layer']] += [Color(data['face_color']).rgba] * dim_mesh_tris
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create mesh colors --> Data error. %s" % str(e))
-
-                        if dim_line_pts != 0:
-                            try:
-                                line_pts[data['layer']] += data['line_pts']
-                                line_colors[data['layer']] += [Color(data['color']).rgba] * dim_line_pts
-                            except Exception as e:
-                                print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                                      "Create line colors --> Data error. %s" % str(e))
-
-        # Updating meshes
-        if new_mesh_color and new_mesh_color != '':
-            for i, mesh in enumerate(self._meshes):
-                if mesh_colors[i]:
-                    try:
-                        mesh._meshdata.set_face_colors(colors=np.asarray(mesh_colors[i]))
-                        mesh.mesh_data_changed()
-                    except Exception as e:
-                        print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                              "Apply mesh colors --> Data error. %s" % str(e))
-
-        # Updating lines
-        if new_line_color and new_line_color != '':
-            for i, line in enumerate(self._lines):
-                if len(line_pts[i]) > 0:
-                    try:
-                        line._color = np.asarray(line_colors[i])
-                        line._changed['color'] = True
-                        line.update()
-                    except Exception as e:
-                        print("VisPyVisuals.ShapeCollectionVisual.update_color(). "
-                              "Apply line colors --> Data error. %s" % str(e))
-                else:
-                    line.clear_data()
+
+        # Set the new colors of the visible shapes; only their ranges of the layers buffers are changed
+        for k in (list(self.data.keys()) if indexes is None else indexes):
+            data = self.data.get(k)
+            if data is None or not data['visible'] or 'line_pts' not in data:
+                continue
+
+            if new_mesh_color and data['mesh_color_rgba'] is not None:
+                data['face_color'] = new_mesh_color
+                data['mesh_color_rgba'] = mesh_color_rgba
+                if k in self._mesh_buffers[data['layer']]:
+                    self._mesh_buffers[data['layer']].write_color(k, mesh_color_rgba)
+
+            if new_line_color and data['line_color_rgba'] is not None:
+                data['color'] = new_line_color
+                data['line_color_rgba'] = line_color_rgba
+                if k in self._line_buffers[data['layer']]:
+                    self._line_buffers[data['layer']].write_color(k, line_color_rgba)
+
+        try:
+            self._upload_buffers()
+        except Exception as e:
+            print("VisPyVisuals.ShapeCollectionVisual.update_color() --> Data error. %s" % str(e))
 
         self.update_lock.release()
 
-    def __update(self):
+    def set_view(self, pixel_size=None, rect=None):
         """
-        Merges internal buffers, sets data to visuals, redraws collection on scene
+        Sets the size of a pixel and the rectangle of the view, in plot units. The shapes whose level of detail changes
+        at this size and the shapes of the tiles that are loaded for the view or that are dropped from the tiles cache
+        are written again in the layers buffers and the collection is redrawn.
+        :param pixel_size: float
+            Size of a pixel in plot units, None to draw all the shapes with their full detail
+        :param rect: tuple
+            (xmin, ymin, xmax, ymax) of the view, None to keep the tiles already loaded
         """
-        mesh_vertices = [[] for _ in range(0, len(self._meshes))]       # Vertices for mesh
-        mesh_tris = [[] for _ in range(0, len(self._meshes))]           # Faces for mesh
-        mesh_colors = [[] for _ in range(0, len(self._meshes))]         # Face colors
-        line_pts = [[] for _ in range(0, len(self._lines))]             # Vertices for line
-        line_colors = [[] for _ in range(0, len(self._lines))]          # Line color
+        # the size is rounded down to a power of 2 so the levels are not checked again for each zoom step
+        if pixel_size is not None:
+            pixel_size = 2.0 ** np.floor(np.log2(pixel_size)) if pixel_size > 0 else None
 
-        # Lock sub-visuals updates
         self.update_lock.acquire(True)
+        if self._tiles and rect is not None:
+            self._load_tiles(rect)
+        if pixel_size != self._pixel_size:
+            self._pixel_size = pixel_size
+            for key, data in self.data.items():
+                if data.get('lod_buffers') and self._draw_level(key, data) != data.get('draw_level', 0):
+                    self._changed_keys.add(key)
+        changed = bool(self._changed_keys)
+        self.update_lock.release()
 
-        # Merge shapes buffers
-        for data in list(self.data.values()):
-            if data['visible'] and 'line_pts' in data:
-                try:
-                    line_pts[data['layer']] += data['line_pts']
-                    line_colors[data['layer']] += data['line_colors']
+        if changed:
+            self.__update()
 
-                    mesh_tris[data['layer']] += [x + len(mesh_vertices[data['layer']]) for x in data['mesh_tris']]
-                    mesh_vertices[data['layer']] += data['mesh_vertices']
-                    mesh_colors[data['layer']] += data['mesh_colors']
-                except Exception as e:
-                    print("VisPyVisuals.ShapeCollectionVisual._update() --> Data error. %s" % str(e))
+    def _load_tiles(self, rect):
+        """
+        Loads the tiles of the view: the shapes of the tiles that were not loaded are found with the R-tree and the
+        least recently used tiles over TILES_CACHED are dropped. The size of the tiles is the power of 2 that is at
+        least half of the view size; after a zoom the tiles of the previous size are dropped. The shapes that enter
+        or leave the loaded tiles are marked as changed.
+        :param rect: tuple
+            (xmin, ymin, xmax, ymax) of the view
+        """
+        xmin, ymin, xmax, ymax = rect
+        size = 2.0 ** np.ceil(np.log2(max(xmax - xmin, ymax - ymin, 1e-9) / 2))
+        view_tiles = [(size, col, row)
+                      for col in range(int(np.floor(xmin / size)), int(np.floor(xmax / size)) + 1)
+                      for row in range(int(np.floor(ymin / size)), int(np.floor(ymax / size)) + 1)]
+
+        # all the shapes were drawn before the first tiles are loaded
+        if not self._loaded_tiles:
+            self._changed_keys.update(self.data.keys())
+
+        for tile in [tile for tile in self._loaded_tiles if tile[0] != size]:
+            self._drop_tile(tile)
+
+        for tile in view_tiles:
+            if tile in self._loaded_tiles:
+                self._loaded_tiles.move_to_end(tile)
+                continue
+
+            __, col, row = tile
+            keys = set(key for key in self._query_index((col * size, row * size, (col + 1) * size, (row + 1) * size))
+                       if key in self.data)
+            self._loaded_tiles[tile] = keys
+            for key in keys:
+                self._tile_refs[key] = self._tile_refs.get(key, 0) + 1
+                if self._tile_refs[key] == 1:
+                    self._changed_keys.add(key)
+
+        while len(self._loaded_tiles) > max(TILES_CACHED, len(view_tiles)):
+            self._drop_tile(next(iter(self._loaded_tiles)))
+
+    def _drop_tile(self, tile):
+        """
+        Drops a loaded tile. Its shapes that are not in other loaded tiles are marked as changed.
+        :param tile: tuple
+            (size, column, row) of the tile
+        """
+        for key in self._loaded_tiles.pop(tile):
+            if key in self._tile_refs:
+                self._tile_refs[key] -= 1
+                if self._tile_refs[key] == 0:
+                    del self._tile_refs[key]
+                    self._changed_keys.add(key)
+
+    @staticmethod
+    def _shape_bounds(data):
+        """
+        The bounds of a shape, one for each instance of a shape with offsets
+        :param data: dict
+            Shape data, translated by _update_shape_buffers()
+        :return: list
+            (xmin, ymin, xmax, ymax) of each instance
+        """
+        if data.get('instance_bounds') is not None:
+            return data['instance_bounds'].tolist()
+        return [data['geo_bounds']]
 
-        # Updating meshes
-        for i, mesh in enumerate(self._meshes):
-            if len(mesh_vertices[i]) > 0:
-                set_state(polygon_offset_fill=False)
-                faces_array = np.asarray(mesh_tris[i], dtype=np.uint32)
-                mesh.set_data(
-                    vertices=np.asarray(mesh_vertices[i]),
-                    faces=faces_array.reshape((-1, 3)),
-                    face_colors=np.asarray(mesh_colors[i])
-                )
+    def _query_index(self, bounds):
+        """
+        The keys of the shapes whose bounds intersect the bounds. The R-tree is made again, in bulk, when there are
+        many shapes that are not in it; otherwise they are inserted one by one. A shape with offsets has an entry for
+        each instance.
+        :param bounds: tuple
+            (xmin, ymin, xmax, ymax)
+        :return: list
+            Shapes keys; the removed shapes may be in the list
+        """
+        if self._index is None or len(self._unindexed) > self._index_size / 4:
+            items = [(key, shape_bounds, None) for key, data in self.data.items() if data.get('geo_bounds') is not None
+                     for shape_bounds in self._shape_bounds(data)]
+            self._index = rtindex.Index(iter(items)) if items else rtindex.Index()
+            self._index_size = len(items)
+        else:
+            for key in self._unindexed:
+                data = self.data.get(key)
+                if data is not None:
+                    for shape_bounds in self._shape_bounds(data):
+                        self._index.insert(key, shape_bounds)
+                        self._index_size += 1
+        self._unindexed = []
+
+        return list(set(self._index.intersection(bounds)))
+
+    def _add_to_tiles(self, keys):
+        """
+        Adds the new shapes to the loaded tiles that they intersect
+        :param keys: list
+            Keys of the new shapes, translated by _update_shape_buffers()
+        """
+        self._unindexed += keys
+        if not self._loaded_tiles:
+            return
+
+        # one row for each instance of the shapes with offsets
+        rows = [(key, shape_bounds) for key in keys for shape_bounds in self._shape_bounds(self.data[key])]
+        bounds = np.array([shape_bounds for __, shape_bounds in rows]).reshape((-1, 4))
+        tiles = list(self._loaded_tiles.keys())
+        tiles_bounds = np.array([(col * size, row * size, (col + 1) * size, (row + 1) * size)
+                                 for size, col, row in tiles])
+        inside = (bounds[:, None, 0] <= tiles_bounds[None, :, 2]) & (bounds[:, None, 2] >= tiles_bounds[None, :, 0]) & \
+            (bounds[:, None, 1] <= tiles_bounds[None, :, 3]) & (bounds[:, None, 3] >= tiles_bounds[None, :, 1])
+
+        for key, tile_idx in set((rows[idx][0], tile_idx) for idx, tile_idx in zip(*np.nonzero(inside))):
+            self._loaded_tiles[tiles[tile_idx]].add(key)
+            self._tile_refs[key] = self._tile_refs.get(key, 0) + 1
+
+    def _draw_level(self, key, data):
+        """
+        The level of detail of a shape drawn in the current view
+        :param key: int
+            Shape key
+        :param data: dict
+            Shape data, translated by _update_shape_buffers()
+        :return: int
+            Level of detail or -1 if the shape is not drawn: it is smaller than a pixel or it is out of the loaded tiles
+        """
+        if self._tiles and self._loaded_tiles and data['geo_bounds'] is not None and key not in self._tile_refs:
+            return -1
+        return self._lod_level(data)
+
+    def _lod_level(self, data):
+        """
+        The level of detail of a shape drawn at the current pixel size. The coarser levels are used when their
+        simplifying tolerance is at most half of a pixel.
+        :param data: dict
+            Shape data, translated by _update_shape_buffers()
+        :return: int
+            Level of detail, 0 for the full detail, or -1 if the shape is smaller than a pixel and it is not drawn
+        """
+        lod_buffers = data.get('lod_buffers')
+        if self._pixel_size is None or not lod_buffers:
+            return 0
+
+        # the size of one instance for a shape with offsets
+        instance_bounds = data.get('instance_bounds')
+        xmin, ymin, xmax, ymax = data['geo_bounds'] if instance_bounds is None else instance_bounds[0]
+        if max(xmax - xmin, ymax - ymin) < self._pixel_size:
+            return -1
+
+        level = 0
+        while level < len(lod_buffers) and 2 * data['tolerance'] * LOD_STEP ** (level + 1) <= self._pixel_size:
+            level += 1
+        return level
+
+    @staticmethod
+    def _level_buffers(data, level):
+        """
+        The buffers of a level of detail of a shape
+        :param data: dict
+            Shape data, translated by _update_shape_buffers()
+        :param level: int
+            Level of detail
+        :return: tuple
+            Line segments vertices, mesh vertices and mesh faces
+        """
+        if level == 0:
+            return data['line_pts'], data['mesh_vertices'], data['mesh_tris']
+        return data['lod_buffers'][level - 1]
+
+    def _remove_buffers(self, key, layer):
+        """
+        Frees the ranges of a shape in the buffers of its layer
+        :param key: int
+            Shape key
+        :param layer: int
+            Shape layer
+        """
+        if key in self._line_buffers[layer]:
+            self._line_buffers[layer].remove(key)
+        if key in self._mesh_buffers[layer]:
+            self._mesh_buffers[layer].remove(key)
+
+    def _update_shape(self, key, data, line_pts, mesh_vertices, mesh_tris):
+        """
+        Writes the buffers of a shape into the buffers of its layer
+        :param key: int
+            Shape key
+        :param data: dict
+            Shape data, translated by _update_shape_buffers()
+        :param line_pts: numpy.array
+            Line segments vertices of the level of detail that is drawn
+        :param mesh_vertices: numpy.array
+            Mesh vertices of the level of detail that is drawn
+        :param mesh_tris: numpy.array
+            Mesh faces of the level of detail that is drawn
+        """
+        line_buffer = self._line_buffers[data['layer']]
+        mesh_buffer = self._mesh_buffers[data['layer']]
+
+        if len(line_pts) > 0:
+            if key not in line_buffer:
+                line_buffer.add(key, len(line_pts))
+            if data['visible']:
+                line_buffer.write(key, line_pts, data['line_color_rgba'])
             else:
-                mesh.set_data()
+                line_buffer.write(key)
 
+        if len(mesh_tris) > 0:
+            if key not in mesh_buffer:
+                mesh_buffer.add(key, mesh_tris.size)
+            if data['visible']:
+                # each face has its own 3 vertices in the layer buffer
+                mesh_buffer.write(key, mesh_vertices[mesh_tris.ravel()], data['mesh_color_rgba'])
+            else:
+                mesh_buffer.write(key)
+
+    def _upload_buffers(self):
+        """
+        Uploads the changed parts of the layers buffers into the visuals
+        """
+        for i, mesh in enumerate(self._meshes):
+            if self._mesh_buffers[i].ranges:
+                mesh.set_buffer(self._mesh_buffers[i])
+            elif mesh._buffer is not None or self._mesh_buffers[i].reallocated:
+                mesh.clear_data()
             mesh._bounds_changed()
 
-        # Updating lines
         for i, line in enumerate(self._lines):
-            if len(line_pts[i]) > 0:
-                line.set_data(
-                    pos=np.asarray(line_pts[i]),
-                    color=np.asarray(line_colors[i]),
-                    width=self._line_width,
-                    connect='segments')
-            else:
+            if self._line_buffers[i].ranges:
+                line.set_buffer(self._line_buffers[i], width=self._line_width)
+            elif line._buffer is not None or self._line_buffers[i].reallocated:
                 line.clear_data()
-
             line._bounds_changed()
 
         self._bounds_changed()
+
+    def _compute_bounds(self, axis, view):
+        bounds = CompoundVisual._compute_bounds(self, axis, view)
+
+        # the visible shapes that are not drawn are not in the layers buffers but they are part of the bounds
+        undrawn = [geo_bounds for key, geo_bounds in self._undrawn.items() if self.data[key]['visible']]
+        if axis > 1 or not undrawn:
+            return bounds
+        undrawn = np.array(undrawn)
+        undrawn_bounds = undrawn[:, axis].min(), undrawn[:, axis + 2].max()
+        if bounds is None:
+            return undrawn_bounds
+        return min(bounds[0], undrawn_bounds[0]), max(bounds[1], undrawn_bounds[1])
+
+    def __update(self):
+        """
+        Writes the buffers of the new and changed shapes into the layers buffers, uploads the changed parts
+        of the layers buffers into the visuals, redraws collection on scene
+        """
+        # Lock sub-visuals updates
+        self.update_lock.acquire(True)
+
+        # the new visible shapes are appended to the layers buffers in one operation
+        new_lines = [([], [], []) for _ in range(0, len(self._lines))]      # keys, vertices, colors
+        new_meshes = [([], [], []) for _ in range(0, len(self._meshes))]
+
+        # the new translated shapes are added to the tiles
+        if self._tiles:
+            new_keys = [key for key in sorted(self._changed_keys)
+                        if key in self.data and 'line_pts' in self.data[key] and 'draw_level' not in self.data[key]
+                        and self.data[key]['geo_bounds'] is not None]
+            if new_keys:
+                self._add_to_tiles(new_keys)
+
+        for key in sorted(self._changed_keys):
+            data = self.data.get(key)
+            if data is None:
+                self._changed_keys.discard(key)
+            elif 'line_pts' in data:                # the shape was translated
+                layer = data['layer']
+                try:
+                    level = self._draw_level(key, data)
+                    if level != data.get('draw_level', 0):
+                        # the shape is drawn with another level of detail so it gets new ranges in the layer buffers
+                        self._remove_buffers(key, layer)
+                    data['draw_level'] = level
+
+                    if level < 0:
+                        # smaller than a pixel or out of view, it is not drawn
+                        self._undrawn[key] = data['geo_bounds']
+                    else:
+                        self._undrawn.pop(key, None)
+                        line_pts, mesh_vertices, mesh_tris = self._level_buffers(data, level)
+
+                        if data['visible'] and key not in self._line_buffers[layer] and \
+                                key not in self._mesh_buffers[layer]:
+                            if len(line_pts) > 0:
+                                new_lines[layer][0].append(key)
+                                new_lines[layer][1].append(line_pts)
+                                new_lines[layer][2].append(data['line_color_rgba'])
+                            if len(mesh_tris) > 0:
+                                new_meshes[layer][0].append(key)
+                                new_meshes[layer][1].append(mesh_vertices[mesh_tris.ravel()])
+                                new_meshes[layer][2].append(data['mesh_color_rgba'])
+                        else:
+                            self._update_shape(key, data, line_pts, mesh_vertices, mesh_tris)
+                except Exception as e:
+                    print("VisPyVisuals.ShapeCollectionVisual._update() --> Data error. %s" % str(e))
+                self._changed_keys.discard(key)
+
+        for i in range(0, len(self._lines)):
+            if new_lines[i][0]:
+                self._line_buffers[i].add_shapes(*new_lines[i])
+            if new_meshes[i][0]:
+                self._mesh_buffers[i].add_shapes(*new_meshes[i])
+
+        self._upload_buffers()
+
         self.update_lock.release()
 
     def redraw(self, indexes=None, update_colors=None):
@@ -544,16 +1739,20 @@ class ShapeCollectionVisual(CompoundVisual):
             Shape indexes to get from process pool
         :param update_colors:
         """
+        # Send the shapes waiting in the batch
+        self._submit_batch()
+
         # Only one thread can update data
         self.results_lock.acquire(True)
 
         for i in list(self.data.keys()) if not indexes else indexes:
-            if i in list(self.results.keys()):
+            if i in self.results:
                 try:
-                    self.results[i].wait()                                  # Wait for process results
+                    buffers = self.results[i].get(i)                        # Wait for process results
                     if i in self.data:
-                        self.data[i] = self.results[i].get()[0]             # Store translated data
+                        self.data[i] = _set_shape_buffers(self.data[i], *buffers)   # Store translated data
                         del self.results[i]
+                        tessellation_cache.put(self.data[i]['fingerprint'], buffers)
                 except Exception as e:
                     print("VisPyVisuals.ShapeCollectionVisual.redraw() --> Data error = %s. Indexes = %s" %
                           (str(e), str(indexes)))
@@ -64,6 +64,7 @@ class PreferencesUIManager:
 
             "global_worker_number": self.ui.general_defaults_form.general_app_group.worker_number_sb,
             "global_tolerance": self.ui.general_defaults_form.general_app_group.tol_entry,
+            "global_tessellation_cache": self.ui.general_defaults_form.general_app_group.tess_cache_sb,
 
             "global_compression_level": self.ui.general_defaults_form.general_app_group.compress_spinner,
             "global_save_compressed": self.ui.general_defaults_form.general_app_group.save_type_cb,
@@ -314,6 +315,7 @@ class PreferencesUIManager:
             # CNC Job Options
             "cncjob_plot_kind":         self.ui.cncjob_defaults_form.cncjob_opt_group.cncplot_method_radio,
             "cncjob_annotation":        self.ui.cncjob_defaults_form.cncjob_opt_group.annotation_cb,
+            "cncjob_fast_preview":      self.ui.cncjob_defaults_form.cncjob_opt_group.fast_preview_cb,
 
             # CNC Job Advanced Options
             "cncjob_annotation_fontsize":   self.ui.cncjob_defaults_form.cncjob_adv_opt_group.annotation_fontsize_sp,
@@ -418,6 +420,7 @@ class PreferencesUIManager:
             "tools_ncc_tipangle":        self.ui.tools_defaults_form.tools_ncc_group.tipangle_entry,
             "tools_ncc_newdia":          self.ui.tools_defaults_form.tools_ncc_group.newdia_entry,
             "tools_ncc_plotting":       self.ui.tools_defaults_form.tools_ncc_group.plotting_radio,
+            "tools_ncc_multiprocessing": self.ui.tools_defaults_form.tools_ncc_group.multiprocessing_cb,
             "tools_ncc_check_valid":    self.ui.tools_defaults_form.tools_ncc_group.valid_cb,
 
             # CutOut Tool
@@ -559,6 +562,7 @@ class PreferencesUIManager:
 
             # Optimal Tool
             "tools_opt_precision": self.ui.tools2_defaults_form.tools2_optimal_group.precision_sp,
+            "tools_opt_ceiling": self.ui.tools2_defaults_form.tools2_optimal_group.ceiling_entry,
 
             # Check Rules Tool
             "tools_cr_trace_size": self.ui.tools2_defaults_form.tools2_checkrules_group.trace_size_cb,
@@ -78,4 +78,14 @@ class CNCJobOptPrefGroupUI(OptionsGroupUI):
 
         grid0.addWidget(self.annotation_cb, 2, 0, 1, 3)
 
+        # Fast Preview
+        self.fast_preview_cb = FCCheckBox(_("Fast Preview"))
+        self.fast_preview_cb.setToolTip(
+            _("When checked, the tool paths are plotted as center lines\n"
+              "drawn with the width of the tool instead of polygons.\n"
+              "It is much faster for large G-code files.")
+        )
+
+        grid0.addWidget(self.fast_preview_cb, 3, 0, 1, 3)
+
         self.layout.addStretch()
@@ -213,11 +213,12 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
         self.excellon_optimization_label = QtWidgets.QLabel(_('Algorithm:'))
         self.excellon_optimization_label.setToolTip(
             _("This sets the optimization type for the Excellon drill path.\n"
+              "If <<TSA>> is checked then a nearest neighbour path improved\n"
+              "with 2-opt and Or-opt moves is used for drill path optimization.\n"
+              "If <<Basic>> is checked then Google OR-Tools Basic algorithm\n"
+              "improves further the TSA path.\n"
               "If <<MetaHeuristic>> is checked then Google OR-Tools algorithm with\n"
-              "MetaHeuristic Guided Local Path is used. Default search time is 3sec.\n"
-              "If <<Basic>> is checked then Google OR-Tools Basic algorithm is used.\n"
-              "If <<TSA>> is checked then Travelling Salesman algorithm is used for\n"
-              "drill path optimization.\n"
+              "MetaHeuristic Guided Local Path improves further the TSA path.\n"
               "\n"
               "Some options are disabled when the application works in 32bit mode.")
         )
@@ -233,9 +234,8 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
         self.optimization_time_label = QtWidgets.QLabel('%s:' % _('Duration'))
         self.optimization_time_label.setAlignment(QtCore.Qt.AlignLeft)
         self.optimization_time_label.setToolTip(
-            _("When OR-Tools Metaheuristic (MH) is enabled there is a\n"
-              "maximum threshold for how much time is spent doing the\n"
-              "path optimization. This max duration is set here.\n"
+            _("The maximum threshold for how much time is spent doing the\n"
+              "path optimization, for each tool. This max duration is set here.\n"
               "In seconds.")
 
         )
@@ -308,12 +308,8 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
         current_platform = platform.architecture()[0]
         if current_platform == '64bit':
             self.excellon_optimization_radio.setOptionsDisabled([_('MetaHeuristic'), _('Basic')], False)
-            self.optimization_time_label.setDisabled(False)
-            self.optimization_time_entry.setDisabled(False)
         else:
             self.excellon_optimization_radio.setOptionsDisabled([_('MetaHeuristic'), _('Basic')], True)
-            self.optimization_time_label.setDisabled(True)
-            self.optimization_time_entry.setDisabled(True)
 
         # Setting plot colors signals
         self.line_color_entry.editingFinished.connect(self.on_line_color_entry)
@@ -330,16 +326,6 @@ class ExcellonGenPrefGroupUI(OptionsGroupUI):
         # call it once to make sure it is updated at startup
         self.on_update_exc_export(state=self.app.defaults["excellon_update"])
 
-        self.excellon_optimization_radio.activated_custom.connect(self.optimization_selection)
-
-    def optimization_selection(self):
-        if self.excellon_optimization_radio.get_value() == 'M':
-            self.optimization_time_label.setDisabled(False)
-            self.optimization_time_entry.setDisabled(False)
-        else:
-            self.optimization_time_label.setDisabled(True)
-            self.optimization_time_entry.setDisabled(True)
-
     # Setting plot colors handlers
     def on_fill_color_entry(self):
         self.app.defaults['excellon_plot_fill'] = self.fill_color_entry.get_value()[:7] + \
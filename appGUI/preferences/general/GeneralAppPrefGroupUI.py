@@ -243,14 +243,29 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
         grid0.addWidget(tol_label, 26, 0)
         grid0.addWidget(self.tol_entry, 26, 1)
 
+        # Tessellation cache size
+        tess_cache_label = QtWidgets.QLabel('%s:' % _("Plot Cache"))
+        tess_cache_label.setToolTip(_(
+            "The memory, in MB, used to keep the triangulated shapes\n"
+            "of the plotted objects. An object that is plotted again\n"
+            "without changes reuses them instead of triangulating its\n"
+            "shapes again. A value of 0 disables the cache.\n"
+            "After change, it will be applied at next App start."
+        ))
+        self.tess_cache_sb = FCSpinner()
+        self.tess_cache_sb.set_range(0, 16384)
+
+        grid0.addWidget(tess_cache_label, 27, 0)
+        grid0.addWidget(self.tess_cache_sb, 27, 1)
+
         separator_line = QtWidgets.QFrame()
         separator_line.setFrameShape(QtWidgets.QFrame.HLine)
         separator_line.setFrameShadow(QtWidgets.QFrame.Sunken)
-        grid0.addWidget(separator_line, 27, 0, 1, 2)
+        grid0.addWidget(separator_line, 28, 0, 1, 2)
 
         # Save Settings
         self.save_label = QtWidgets.QLabel('<b>%s</b>' % _("Save Settings"))
-        grid0.addWidget(self.save_label, 28, 0, 1, 2)
+        grid0.addWidget(self.save_label, 29, 0, 1, 2)
 
         # Save compressed project CB
         self.save_type_cb = FCCheckBox(_('Save Compressed Project'))
@@ -259,9 +274,9 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
               "When checked it will save a compressed FlatCAM project.")
         )
 
-        grid0.addWidget(self.save_type_cb, 29, 0, 1, 2)
+        grid0.addWidget(self.save_type_cb, 30, 0, 1, 2)
 
-        # Project LZMA Comppression Level
+        # Project Compression Level
         self.compress_spinner = FCSpinner()
         self.compress_spinner.set_range(0, 9)
         self.compress_label = QtWidgets.QLabel('%s:' % _('Compression'))
@@ -271,8 +286,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
               "but require more RAM usage and more processing time.")
         )
 
-        grid0.addWidget(self.compress_label, 30, 0)
-        grid0.addWidget(self.compress_spinner, 30, 1)
+        grid0.addWidget(self.compress_label, 31, 0)
+        grid0.addWidget(self.compress_spinner, 31, 1)
 
         self.proj_ois = OptionalInputSection(self.save_type_cb, [self.compress_label, self.compress_spinner], True)
 
@@ -284,7 +299,7 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
               "at the set interval.")
         )
 
-        grid0.addWidget(self.autosave_cb, 31, 0, 1, 2)
+        grid0.addWidget(self.autosave_cb, 32, 0, 1, 2)
 
         # Auto Save Timeout Interval
         self.autosave_entry = FCSpinner()
@@ -297,21 +312,21 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
               "While active, some operations may block this feature.")
         )
 
-        grid0.addWidget(self.autosave_label, 32, 0)
-        grid0.addWidget(self.autosave_entry, 32, 1)
+        grid0.addWidget(self.autosave_label, 33, 0)
+        grid0.addWidget(self.autosave_entry, 33, 1)
 
         # self.as_ois = OptionalInputSection(self.autosave_cb, [self.autosave_label, self.autosave_entry], True)
 
         separator_line = QtWidgets.QFrame()
         separator_line.setFrameShape(QtWidgets.QFrame.HLine)
         separator_line.setFrameShadow(QtWidgets.QFrame.Sunken)
-        grid0.addWidget(separator_line, 33, 0, 1, 2)
+        grid0.addWidget(separator_line, 34, 0, 1, 2)
 
         self.pdf_param_label = QtWidgets.QLabel('<B>%s:</b>' % _("Text to PDF parameters"))
         self.pdf_param_label.setToolTip(
             _("Used when saving text in Code Editor or in FlatCAM Document objects.")
         )
-        grid0.addWidget(self.pdf_param_label, 34, 0, 1, 2)
+        grid0.addWidget(self.pdf_param_label, 35, 0, 1, 2)
 
         # Top Margin value
         self.tmargin_entry = FCDoubleSpinner()
@@ -323,8 +338,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
             _("Distance between text body and the top of the PDF file.")
         )
 
-        grid0.addWidget(self.tmargin_label, 35, 0)
-        grid0.addWidget(self.tmargin_entry, 35, 1)
+        grid0.addWidget(self.tmargin_label, 36, 0)
+        grid0.addWidget(self.tmargin_entry, 36, 1)
 
         # Bottom Margin value
         self.bmargin_entry = FCDoubleSpinner()
@@ -336,8 +351,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
             _("Distance between text body and the bottom of the PDF file.")
         )
 
-        grid0.addWidget(self.bmargin_label, 36, 0)
-        grid0.addWidget(self.bmargin_entry, 36, 1)
+        grid0.addWidget(self.bmargin_label, 37, 0)
+        grid0.addWidget(self.bmargin_entry, 37, 1)
 
         # Left Margin value
         self.lmargin_entry = FCDoubleSpinner()
@@ -349,8 +364,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
             _("Distance between text body and the left of the PDF file.")
         )
 
-        grid0.addWidget(self.lmargin_label, 37, 0)
-        grid0.addWidget(self.lmargin_entry, 37, 1)
+        grid0.addWidget(self.lmargin_label, 38, 0)
+        grid0.addWidget(self.lmargin_entry, 38, 1)
 
         # Right Margin value
         self.rmargin_entry = FCDoubleSpinner()
@@ -362,8 +377,8 @@ class GeneralAppPrefGroupUI(OptionsGroupUI):
             _("Distance between text body and the right of the PDF file.")
         )
 
-        grid0.addWidget(self.rmargin_label, 38, 0)
-        grid0.addWidget(self.rmargin_entry, 38, 1)
+        grid0.addWidget(self.rmargin_label, 39, 0)
+        grid0.addWidget(self.rmargin_entry, 39, 1)
 
         self.layout.addStretch()
 
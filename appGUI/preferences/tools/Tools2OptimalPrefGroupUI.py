@@ -1,7 +1,7 @@
 from PyQt5 import QtWidgets
 from PyQt5.QtCore import QSettings
 
-from appGUI.GUIElements import FCSpinner
+from appGUI.GUIElements import FCSpinner, FCDoubleSpinner
 from appGUI.preferences.OptionsGroupUI import OptionsGroupUI
 
 import gettext
@@ -53,4 +53,17 @@ class Tools2OptimalPrefGroupUI(OptionsGroupUI):
         grid0.addWidget(self.precision_lbl, 0, 0)
         grid0.addWidget(self.precision_sp, 0, 1)
 
+        self.ceiling_entry = FCDoubleSpinner()
+        self.ceiling_entry.set_range(0.0, 10000.0000)
+        self.ceiling_entry.set_precision(self.decimals)
+        self.ceiling_entry.setSingleStep(0.1)
+
+        self.ceiling_lbl = QtWidgets.QLabel('%s:' % _("Distances ceiling"))
+        self.ceiling_lbl.setToolTip(
+            _("Other distances are reported only if they are smaller than this value.")
+        )
+
+        grid0.addWidget(self.ceiling_lbl, 1, 0)
+        grid0.addWidget(self.ceiling_entry, 1, 1)
+
         self.layout.addStretch()
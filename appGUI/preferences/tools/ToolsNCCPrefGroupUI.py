@@ -344,6 +344,15 @@ class ToolsNCCPrefGroupUI(OptionsGroupUI):
         grid0.addWidget(plotting_label, 21, 0)
         grid0.addWidget(self.plotting_radio, 21, 1)
 
+        # Multiprocessing
+        self.multiprocessing_cb = FCCheckBox(label=_('Multiprocessing'))
+        self.multiprocessing_cb.setToolTip(
+            _("If checked then the polygons are cleared in parallel, using all the CPU cores.\n"
+              "It is not used when the plotting is 'Progressive'.")
+        )
+
+        grid0.addWidget(self.multiprocessing_cb, 22, 0, 1, 2)
+
         # Check Tool validity
         self.valid_cb = FCCheckBox(label=_('Check validity'))
         self.valid_cb.setToolTip(
@@ -20,6 +20,8 @@ from appObjects.FlatCAMObj import *
 from matplotlib.backend_bases import KeyEvent as mpl_key_event
 
 from camlib import CNCjob
+from appCommon.AutoLevelling import GridHeightMap, DelaunayHeightMap, level_gcode
+from appCommon.GrblStreamer import GrblStreamer
 
 from shapely.ops import unary_union
 from shapely.geometry import Point, MultiPoint, Polygon, LineString, box
@@ -55,6 +57,8 @@ class CNCJobObject(FlatCAMObj, CNCjob):
     """
     optionChanged = QtCore.pyqtSignal(str)
     build_al_table_sig = QtCore.pyqtSignal()
+    # emitted from the streaming thread when the streaming of GCode to the GRBL controller ended
+    grbl_stream_ended = QtCore.pyqtSignal()
 
     ui_type = CNCObjectUI
 
@@ -214,8 +218,15 @@ class CNCJobObject(FlatCAMObj, CNCjob):
         '''
         self.al_bilinear_geo_storage = []
 
+        # the GCode before the autolevelling, for each tool key (None for the single tool GCode)
+        self.al_source_gcode = {}
+        # the probing results sent by GRBL: [PRB:x,y,z:1], the last field is 0 when the probe did not touch
+        self.prb_re = re.compile(r'PRB:([+-]?\d*\.?\d+),([+-]?\d*\.?\d+),([+-]?\d*\.?\d+):([01])')
+
         self.solid_geo = None
         self.grbl_ser_port = None
+        # sends the GCode to the GRBL controller in a background thread
+        self.grbl_streamer = None
 
         self.pressed_button = None
 
@@ -634,8 +645,11 @@ class CNCJobObject(FlatCAMObj, CNCjob):
         self.ui.pause_resume_button.clicked.connect(self.on_grbl_pause_resume)
         self.ui.grbl_get_heightmap_button.clicked.connect(self.on_grbl_autolevel)
         self.ui.grbl_save_height_map_button.clicked.connect(self.on_grbl_heightmap_save)
+        self.ui.grbl_stream_button.clicked.connect(self.on_grbl_stream_gcode)
+        self.ui.grbl_stop_stream_button.clicked.connect(self.on_grbl_stop_stream)
 
         self.build_al_table_sig.connect(self.build_al_table)
+        self.grbl_stream_ended.connect(lambda: self.set_grbl_controls_enabled(True))
 
         # self.ui.tc_variable_combo.currentIndexChanged[str].connect(self.on_cnc_custom_parameters)
 
@@ -1141,23 +1155,84 @@ class CNCJobObject(FlatCAMObj, CNCjob):
         self.app.defaults["cncjob_al_status"] = True if state else False
 
     def autolevell_gcode(self):
-        pass
+        """
+        Adds the heights measured in the probe points to the Z of the moves of the GCode. The GCode is levelled
+        starting from the GCode that was not levelled, so it can be levelled again with new heights.
 
-    def autolevell_gcode_line(self, gcode_line):
+        :return:    'fail' if the GCode could not be levelled
+        """
         al_method = self.ui.al_method_radio.get_value()
 
-        coords = ()
+        points = [
+            (pt['point'].x, pt['point'].y, pt['height']) for pt in self.al_voronoi_geo_storage.values()
+            if 'point' in pt and pt.get('height') is not None
+        ]
+        if not points:
+            self.app.inform.emit('[WARNING_NOTCL] %s' % _("There are no probe points with a height."))
+            return 'fail'
 
-        if al_method == 'v':
-            self.autolevell_voronoi(gcode_line, coords)
-        elif al_method == 'b':
-            self.autolevell_bilinear(gcode_line, coords)
+        try:
+            if al_method == 'b':
+                height_map = self.autolevell_bilinear(points)
+            else:
+                height_map = self.autolevell_voronoi(points)
+        except ValueError as err:
+            log.error("CNCJobObject.autolevell_gcode() --> %s" % str(err))
+            self.app.inform.emit('[ERROR_NOTCL] %s' % _("Failed. The height map could not be made."))
+            return 'fail'
+
+        # the GCode of each tool for multi-tool jobs
+        if self.multitool is True:
+            tools = self.exc_cnc_tools if self.origin_kind == 'excellon' else self.cnc_tools
+        else:
+            tools = None
 
-    def autolevell_bilinear(self, gcode_line, coords):
-        pass
+        if not self.al_source_gcode:
+            if tools is None:
+                self.al_source_gcode = {None: self.gcode}
+            else:
+                self.al_source_gcode = {key: tools[key]['gcode'] for key in tools if tools[key].get('gcode')}
 
-    def autolevell_voronoi(self, gcode_line, coords):
-        pass
+        # the moves are split in segments no longer than the segment limits or half the distance between probe points
+        seg_x, seg_y = self.segx, self.segy
+        if seg_x <= 0 and seg_y <= 0:
+            seg_x = seg_y = height_map.spacing / 2.0
+
+        try:
+            levelled = level_gcode(list(self.al_source_gcode.values()), height_map, seg_x=seg_x, seg_y=seg_y,
+                                   decimals=self.coords_decimals)
+        except ValueError as err:
+            log.error("CNCJobObject.autolevell_gcode() --> %s" % str(err))
+            self.app.inform.emit('[ERROR_NOTCL] %s' % _("Failed. The GCode could not be levelled."))
+            return 'fail'
+
+        for key, gcode in zip(self.al_source_gcode, levelled):
+            if key is None:
+                self.gcode = gcode
+            else:
+                tools[key]['gcode'] = gcode
+
+        self.app.inform.emit('[success] %s' % _("Finished autolevelling."))
+
+    def autolevell_bilinear(self, points):
+        """
+        Makes the height map of the probe points of a grid, with bilinear interpolation.
+
+        :param points:  list of (x, y, height) tuples
+        :return:        the height map
+        :rtype:         GridHeightMap
+        """
+        return GridHeightMap(points)
+
+    def autolevell_voronoi(self, points):
+        """
+        Makes the height map of any probe points, with linear interpolation over their Delaunay triangulation.
+
+        :param points:  list of (x, y, height) tuples
+        :return:        the height map
+        :rtype:         DelaunayHeightMap
+        """
+        return DelaunayHeightMap(points)
 
     def on_show_al_table(self, state):
         self.ui.al_probe_points_table.show() if state else self.ui.al_probe_points_table.hide()
@@ -1504,6 +1579,16 @@ class CNCJobObject(FlatCAMObj, CNCjob):
         self.send_grbl_command(command=cmd)
 
     def on_grbl_pause_resume(self, checked):
+        # while the GCode is streamed the streamer stops sending lines during the feed hold
+        if self.grbl_streamer is not None and self.grbl_streamer.is_running():
+            if checked is False:
+                self.grbl_streamer.cycle_start()
+                self.app.inform.emit("%s" % _("GRBL resumed."))
+            else:
+                self.grbl_streamer.feed_hold()
+                self.app.inform.emit("%s" % _("GRBL paused."))
+            return
+
         if checked is False:
             cmd = '~'
             self.send_grbl_command(command=cmd)
@@ -1513,6 +1598,91 @@ class CNCJobObject(FlatCAMObj, CNCjob):
             self.send_grbl_command(command=cmd)
             self.app.inform.emit("%s" % _("GRBL paused."))
 
+    def grbl_connected(self):
+        """
+        :return:    True if the serial port of the GRBL controller is open
+        :rtype:     bool
+        """
+        return self.grbl_ser_port is not None and self.grbl_ser_port.is_open
+
+    def set_grbl_controls_enabled(self, enabled):
+        """
+        Enables or disables the controls that send commands to the GRBL controller and read its answers (jog, zero,
+        homing, reset, send command, report, parameters, probing, streaming, connect). They are disabled while GCode
+        is streamed because the answers they read ('ok') belong to the streamed lines and the streamer counts them to
+        know how much of the controller receive buffer is used.
+
+        :param enabled: True to enable the controls
+        :type enabled:  bool
+        :return:        None
+        """
+        for widget in (self.ui.jog_wdg, self.ui.zero_axs_wdg, self.ui.controller_reset_button,
+                       self.ui.com_connect_button, self.ui.grbl_send_button, self.ui.grbl_command_entry,
+                       self.ui.grbl_report_button, self.ui.grbl_get_param_button, self.ui.grbl_get_heightmap_button,
+                       self.ui.grbl_stream_button):
+            widget.setDisabled(not enabled)
+
+    def on_grbl_stream_gcode(self):
+        """
+        Sends the GCode of this object to the GRBL controller, from a background thread, keeping the receive buffer
+        of the controller full (character counting flow control).
+
+        :return:    None
+        """
+        if not self.grbl_connected():
+            self.app.inform.emit('[WARNING_NOTCL] %s' % _("Not connected to a GRBL controller."))
+            return
+
+        if self.grbl_streamer is not None and self.grbl_streamer.is_running():
+            self.app.inform.emit('[WARNING_NOTCL] %s' % _("The GCode is already being sent."))
+            return
+
+        gcode = self.export_gcode(to_file=True)
+        if gcode == 'fail' or gcode is None:
+            return
+
+        # show the Shell Dock
+        self.app.ui.shell_dock.show()
+
+        self.set_grbl_controls_enabled(False)
+        self.grbl_streamer = GrblStreamer(self.grbl_ser_port, gcode.getvalue(),
+                                          on_progress=self.on_grbl_stream_progress,
+                                          on_message=self.on_grbl_stream_message)
+        self.grbl_streamer.start()
+        self.app.inform.emit('%s' % _("Sending GCode to the GRBL controller."))
+
+    def on_grbl_stop_stream(self):
+        if self.grbl_streamer is not None and self.grbl_streamer.is_running():
+            self.grbl_streamer.stop(reset=True)
+            self.ui.pause_resume_button.setChecked(False)
+
+    def on_grbl_stream_progress(self, status):
+        """
+        Shows the progress of the GCode streaming. Called from the streaming thread.
+
+        :param status:  the status of the streaming, see GrblStreamer.status()
+        :type status:   dict
+        :return:        None
+        """
+        if status['state'] == 'finished':
+            self.app.inform.emit('[success] %s: %d %s, %.1f sec.' % (
+                _("Finished sending GCode"), status['lines_total'], _("lines"), status['elapsed']))
+            self.grbl_stream_ended.emit()
+        elif status['state'] in ('stopped', 'alarm', 'failed'):
+            self.app.inform.emit('[WARNING_NOTCL] %s: %s %d, %d/%d %s.' % (
+                _("Stopped sending GCode"), _("line"), status['line_nr'], status['lines_done'],
+                status['lines_total'], _("lines")))
+            self.grbl_stream_ended.emit()
+        else:
+            self.app.inform.emit('%s: %s %d, %d/%d %s, %s: %d %s / %d B, %.0f %s/s, %.1f kB/s' % (
+                _("Sending GCode"), _("line"), status['line_nr'], status['lines_done'], status['lines_total'],
+                _("lines"), _("queue"), status['queue_lines'], _("lines"), status['queue_bytes'],
+                status['lines_per_sec'], _("lines"), status['bytes_per_sec'] / 1000.0))
+
+    def on_grbl_stream_message(self, line_nr, message):
+        # the errors, alarms and messages of the GRBL controller, with the GCode line that they belong to
+        self.app.inform_shell[str, bool].emit('\t\t\t%s %d: %s' % (_("Line"), line_nr, message.upper()), False)
+
     def probing_gcode(self, storage):
         """
         :param storage:         either a dict of dicts (voronoi) or a list of tuples (bilinear)
@@ -1790,8 +1960,17 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                         self.al_voronoi_geo_storage[idx]['point'] = Point((x, y))
 
             self.build_al_table_sig.emit()
+            self.autolevell_gcode()
 
     def on_grbl_autolevel(self):
+        if not self.grbl_connected():
+            self.app.inform.emit('[WARNING_NOTCL] %s' % _("Not connected to a GRBL controller."))
+            return
+
+        if self.grbl_streamer is not None and self.grbl_streamer.is_running():
+            self.app.inform.emit('[WARNING_NOTCL] %s' % _("The GCode is already being sent."))
+            return
+
         # show the Shell Dock
         self.app.ui.shell_dock.show()
 
@@ -1802,31 +1981,40 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                 probe_fr = str(self.ui.feedrate_probe_entry.get_value())
                 pr_depth = str(self.ui.pdepth_entry.get_value())
 
-                cmd = 'G21\n'
-                self.send_grbl_command(command=cmd)
-                cmd = 'G90\n'
-                self.send_grbl_command(command=cmd)
-
+                commands = ['G21', 'G90']
                 for pt_key in self.al_voronoi_geo_storage:
                     x = str(self.al_voronoi_geo_storage[pt_key]['point'].x)
                     y = str(self.al_voronoi_geo_storage[pt_key]['point'].y)
 
-                    cmd = 'G0 Z%s\n' % pr_travelz
-                    self.send_grbl_command(command=cmd)
-                    cmd = 'G0 X%s Y%s\n' % (x, y)
-                    self.send_grbl_command(command=cmd)
-                    cmd = 'G38.2 Z%s F%s' % (pr_depth, probe_fr)
-                    output = self.send_grbl_command(command=cmd)
+                    commands.append('G0 Z%s' % pr_travelz)
+                    commands.append('G0 X%s Y%s' % (x, y))
+                    commands.append('G38.2 Z%s F%s' % (pr_depth, probe_fr))
+                commands.append('M2')
 
-                    self.grbl_probe_result += output + '\n'
+                # the probing commands are streamed; GRBL answers each probing with the probed point: [PRB:x,y,z:1]
+                self.grbl_streamer = GrblStreamer(self.grbl_ser_port, '\n'.join(commands),
+                                                  on_message=self.on_grbl_stream_message)
+                try:
+                    self.grbl_streamer.start()
+                    self.grbl_streamer.wait()
+                finally:
+                    self.grbl_stream_ended.emit()
+
+                # a probing that did not end (an alarm, a serial error or a stop) gives a partial height map
+                if self.grbl_streamer.state != 'finished':
+                    self.app.inform.emit('[ERROR_NOTCL] %s: %s. %s' % (
+                        _("Probing did not finish"), self.grbl_streamer.state, _("The GCode is not autolevelled.")))
+                    return
 
-                cmd = 'M2\n'
-                self.send_grbl_command(command=cmd)
+                for __, message in self.grbl_streamer.messages:
+                    if 'PRB' in message:
+                        self.grbl_probe_result += message + '\n'
                 self.app.inform.emit('%s' % _("Finished probing. Doing the autolevelling."))
 
                 # apply autolevel here
                 self.on_grbl_apply_autolevel()
 
+        self.set_grbl_controls_enabled(False)
         self.app.inform.emit('%s' % _("Sending probing GCode to the GRBL controller."))
         self.app.worker_task.emit({'fcn': worker_task, 'params': []})
 
@@ -1873,8 +2061,33 @@ class CNCJobObject(FlatCAMObj, CNCjob):
             self.app.inform.emit('[ERROR_NOTCL] %s' % _("Empty GRBL heightmap."))
 
     def on_grbl_apply_autolevel(self):
-        # TODO here we call the autolevell method
-        self.app.inform.emit('%s' % _("Finished autolevelling."))
+        """
+        Sets the heights of the probe points from the probing results sent by the GRBL controller ("[PRB:x,y,z:1]")
+        and levels the GCode. The heights are relative to the first probe point.
+        """
+        matches = list(self.prb_re.finditer(self.grbl_probe_result))
+        if not matches:
+            self.app.inform.emit('[ERROR_NOTCL] %s' % _("Empty GRBL heightmap."))
+            return
+
+        failed = sum(1 for match in matches if match.group(4) == '0')
+        if failed:
+            self.app.inform.emit('[ERROR_NOTCL] %s: %d. %s' % (
+                _("Probe points that were not touched"), failed, _("The GCode is not autolevelled.")))
+            return
+
+        heights = [float(match.group(3)) for match in matches]
+        if len(heights) != len(self.al_voronoi_geo_storage):
+            self.app.inform.emit('[ERROR_NOTCL] %s: %d/%d. %s' % (
+                _("Probing results"), len(heights), len(self.al_voronoi_geo_storage),
+                _("The GCode is not autolevelled.")))
+            return
+
+        for pt_key, height in zip(self.al_voronoi_geo_storage, heights):
+            self.al_voronoi_geo_storage[pt_key]['height'] = height - heights[0]
+        self.build_al_table_sig.emit()
+
+        self.autolevell_gcode()
 
     def on_updateplot_button_click(self, *args):
         """
@@ -2185,19 +2398,21 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                 self.exc_cnc_tools[first_key]['data']['tools_drill_ppname_e']
             ].include_header
 
-        gcode = ''
+        # the G-Code of the tools is not concatenated in one string but kept as a list of parts that are written one
+        # after another into the file
+        gcode = []
         if include_header is False:
             # detect if using multi-tool and make the Gcode summation correctly for each case
             if self.multitool is True:
                 for tooluid_key in self.cnc_tools:
                     for key, value in self.cnc_tools[tooluid_key].items():
                         if key == 'gcode':
-                            gcode += value
+                            gcode.append(value)
                             break
             else:
-                gcode += self.gcode
+                gcode.append(self.gcode)
 
-            g = preamble + '\n' + gcode + '\n' + postamble
+            g = [preamble, '\n'] + gcode + ['\n', postamble]
         else:
             # search for the GCode beginning which is usually a G20 or G21
             # fix so the preamble gets inserted in between the comments header and the actual start of GCODE
@@ -2218,16 +2433,16 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                     for tooluid_key in self.exc_cnc_tools:
                         for key, value in self.exc_cnc_tools[tooluid_key].items():
                             if key == 'gcode' and value:
-                                gcode += value
+                                gcode.append(value)
                                 break
                 else:
                     for tooluid_key in self.cnc_tools:
                         for key, value in self.cnc_tools[tooluid_key].items():
                             if key == 'gcode' and value:
-                                gcode += value
+                                gcode.append(value)
                                 break
             else:
-                gcode += self.gcode
+                gcode.append(self.gcode)
 
             end_gcode = self.gcode_footer() if self.app.defaults['cncjob_footer'] is True else ''
 
@@ -2247,23 +2462,22 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                             break
 
             if hpgl:
-                processed_body_gcode = ''
+                processed_body_gcode = []
                 pa_re = re.compile(r"^PA\s*(-?\d+\.\d*),?\s*(-?\d+\.\d*)*;?$")
 
                 # process body gcode
-                for gline in gcode.splitlines():
+                for gline in ''.join(gcode).splitlines():
                     match = pa_re.search(gline)
                     if match:
                         x_int = int(float(match.group(1)))
                         y_int = int(float(match.group(2)))
                         new_line = 'PA%d,%d;\n' % (x_int, y_int)
-                        processed_body_gcode += new_line
+                        processed_body_gcode.append(new_line)
                     else:
-                        processed_body_gcode += gline + '\n'
+                        processed_body_gcode.append(gline + '\n')
 
                 gcode = processed_body_gcode
-                g = self.gc_header + '\n' + self.gc_start + '\n' + preamble + '\n' + \
-                    gcode + '\n' + postamble + end_gcode
+                g = [self.gc_header, '\n', self.gc_start, '\n', preamble, '\n'] + gcode + ['\n', postamble, end_gcode]
             else:
                 # try:
                 #     g_idx = gcode.index('G94')
@@ -2283,16 +2497,14 @@ class CNCJobObject(FlatCAMObj, CNCjob):
                 #                          _("G-code does not have a G94 code.\n"
                 #                            "Append Code snippet will not be used.."))
                 #     g = self.gc_header + '\n' + gcode + postamble + end_gcode
-                g = ''
-                if preamble != '' and postamble != '':
-                    g = self.gc_header + self.gc_start + '\n' + preamble + '\n' + gcode + '\n' + \
-                        postamble + '\n' + end_gcode
-                if preamble == '':
-                    g = self.gc_header + self.gc_start + '\n' + gcode + '\n' + postamble + '\n' + end_gcode
-                if postamble == '':
-                    g = self.gc_header + self.gc_start + '\n' + preamble + '\n' + gcode + '\n' + end_gcode
-                if preamble == '' and postamble == '':
-                    g = self.gc_header + self.gc_start + '\n' + gcode + '\n' + end_gcode
+                g = [self.gc_header, self.gc_start, '\n']
+                if preamble != '':
+                    g += [preamble, '\n']
+                g += gcode
+                g.append('\n')
+                if postamble != '':
+                    g += [postamble, '\n']
+                g.append(end_gcode)
 
         # if toolchange custom is used, replace M6 code with the code from the Toolchange Custom Text box
         # if self.ui.toolchange_cb.get_value() is True:
@@ -2308,20 +2520,17 @@ class CNCJobObject(FlatCAMObj, CNCjob):
         #         g = g.replace('M6', m6_code)
         #         self.app.inform.emit('[success] %s' % _("Toolchange G-code was replaced by a custom code."))
 
-        lines = StringIO(g)
-
         # Write
         if filename is not None:
             try:
+                # the parts are streamed into the file, the whole G-Code is never made into a single string
                 force_windows_line_endings = self.app.defaults['cncjob_line_ending']
                 if force_windows_line_endings and sys.platform != 'win32':
                     with open(filename, 'w', newline='\r\n') as f:
-                        for line in lines:
-                            f.write(line)
+                        f.writelines(g)
                 else:
                     with open(filename, 'w') as f:
-                        for line in lines:
-                            f.write(line)
+                        f.writelines(g)
             except FileNotFoundError:
                 self.app.inform.emit('[WARNING_NOTCL] %s' % _("No such file or directory"))
                 return
@@ -2339,7 +2548,7 @@ class CNCJobObject(FlatCAMObj, CNCjob):
 
             self.app.inform.emit('[success] %s: %s' % (_("Saved to"), filename))
         else:
-            return lines
+            return StringIO(''.join(g))
 
     # def on_toolchange_custom_clicked(self, signal):
     #     """
@@ -253,17 +253,11 @@ class ExcellonObject(FlatCAMObj, Excellon):
             slot_cnt = 0  # variable to store the nr of slots per tool
 
             # Find no of drills for the current tool
-            try:
-                drill_cnt = len(self.tools[tool_no]['drills'])
-            except KeyError:
-                drill_cnt = 0
+            drill_cnt = self.geometry_count('drills', self.tools[tool_no])
             self.tot_drill_cnt += drill_cnt
 
             # Find no of slots for the current tool
-            try:
-                slot_cnt = len(self.tools[tool_no]['slots'])
-            except KeyError:
-                slot_cnt = 0
+            slot_cnt = self.geometry_count('slots', self.tools[tool_no])
             self.tot_slot_cnt += slot_cnt
 
             # Tool ID
@@ -421,7 +415,7 @@ class ExcellonObject(FlatCAMObj, Excellon):
         # find if we have drills:
         has_drills = None
         for tt in self.tools:
-            if 'drills' in self.tools[tt] and self.tools[tt]['drills']:
+            if self.geometry_count('drills', self.tools[tt]):
                 has_drills = True
                 break
         if has_drills is None:
@@ -434,7 +428,7 @@ class ExcellonObject(FlatCAMObj, Excellon):
         # find if we have slots
         has_slots = None
         for tt in self.tools:
-            if 'slots' in self.tools[tt] and self.tools[tt]['slots']:
+            if self.geometry_count('slots', self.tools[tt]):
                 has_slots = True
                 break
         if has_slots is None:
@@ -528,11 +522,11 @@ class ExcellonObject(FlatCAMObj, Excellon):
                     tool_dia = self.app.dec_format(float(self.tools[tt]['tooldia']), self.decimals)
                     if tool_dia == row_dia:
                         # find if we have drills:
-                        if 'drills' not in self.tools[tt] or not self.tools[tt]['drills']:
+                        if not self.geometry_count('drills', self.tools[tt]):
                             has_drills = None
 
                         # find if we have slots
-                        if 'slots' not in self.tools[tt] or not self.tools[tt]['slots']:
+                        if not self.geometry_count('slots', self.tools[tt]):
                             has_slots = None
 
             if has_drills is None:
@@ -1173,7 +1167,7 @@ class ExcellonObject(FlatCAMObj, Excellon):
 
         # this stays for compatibility reasons, in case we try to open old projects
         try:
-            __ = iter(self.solid_geometry)
+            __ = iter(self.panel_geometry('solid_geometry')[0])
         except TypeError:
             self.solid_geometry = [self.solid_geometry]
 
@@ -1191,27 +1185,30 @@ class ExcellonObject(FlatCAMObj, Excellon):
                     else:
                         self.tools[tool]['multicolor'] = None
 
-                    # tool is a dict also
-                    for geo in self.tools[tool]["solid_geometry"]:
+                    # tool is a dict also; a panel is drawn from the source geometry, at the offsets of the instances
+                    tool_geometry, offsets = self.panel_geometry('solid_geometry', self.tools[tool])
+                    for geo in tool_geometry:
                         idx = self.add_shape(shape=geo,
                                              color=geo_color if multicolored else self.outline_color,
                                              face_color=geo_color if multicolored else self.fill_color,
                                              visible=visible,
-                                             layer=2)
+                                             layer=2,
+                                             offsets=offsets)
                         try:
                             self.shape_indexes_dict[tool].append(idx)
                         except KeyError:
                             self.shape_indexes_dict[tool] = [idx]
             else:
                 for tool in self.tools:
-                    for geo in self.tools[tool]['solid_geometry']:
-                        idx = self.add_shape(shape=geo.exterior, color='red', visible=visible)
+                    tool_geometry, offsets = self.panel_geometry('solid_geometry', self.tools[tool])
+                    for geo in tool_geometry:
+                        idx = self.add_shape(shape=geo.exterior, color='red', visible=visible, offsets=offsets)
                         try:
                             self.shape_indexes_dict[tool].append(idx)
                         except KeyError:
                             self.shape_indexes_dict[tool] = [idx]
                         for ints in geo.interiors:
-                            idx = self.add_shape(shape=ints, color='orange', visible=visible)
+                            idx = self.add_shape(shape=ints, color='orange', visible=visible, offsets=offsets)
                             try:
                                 self.shape_indexes_dict[tool].append(idx)
                             except KeyError:
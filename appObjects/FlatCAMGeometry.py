@@ -11,9 +11,9 @@
 # ##########################################################
 
 from shapely.geometry import MultiLineString, LineString, LinearRing, box
-import shapely.affinity as affinity
+from appCommon.AffineTransform import scale_matrix, translate_matrix
 
-from camlib import Geometry, grace
+from camlib import Geometry, invalidates_bounds, grace
 
 from appObjects.FlatCAMObj import *
 
@@ -527,18 +527,21 @@ class GeometryObject(FlatCAMObj, Geometry):
         self.tooluid += 1
 
         if not self.tools:
+            # the tools of a pending panel hold the panel source geometry, like the object, so it is not expanded here
+            solid_geometry, offsets = self.panel_geometry('solid_geometry')
             for toold in tools_list:
                 new_data = deepcopy(self.default_data)
+                new_tool = {
+                    'tooldia': self.app.dec_format(float(toold), self.decimals),
+                    'offset': 'Path',
+                    'offset_value': 0.0,
+                    'type': 'Rough',
+                    'tool_type': self.tool_type,
+                    'data': new_data,
+                    'solid_geometry': solid_geometry
+                }
                 self.tools.update({
-                    self.tooluid: {
-                        'tooldia': self.app.dec_format(float(toold), self.decimals),
-                        'offset': 'Path',
-                        'offset_value': 0.0,
-                        'type': 'Rough',
-                        'tool_type': self.tool_type,
-                        'data': new_data,
-                        'solid_geometry': self.solid_geometry
-                    }
+                    self.tooluid: new_tool if offsets is None else self.panel.share(new_tool, self)
                 })
                 self.tooluid += 1
         else:
@@ -1211,6 +1214,9 @@ class GeometryObject(FlatCAMObj, Geometry):
         self.ui.tool_offset_entry.hide()
         self.ui.tool_offset_lbl.hide()
 
+        # the geometry of the tools changed
+        self.invalidate_bounds()
+
         # we do this HACK to make sure the tools attribute to be serialized is updated in the self.ser_attrs list
         try:
             self.ser_attrs.remove('tools')
@@ -1291,6 +1297,9 @@ class GeometryObject(FlatCAMObj, Geometry):
         self.ui.tool_offset_entry.hide()
         self.ui.tool_offset_lbl.hide()
 
+        # the geometry of the tools changed
+        self.invalidate_bounds()
+
         # we do this HACK to make sure the tools attribute to be serialized is updated in the self.ser_attrs list
         try:
             self.ser_attrs.remove('tools')
@@ -1359,6 +1368,9 @@ class GeometryObject(FlatCAMObj, Geometry):
             self.ui.tool_offset_entry.hide()
             self.ui.tool_offset_lbl.hide()
 
+        # the geometry of the tools changed
+        self.invalidate_bounds()
+
         # we do this HACK to make sure the tools attribute to be serialized is updated in the self.ser_attrs list
         try:
             self.ser_attrs.remove('tools')
@@ -1455,6 +1467,9 @@ class GeometryObject(FlatCAMObj, Geometry):
             self.ui.tool_offset_entry.hide()
             self.ui.tool_offset_lbl.hide()
 
+        # the geometry of the tools changed
+        self.invalidate_bounds()
+
         # we do this HACK to make sure the tools attribute to be serialized is updated in the self.ser_attrs list
         try:
             self.ser_attrs.remove('tools')
@@ -2655,6 +2670,7 @@ class GeometryObject(FlatCAMObj, Geometry):
         # Send to worker
         self.app.worker_task.emit({'fcn': job_thread, 'params': [self]})
 
+    @invalidates_bounds
     def scale(self, xfactor, yfactor=None, point=None):
         """
         Scales all geometry by a given factor.
@@ -2693,59 +2709,12 @@ class GeometryObject(FlatCAMObj, Geometry):
         else:
             px, py = point
 
-        self.geo_len = 0
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def scale_recursion(geom):
-            if type(geom) is list:
-                geoms = []
-                for local_geom in geom:
-                    geoms.append(scale_recursion(local_geom))
-                return geoms
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.scale(geom, xfactor, yfactor, origin=(px, py))
-                except AttributeError:
-                    return geom
-
-        if self.multigeo is True:
-            for tool in self.tools:
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(self.tools[tool]['solid_geometry'])
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                self.tools[tool]['solid_geometry'] = scale_recursion(self.tools[tool]['solid_geometry'])
-
-        try:
-            # variables to display the percentage of work done
-            self.geo_len = 0
-            try:
-                self.geo_len = len(self.solid_geometry)
-            except TypeError:
-                self.geo_len = 1
-            self.old_disp_number = 0
-            self.el_count = 0
-
-            self.solid_geometry = scale_recursion(self.solid_geometry)
-        except AttributeError:
-            self.solid_geometry = []
-            return
+        self.affine_transform(scale_matrix(xfactor, yfactor, (px, py)))
 
         self.app.proc_container.new_text = ''
         self.app.inform.emit('[success] %s' % _("Done."))
 
+    @invalidates_bounds
     def offset(self, vect):
         """
         Offsets all geometry by a given vector/
@@ -2769,56 +2738,12 @@ class GeometryObject(FlatCAMObj, Geometry):
         if dx == 0 and dy == 0:
             return
 
-        self.geo_len = 0
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def translate_recursion(geom):
-            if type(geom) is list:
-                geoms = []
-                for local_geom in geom:
-                    geoms.append(translate_recursion(local_geom))
-                return geoms
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.translate(geom, xoff=dx, yoff=dy)
-                except AttributeError:
-                    return geom
-
-        if self.multigeo is True:
-            for tool in self.tools:
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(self.tools[tool]['solid_geometry'])
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                self.tools[tool]['solid_geometry'] = translate_recursion(self.tools[tool]['solid_geometry'])
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        self.solid_geometry = translate_recursion(self.solid_geometry)
+        self.affine_transform(translate_matrix(dx, dy))
 
         self.app.proc_container.new_text = ''
         self.app.inform.emit('[success] %s' % _("Done."))
 
+    @invalidates_bounds
     def convert_units(self, units):
         log.debug("FlatCAMObj.GeometryObject.convert_units()")
 
@@ -3039,7 +2964,7 @@ class GeometryObject(FlatCAMObj, Geometry):
             self.ui.exclusion_table.selectAll()
             self.draw_sel_shape()
 
-    def plot_element(self, element, color=None, visible=None):
+    def plot_element(self, element, color=None, visible=None, offsets=None):
 
         if color is None:
             color = '#FF0000FF'
@@ -3047,11 +2972,11 @@ class GeometryObject(FlatCAMObj, Geometry):
         visible = visible if visible else self.options['plot']
         try:
             for sub_el in element:
-                self.plot_element(sub_el, color=color)
+                self.plot_element(sub_el, color=color, offsets=offsets)
 
         except TypeError:  # Element is not iterable...
             # if self.app.is_legacy is False:
-            self.add_shape(shape=element, color=color, visible=visible, layer=0)
+            self.add_shape(shape=element, color=color, visible=visible, layer=0, offsets=offsets)
 
     def plot(self, visible=None, kind=None, plot_tool=None):
         """
@@ -3116,12 +3041,12 @@ class GeometryObject(FlatCAMObj, Geometry):
                     self.plot_element(solid_geometry, visible=visible, color=color)
             else:
                 # plot solid geometry that may be an direct attribute of the geometry object
-                # for SingleGeo
-                if self.solid_geometry:
-                    solid_geometry = self.solid_geometry
+                # for SingleGeo; a panel is drawn from the source geometry, at the offsets of the instances
+                solid_geometry, offsets = self.panel_geometry('solid_geometry')
+                if solid_geometry:
                     color = self.app.defaults["geometry_plot_line"]
 
-                    self.plot_element(solid_geometry, visible=visible, color=color)
+                    self.plot_element(solid_geometry, visible=visible, color=color, offsets=offsets)
 
             # self.plot_element(self.solid_geometry, visible=self.options['plot'])
 
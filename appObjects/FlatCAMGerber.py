@@ -11,13 +11,15 @@
 # ##########################################################
 
 
-from shapely.geometry import Point, MultiLineString, LineString, LinearRing
+from shapely.geometry import Point, LineString, LinearRing
 
 from appParsers.ParseGerber import Gerber
+from appCommon.GerberWriter import GerberWriter
 from appObjects.FlatCAMObj import *
 
 import numpy as np
 from copy import deepcopy
+from io import StringIO
 
 import gettext
 import appTranslation as fcTranslate
@@ -885,10 +887,11 @@ class GerberObject(FlatCAMObj, Gerber):
             visible = kwargs['visible']
 
         # if the Follow Geometry checkbox is checked then plot only the follow geometry
+        # a panel is drawn from the source geometry, at the offsets of the instances
         if self.ui.follow_cb.get_value():
-            geometry = self.follow_geometry
+            geometry, offsets = self.panel_geometry('follow_geometry')
         else:
-            geometry = self.solid_geometry
+            geometry, offsets = self.panel_geometry('solid_geometry')
 
         # Make sure geometry is iterable.
         try:
@@ -923,7 +926,7 @@ class GerberObject(FlatCAMObj, Gerber):
                     if type(g) == Polygon or type(g) == LineString:
                         self.add_shape(shape=g, color=color,
                                        face_color=random_color() if self.options['multicolored']
-                                       else face_color, visible=visible)
+                                       else face_color, visible=visible, offsets=offsets)
                     elif type(g) == Point:
                         pass
                     else:
@@ -931,22 +934,22 @@ class GerberObject(FlatCAMObj, Gerber):
                             for el in g:
                                 self.add_shape(shape=el, color=color,
                                                face_color=random_color() if self.options['multicolored']
-                                               else face_color, visible=visible)
+                                               else face_color, visible=visible, offsets=offsets)
                         except TypeError:
                             self.add_shape(shape=g, color=color,
                                            face_color=random_color() if self.options['multicolored']
-                                           else face_color, visible=visible)
+                                           else face_color, visible=visible, offsets=offsets)
             else:
                 for g in geometry:
                     if type(g) == Polygon or type(g) == LineString:
                         self.add_shape(shape=g, color=random_color() if self.options['multicolored'] else 'black',
-                                       visible=visible)
+                                       visible=visible, offsets=offsets)
                     elif type(g) == Point:
                         pass
                     else:
                         for el in g:
                             self.add_shape(shape=el, color=random_color() if self.options['multicolored'] else 'black',
-                                           visible=visible)
+                                           visible=visible, offsets=offsets)
             self.shapes.redraw(
                 # update_colors=(self.fill_color, self.outline_color),
                 # indexes=self.app.plotcanvas.shape_collection.data.keys()
@@ -1132,355 +1135,113 @@ class GerberObject(FlatCAMObj, Gerber):
         :param factor: factor to be applied onto the Gerber coordinates
         :return: Gerber_code
         """
-        log.debug("GerberObject.export_gerber() --> Generating the Gerber code from the selected Gerber file")
-
-        def tz_format(x, y, fac):
-            x_c = x * fac
-            y_c = y * fac
-
-            x_form = "{:.{dec}f}".format(x_c, dec=fract)
-            y_form = "{:.{dec}f}".format(y_c, dec=fract)
-
-            # extract whole part and decimal part
-            x_form = x_form.partition('.')
-            y_form = y_form.partition('.')
-
-            # left padd the 'whole' part with zeros
-            x_whole = x_form[0].rjust(whole, '0')
-            y_whole = y_form[0].rjust(whole, '0')
-
-            # restore the coordinate padded in the left with 0 and added the decimal part
-            # without the decinal dot
-            x_form = x_whole + x_form[2]
-            y_form = y_whole + y_form[2]
-            return x_form, y_form
-
-        def lz_format(x, y, fac):
-            x_c = x * fac
-            y_c = y * fac
+        gerber_code = StringIO()
+        if self.write_gerber_code(gerber_code, whole, fract, g_zeros=g_zeros, factor=factor) == 'fail':
+            return 'fail'
+        return gerber_code.getvalue()
 
-            x_form = "{:.{dec}f}".format(x_c, dec=fract).replace('.', '')
-            y_form = "{:.{dec}f}".format(y_c, dec=fract).replace('.', '')
+    def write_gerber_code(self, fp, whole, fract, g_zeros='L', factor=1):
+        """
+        Writes the Gerber code of the apertures to a file. The code is written in chunks and the coordinates are
+        formatted in bulk by a GerberWriter, so the Gerber code of the whole object is never held in memory.
 
-            # pad with rear zeros
-            x_form.ljust(length, '0')
-            y_form.ljust(length, '0')
+        :param fp: file like object where the Gerber code is written
+        :param whole: how many digits in the whole part of coordinates
+        :param fract: how many decimals in coordinates
+        :param g_zeros: type of the zero suppression used: LZ or TZ; string
+        :param factor: factor to be applied onto the Gerber coordinates
+        :return: 'fail' if the object has no apertures
+        """
+        log.debug("GerberObject.write_gerber_code() --> Generating the Gerber code from the selected Gerber file")
 
-            return x_form, y_form
+        if not self.apertures:
+            log.debug("FlatCAMObj.GerberObject.write_gerber_code() --> Gerber Object is empty: no apertures.")
+            return 'fail'
 
-        # Gerber code is stored here
-        gerber_code = ''
+        writer = GerberWriter(fp, whole, fract, zeros=g_zeros, factor=factor)
 
         # apertures processing
         try:
-            length = whole + fract
-            if '0' in self.apertures:
-                if 'geometry' in self.apertures['0']:
-                    for geo_elem in self.apertures['0']['geometry']:
-                        if 'solid' in geo_elem:
-                            geo = geo_elem['solid']
-                            if not geo.is_empty and not isinstance(geo, LineString) and \
-                                    not isinstance(geo, MultiLineString) and not isinstance(geo, Point):
-                                gerber_code += 'G36*\n'
-                                geo_coords = list(geo.exterior.coords)
-                                # first command is a move with pen-up D02 at the beginning of the geo
-                                if g_zeros == 'T':
-                                    x_formatted, y_formatted = tz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                else:
-                                    x_formatted, y_formatted = lz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                for coord in geo_coords[1:]:
-                                    if g_zeros == 'T':
-                                        x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                        gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                       yform=y_formatted)
-                                    else:
-                                        x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                        gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                       yform=y_formatted)
-                                gerber_code += 'D02*\n'
-                                gerber_code += 'G37*\n'
-
-                                clear_list = list(geo.interiors)
-                                if clear_list:
-                                    gerber_code += '%LPC*%\n'
-                                    for clear_geo in clear_list:
-                                        gerber_code += 'G36*\n'
-                                        geo_coords = list(clear_geo.coords)
-
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                            prev_coord = coord
-
-                                        gerber_code += 'D02*\n'
-                                        gerber_code += 'G37*\n'
-                                    gerber_code += '%LPD*%\n'
-                            elif isinstance(geo, LineString) or isinstance(geo, MultiLineString) or \
-                                    isinstance(geo, Point):
-                                try:
-                                    if not geo.is_empty:
-                                        if isinstance(geo, Point):
-                                            if g_zeros == 'T':
-                                                x_formatted, y_formatted = tz_format(geo.x, geo.y, factor)
-                                                gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                            else:
-                                                x_formatted, y_formatted = lz_format(geo.x, geo.y, factor)
-                                                gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                        else:
-                                            geo_coords = list(geo.coords)
-                                            # first command is a move with pen-up D02 at the beginning of the geo
-                                            if g_zeros == 'T':
-                                                x_formatted, y_formatted = tz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                            else:
-                                                x_formatted, y_formatted = lz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-
-                                            prev_coord = geo_coords[0]
-                                            for coord in geo_coords[1:]:
-                                                if coord != prev_coord:
-                                                    if g_zeros == 'T':
-                                                        x_formatted, y_formatted = tz_format(coord[0], coord[1],
-                                                                                             factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-                                                    else:
-                                                        x_formatted, y_formatted = lz_format(coord[0], coord[1],
-                                                                                             factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-                                                prev_coord = coord
-
-                                            # gerber_code += "D02*\n"
-                                except Exception as e:
-                                    log.debug("FlatCAMObj.GerberObject.export_gerber() 'follow' --> %s" % str(e))
-                        if 'clear' in geo_elem:
-                            geo = geo_elem['clear']
-                            if not geo.is_empty:
-                                gerber_code += '%LPC*%\n'
-                                gerber_code += 'G36*\n'
-                                geo_coords = list(geo.exterior.coords)
-                                # first command is a move with pen-up D02 at the beginning of the geo
-                                if g_zeros == 'T':
-                                    x_formatted, y_formatted = tz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-                                else:
-                                    x_formatted, y_formatted = lz_format(geo_coords[0][0], geo_coords[0][1], factor)
-                                    gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                   yform=y_formatted)
-
-                                prev_coord = geo_coords[0]
-                                for coord in geo_coords[1:]:
-                                    if coord != prev_coord:
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                            gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                            gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                    prev_coord = coord
-
-                                gerber_code += 'D02*\n'
-                                gerber_code += 'G37*\n'
-                                gerber_code += '%LPD*%\n'
+            if '0' in self.apertures and 'geometry' in self.apertures['0']:
+                for geo_elem in self.apertures['0']['geometry']:
+                    if 'solid' in geo_elem:
+                        geo = geo_elem['solid']
+                        if not geo.is_empty and isinstance(geo, (Polygon, MultiPolygon)):
+                            for poly in (geo.geoms if isinstance(geo, MultiPolygon) else [geo]):
+                                writer.write('G36*\n')
+                                writer.path(poly.exterior.coords)
+                                writer.write('D02*\nG37*\n')
+
+                                if poly.interiors:
+                                    writer.write('%LPC*%\n')
+                                    for clear_geo in poly.interiors:
+                                        writer.write('G36*\n')
+                                        writer.path(clear_geo.coords)
+                                        writer.write('D02*\nG37*\n')
+                                    writer.write('%LPD*%\n')
+                        else:
+                            try:
+                                self.write_gerber_geometry(writer, geo, polygons=False)
+                            except Exception as e:
+                                log.debug("FlatCAMObj.GerberObject.write_gerber_code() 'follow' --> %s" % str(e))
+                    if 'clear' in geo_elem:
+                        geo = geo_elem['clear']
+                        if not geo.is_empty:
+                            writer.write('%LPC*%\nG36*\n')
+                            writer.path(geo.exterior.coords)
+                            writer.write('D02*\nG37*\n%LPD*%\n')
         except Exception as e:
-            log.debug("FlatCAMObj.GerberObject.export_gerber() '0' aperture --> %s" % str(e))
+            log.debug("FlatCAMObj.GerberObject.write_gerber_code() '0' aperture --> %s" % str(e))
 
         for apid in self.apertures:
             if apid == '0':
                 continue
-            else:
-                gerber_code += 'D%s*\n' % str(apid)
-                if 'geometry' in self.apertures[apid]:
-                    for geo_elem in self.apertures[apid]['geometry']:
-                        try:
-                            if 'follow' in geo_elem:
-                                geo = geo_elem['follow']
-                                if not geo.is_empty:
-                                    if isinstance(geo, Point):
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(geo.x, geo.y, factor)
-                                            gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(geo.x, geo.y, factor)
-                                            gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                    else:
-                                        geo_coords = list(geo.coords)
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                            prev_coord = coord
-
-                                        # gerber_code += "D02*\n"
-                        except Exception as e:
-                            log.debug("FlatCAMObj.GerberObject.export_gerber() 'follow' --> %s" % str(e))
 
-                        try:
-                            if 'clear' in geo_elem:
-                                gerber_code += '%LPC*%\n'
-
-                                geo = geo_elem['clear']
-                                if not geo.is_empty:
-                                    if isinstance(geo, Point):
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(geo.x, geo.y, factor)
-                                            gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(geo.x, geo.y, factor)
-                                            gerber_code += "X{xform}Y{yform}D03*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                    elif isinstance(geo, Polygon):
-                                        geo_coords = list(geo.exterior.coords)
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-
-                                            prev_coord = coord
-
-                                        for geo_int in geo.interiors:
-                                            geo_coords = list(geo_int.coords)
-                                            # first command is a move with pen-up D02 at the beginning of the geo
-                                            if g_zeros == 'T':
-                                                x_formatted, y_formatted = tz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-                                            else:
-                                                x_formatted, y_formatted = lz_format(
-                                                    geo_coords[0][0], geo_coords[0][1], factor)
-                                                gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                               yform=y_formatted)
-
-                                            prev_coord = geo_coords[0]
-                                            for coord in geo_coords[1:]:
-                                                if coord != prev_coord:
-                                                    if g_zeros == 'T':
-                                                        x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-                                                    else:
-                                                        x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                        gerber_code += "X{xform}Y{yform}D01*\n".format(
-                                                            xform=x_formatted,
-                                                            yform=y_formatted)
-
-                                                prev_coord = coord
-                                    else:
-                                        geo_coords = list(geo.coords)
-                                        # first command is a move with pen-up D02 at the beginning of the geo
-                                        if g_zeros == 'T':
-                                            x_formatted, y_formatted = tz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-                                        else:
-                                            x_formatted, y_formatted = lz_format(
-                                                geo_coords[0][0], geo_coords[0][1], factor)
-                                            gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted,
-                                                                                           yform=y_formatted)
-
-                                        prev_coord = geo_coords[0]
-                                        for coord in geo_coords[1:]:
-                                            if coord != prev_coord:
-                                                if g_zeros == 'T':
-                                                    x_formatted, y_formatted = tz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-                                                else:
-                                                    x_formatted, y_formatted = lz_format(coord[0], coord[1], factor)
-                                                    gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted,
-                                                                                                   yform=y_formatted)
-
-                                            prev_coord = coord
-                                        # gerber_code += "D02*\n"
-                                    gerber_code += '%LPD*%\n'
-                        except Exception as e:
-                            log.debug("FlatCAMObj.GerberObject.export_gerber() 'clear' --> %s" % str(e))
+            writer.write('D%s*\n' % str(apid))
+            for geo_elem in self.apertures[apid].get('geometry', []):
+                try:
+                    if 'follow' in geo_elem:
+                        self.write_gerber_geometry(writer, geo_elem['follow'], polygons=False)
+                except Exception as e:
+                    log.debug("FlatCAMObj.GerberObject.write_gerber_code() 'follow' --> %s" % str(e))
 
-        if not self.apertures:
-            log.debug("FlatCAMObj.GerberObject.export_gerber() --> Gerber Object is empty: no apertures.")
-            return 'fail'
+                try:
+                    if 'clear' in geo_elem and not geo_elem['clear'].is_empty:
+                        writer.write('%LPC*%\n')
+                        self.write_gerber_geometry(writer, geo_elem['clear'])
+                        writer.write('%LPD*%\n')
+                except Exception as e:
+                    log.debug("FlatCAMObj.GerberObject.write_gerber_code() 'clear' --> %s" % str(e))
+
+        writer.flush()
+
+    @staticmethod
+    def write_gerber_geometry(writer, geo, polygons=True):
+        """
+        Writes a geometry drawn or flashed with the current aperture: the points are flashed and the lines and the
+        polygon contours are drawn.
 
-        return gerber_code
+        :param writer: GerberWriter
+        :param geo: Shapely geometry
+        :param polygons: if False the polygons are skipped; the 'follow' geometry of the apertures is written
+            without its polygons, which are the outlines of the regions and not tracks
+        :return:
+        """
+        if geo.is_empty:
+            return
+
+        if isinstance(geo, Point):
+            writer.flash(geo.coords)
+        elif isinstance(geo, Polygon):
+            if polygons:
+                writer.path(geo.exterior.coords)
+                for interior in geo.interiors:
+                    writer.path(interior.coords)
+        elif hasattr(geo, 'geoms'):
+            for sub_geo in geo.geoms:
+                GerberObject.write_gerber_geometry(writer, sub_geo, polygons=polygons)
+        else:
+            writer.path(geo.coords)
 
     @staticmethod
     def merge(grb_list, grb_final):
@@ -1542,6 +1303,10 @@ class GerberObject(FlatCAMObj, Gerber):
         grb_final.solid_geometry = MultiPolygon(grb_final.solid_geometry)
         grb_final.follow_geometry = MultiPolygon(grb_final.follow_geometry)
 
+    def affine_transform(self, matrix):
+        Gerber.affine_transform(self, matrix=matrix)
+        self.replotApertures.emit()
+
     def mirror(self, axis, point):
         Gerber.mirror(self, axis=axis, point=point)
         self.replotApertures.emit()
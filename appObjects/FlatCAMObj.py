@@ -172,6 +172,18 @@ class FlatCAMObj(QtCore.QObject):
 
         self.optionChanged.emit(key)
 
+    def bounds_changed(self):
+        """
+        Called when the geometry of the object changes. Lets the collection know that the bounds of this object have
+        to be found again.
+
+        :return:    None
+        """
+        try:
+            self.app.collection.on_object_bounds_changed(self)
+        except AttributeError:
+            pass
+
     def set_ui(self, ui):
         self.ui = ui
 
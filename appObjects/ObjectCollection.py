@@ -28,6 +28,7 @@ import inspect  # TODO: Remove
 
 import re
 import logging
+import threading
 from copy import deepcopy
 from numpy import Inf
 
@@ -302,6 +303,16 @@ class ObjectCollection(QtCore.QAbstractItemModel):
         # same as above only for objects that are plotted
         self.plot_promises = set()
 
+        # The bounds of all the objects, found once from the bounds of each object and then updated only with the
+        # bounds of the objects that were added, changed or deleted since. None when they have to be found again.
+        self.collection_bounds = None
+        # the bounds of each object used in the collection bounds
+        self.objects_bounds = {}
+        # the objects whose bounds changed (True) or that were deleted (False) since the last get_bounds()
+        self.changed_bounds = {}
+        # the objects let the collection know about their changes from any thread
+        self.bounds_lock = threading.RLock()
+
         # ## View
         self.view = KeySensitiveListView(self.app)
         self.view.setModel(self)
@@ -596,6 +607,12 @@ class ObjectCollection(QtCore.QAbstractItemModel):
 
         self.app.should_we_save = True
 
+        # the bounds of the new object are added to the collection bounds by the next get_bounds()
+        with self.bounds_lock:
+            if self.collection_bounds is not None:
+                self.objects_bounds[obj] = None
+                self.changed_bounds[obj] = True
+
         self.app.object_status_changed.emit(obj, 'append', name)
 
         # decide if to show or hide the Notebook side of the screen
@@ -617,31 +634,76 @@ class ObjectCollection(QtCore.QAbstractItemModel):
     def get_bounds(self):
         """
         Finds coordinates bounding all objects in the collection.
+        The bounds are kept and updated only with the bounds of the objects added, changed or deleted since the last
+        call. They are found again from all the objects only when an object that was on the edge of the bounds
+        changed or was deleted.
 
         :return: [xmin, ymin, xmax, ymax]
         :rtype: list
         """
         log.debug(str(inspect.stack()[1][3]) + "--> OC.get_bounds()")
 
-        # TODO: Move the operation out of here.
+        with self.bounds_lock:
+            changed, self.changed_bounds = self.changed_bounds, {}
 
-        xmin = Inf
-        ymin = Inf
-        xmax = -Inf
-        ymax = -Inf
+            if self.collection_bounds is not None:
+                for obj, present in changed.items():
+                    old_bounds = self.objects_bounds.pop(obj, None)
+                    if old_bounds is not None and self.on_bounds_edge(old_bounds):
+                        self.collection_bounds = None
+                        break
+                    if present:
+                        self.add_object_bounds(obj)
 
-        # for obj in self.object_list:
-        for obj in self.get_list():
-            try:
-                gxmin, gymin, gxmax, gymax = obj.bounds()
-                xmin = min([xmin, gxmin])
-                ymin = min([ymin, gymin])
-                xmax = max([xmax, gxmax])
-                ymax = max([ymax, gymax])
-            except Exception as e:
-                log.warning("DEV WARNING: Tried to get bounds of empty geometry. %s" % str(e))
+            if self.collection_bounds is None:
+                self.collection_bounds = [Inf, Inf, -Inf, -Inf]
+                self.objects_bounds = {}
+                for obj in self.get_list():
+                    self.add_object_bounds(obj)
+
+            return list(self.collection_bounds)
+
+    def add_object_bounds(self, obj):
+        """
+        Finds the bounds of an object and adds them to the collection bounds.
+
+        :param obj:     FlatCAMObj
+        :return:        None
+        """
+        try:
+            bounds = tuple(float(coord) for coord in obj.bounds())
+            xmin, ymin, xmax, ymax = self.collection_bounds
+            self.collection_bounds = [min(xmin, bounds[0]), min(ymin, bounds[1]),
+                                      max(xmax, bounds[2]), max(ymax, bounds[3])]
+        except Exception as e:
+            log.warning("DEV WARNING: Tried to get bounds of empty geometry. %s" % str(e))
+            bounds = None
+
+        self.objects_bounds[obj] = bounds
+        # finding the bounds may have marked the object as changed
+        self.changed_bounds.pop(obj, None)
+
+    def on_bounds_edge(self, bounds):
+        """
+        :param bounds:  the bounds of an object
+        :return:        True if the bounds touch the collection bounds, so the collection bounds may shrink
+        :rtype:         bool
+        """
+        xmin, ymin, xmax, ymax = self.collection_bounds
+        return bounds[0] <= xmin or bounds[1] <= ymin or bounds[2] >= xmax or bounds[3] >= ymax
 
-        return [xmin, ymin, xmax, ymax]
+    def on_object_bounds_changed(self, obj, present=True):
+        """
+        Marks an object whose bounds changed, to be updated in the collection bounds by the next get_bounds().
+        Can be called from any thread.
+
+        :param obj:         FlatCAMObj
+        :param present:     False if the object was deleted from the collection
+        :return:            None
+        """
+        with self.bounds_lock:
+            if obj in self.objects_bounds:
+                self.changed_bounds[obj] = present
 
     def get_by_name(self, name, isCaseSensitive=None):
         """
@@ -694,6 +756,7 @@ class ObjectCollection(QtCore.QAbstractItemModel):
                 "delete_active() --> Could not remove the old object name from auto-completer model list. %s" % str(e))
 
         self.app.object_status_changed.emit(active.obj, 'delete', name)
+        self.on_object_bounds_changed(active.obj, present=False)
 
         # ############ OBJECT DELETION FROM MODEL STARTS HERE ####################
         self.beginRemoveRows(self.index(group.row(), 0, QtCore.QModelIndex()), active.row(), active.row())
@@ -747,6 +810,7 @@ class ObjectCollection(QtCore.QAbstractItemModel):
                 "delete_by_name() --> Could not remove the old object name from auto-completer model list. %s" % str(e))
 
         self.app.object_status_changed.emit(deleted.obj, 'delete', name)
+        self.on_object_bounds_changed(deleted.obj, present=False)
 
         # ############ OBJECT DELETION FROM MODEL STARTS HERE ####################
         self.beginRemoveRows(self.index(group.row(), 0, QtCore.QModelIndex()), deleted.row(), deleted.row())
@@ -798,6 +862,11 @@ class ObjectCollection(QtCore.QAbstractItemModel):
 
             self.checked_indexes = []
 
+            with self.bounds_lock:
+                self.collection_bounds = None
+                self.objects_bounds = {}
+                self.changed_bounds = {}
+
             for group in self.root_item.child_items:
                 group.remove_children()
 
@@ -6,7 +6,9 @@
 # MIT Licence                                                 #
 # ########################################################## ##
 
-from camlib import Geometry, grace
+from camlib import Geometry, invalidates_bounds, grace
+from appCommon.AffineTransform import transform_geometry, scale_matrix, translate_matrix, mirror_matrix, \
+    rotate_matrix, skew_matrix
 
 import shapely.affinity as affinity
 from shapely.geometry import Point, LineString
@@ -1095,10 +1097,18 @@ class Excellon(Geometry):
 
         log.debug("appParsers.ParseExcellon.Excellon.bounds()")
 
+        panel = self.panel
+        if panel is not None:
+            return panel.bounds()
+
         if self.solid_geometry is None or not self.tools:
             log.debug("appParsers.ParseExcellon.Excellon -> solid_geometry is None")
             return 0, 0, 0, 0
 
+        cached = self.cached_bounds()
+        if cached is not None:
+            return cached
+
         def bounds_rec(obj):
             if type(obj) is list:
                 minx = np.Inf
@@ -1137,8 +1147,9 @@ class Excellon(Geometry):
             maxx_list.append(emaxx)
             maxy_list.append(emaxy)
 
-        return min(minx_list), min(miny_list), max(maxx_list), max(maxy_list)
+        return self.cache_bounds((min(minx_list), min(miny_list), max(maxx_list), max(maxy_list)))
 
+    @invalidates_bounds
     def convert_units(self, units):
         """
         This function first convert to the the units found in the Excellon file but it converts tools that
@@ -1180,6 +1191,30 @@ class Excellon(Geometry):
         self.create_geometry()
         return factor
 
+    @invalidates_bounds
+    def affine_transform(self, matrix):
+        """
+        Applies an affine transformation to the drills, the slots and the solid_geometry of all the tools, in one
+        pass, and recreates the geometry.
+
+        :param matrix:  3x3 affine matrix (see appCommon.AffineTransform)
+        :return:        None
+        """
+        log.debug("appParsers.ParseExcellon.Excellon.affine_transform()")
+
+        tools_geo = {}
+        for tool in self.tools:
+            tools_geo[tool] = {key: self.tools[tool][key] for key in ('drills', 'slots', 'solid_geometry')
+                               if key in self.tools[tool]}
+
+        # the slots are (start Point, stop Point) tuples and they stay tuples
+        tools_geo = transform_geometry(tools_geo, matrix)
+        for tool in tools_geo:
+            self.tools[tool].update(tools_geo[tool])
+
+        self.create_geometry()
+
+    @invalidates_bounds
     def scale(self, xfactor, yfactor=None, point=None):
         """
         Scales geometry on the XY plane in the object by a given factor.
@@ -1207,58 +1242,10 @@ class Excellon(Geometry):
         if xfactor == 0 and yfactor == 0:
             return
 
-        def scale_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(scale_geom(g))
-                return new_obj
-            else:
-                try:
-                    return affinity.scale(obj, xfactor, yfactor, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for tool in self.tools:
-            # Scale Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.scale(drill, xfactor, yfactor, origin=(px, py)))
-                self.tools[tool]['drills'] = new_drills
-
-            # Scale Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.scale(slot[0], xfactor, yfactor, origin=(px, py))
-                    new_stop = affinity.scale(slot[1], xfactor, yfactor, origin=(px, py))
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Scale solid_geometry
-            self.tools[tool]['solid_geometry'] = scale_geom(self.tools[tool]['solid_geometry'])
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        self.create_geometry()
+        self.affine_transform(scale_matrix(xfactor, yfactor, (px, py)))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def offset(self, vect):
         """
         Offsets geometry on the XY plane in the object by a given vector.
@@ -1274,59 +1261,10 @@ class Excellon(Geometry):
         if dx == 0 and dy == 0:
             return
 
-        def offset_geom(obj):
-            try:
-                new_obj = []
-                for geo in obj:
-                    new_obj.append(offset_geom(geo))
-                return new_obj
-            except TypeError:
-                try:
-                    return affinity.translate(obj, xoff=dx, yoff=dy)
-                except AttributeError:
-                    return obj
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for tool in self.tools:
-            # Offset Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.translate(drill, xoff=dx, yoff=dy))
-                self.tools[tool]['drills'] = new_drills
-
-            # Offset Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.translate(slot[0], xoff=dx, yoff=dy)
-                    new_stop = affinity.translate(slot[1], xoff=dx, yoff=dy)
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Offset solid_geometry
-            self.tools[tool]['solid_geometry'] = offset_geom(self.tools[tool]['solid_geometry'])
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        # Recreate geometry
-        self.create_geometry()
+        self.affine_transform(translate_matrix(dx, dy))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def mirror(self, axis, point):
         """
 
@@ -1338,64 +1276,10 @@ class Excellon(Geometry):
         """
         log.debug("appParsers.ParseExcellon.Excellon.mirror()")
 
-        px, py = point
-        xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
-
-        def mirror_geom(obj):
-            try:
-                new_obj = []
-                for geo in obj:
-                    new_obj.append(mirror_geom(geo))
-                return new_obj
-            except TypeError:
-                try:
-                    return affinity.scale(obj, xscale, yscale, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        # Modify data
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        for tool in self.tools:
-            # Offset Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.scale(drill, xscale, yscale, origin=(px, py)))
-                self.tools[tool]['drills'] = new_drills
-
-            # Offset Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.scale(slot[0], xscale, yscale, origin=(px, py))
-                    new_stop = affinity.scale(slot[1], xscale, yscale, origin=(px, py))
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Offset solid_geometry
-            self.tools[tool]['solid_geometry'] = mirror_geom(self.tools[tool]['solid_geometry'])
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        # Recreate geometry
-        self.create_geometry()
+        self.affine_transform(mirror_matrix(axis, point))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def skew(self, angle_x=None, angle_y=None, point=None):
         """
         Shear/Skew the geometries of an object by angles along x and y dimensions.
@@ -1403,9 +1287,7 @@ class Excellon(Geometry):
 
         :param angle_x:
         :param angle_y:
-            The shear angle(s) for the x and y axes respectively. These can be
-            specified in either degrees (default) or radians by setting
-            use_radians=True.
+            The shear angle(s) for the x and y axes respectively, in degrees.
         :param point:       Origin point for Skew
 
         See shapely manual for more information:
@@ -1422,69 +1304,21 @@ class Excellon(Geometry):
         if angle_x == 0 and angle_y == 0:
             return
 
-        def skew_geom(obj):
-            try:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(skew_geom(g))
-                return new_obj
-            except TypeError:
-                try:
-                    return affinity.skew(obj, angle_x, angle_y, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
         if point is None:
             px, py = 0, 0
         else:
             px, py = point
 
-        for tool in self.tools:
-            # Offset Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.skew(drill, angle_x, angle_y, origin=(px, py)))
-                self.tools[tool]['drills'] = new_drills
-
-            # Offset Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.skew(slot[0], angle_x, angle_y, origin=(px, py))
-                    new_stop = affinity.skew(slot[1], angle_x, angle_y, origin=(px, py))
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Offset solid_geometry
-            self.tools[tool]['solid_geometry'] = skew_geom(self.tools[tool]['solid_geometry'])
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
-
-        self.create_geometry()
+        self.affine_transform(skew_matrix(angle_x, angle_y, (px, py)))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def rotate(self, angle, point=None):
         """
         Rotate the geometry of an object by an angle around the 'point' coordinates
 
         :param angle:
-        :param point:   tuple of coordinates (x, y)
+        :param point:   tuple of coordinates (x, y); if None the center of the object bounding box is used
         :return:        None
         """
         log.debug("appParsers.ParseExcellon.Excellon.rotate()")
@@ -1492,69 +1326,14 @@ class Excellon(Geometry):
         if angle == 0:
             return
 
-        def rotate_geom(obj, origin=None):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(rotate_geom(g))
-                return new_obj
-            else:
-                if origin:
-                    try:
-                        return affinity.rotate(obj, angle, origin=origin)
-                    except AttributeError:
-                        return obj
-                else:
-                    try:
-                        return affinity.rotate(obj, angle, origin=orig)
-                    except AttributeError:
-                        return obj
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.tools)
-        except TypeError:
-            self.geo_len = 1
-        self.old_disp_number = 0
-        self.el_count = 0
-
         if point is None:
-            orig = 'center'
-        else:
-            orig = point
-
-        for tool in self.tools:
-            # Offset Drills
-            if 'drills' in self.tools[tool]:
-                new_drills = []
-                for drill in self.tools[tool]['drills']:
-                    new_drills.append(affinity.rotate(drill, angle, origin=orig))
-                self.tools[tool]['drills'] = new_drills
-
-            # Offset Slots
-            if 'slots' in self.tools[tool]:
-                new_slots = []
-                for slot in self.tools[tool]['slots']:
-                    new_start = affinity.rotate(slot[0], angle, origin=orig)
-                    new_stop = affinity.rotate(slot[1], angle, origin=orig)
-                    new_slot = (new_start, new_stop)
-                    new_slots.append(new_slot)
-                self.tools[tool]['slots'] = new_slots
-
-            # Offset solid_geometry
-            self.tools[tool]['solid_geometry'] = rotate_geom(self.tools[tool]['solid_geometry'], origin=orig)
-
-            # update status display
-            self.el_count += 1
-            disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-            if self.old_disp_number < disp_number <= 100:
-                self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                self.old_disp_number = disp_number
+            xmin, ymin, xmax, ymax = self.bounds()
+            point = ((xmin + xmax) / 2, (ymin + ymax) / 2)
 
-        self.create_geometry()
+        self.affine_transform(rotate_matrix(angle, point))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def buffer(self, distance, join, factor):
         """
 
@@ -0,0 +1,482 @@
+# ############################################################
+# FlatCAM: 2D Post-processing for Manufacturing              #
+# http://flatcam.org                                         #
+# MIT Licence                                                #
+# ############################################################
+
+"""
+G-Code parsing engine used by CNCjob.gcode_parse() and CNCjob.excellon_tool_gcode_parse().
+
+The program is tokenized in one pass into a NumPy table with one row for each line and one column for each of the
+codes G, X, Y, Z, I, J, F (NaN where the line does not have the code). The modal state (current position, height and
+motion mode) is then forward filled over the rows and the tool paths are produced as slices of one array of
+vertices, split where the height changes.
+
+The dialects of the preprocessors that do not output standard G-Code (Roland, HPGL, laser and solder paste) are
+plugins, subclasses of GCodeDialect that translate one line into the same codes. The dialect is chosen once for a
+program, by get_dialect().
+"""
+
+import re
+import logging
+
+import numpy as np
+from shapely.geometry import LineString, LinearRing, Point
+
+# Shapely 2 creates many line strings in one call
+try:
+    from shapely import linestrings
+except ImportError:
+    linestrings = None
+
+log = logging.getLogger('base')
+
+# the columns of the parsed program table
+CODES = 'GXYZIJF'
+COL_G, COL_X, COL_Y, COL_Z, COL_I, COL_J, COL_F = range(len(CODES))
+
+
+class GCodeDialect:
+    """
+    Base class of the G-Code dialects. A dialect translates the lines of the program into codes.
+    """
+
+    # if True the Z moves that are done together with X, Y moves are reported as non-orthogonal motion
+    check_orthogonal = True
+
+    @classmethod
+    def match(cls, pp_geometry_name, pp_excellon_name, pp_solderpaste_name):
+        """
+        Check if the dialect is used by the preprocessors of the job.
+
+        :param pp_geometry_name:        name of the preprocessor for Geometry objects
+        :param pp_excellon_name:        name of the preprocessor for Excellon objects
+        :param pp_solderpaste_name:     name of the preprocessor for solder paste or None
+        :return:                        True if the dialect is used
+        :rtype:                         bool
+        """
+        return False
+
+    def parse_line(self, gline):
+        """
+        Parses a line of the program into a dictionary like: {'G': 1.0, 'X': 1234.0, 'Y': 987.0}
+
+        :param gline:   a line of the program
+        :type gline:    str
+        :return:        the codes of the line
+        :rtype:         dict
+        """
+        return {}
+
+    def tokenize(self, gcode):
+        """
+        Parses the program into a table with one row for each line and one column for each of the codes in CODES.
+
+        :param gcode:   the program
+        :type gcode:    str
+        :return:        the table; NaN where the line does not have the code
+        :rtype:         numpy.ndarray
+        """
+        lines = gcode.splitlines()
+        table = np.full((len(lines), len(CODES)), np.nan)
+        for row, line in enumerate(lines):
+            for code, value in self.parse_line(line).items():
+                if code in CODES:
+                    table[row, CODES.index(code)] = value
+        return table
+
+
+class GenericDialect(GCodeDialect):
+    """
+    Standard G-Code: words made by a letter and a number. The comments in parentheses or after a semicolon are
+    skipped.
+    """
+
+    word_re = re.compile(r'^\s*([A-Z])\s*([\+\-\.\d\s]+)')
+
+    # a word or a line end
+    token_re = re.compile(rb'[A-Z][ \t]*[\+\-]?(?:\d+\.?\d*|\.\d+)|\n')
+    comment_re = re.compile(rb'\([^)\n]*\)|;[^\n]*')
+
+    # column of each letter (indexed by the ASCII code), -1 for the letters that are not stored
+    columns = np.full(256, -1, dtype=np.int64)
+    columns[np.frombuffer(CODES.encode('ascii'), dtype=np.uint8)] = np.arange(len(CODES))
+
+    def parse_line(self, gline):
+        command = {}
+        match = self.word_re.search(gline)
+        while match:
+            command[match.group(1)] = float(match.group(2).replace(" ", ""))
+            gline = gline[match.end():]
+            match = self.word_re.search(gline)
+        return command
+
+    def tokenize(self, gcode):
+        data = gcode.encode('utf-8', errors='replace').replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        data = self.comment_re.sub(b'', data)
+
+        tokens = np.array(self.token_re.findall(data) or [b'\n'])
+
+        # the first character of a token is the letter of the word or the line end
+        chars = tokens.view(np.uint8).reshape((len(tokens), tokens.dtype.itemsize))
+        letters = chars[:, 0].copy()
+        rows = np.cumsum(letters == ord('\n'))
+        cols = self.columns[letters]
+        keep = np.flatnonzero(cols >= 0)
+
+        # the letter is replaced by a space and the rest of the word is the number
+        chars[:, 0] = ord(' ')
+        values = tokens[keep].astype(np.float64)
+
+        table = np.full((rows[-1] + 1, len(CODES)), np.nan)
+        table[rows[keep], cols[keep]] = values
+        return table
+
+
+class RolandDialect(GCodeDialect):
+    """
+    Roland MDX-20: "Z x,y,z;" moves, in units of 0.025 mm.
+    """
+
+    check_orthogonal = False
+    move_re = re.compile(r"^Z(\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?)*;$")
+
+    @classmethod
+    def match(cls, pp_geometry_name, pp_excellon_name, pp_solderpaste_name):
+        return 'Roland' in pp_excellon_name or 'Roland' in pp_geometry_name
+
+    def parse_line(self, gline):
+        command = {}
+        match_z = self.move_re.search(gline)
+        if match_z:
+            command['G'] = 0
+            command['X'] = float(match_z.group(1).replace(" ", "")) * 0.025
+            command['Y'] = float(match_z.group(2).replace(" ", "")) * 0.025
+            command['Z'] = float(match_z.group(3).replace(" ", "")) * 0.025
+        return command
+
+
+class HPGLDialect(GCodeDialect):
+    """
+    HPGL: "PA x,y;" moves, in units of 0.025 mm; the pen up (PU) and pen down (PD) set the height.
+    """
+
+    check_orthogonal = False
+    move_re = re.compile(r"^PA(\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?)*;$")
+    pen_re = re.compile(r"^(P[U|D])")
+
+    @classmethod
+    def match(cls, pp_geometry_name, pp_excellon_name, pp_solderpaste_name):
+        return 'hpgl' in pp_excellon_name or 'hpgl' in pp_geometry_name
+
+    def parse_line(self, gline):
+        command = {}
+        match_pa = self.move_re.search(gline)
+        if match_pa:
+            command['G'] = 0
+            command['X'] = float(match_pa.group(1).replace(" ", "")) / 40
+            command['Y'] = float(match_pa.group(2).replace(" ", "")) / 40
+        match_pen = self.pen_re.search(gline)
+        if match_pen:
+            # the value does not matter, only that it is positive so the move is of kind T (travel)
+            command['Z'] = 1 if match_pen.group(1) == 'PU' else 0
+        return command
+
+
+class LaserDialect(GCodeDialect):
+    """
+    Laser: the X, Y moves; the laser off (M5, M107) and laser on (M3, M4, M106) set the height.
+    """
+
+    check_orthogonal = False
+    move_re = re.compile(r"X([\+-]?\d+.[\+-]?\d+)\s*Y([\+-]?\d+.[\+-]?\d+)")
+    laser_re = re.compile(r"^(M0?[3-5])")
+    fan_re = re.compile(r"^(M10[6|7])")
+
+    @classmethod
+    def match(cls, pp_geometry_name, pp_excellon_name, pp_solderpaste_name):
+        return 'laser' in pp_excellon_name.lower() or 'laser' in pp_geometry_name.lower()
+
+    def parse_line(self, gline):
+        command = {}
+        match_lsr = self.move_re.search(gline)
+        if match_lsr:
+            command['X'] = float(match_lsr.group(1).replace(" ", ""))
+            command['Y'] = float(match_lsr.group(2).replace(" ", ""))
+
+        match_lsr_pos = self.laser_re.search(gline)
+        if match_lsr_pos:
+            # the value does not matter, only that it is positive so the move is of kind T (travel)
+            command['Z'] = 1 if match_lsr_pos.group(1) in ('M05', 'M5') else 0
+
+        match_lsr_pos_2 = self.fan_re.search(gline)
+        if match_lsr_pos_2:
+            command['Z'] = 1 if match_lsr_pos_2.group(1) == 'M107' else 0
+        return command
+
+
+class PasteDialect(LaserDialect):
+    """
+    Solder paste dispensing: parsed as the laser dialect, the dispenser on and off set the height.
+    """
+
+    check_orthogonal = True
+
+    @classmethod
+    def match(cls, pp_geometry_name, pp_excellon_name, pp_solderpaste_name):
+        return pp_solderpaste_name is not None and 'paste' in pp_solderpaste_name.lower()
+
+
+# the dialects are tried in this order; when none is used by the preprocessors the program is standard G-Code
+DIALECTS = [RolandDialect, HPGLDialect, LaserDialect, PasteDialect]
+
+
+def get_dialect(pp_geometry_name, pp_excellon_name, pp_solderpaste_name=None):
+    """
+    Choose the dialect of the program made with the given preprocessors.
+
+    :param pp_geometry_name:        name of the preprocessor for Geometry objects
+    :param pp_excellon_name:        name of the preprocessor for Excellon objects
+    :param pp_solderpaste_name:     name of the preprocessor for solder paste or None
+    :return:                        the dialect
+    :rtype:                         GCodeDialect
+    """
+    for dialect in DIALECTS:
+        if dialect.match(pp_geometry_name, pp_excellon_name, pp_solderpaste_name):
+            return dialect()
+    return GenericDialect()
+
+
+class ParsedGCode:
+    """
+    The tool paths and the drill holes of a parsed program.
+
+    The paths are slices of one array of vertices: the path i is coords[starts[i]:ends[i]]. The consecutive paths
+    share a vertex, the end of a path is the start of the next one.
+    """
+
+    def __init__(self, coords, starts, ends, kinds, drills, order, units):
+        """
+
+        :param coords:  array of the vertices of all the paths, shape (N, 2)
+        :param starts:  index of the first vertex of each path
+        :param ends:    index after the last vertex of each path
+        :param kinds:   kind of each path, like "CF": "T" (travel) or "C" (cut), "F" (fast) or "S" (slow)
+        :param drills:  the drill holes as a list of (center, diameter)
+        :param order:   the paths and the drills in program order: ('P', path index) or ('D', drill index)
+        :param units:   the units set by the program ("IN" or "MM") or None
+        """
+        self.coords = coords
+        self.starts = starts
+        self.ends = ends
+        self.kinds = kinds
+        self.drills = drills
+        self.order = order
+        self.units = units
+
+    def to_geometry(self):
+        """
+        The tool paths and the drill holes in the format of CNCjob.gcode_parsed: a list of dictionaries like
+        {"geom": LineString, "kind": ["C", "F"]}
+
+        :return:    list of dictionaries
+        :rtype:     list
+        """
+        if linestrings is not None and len(self.starts):
+            # the consecutive paths share a vertex so the vertices of each path are gathered from coords
+            lengths = self.ends - self.starts
+            offsets = self.starts - np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            vertices = np.arange(lengths.sum()) + np.repeat(offsets, lengths)
+            lines = linestrings(self.coords[vertices], indices=np.repeat(np.arange(len(lengths)), lengths))
+        else:
+            lines = [LineString(self.coords[s:e]) for s, e in zip(self.starts, self.ends)]
+
+        # the drill holes of the same diameter are translated copies of the same circle
+        circles = {}
+        geometry = []
+        for item_type, idx in self.order:
+            if item_type == 'P':
+                geometry.append({"geom": lines[idx], "kind": list(self.kinds[idx])})
+            else:
+                center, dia = self.drills[idx]
+                if dia not in circles:
+                    circles[dia] = np.asarray(Point(0, 0).buffer(dia / 2.0).exterior.coords)
+                geometry.append({"geom": LinearRing(circles[dia] + center), "kind": ['C', 'F']})
+        return geometry
+
+
+def is_foreign_gcode(gcode):
+    """
+    Check if the file is not a G-Code program, like a Gerber or an Excellon file.
+
+    :param gcode:   the program
+    :type gcode:    str
+    :return:        True if the file has the marks of a Gerber or an Excellon file
+    :rtype:         bool
+    """
+    return '%' in gcode or 'MOIN' in gcode or 'MOMM' in gcode
+
+
+def parse_gcode(gcode, dialect, start_pt=(0, 0), steps_per_circle=64, drill_dia=None, line_xyz=False,
+                decimals=4):
+    """
+    Parses a G-Code program into tool paths.
+
+    :param gcode:               the program
+    :type gcode:                str
+    :param dialect:             the dialect of the program, from get_dialect()
+    :type dialect:              GCodeDialect
+    :param start_pt:            the position from where the first path starts
+    :type start_pt:             tuple
+    :param steps_per_circle:    number of segments used to approximate a full circle for the arcs
+    :type steps_per_circle:     int
+    :param drill_dia:           None if the drill holes are not created; else the diameter of the holes, or a
+                                function that takes the hole center (rounded to the decimals) and returns the
+                                diameter or None if there is no hole there
+    :type drill_dia:            float or function
+    :param line_xyz:            if True the Z moves done together with X, Y moves are expected
+    :type line_xyz:             bool
+    :param decimals:            the decimals of the drill holes coordinates
+    :type decimals:             int
+    :return:                    the tool paths and the drill holes
+    :rtype:                     ParsedGCode
+    """
+    table = dialect.tokenize(gcode)
+
+    # ## Units; the lines that set the units have no other effect
+    g_codes = table[:, COL_G]
+    units_rows = (g_codes == 20.0) | (g_codes == 21.0)
+    units = None
+    if units_rows.any():
+        units = {20.0: "IN", 21.0: "MM"}[g_codes[units_rows][-1]]
+
+    # only the lines with a motion or a height change make the paths
+    table = table[~units_rows]
+    present = ~np.isnan(table)
+    moves = present[:, [COL_G, COL_X, COL_Y, COL_Z]].any(axis=1)
+    table = table[moves]
+    present = present[moves]
+
+    # the modal state after each line
+    g = np.trunc(_fill_forward(table[:, COL_G], 0.0))
+    x = _fill_forward(table[:, COL_X], 0.0)
+    y = _fill_forward(table[:, COL_Y], 0.0)
+    z = _fill_forward(table[:, COL_Z], 0.0)
+    # the position before each line
+    prev_x = np.concatenate(([0.0], x))[:-1]
+    prev_y = np.concatenate(([0.0], y))[:-1]
+
+    has_z = present[:, COL_Z]
+    has_xy = present[:, COL_X] | present[:, COL_Y]
+
+    if dialect.check_orthogonal and not line_xyz:
+        prev_z = np.concatenate(([0.0], z))[:-1]
+        for row in np.flatnonzero(has_z & has_xy & (z != prev_z)):
+            log.warning("Non-orthogonal motion: From (%s, %s, %s) To: (%s, %s, %s)" %
+                        (prev_x[row], prev_y[row], prev_z[row], x[row], y[row], z[row]))
+
+    # a change of height ends the current path; the lines before the first change of height are in path 0
+    path_ids = np.cumsum(has_z)
+
+    # vertices: one for each line move (G0, G1) and the points of each arc (G2, G3)
+    motion_rows = np.flatnonzero(has_xy & (g <= 3))
+    vertices = np.column_stack((x[motion_rows], y[motion_rows]))
+    vertices_path = path_ids[motion_rows]
+
+    is_arc = g[motion_rows] >= 2
+    if is_arc.any():
+        arc_rows = motion_rows[is_arc]
+        steps, arcs_points = _arcs(table[arc_rows, COL_I], table[arc_rows, COL_J], prev_x[arc_rows],
+                                   prev_y[arc_rows], x[arc_rows], y[arc_rows], g[arc_rows] == 3, steps_per_circle)
+
+        # each arc is replaced by its points
+        counts = np.ones(len(motion_rows), dtype=np.int64)
+        counts[is_arc] = steps + 1
+        owner = np.repeat(np.arange(len(motion_rows)), counts)
+        vertices = vertices[owner]
+        vertices[is_arc[owner]] = arcs_points
+        vertices_path = vertices_path[owner]
+
+    # each path starts from the last vertex of the previous path
+    coords = np.concatenate((np.asarray(start_pt, dtype=np.float64).reshape((1, 2)), vertices))
+    paths, first = np.unique(vertices_path, return_index=True)
+    starts = first                                          # vertices are shifted by one in coords
+    ends = np.append(first[1:], len(vertices)) + 1
+
+    # the kind of a path is given by the last X, Y move of the path
+    xy_rows = np.flatnonzero(has_xy)
+    last_xy_rows = xy_rows[np.searchsorted(path_ids[xy_rows], paths, side='right') - 1]
+    kinds = [('T' if z_val > 0 else 'C') + ('S' if g_val > 0 else 'F')
+             for z_val, g_val in zip(z[last_xy_rows], g[last_xy_rows])]
+
+    # the drill holes are made when the tool goes down, in the position before the line
+    drills = []
+    drills_path = []
+    if drill_dia is not None:
+        for row in np.flatnonzero(has_z & (z < 0)):
+            center = (float('%.*f' % (decimals, prev_x[row])), float('%.*f' % (decimals, prev_y[row])))
+            dia = drill_dia(center) if callable(drill_dia) else drill_dia
+            if dia is not None:
+                drills.append((center, dia))
+                drills_path.append(path_ids[row])
+
+    # a path is ended by the change of height that starts the next path, before the drill hole made there
+    order_keys = np.concatenate((paths + 1, drills_path)).astype(np.int64)
+    order_types = np.concatenate((np.zeros(len(paths), dtype=np.int64), np.ones(len(drills), dtype=np.int64)))
+    order_index = np.concatenate((np.arange(len(paths)), np.arange(len(drills)))).astype(np.int64)
+    sort_idx = np.lexsort((order_types, order_keys))
+    order = [('P' if t == 0 else 'D', int(i)) for t, i in zip(order_types[sort_idx], order_index[sort_idx])]
+
+    return ParsedGCode(coords, starts, ends, kinds, drills, order, units)
+
+
+def _fill_forward(values, initial):
+    """
+    Replaces the NaN values with the last value before them.
+
+    :param values:      1D array
+    :param initial:     the value used before the first value that is not NaN
+    :return:            the filled array
+    """
+    idx = np.where(np.isnan(values), -1, np.arange(len(values)))
+    np.maximum.accumulate(idx, out=idx)
+    return np.where(idx >= 0, values[np.maximum(idx, 0)], initial)
+
+
+def _arcs(i, j, start_x, start_y, stop_x, stop_y, ccw, steps_per_circle):
+    """
+    The points of the arcs, from the start point to the end point of each arc; same as camlib.arc().
+
+    :param i:                   X offsets of the arcs centers from the start points (NaN is 0)
+    :param j:                   Y offsets of the arcs centers from the start points (NaN is 0)
+    :param start_x:             X coordinates of the start points
+    :param start_y:             Y coordinates of the start points
+    :param stop_x:              X coordinates of the end points
+    :param stop_y:              Y coordinates of the end points
+    :param ccw:                 True for the counter-clockwise arcs
+    :param steps_per_circle:    number of segments used to approximate a full circle
+    :return:                    the number of segments of each arc and the points of all the arcs, shape (N, 2)
+    """
+    i = np.nan_to_num(i)
+    j = np.nan_to_num(j)
+    center_x = start_x + i
+    center_y = start_y + j
+    radius = np.hypot(i, j)
+    start = np.arctan2(-j, -i)
+    stop = np.arctan2(stop_y - center_y, stop_x - center_x)
+
+    stop = np.where(ccw & (stop <= start), stop + 2 * np.pi, stop)
+    stop = np.where(~ccw & (stop >= start), stop - 2 * np.pi, stop)
+
+    angle = np.abs(stop - start)
+    steps = np.maximum(np.ceil(angle / (2 * np.pi) * steps_per_circle).astype(np.int64), 2)
+    delta_angle = np.where(ccw, 1.0, -1.0) * angle / steps
+
+    # the step number of each point in its arc
+    arc_idx = np.repeat(np.arange(len(steps)), steps + 1)
+    step_nr = np.arange(len(arc_idx)) - np.repeat(np.cumsum(steps + 1) - (steps + 1), steps + 1)
+
+    theta = start[arc_idx] + delta_angle[arc_idx] * step_nr
+    points = np.column_stack((center_x[arc_idx] + radius[arc_idx] * np.cos(theta),
+                              center_y[arc_idx] + radius[arc_idx] * np.sin(theta)))
+    return steps, points
@@ -1,8 +1,11 @@
 from PyQt5 import QtWidgets
-from camlib import Geometry, arc, arc_angle, ApertureMacro, grace
+from camlib import Geometry, invalidates_bounds, arc, arc_angle, ApertureMacro, grace
+from appCommon.AffineTransform import transform_geometry, scale_matrix, translate_matrix, mirror_matrix, \
+    rotate_matrix, skew_matrix
 
 import numpy as np
 import traceback
+from io import StringIO
 from copy import deepcopy
 
 from shapely.ops import unary_union, linemerge
@@ -301,7 +304,7 @@ class Gerber(Geometry):
         log.warning("Aperture not implemented: %s" % str(apertureType))
         return None
 
-    def parse_file(self, filename, follow=False):
+    def parse_file(self, filename, follow=False, chunk_size=1048576):
         """
         Calls Gerber.parse_lines() with generator of lines
         read from the given file. Will split the lines if multiple
@@ -313,41 +316,21 @@ class Gerber(Geometry):
 
         First is ``G54D11*`` and seconds is ``G36*``.
 
+        The file is read in chunks of ``chunk_size`` characters and the statements are fed to the parser as they
+        are found so the file content is never held in memory as a list of lines.
+
         :param filename:        Gerber file to parse.
         :type filename:         str
         :param follow:          If true, will not create polygons, just lines
                                 following the gerber path.
         :type follow:           bool
+        :param chunk_size:      How many characters to read from the file at once
+        :type chunk_size:       int
         :return:                None
         """
 
         with open(filename, 'r') as gfile:
-
-            def line_generator():
-                for line in gfile:
-                    line = line.strip(' \r\n')
-                    while len(line) > 0:
-
-                        # If ends with '%' leave as is.
-                        if line[-1] == '%':
-                            yield line
-                            break
-
-                        # Split after '*' if any.
-                        starpos = line.find('*')
-                        if starpos > -1:
-                            cleanline = line[:starpos + 1]
-                            yield cleanline
-                            line = line[starpos + 1:]
-
-                        # Otherwise leave as is.
-                        else:
-                            # yield clean line
-                            yield line
-                            break
-
-            processed_lines = list(line_generator())
-            self.parse_lines(processed_lines)
+            self.parse_lines(gerber_statements(gfile, chunk_size=chunk_size))
 
     # @profile
     def parse_lines(self, glines):
@@ -355,7 +338,7 @@ class Gerber(Geometry):
         Main Gerber parser. Reads Gerber and populates ``self.paths``, ``self.apertures``,
         ``self.flashes``, ``self.regions`` and ``self.units``.
 
-        :param glines: Gerber code as list of strings, each element being
+        :param glines: Gerber code as an iterable of strings (list or generator), each element being
             one line of the source file.
         :type glines: list
         :return: None
@@ -421,7 +404,16 @@ class Gerber(Geometry):
 
         s_tol = float(self.app.defaults["gerber_simp_tolerance"])
 
-        self.app.inform.emit('%s %d %s.' % (_("Gerber processing. Parsing"), len(glines), _("Lines").lower()))
+        # the source lines are written here and added to self.source_file only once at the end; adding them to
+        # self.source_file one by one is quadratic for large files
+        source_buffer = StringIO()
+
+        try:
+            self.app.inform.emit('%s %d %s.' % (_("Gerber processing. Parsing"), len(glines), _("Lines").lower()))
+        except TypeError:
+            # glines is a generator
+            self.app.inform.emit('%s...' % _("Gerber processing. Parsing"))
+
         try:
             for gline in glines:
                 if self.app.abort_flag:
@@ -429,17 +421,23 @@ class Gerber(Geometry):
                     raise grace
 
                 line_num += 1
-                self.source_file += gline + '\n'
+                source_buffer.write(gline)
+                source_buffer.write('\n')
 
                 # Cleanup #
                 gline = gline.strip(' \r\n')
                 # log.debug("Line=%3s %s" % (line_num, gline))
 
+                # the statement is classified by its first character and it is tested only against the patterns
+                # that can match it; the coordinate statements (X, Y, I, J) are the bulk of a Gerber file and this
+                # way they are no longer tested against all the other patterns before reaching their handlers
+                lead = gline[:1]
+
                 # ###############################################################
                 # ################   Ignored lines   ############################
                 # ################     Comments      ############################
                 # ###############################################################
-                match = self.comm_re.search(gline)
+                match = self.comm_re.search(gline) if lead == 'G' else None
                 if match:
                     continue
 
@@ -449,7 +447,7 @@ class Gerber(Geometry):
                 # ########   If polarity changes, creates geometry from current #
                 # ########    buffer, then adds or subtracts accordingly.       #
                 # ###############################################################
-                match = self.lpol_re.search(gline)
+                match = self.lpol_re.search(gline) if lead == '%' else None
                 if match:
                     new_polarity = match.group(1)
                     # log.info("Polarity CHANGE, LPC = %s, poly_buff = %s" % (self.is_lpc, poly_buffer))
@@ -517,7 +515,7 @@ class Gerber(Geometry):
                 # #####################  Example: %FSLAX24Y24*%  #################
                 # ################################################################
 
-                match = self.fmt_re.search(gline)
+                match = self.fmt_re.search(gline) if 'FS' in gline else None
                 if match:
                     absolute = {'A': 'Absolute', 'I': 'Relative'}[match.group(2)]
                     if match.group(1) is not None:
@@ -536,7 +534,7 @@ class Gerber(Geometry):
                 # ######################## Mode (IN/MM)    #######################
                 # #####################    Example: %MOIN*%  #####################
                 # ################################################################
-                match = self.mode_re.search(gline)
+                match = self.mode_re.search(gline) if lead in '%M' else None
                 if match:
                     self.units = match.group(1)
                     log.debug("Gerber units found = %s" % self.units)
@@ -548,7 +546,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # Combined Number format and Mode --- Allegro does this ##########
                 # ################################################################
-                match = self.fmt_re_alt.search(gline)
+                match = self.fmt_re_alt.search(gline) if '%FS' in gline else None
                 if match:
                     absolute = {'A': 'Absolute', 'I': 'Relative'}[match.group(2)]
                     if match.group(1) is not None:
@@ -571,7 +569,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ####     Search for OrCAD way for having Number format  ########
                 # ################################################################
-                match = self.fmt_re_orcad.search(gline)
+                match = self.fmt_re_orcad.search(gline) if '%FS' in gline else None
                 if match:
                     if match.group(1) is not None:
                         if match.group(1) == 'G74':
@@ -600,7 +598,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ############     Units (G70/1) OBSOLETE   ######################
                 # ################################################################
-                match = self.units_re.search(gline)
+                match = self.units_re.search(gline) if lead == 'G' else None
                 if match:
                     obs_gerber_units = {'0': 'IN', '1': 'MM'}[match.group(1)]
                     self.units = obs_gerber_units
@@ -613,7 +611,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # #####   Absolute/relative coordinates G90/1 OBSOLETE ###########
                 # ################################################################
-                match = self.absrel_re.search(gline)
+                match = self.absrel_re.search(gline) if lead == 'G' else None
                 if match:
                     absolute = {'0': "Absolute", '1': "Relative"}[match.group(1)]
                     log.warning("Gerber obsolete coordinates type found = %s (Absolute or Relative) " % absolute)
@@ -626,7 +624,7 @@ class Gerber(Geometry):
                 # be caught by other patterns.
                 # ################################################################
                 if current_macro is None:  # No macro started yet
-                    match = self.am1_re.search(gline)
+                    match = self.am1_re.search(gline) if lead == '%' else None
                     # Start macro if match, else not an AM, carry on.
                     if match:
                         log.debug("Starting macro. Line %d: %s" % (line_num, gline))
@@ -654,7 +652,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ##############   Aperture definitions %ADD...  #################
                 # ################################################################
-                match = self.ad_re.search(gline)
+                match = self.ad_re.search(gline) if lead == '%' else None
                 if match:
                     # log.info("Found aperture definition. Line %d: %s" % (line_num, gline))
                     self.aperture_parse(match.group(1), match.group(2), match.group(3))
@@ -665,7 +663,7 @@ class Gerber(Geometry):
                 # ###########   Operation code alone, usually just D03 (Flash) ###
                 # self.opcode_re = re.compile(r'^D0?([123])\*$')
                 # ################################################################
-                match = self.opcode_re.search(gline)
+                match = self.opcode_re.search(gline) if lead == 'D' else None
                 if match:
                     current_operation_code = int(match.group(1))
                     current_d = current_operation_code
@@ -707,7 +705,7 @@ class Gerber(Geometry):
                 # ################  Tool/aperture change  ########################
                 # ################  Example: D12*         ########################
                 # ################################################################
-                match = self.tool_re.search(gline)
+                match = self.tool_re.search(gline) if lead in 'GD' else None
                 if match:
                     current_aperture = match.group(1)
                     # log.debug("Line %d: Aperture change to (%s)" % (line_num, current_aperture))
@@ -763,7 +761,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ################  G36* - Begin region   ########################
                 # ################################################################
-                if self.regionon_re.search(gline):
+                if lead == 'G' and self.regionon_re.search(gline):
                     try:
                         path_length = len(path)
                     except TypeError:
@@ -805,7 +803,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ################  G37* - End region     ########################
                 # ################################################################
-                if self.regionoff_re.search(gline):
+                if lead == 'G' and self.regionoff_re.search(gline):
                     making_region = False
 
                     if '0' not in self.apertures:
@@ -901,7 +899,7 @@ class Gerber(Geometry):
                 # ####  sometimes by itself (handled here).  #####################
                 # ####  Example: G01*                        #####################
                 # ################################################################
-                match = self.interp_re.search(gline)
+                match = self.interp_re.search(gline) if lead == 'G' else None
                 if match:
                     current_interpolation_mode = int(match.group(1))
                     continue
@@ -911,7 +909,7 @@ class Gerber(Geometry):
                 # ######### Operation code (D0x) missing is deprecated   #########
                 # REGEX: r'^(?:G0?(1))?(?:X(-?\d+))?(?:Y(-?\d+))?(?:D0([123]))?\*$'
                 # ################################################################
-                match = self.lin_re.search(gline)
+                match = self.lin_re.search(gline) if lead in 'GXY' else None
                 if match:
                     # Dxx alone?
                     # if match.group(1) is None and match.group(2) is None and match.group(3) is None:
@@ -1244,7 +1242,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ######### G74/75* - Single or multiple quadrant arcs  ##########
                 # ################################################################
-                match = self.quad_re.search(gline)
+                match = self.quad_re.search(gline) if lead == 'G' else None
                 if match:
                     if match.group(1) == '4':
                         quadrant_mode = 'SINGLE'
@@ -1258,7 +1256,7 @@ class Gerber(Geometry):
                 # ######### Ex. format: G03 X0 Y50 I-50 J0 where the     #########
                 # ######### X, Y coords are the coords of the End Point  #########
                 # ################################################################
-                match = self.circ_re.search(gline)
+                match = self.circ_re.search(gline) if lead in 'GXYIJ' else None
                 if match:
                     arcdir = [None, None, "cw", "ccw"]
 
@@ -1446,7 +1444,7 @@ class Gerber(Geometry):
                 # ################################################################
                 # ######### EOF - END OF FILE ####################################
                 # ################################################################
-                match = self.eof_re.search(gline)
+                match = self.eof_re.search(gline) if lead == 'M' else None
                 if match:
                     continue
 
@@ -1457,6 +1455,10 @@ class Gerber(Geometry):
                 # provide the app with a way to process the GUI events when in a blocking loop
                 QtWidgets.QApplication.processEvents()
 
+            # all the lines were consumed, build the source file
+            self.source_file += source_buffer.getvalue()
+            source_buffer.close()
+
             try:
                 path_length = len(path)
             except TypeError:
@@ -1718,10 +1720,18 @@ class Gerber(Geometry):
 
         log.debug("parseGerber.Gerber.bounds()")
 
+        panel = self.panel
+        if panel is not None:
+            return panel.bounds()
+
         if self.solid_geometry is None:
             log.debug("solid_geometry is None")
             return 0, 0, 0, 0
 
+        cached = self.cached_bounds()
+        if cached is not None:
+            return cached
+
         def bounds_rec(obj):
             if type(obj) is list and type(obj) is not MultiPolygon:
                 minx = np.Inf
@@ -1755,8 +1765,9 @@ class Gerber(Geometry):
                 return obj.bounds
 
         bounds_coords = bounds_rec(self.solid_geometry)
-        return bounds_coords
+        return self.cache_bounds(bounds_coords)
 
+    @invalidates_bounds
     def convert_units(self, obj_units):
         """
         Converts the units of the object to ``units`` by scaling all
@@ -1924,6 +1935,29 @@ class Gerber(Geometry):
             new_el = {'solid': pol, 'follow': pol}
             self.apertures['0']['geometry'].append(deepcopy(new_el))
 
+    @invalidates_bounds
+    def affine_transform(self, matrix):
+        """
+        Applies an affine transformation to the solid_geometry, the follow_geometry and the geometry stored in the
+        apertures, all in one pass.
+
+        :param matrix:  3x3 affine matrix (see appCommon.AffineTransform)
+        :return:        None
+        """
+        log.debug("parseGerber.Gerber.affine_transform()")
+
+        apertures_geo = {}
+        for apid in self.apertures:
+            if 'geometry' in self.apertures[apid]:
+                apertures_geo[apid] = self.apertures[apid]['geometry']
+
+        self.solid_geometry, self.follow_geometry, apertures_geo = transform_geometry(
+            [self.solid_geometry, self.follow_geometry, apertures_geo], matrix)
+
+        for apid, geometry in apertures_geo.items():
+            self.apertures[apid]['geometry'] = geometry
+
+    @invalidates_bounds
     def scale(self, xfactor, yfactor=None, point=None):
         """
         Scales the objects' geometry on the XY plane by a given factor.
@@ -1974,54 +2008,11 @@ class Gerber(Geometry):
         else:
             px, py = point
 
-        # variables to display the percentage of work done
-        self.geo_len = 0
         try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def scale_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(scale_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 99]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
+            self.affine_transform(scale_matrix(xfactor, yfactor, (px, py)))
 
-                    return affinity.scale(obj, xfactor, yfactor, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        self.solid_geometry = scale_geom(self.solid_geometry)
-        self.follow_geometry = scale_geom(self.follow_geometry)
-
-        # we need to scale the geometry stored in the Gerber apertures, too
-        try:
+            # the sizes of the apertures are scaled, too
             for apid in self.apertures:
-                new_geometry = []
-                if 'geometry' in self.apertures[apid]:
-                    for geo_el in self.apertures[apid]['geometry']:
-                        new_geo_el = {}
-                        if 'solid' in geo_el:
-                            new_geo_el['solid'] = scale_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            new_geo_el['follow'] = scale_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            new_geo_el['clear'] = scale_geom(geo_el['clear'])
-                        new_geometry.append(new_geo_el)
-
-                self.apertures[apid]['geometry'] = deepcopy(new_geometry)
-
                 try:
                     if str(self.apertures[apid]['type']) == 'R' or str(self.apertures[apid]['type']) == 'O':
                         self.apertures[apid]['width'] *= xfactor
@@ -2053,6 +2044,7 @@ class Gerber(Geometry):
         # # Now buffered_paths, flash_geometry and solid_geometry
         # self.create_geometry()
 
+    @invalidates_bounds
     def offset(self, vect):
         """
         Offsets the objects' geometry on the XY plane by a given vector.
@@ -2085,50 +2077,8 @@ class Gerber(Geometry):
         if dx == 0 and dy == 0:
             return
 
-        # variables to display the percentage of work done
-        self.geo_len = 0
         try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def offset_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(offset_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 99]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.translate(obj, xoff=dx, yoff=dy)
-                except AttributeError:
-                    return obj
-
-        # ## Solid geometry
-        self.solid_geometry = offset_geom(self.solid_geometry)
-        self.follow_geometry = offset_geom(self.follow_geometry)
-
-        # we need to offset the geometry stored in the Gerber apertures, too
-        try:
-            for apid in self.apertures:
-                if 'geometry' in self.apertures[apid]:
-                    for geo_el in self.apertures[apid]['geometry']:
-                        if 'solid' in geo_el:
-                            geo_el['solid'] = offset_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            geo_el['follow'] = offset_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            geo_el['clear'] = offset_geom(geo_el['clear'])
-
+            self.affine_transform(translate_matrix(dx, dy))
         except Exception as e:
             log.debug('camlib.Gerber.offset() Exception --> %s' % str(e))
             return 'fail'
@@ -2136,6 +2086,7 @@ class Gerber(Geometry):
         self.app.inform.emit('[success] %s' % _("Done."))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def mirror(self, axis, point):
         """
         Mirrors the object around a specified axis passing through
@@ -2159,51 +2110,8 @@ class Gerber(Geometry):
         """
         log.debug("parseGerber.Gerber.mirror()")
 
-        px, py = point
-        xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
-
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def mirror_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(mirror_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 99]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.scale(obj, xscale, yscale, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        self.solid_geometry = mirror_geom(self.solid_geometry)
-        self.follow_geometry = mirror_geom(self.follow_geometry)
-
-        # we need to mirror the geometry stored in the Gerber apertures, too
         try:
-            for apid in self.apertures:
-                if 'geometry' in self.apertures[apid]:
-                    for geo_el in self.apertures[apid]['geometry']:
-                        if 'solid' in geo_el:
-                            geo_el['solid'] = mirror_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            geo_el['follow'] = mirror_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            geo_el['clear'] = mirror_geom(geo_el['clear'])
+            self.affine_transform(mirror_matrix(axis, point))
         except Exception as e:
             log.debug('camlib.Gerber.mirror() Exception --> %s' % str(e))
             return 'fail'
@@ -2211,6 +2119,7 @@ class Gerber(Geometry):
         self.app.inform.emit('[success] %s' % _("Done."))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def skew(self, angle_x, angle_y, point):
         """
         Shear/Skew the geometries of an object by angles along x and y dimensions.
@@ -2231,53 +2140,11 @@ class Gerber(Geometry):
         """
         log.debug("parseGerber.Gerber.skew()")
 
-        px, py = point
-
         if angle_x == 0 and angle_y == 0:
             return
 
-        # variables to display the percentage of work done
-        self.geo_len = 0
-        try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def skew_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(skew_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.skew(obj, angle_x, angle_y, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        self.solid_geometry = skew_geom(self.solid_geometry)
-        self.follow_geometry = skew_geom(self.follow_geometry)
-
-        # we need to skew the geometry stored in the Gerber apertures, too
         try:
-            for apid in self.apertures:
-                if 'geometry' in self.apertures[apid]:
-                    for geo_el in self.apertures[apid]['geometry']:
-                        if 'solid' in geo_el:
-                            geo_el['solid'] = skew_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            geo_el['follow'] = skew_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            geo_el['clear'] = skew_geom(geo_el['clear'])
+            self.affine_transform(skew_matrix(angle_x, angle_y, point))
         except Exception as e:
             log.debug('camlib.Gerber.skew() Exception --> %s' % str(e))
             return 'fail'
@@ -2285,6 +2152,7 @@ class Gerber(Geometry):
         self.app.inform.emit('[success] %s' % _("Done."))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def rotate(self, angle, point):
         """
         Rotate an object by a given angle around given coords (point)
@@ -2294,59 +2162,18 @@ class Gerber(Geometry):
         """
         log.debug("parseGerber.Gerber.rotate()")
 
-        px, py = point
-
         if angle == 0:
             return
 
-        # variables to display the percentage of work done
-        self.geo_len = 0
         try:
-            self.geo_len = len(self.solid_geometry)
-        except TypeError:
-            self.geo_len = 1
-
-        self.old_disp_number = 0
-        self.el_count = 0
-
-        def rotate_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(rotate_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.rotate(obj, angle, origin=(px, py))
-                except AttributeError:
-                    return obj
-
-        self.solid_geometry = rotate_geom(self.solid_geometry)
-        self.follow_geometry = rotate_geom(self.follow_geometry)
-
-        # we need to rotate the geometry stored in the Gerber apertures, too
-        try:
-            for apid in self.apertures:
-                if 'geometry' in self.apertures[apid]:
-                    for geo_el in self.apertures[apid]['geometry']:
-                        if 'solid' in geo_el:
-                            geo_el['solid'] = rotate_geom(geo_el['solid'])
-                        if 'follow' in geo_el:
-                            geo_el['follow'] = rotate_geom(geo_el['follow'])
-                        if 'clear' in geo_el:
-                            geo_el['clear'] = rotate_geom(geo_el['clear'])
+            self.affine_transform(rotate_matrix(angle, point))
         except Exception as e:
             log.debug('camlib.Gerber.rotate() Exception --> %s' % str(e))
             return 'fail'
         self.app.inform.emit('[success] %s' % _("Done."))
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def buffer(self, distance, join=2, factor=None):
         """
 
@@ -2535,3 +2362,59 @@ def parse_gerber_number(strnumber, int_digits, frac_digits, zeros):
         ret_val = (int_val * (10 ** ((int_digits + frac_digits) - len(strnumber)))) * (10 ** (-frac_digits))
 
     return ret_val
+
+
+def gerber_statements(gfile, chunk_size=1048576):
+    """
+    Generator that reads a Gerber file object in chunks and yields the Gerber statements found in it.
+    Each line is stripped and then split after each '*' so that multiple statements found in a single line are
+    yielded separately. A line that ends with '%' is yielded as it is.
+
+    :param gfile:       File object opened in text mode
+    :type gfile:
+    :param chunk_size:  Number of characters to read at once from the file
+    :type chunk_size:   int
+    :return:            Generator of Gerber statements
+    :rtype:             generator
+    """
+
+    # the pieces of a line that is not complete yet; they are joined once, when the end of the line is read, so a
+    # file with few newlines is not copied again for each chunk
+    pending = []
+    while True:
+        chunk = gfile.read(chunk_size)
+        if not chunk:
+            lines = [''.join(pending)]
+        else:
+            lines = chunk.split('\n')
+            # the last element may be an incomplete line, keep it for the next chunk
+            last = lines.pop()
+            if lines:
+                lines[0] = ''.join(pending) + lines[0]
+                pending = []
+            pending.append(last)
+
+        for line in lines:
+            line = line.strip(' \r\n')
+            if not line:
+                continue
+
+            # If ends with '%' leave as is.
+            if line[-1] == '%':
+                yield line
+                continue
+
+            # Split after each '*'. The line is scanned with a cursor and each statement is sliced once.
+            pos = 0
+            end = len(line)
+            while pos < end:
+                starpos = line.find('*', pos)
+                if starpos == -1:
+                    # Otherwise leave as is.
+                    yield line[pos:]
+                    break
+                yield line[pos:starpos + 1]
+                pos = starpos + 1
+
+        if not chunk:
+            break
@@ -59,6 +59,18 @@ class PreProc(object, metaclass=ABCPreProcRegister):
     def linear_code(self, p):
         pass
 
+    def linear_template(self, p):
+        """
+        Optional. The line made by linear_code() as a %-style template where only the X and Y coordinates are left to
+        be filled, e.g. 'G01 X%.4f Y%.4f'. With it the runs of linear moves are formatted in bulk instead of calling
+        linear_code() for each move. A preprocessor that changes linear_code() has to change this method too.
+
+        :param p:   the CNCJob attributes, like for linear_code()
+        :return:    the template or None to make each linear move with linear_code()
+        :rtype:     str
+        """
+        return None
+
     @abstractmethod
     def end_code(self, p):
         pass
@@ -15,6 +15,8 @@ import math
 from shapely.geometry import Point
 from shapely.affinity import translate
 
+from appCommon.AffineTransform import compose, translate_matrix, rotate_matrix
+
 import gettext
 import appTranslation as fcTranslate
 import builtins
@@ -270,19 +272,29 @@ class AlignObjects(AppTool):
             self.set_color()
 
         if len(self.clicked_points) == 4:
-            self.align_translate()
-            self.align_rotate()
+            self.align_translate_rotate()
             self.app.inform.emit('[success] %s' % _("Done."))
 
             self.disconnect_cal_events()
             self.app.plot_all()
 
     def align_translate(self):
-        dx = self.clicked_points[1][0] - self.clicked_points[0][0]
-        dy = self.clicked_points[1][1] - self.clicked_points[0][1]
+        self.aligned_obj.offset(self.get_translation())
+        self.update_bounds_options()
+
+    def align_translate_rotate(self):
+        # the offset and the rotation are chained and applied to the object in one pass
+        dx, dy = self.get_translation()
+        matrix = translate_matrix(dx, dy)
 
-        self.aligned_obj.offset((dx, dy))
+        angle = self.get_rotation_angle()
+        if angle is not None:
+            matrix = compose(matrix, rotate_matrix(angle, self.clicked_points[1]))
 
+        self.aligned_obj.affine_transform(matrix)
+        self.update_bounds_options()
+
+    def update_bounds_options(self):
         # Update the object bounding box options
         a, b, c, d = self.aligned_obj.bounds()
         self.aligned_obj.options['xmin'] = a
@@ -290,9 +302,17 @@ class AlignObjects(AppTool):
         self.aligned_obj.options['xmax'] = c
         self.aligned_obj.options['ymax'] = d
 
-    def align_rotate(self):
+    def get_translation(self):
         dx = self.clicked_points[1][0] - self.clicked_points[0][0]
         dy = self.clicked_points[1][1] - self.clicked_points[0][1]
+        return dx, dy
+
+    def get_rotation_angle(self):
+        """
+        :return:    the rotation angle, in degrees, around the first destination point that aligns the second start
+                    point (after the translation) with the second destination point; None if no rotation is needed
+        """
+        dx, dy = self.get_translation()
 
         test_rotation_pt = translate(Point(self.clicked_points[2]), xoff=dx, yoff=dy)
         new_start = (test_rotation_pt.x, test_rotation_pt.y)
@@ -308,12 +328,13 @@ class AlignObjects(AppTool):
 
         rotation_not_needed = (abs(new_start[0] - new_dest[0]) <= (10 ** -self.decimals)) or \
                               (abs(new_start[1] - new_dest[1]) <= (10 ** -self.decimals))
-        if rotation_not_needed is False:
-            # calculate rotation angle
-            angle_dest = math.degrees(math.atan(dyd / dxd))
-            angle_start = math.degrees(math.atan(dys / dxs))
-            angle = angle_dest - angle_start
-            self.aligned_obj.rotate(angle=angle, point=origin_pt)
+        if rotation_not_needed is True:
+            return None
+
+        # calculate rotation angle
+        angle_dest = math.degrees(math.atan(dyd / dxd))
+        angle_start = math.degrees(math.atan(dys / dxs))
+        return angle_dest - angle_start
 
     def disconnect_cal_events(self):
         # restore the Grid snapping if it was active before
@@ -10,13 +10,23 @@ from PyQt5 import QtWidgets, QtCore, QtGui
 from camlib import grace
 from appTool import AppTool
 from appGUI.GUIElements import FCDoubleSpinner, RadioSet, FCEntry, FCComboBox, FCLabel
+from appCommon.Common import strtree_query
 
 import shapely.geometry.base as base
 from shapely.ops import unary_union
 from shapely.geometry import Polygon, MultiPolygon, Point, LineString
 from shapely.geometry import box as box
+from shapely.prepared import prep
+from shapely.strtree import STRtree
 import shapely.affinity as affinity
 
+# Shapely 2 tests many points and creates many polygons in one call
+try:
+    from shapely import contains_xy, polygons
+except ImportError:
+    from shapely.vectorized import contains as contains_xy
+    polygons = None
+
 import logging
 from copy import deepcopy
 import numpy as np
@@ -713,51 +723,18 @@ class ToolCopperThieving(AppTool):
             tool_obj.app.proc_container.update_view_text(' %s' % _("Create geometry"))
 
             if fill_type == 'dot' or fill_type == 'square':
-                # build the MultiPolygon of dots/squares that will fill the entire bounding box
-                thieving_list = []
-
+                # a single dot/square centered in origin is placed in a grid that fills the entire bounding box and
+                # only the copies that are within the areas to fill are kept
                 if fill_type == 'dot':
-                    radius = dot_dia / 2.0
-                    new_x = x0 + radius
-                    new_y = y0 + radius
-                    while new_x <= x1 - radius:
-                        while new_y <= y1 - radius:
-                            dot_geo = Point((new_x, new_y)).buffer(radius, resolution=64)
-                            thieving_list.append(dot_geo)
-                            new_y += dot_dia + dot_spacing
-                        new_x += dot_dia + dot_spacing
-                        new_y = y0 + radius
+                    template = Point((0, 0)).buffer(dot_dia / 2.0, resolution=64)
+                    size, spacing = dot_dia, dot_spacing
                 else:
                     h_size = square_size / 2.0
-                    new_x = x0 + h_size
-                    new_y = y0 + h_size
-                    while new_x <= x1 - h_size:
-                        while new_y <= y1 - h_size:
-                            a, b, c, d = (Point((new_x, new_y)).buffer(h_size)).bounds
-                            square_geo = box(a, b, c, d)
-                            thieving_list.append(square_geo)
-                            new_y += square_size + square_spacing
-                        new_x += square_size + square_spacing
-                        new_y = y0 + h_size
-
-                thieving_box_geo = MultiPolygon(thieving_list)
-                dx = bounding_box.centroid.x - thieving_box_geo.centroid.x
-                dy = bounding_box.centroid.y - thieving_box_geo.centroid.y
-
-                thieving_box_geo = affinity.translate(thieving_box_geo, xoff=dx, yoff=dy)
-
-                try:
-                    _it = iter(thieving_box_geo)
-                except TypeError:
-                    thieving_box_geo = [thieving_box_geo]
-
-                thieving_geo = []
-                for dot_geo in thieving_box_geo:
-                    for geo_t in tool_obj.thief_solid_geometry:
-                        if dot_geo.within(geo_t):
-                            thieving_geo.append(dot_geo)
+                    template = box(-h_size, -h_size, h_size, h_size)
+                    size, spacing = square_size, square_spacing
 
-                tool_obj.thief_solid_geometry = thieving_geo
+                tool_obj.thief_solid_geometry = self.grid_fill(
+                    template, size, spacing, (x0, y0, x1, y1), bounding_box.centroid, tool_obj.thief_solid_geometry)
 
             if fill_type == 'line':
                 half_thick_line = line_size / 2.0
@@ -820,29 +797,39 @@ class ToolCopperThieving(AppTool):
                 )
 
                 bx0, by0, bx1, by1 = box_outline_geo.bounds
-                thieving_lines_geo = []
-                new_x = bx0
-                new_y = by0
-                while new_x <= x1 - half_thick_line:
-                    line_geo = LineString([(new_x, by0), (new_x, by1)]).buffer(
-                        half_thick_line,
-                        resolution=int(int(tool_obj.geo_steps_per_circle) / 4)
-                    )
-                    thieving_lines_geo.append(line_geo)
-                    new_x += line_size + line_spacing
+                # a single vertical and a single horizontal line, placed at each line position
+                v_line_geo = LineString([(0, by0), (0, by1)]).buffer(
+                    half_thick_line,
+                    resolution=int(int(tool_obj.geo_steps_per_circle) / 4)
+                )
+                h_line_geo = LineString([(bx0, 0), (bx1, 0)]).buffer(
+                    half_thick_line,
+                    resolution=int(int(tool_obj.geo_steps_per_circle) / 4)
+                )
+                thieving_lines_geo = \
+                    [affinity.translate(v_line_geo, xoff=new_x)
+                     for new_x in self.grid_positions(bx0, x1 - half_thick_line, line_size + line_spacing)] + \
+                    [affinity.translate(h_line_geo, yoff=new_y)
+                     for new_y in self.grid_positions(by0, y1 - half_thick_line, line_size + line_spacing)]
 
-                while new_y <= y1 - half_thick_line:
-                    line_geo = LineString([(bx0, new_y), (bx1, new_y)]).buffer(
-                        half_thick_line,
-                        resolution=int(int(tool_obj.geo_steps_per_circle) / 4)
-                    )
-                    thieving_lines_geo.append(line_geo)
-                    new_y += line_size + line_spacing
+                # merge everything together; each line is cut only by the clearance polygons found near it
+                try:
+                    clearance_polygons = list(clearance_geometry.geoms)
+                except AttributeError:
+                    clearance_polygons = [clearance_geometry]
+                clearance_tree = STRtree(clearance_polygons)
 
-                # merge everything together
                 diff_lines_geo = []
                 for line_poly in thieving_lines_geo:
-                    rest_line = line_poly.difference(clearance_geometry)
+                    if tool_obj.app.abort_flag:
+                        # graceful abort requested by the user
+                        raise grace
+
+                    near_clearance = [clearance_polygons[idx] for idx in strtree_query(clearance_tree, line_poly)]
+                    if near_clearance:
+                        rest_line = line_poly.difference(MultiPolygon(near_clearance))
+                    else:
+                        rest_line = line_poly
                     diff_lines_geo.append(rest_line)
                 tool_obj.flatten([outline_geometry, box_outline_geometry, diff_lines_geo])
                 tool_obj.thief_solid_geometry = tool_obj.flat_geometry
@@ -1188,6 +1175,111 @@ class ToolCopperThieving(AppTool):
                                                                   self.app.on_mouse_click_release_over_plot)
             self.handlers_connected = False
 
+    @staticmethod
+    def grid_positions(start, stop, step):
+        """
+        The positions of a row of the fill grid: from start, every step, up to stop.
+
+        :param start:   first position
+        :param stop:    last position allowed
+        :param step:    distance between positions
+        :return:        the positions
+        :rtype:         list
+        """
+        positions = []
+        pos = start
+        while pos <= stop:
+            positions.append(pos)
+            pos += step
+        return positions
+
+    def grid_fill(self, template, size, spacing, bounds, center, regions):
+        """
+        Fill the regions with copies of a template shape placed in a grid. The grid fills the bounds and it is
+        centered in the center point. The copies are made only for the grid positions where the copy is within one
+        of the regions.
+
+        The positions are tested in bulk: a position whose center is outside a region is rejected and one whose center
+        is inside the region shrunk by the template radius is accepted. Only the positions near the region outline are
+        tested with a copy of the template against the prepared region.
+
+        :param template:    Shapely Polygon centered in origin (0, 0), the dot or the square
+        :param size:        the size of the template shape
+        :param spacing:     the spacing between the shapes
+        :param bounds:      (xmin, ymin, xmax, ymax) the bounds to fill with the grid
+        :param center:      Shapely Point; the center of the grid
+        :param regions:     list of Shapely Polygons, the areas to fill
+        :return:            list of Shapely Polygons, the copies of the template within the regions
+        :rtype:             list
+        """
+        x0, y0, x1, y1 = bounds
+        half_size = size / 2.0
+        xs = np.array(self.grid_positions(x0 + half_size, x1 - half_size, size + spacing))
+        ys = np.array(self.grid_positions(y0 + half_size, y1 - half_size, size + spacing))
+        if not len(xs) or not len(ys):
+            return []
+        xs += center.x - xs.mean()
+        ys += center.y - ys.mean()
+
+        template_coords = np.array(template.exterior.coords)
+        tx0, ty0, tx1, ty1 = template.bounds
+        # the template is within the circle of this radius
+        template_radius = np.hypot(template_coords[:, 0], template_coords[:, 1]).max()
+
+        # flags for the grid positions where the copy is kept
+        keep = np.zeros((len(xs), len(ys)), dtype=bool)
+
+        for region in regions:
+            if self.app.abort_flag:
+                # graceful abort requested by the user
+                raise grace
+
+            # the grid positions where the copy is within the region bounds
+            rx0, ry0, rx1, ry1 = region.bounds
+            ix0, ix1 = np.searchsorted(xs, rx0 - tx0), np.searchsorted(xs, rx1 - tx1, side='right')
+            iy0, iy1 = np.searchsorted(ys, ry0 - ty0), np.searchsorted(ys, ry1 - ty1, side='right')
+            if ix0 >= ix1 or iy0 >= iy1:
+                continue
+            grid_x, grid_y = np.meshgrid(xs[ix0:ix1], ys[iy0:iy1], indexing='ij')
+            cx, cy = grid_x.ravel(), grid_y.ravel()
+
+            # the copy is within the region only if its center is inside the region and it is surely within the
+            # region if its center is inside the region shrunk by more than the template radius
+            inside = contains_xy(region, cx, cy)
+            inner_region = region.buffer(-template_radius * 1.01)
+            if inner_region.is_empty:
+                surely_inside = np.zeros(len(cx), dtype=bool)
+            else:
+                surely_inside = contains_xy(inner_region, cx, cy)
+
+            check = np.flatnonzero(inside & ~surely_inside)
+            if len(check):
+                prepared_region = prep(region)
+                for idx, coords in zip(check, self.place_template(template_coords, cx[check], cy[check])):
+                    inside[idx] = prepared_region.contains(coords)
+
+            keep[ix0:ix1, iy0:iy1] |= inside.reshape(grid_x.shape)
+
+        # the copies are made in the grid order: by columns
+        kept_x, kept_y = np.nonzero(keep)
+        return self.place_template(template_coords, xs[kept_x], ys[kept_y])
+
+    @staticmethod
+    def place_template(template_coords, cx, cy):
+        """
+        Copies of a template polygon translated to the given positions.
+
+        :param template_coords:     (N, 2) array, the exterior coordinates of the template polygon
+        :param cx:                  array of X coordinates of the positions
+        :param cy:                  array of Y coordinates of the positions
+        :return:                    list of Shapely Polygons
+        :rtype:                     list
+        """
+        coords = template_coords[None, :, :] + np.stack((cx, cy), axis=1)[:, None, :]
+        if polygons is not None:
+            return list(polygons(coords))
+        return [Polygon(poly_coords) for poly_coords in coords]
+
     def flatten(self, geometry):
         """
         Creates a list of non-iterable linear geometry objects.
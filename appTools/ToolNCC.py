@@ -12,9 +12,12 @@ from appGUI.GUIElements import FCCheckBox, FCDoubleSpinner, RadioSet, FCTable, F
     FCComboBox, OptionalInputSection, FCLabel, FCInputDialogSpinnerButton, FCComboBox2
 from appParsers.ParseGerber import Gerber
 
-from camlib import grace
+from camlib import grace, Geometry
 
 from copy import deepcopy
+from collections import deque
+from multiprocessing import cpu_count
+from types import SimpleNamespace
 
 import numpy as np
 from shapely.geometry import base
@@ -2138,6 +2141,133 @@ class NonCopperClear(AppTool, Gerber):
             self.app.inform_shell.emit('%s %s' % (_('Polygon could not be cleared. Location:'), str(coords)))
             return None
 
+    @staticmethod
+    def clear_polygon_mp(pol, tooldia, steps_per_circle, ncc_method, ncc_overlap, ncc_connect, ncc_contour):
+        """
+        Multiprocessing variant of clear_polygon_worker(). It is run in the App.pool processes therefore it has no
+        access to the App; there is no progressive plotting and the abort is handled by the caller.
+
+        :param pol:                 the Polygon to be cleared
+        :param tooldia:             the tool diameter
+        :param steps_per_circle:    how many linear segments to use to approximate a circle
+        :param ncc_method:          0 - standard, 1 - seed, 2 - lines, 3 - combo
+        :param ncc_overlap:         tool overlap as a fraction of the tool diameter
+        :param ncc_connect:         if to connect the paths to minimize tool lifts
+        :param ncc_contour:         if to cut around the edges
+        :return:                    a list of geometry elements or None if the polygon could not be cleared
+        :rtype:                     list | None
+        """
+
+        clearing = NccPolygonClearing()
+        kwargs = {
+            'overlap': ncc_overlap, 'contour': ncc_contour, 'connect': ncc_connect, 'prog_plot': False
+        }
+
+        cp = None
+        try:
+            if ncc_method == 0:     # standard
+                cp = clearing.clear_polygon(pol, tooldia, steps_per_circle, **kwargs)
+            elif ncc_method == 1:   # seed
+                cp = clearing.clear_polygon2(pol, tooldia, steps_per_circle, **kwargs)
+            elif ncc_method == 2:   # lines
+                cp = clearing.clear_polygon3(pol, tooldia, steps_per_circle, **kwargs)
+            elif ncc_method == 3:   # combo
+                cp = clearing.clear_polygon3(pol, tooldia, steps_per_circle, **kwargs)
+                if not (cp and cp.objects):
+                    cp = clearing.clear_polygon2(pol, tooldia, steps_per_circle, **kwargs)
+                if not (cp and cp.objects):
+                    cp = clearing.clear_polygon(pol, tooldia, steps_per_circle, **kwargs)
+        except Exception as ee:
+            log.debug("NonCopperClear.clear_polygon_mp() --> %s" % str(ee))
+
+        if cp and cp.objects:
+            return list(cp.get_objects())
+        return None
+
+    def clear_polygons_pool(self, polygons, tooldia, ncc_method, ncc_overlap, ncc_connect, ncc_contour,
+                            run_threaded=True):
+        """
+        Clear the polygons in parallel, each polygon being a separate task for the App.pool processes.
+        The results are merged in the order of the polygons so the result is deterministic.
+
+        :param polygons:        an iterable of Polygons/MultiPolygons to be cleared
+        :param tooldia:         the tool diameter
+        :param ncc_method:      0 - standard, 1 - seed, 2 - lines, 3 - combo
+        :param ncc_overlap:     tool overlap as a fraction of the tool diameter
+        :param ncc_connect:     if to connect the paths to minimize tool lifts
+        :param ncc_contour:     if to cut around the edges
+        :param run_threaded:    if False the GUI events are processed while waiting for the results (TclShell usage)
+        :return:                (list of cleared geometry, number of polygons that could not be cleared)
+        :rtype:                 tuple
+        """
+
+        # clean the polygons and break the MultiPolygons into independent tasks
+        to_clear = []
+        for p in polygons:
+            p = p.buffer(0)
+            if p is None or not p.is_valid:
+                continue
+
+            if isinstance(p, MultiPolygon):
+                to_clear += [pol for pol in p.geoms if isinstance(pol, Polygon)]
+            elif isinstance(p, Polygon):
+                to_clear.append(p)
+            else:
+                log.warning("Expected geo is a Polygon. Instead got a %s" % str(type(p)))
+
+        geo_len = len(to_clear)
+        cleared_geo = []
+        poly_failed = 0
+        old_disp_number = 0
+
+        # keep a limited number of tasks in the pool so an abort does not leave a lot of work behind
+        max_pending = 2 * cpu_count()
+        pending = deque()
+
+        def collect_result():
+            pol_idx, task = pending.popleft()
+            while not task.ready():
+                if self.app.abort_flag:
+                    # graceful abort requested by the user
+                    raise grace
+
+                # provide the app with a way to process the GUI events when in a blocking loop
+                if not run_threaded:
+                    QtWidgets.QApplication.processEvents()
+                task.wait(0.05)
+
+            res = task.get()
+            if res is None:
+                pt = to_clear[pol_idx].representative_point()
+                self.app.inform_shell.emit('%s %s' % (_('Polygon could not be cleared. Location:'), str((pt.x, pt.y))))
+            return res
+
+        pol_nr = 0
+        for pol_idx, pol in enumerate(to_clear):
+            if self.app.abort_flag:
+                # graceful abort requested by the user
+                raise grace
+
+            task = self.app.pool.apply_async(
+                self.clear_polygon_mp,
+                args=(pol, tooldia, self.circle_steps, ncc_method, ncc_overlap, ncc_connect, ncc_contour))
+            pending.append((pol_idx, task))
+
+            while len(pending) >= max_pending or (pending and pol_idx == geo_len - 1):
+                res = collect_result()
+                if res is not None:
+                    cleared_geo += res
+                else:
+                    poly_failed += 1
+
+                pol_nr += 1
+                disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
+                if old_disp_number < disp_number <= 100:
+                    self.app.proc_container.update_view_text(' %d%%' % disp_number)
+                    old_disp_number = disp_number
+
+        return cleared_geo, poly_failed
+
     def clear_copper(self, ncc_obj, ncctooldia, isotooldia, sel_obj=None, outname=None, order=None,
                      tools_storage=None, run_threaded=True):
         """
@@ -2184,6 +2314,9 @@ class NonCopperClear(AppTool, Gerber):
         # determine if to use the progressive plotting
         prog_plot = True if self.app.defaults["tools_ncc_plotting"] == 'progressive' else False
 
+        # the progressive plotting can't be done from the App.pool processes
+        use_pool = self.app.defaults["tools_ncc_multiprocessing"] and not prog_plot
+
         tools_storage = tools_storage if tools_storage is not None else self.ncc_tools
         sorted_clear_tools = ncctooldia
 
@@ -2290,8 +2423,20 @@ class NonCopperClear(AppTool, Gerber):
 
                 if area.geoms:
                     if len(area.geoms) > 0:
+                        if use_pool:
+                            # the polygons are independent so they are cleared in parallel in the App.pool processes
+                            pool_geo, poly_failed = self.clear_polygons_pool(
+                                area.geoms, tooldia=tool, ncc_method=ncc_method, ncc_overlap=ncc_overlap,
+                                ncc_connect=ncc_connect, ncc_contour=ncc_contour, run_threaded=run_threaded)
+                            cleared_geo += pool_geo
+                            if poly_failed > 0:
+                                app_obj.poly_not_cleared = True
+                            serial_geoms = []
+                        else:
+                            serial_geoms = area.geoms
+
                         pol_nr = 0
-                        for p in area.geoms:
+                        for p in serial_geoms:
                             # provide the app with a way to process the GUI events when in a blocking loop
                             if not run_threaded:
                                 QtWidgets.QApplication.processEvents()
@@ -3125,8 +3270,22 @@ class NonCopperClear(AppTool, Gerber):
 
                 if area.geoms:
                     if len(area.geoms) > 0:
+                        if self.app.defaults["tools_ncc_multiprocessing"]:
+                            # the polygons are independent so they are cleared in parallel in the App.pool processes
+                            # here any method other than 'standard' and 'seed' is 'lines'
+                            pool_geo, poly_failed = self.clear_polygons_pool(
+                                area.geoms, tooldia=tool, ncc_method=ncc_method if ncc_method in [0, 1] else 2,
+                                ncc_overlap=overlap, ncc_connect=connect, ncc_contour=contour,
+                                run_threaded=run_threaded)
+                            cleared_geo += pool_geo
+                            if poly_failed > 0:
+                                app_obj.poly_not_cleared = True
+                            serial_geoms = []
+                        else:
+                            serial_geoms = area.geoms
+
                         pol_nr = 0
-                        for p in area.geoms:
+                        for p in serial_geoms:
                             # provide the app with a way to process the GUI events when in a blocking loop
                             QtWidgets.QApplication.processEvents()
 
@@ -3918,6 +4077,19 @@ class NonCopperClear(AppTool, Gerber):
         self.object_combo.setRootModelIndex(self.app.collection.index(0, 0, QtCore.QModelIndex()))
 
 
+class NccPolygonClearing:
+    """
+    Holds the Geometry clearing methods so they can be run in the App.pool processes, where the App is not available.
+    The abort flag is never set here, the abort is handled by the process that collects the results.
+    """
+
+    app = SimpleNamespace(abort_flag=False)
+
+    clear_polygon = Geometry.clear_polygon
+    clear_polygon2 = Geometry.clear_polygon2
+    clear_polygon3 = Geometry.clear_polygon3
+
+
 class NccUI:
 
     toolName = _("Non-Copper Clearing")
@@ -9,11 +9,12 @@ from PyQt5 import QtWidgets, QtCore, QtGui
 
 from appTool import AppTool
 from appGUI.GUIElements import OptionalHideInputSection, FCTextArea, FCEntry, FCSpinner, FCCheckBox, FCComboBox, \
-    FCLabel, FCButton
+    FCLabel, FCButton, FCDoubleSpinner
 from camlib import grace
 
 from shapely.geometry import MultiPolygon
 from shapely.ops import nearest_points
+from rtree import index as rtindex
 
 import numpy as np
 
@@ -107,6 +108,7 @@ class ToolOptimal(AppTool):
         self.ui.freq_entry.set_value('0')
 
         self.ui.precision_spinner.set_value(int(self.app.defaults["tools_opt_precision"]))
+        self.ui.ceiling_entry.set_value(float(self.app.defaults["tools_opt_ceiling"]))
         self.ui.locations_textb.clear()
         # new cursor - select all document
         cursor = self.ui.locations_textb.textCursor()
@@ -127,6 +129,7 @@ class ToolOptimal(AppTool):
     def find_minimum_distance(self):
         self.units = self.app.defaults['units'].upper()
         self.decimals = int(self.ui.precision_spinner.get_value())
+        ceiling = float(self.ui.ceiling_entry.get_value())
 
         selection_index = self.ui.gerber_object_combo.currentIndex()
 
@@ -147,8 +150,6 @@ class ToolOptimal(AppTool):
         def job_thread(app_obj):
             app_obj.inform.emit(_("Optimal Tool. Started to search for the minimum distance between copper features."))
             try:
-                old_disp_number = 0
-                pol_nr = 0
                 app_obj.proc_container.update_view_text(' %d%%' % 0)
                 total_geo = []
 
@@ -170,50 +171,18 @@ class ToolOptimal(AppTool):
                 total_geo = MultiPolygon(total_geo)
                 total_geo = total_geo.buffer(0)
 
-                try:
-                    __ = iter(total_geo)
-                    geo_len = len(total_geo)
-                    geo_len = (geo_len * (geo_len - 1)) / 2
-                except TypeError:
+                if not isinstance(total_geo, MultiPolygon):
                     app_obj.inform.emit('[ERROR_NOTCL] %s' %
                                         _("The Gerber object has one Polygon as geometry.\n"
                                           "There are no distances between geometry elements to be found."))
                     return 'fail'
+                total_geo = list(total_geo.geoms)
 
                 app_obj.inform.emit(
                     '%s: %s' % (_("Optimal Tool. Finding the distances between each two elements. Iterations"),
-                                str(geo_len)))
-
-                self.min_dict = {}
-                idx = 1
-                for geo in total_geo:
-                    for s_geo in total_geo[idx:]:
-                        if self.app.abort_flag:
-                            # graceful abort requested by the user
-                            raise grace
-
-                        # minimize the number of distances by not taking into considerations those that are too small
-                        dist = geo.distance(s_geo)
-                        dist = float('%.*f' % (self.decimals, dist))
-                        loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                        proc_loc = (
-                            (float('%.*f' % (self.decimals, loc_1.x)), float('%.*f' % (self.decimals, loc_1.y))),
-                            (float('%.*f' % (self.decimals, loc_2.x)), float('%.*f' % (self.decimals, loc_2.y)))
-                        )
-
-                        if dist in self.min_dict:
-                            self.min_dict[dist].append(proc_loc)
-                        else:
-                            self.min_dict[dist] = [proc_loc]
+                                str(len(total_geo))))
 
-                        pol_nr += 1
-                        disp_number = int(np.interp(pol_nr, [0, geo_len], [0, 100]))
-
-                        if old_disp_number < disp_number <= 100:
-                            app_obj.proc_container.update_view_text(' %d%%' % disp_number)
-                            old_disp_number = disp_number
-                    idx += 1
+                self.min_dict = self.find_distances(total_geo, self.decimals, ceiling)
 
                 app_obj.inform.emit(_("Optimal Tool. Finding the minimum distance."))
 
@@ -240,6 +209,88 @@ class ToolOptimal(AppTool):
 
         self.app.worker_task.emit({'fcn': job_thread, 'params': [self.app]})
 
+    def find_distances(self, geo_list, decimals, ceiling):
+        """
+        Find the minimum distance between the geometry elements and the distances that are smaller than the ceiling
+        value. The envelopes of the elements are stored in a R-tree index and for each element only the elements
+        found inside its envelope expanded with the search radius are checked. The search radius starts as the distance
+        to the element having the nearest envelope and it shrinks as smaller distances are found, but it is never
+        less than the ceiling value.
+
+        :param geo_list:    list of geometry elements
+        :type geo_list:     list
+        :param decimals:    the distances and the coordinates are rounded to this number of decimals
+        :type decimals:     int
+        :param ceiling:     the distances (others than the minimum) smaller than this value are also returned
+        :type ceiling:      float
+        :return:            a dict where the keys are the distances and the values are lists of locations, each
+                            location being a tuple of two points
+        :rtype:             dict
+        """
+
+        def bounds_gen():
+            for geo_idx, geo_el in enumerate(geo_list):
+                yield geo_idx, geo_el.bounds, None
+
+        geo_index = rtindex.Index(bounds_gen())
+
+        # distances that are rounded to the same value as the minimum distance are found too
+        half_step = 0.5 * (10 ** -decimals)
+
+        # a first estimation of the minimum distance, from the element with the nearest envelope to the first element
+        min_dist = np.inf
+        for s_idx in geo_index.nearest(geo_list[0].bounds, 2):
+            if s_idx != 0:
+                min_dist = min(min_dist, geo_list[0].distance(geo_list[s_idx]))
+
+        geo_len = len(geo_list)
+        old_disp_number = 0
+        found = []
+        for idx, geo in enumerate(geo_list):
+            if self.app.abort_flag:
+                # graceful abort requested by the user
+                raise grace
+
+            radius = max(min_dist + half_step, ceiling)
+            minx, miny, maxx, maxy = geo.bounds
+            for s_idx in sorted(geo_index.intersection((minx - radius, miny - radius, maxx + radius, maxy + radius))):
+                if s_idx <= idx:
+                    continue
+
+                dist = geo.distance(geo_list[s_idx])
+                if dist <= radius:
+                    found.append((dist, idx, s_idx))
+                    if dist < min_dist:
+                        min_dist = dist
+                        radius = max(min_dist + half_step, ceiling)
+
+            disp_number = int(np.interp(idx + 1, [0, geo_len], [0, 100]))
+            if old_disp_number < disp_number <= 100:
+                self.app.proc_container.update_view_text(' %d%%' % disp_number)
+                old_disp_number = disp_number
+
+        min_dist_rounded = float('%.*f' % (decimals, min_dist))
+
+        # the pairs found while the search radius was bigger than the final one are not needed
+        min_dict = {}
+        for dist, idx, s_idx in found:
+            dist = float('%.*f' % (decimals, dist))
+            if dist != min_dist_rounded and dist >= ceiling:
+                continue
+
+            loc_1, loc_2 = nearest_points(geo_list[idx], geo_list[s_idx])
+            proc_loc = (
+                (float('%.*f' % (decimals, loc_1.x)), float('%.*f' % (decimals, loc_1.y))),
+                (float('%.*f' % (decimals, loc_2.x)), float('%.*f' % (decimals, loc_2.y)))
+            )
+
+            if dist in min_dict:
+                min_dict[dist].append(proc_loc)
+            else:
+                min_dict[dist] = [proc_loc]
+
+        return min_dict
+
     def on_locate_position(self):
         # cursor = self.locations_textb.textCursor()
         # self.selected_text = cursor.selectedText()
@@ -439,6 +490,16 @@ class OptimalUI:
         self.precision_spinner.setWrapping(True)
         form_lay.addRow(self.precision_label, self.precision_spinner)
 
+        # Ceiling for the other distances
+        self.ceiling_label = FCLabel('%s:' % _("Distances ceiling"))
+        self.ceiling_label.setToolTip(_("Other distances are reported only if they are smaller than this value."))
+
+        self.ceiling_entry = FCDoubleSpinner(callback=self.confirmation_message)
+        self.ceiling_entry.set_range(0.0, 10000.0000)
+        self.ceiling_entry.set_precision(self.decimals)
+        self.ceiling_entry.setSingleStep(0.1)
+        form_lay.addRow(self.ceiling_label, self.ceiling_entry)
+
         # Results Title
         self.title_res_label = FCLabel('<b>%s:</b>' % _("Minimum distance"))
         self.title_res_label.setToolTip(_("Display minimum distance between copper features."))
@@ -15,6 +15,7 @@ from appPool import *
 # from os import getpid
 from shapely.ops import nearest_points
 from shapely.geometry import MultiPolygon, Polygon
+from rtree import index as rtindex
 
 import logging
 import gettext
@@ -157,6 +158,69 @@ class RulesCheck(AppTool):
 
         self.reset_fields()
 
+    @staticmethod
+    def find_clearance_violations(geo_list, s_geo_list, size, same_list=False):
+        """
+        Find the pairs of geometry elements that are closer than the clearance value. Only the pairs whose envelopes,
+        expanded by the clearance value, intersect are tested; they are found by using a R-tree spatial index.
+        The pairs are tested in the same order as when testing every pair of elements.
+
+        :param geo_list:        list of geometry elements
+        :type geo_list:         list
+        :param s_geo_list:      list of geometry elements that are checked against the ones in geo_list
+        :type s_geo_list:       list
+        :param size:            the clearance value
+        :type size:             float
+        :param same_list:       if True then s_geo_list is the same as geo_list and each pair is tested only once
+        :type same_list:        bool
+        :return:                a dictionary with the distances as keys and lists of violation locations as values
+        :rtype:                 dict
+        """
+
+        size = float(size)
+
+        def bounds_gen():
+            for s_idx, s_geo_el in enumerate(s_geo_list):
+                if not s_geo_el.is_empty:
+                    yield s_idx, s_geo_el.bounds, None
+
+        min_dict = {}
+        if not s_geo_list:
+            return min_dict
+
+        try:
+            s_index = rtindex.Index(bounds_gen())
+        except Exception as e:
+            # the R-tree bulk loading fails on an empty stream
+            log.debug("RulesCheck.find_clearance_violations() --> %s" % str(e))
+            return min_dict
+
+        for idx, geo in enumerate(geo_list):
+            if geo.is_empty:
+                continue
+
+            minx, miny, maxx, maxy = geo.bounds
+            candidates = sorted(s_index.intersection((minx - size, miny - size, maxx + size, maxy + size)))
+            for s_idx in candidates:
+                if same_list and s_idx <= idx:
+                    continue
+
+                s_geo = s_geo_list[s_idx]
+                dist = geo.distance(s_geo)
+                if float(dist) < size:
+                    loc_1, loc_2 = nearest_points(geo, s_geo)
+
+                    dx = loc_1.x - loc_2.x
+                    dy = loc_1.y - loc_2.y
+                    loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
+
+                    if dist in min_dict:
+                        min_dict[dist].append(loc)
+                    else:
+                        min_dict[dist] = [loc]
+
+        return min_dict
+
     @staticmethod
     def check_inside_gerber_clearance(gerber_obj, size, rule):
         log.debug("RulesCheck.check_inside_gerber_clearance()")
@@ -200,28 +264,11 @@ class RulesCheck(AppTool):
             obj_violations['points'] = ['Failed. Only one polygon.']
             return rule_title, [obj_violations]
         else:
-            iterations = len(total_geo)
-            iterations = (iterations * (iterations - 1)) / 2
-        log.debug("RulesCheck.check_gerber_clearance(). Iterations: %s" % str(iterations))
+            total_geo = list(total_geo)
+        log.debug("RulesCheck.check_gerber_clearance(). Polygons: %s" % str(len(total_geo)))
 
-        min_dict = {}
-        idx = 1
-        for geo in total_geo:
-            for s_geo in total_geo[idx:]:
-                # minimize the number of distances by not taking into considerations those that are too small
-                dist = geo.distance(s_geo)
-                if float(dist) < float(size):
-                    loc_1, loc_2 = nearest_points(geo, s_geo)
+        min_dict = RulesCheck.find_clearance_violations(total_geo, total_geo, size, same_list=True)
 
-                    dx = loc_1.x - loc_2.x
-                    dy = loc_1.y - loc_2.y
-                    loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
-
-                    if dist in min_dict:
-                        min_dict[dist].append(loc)
-                    else:
-                        min_dict[dist] = [loc]
-            idx += 1
         points_list = set()
         for dist in min_dict.keys():
             for location in min_dict[dist]:
@@ -300,25 +347,9 @@ class RulesCheck(AppTool):
         else:
             len_3 = len(total_geo_grb_3)
 
-        iterations = len_1 * len_3
-        log.debug("RulesCheck.check_gerber_clearance(). Iterations: %s" % str(iterations))
-
-        min_dict = {}
-        for geo in total_geo_grb_1:
-            for s_geo in total_geo_grb_3:
-                # minimize the number of distances by not taking into considerations those that are too small
-                dist = geo.distance(s_geo)
-                if float(dist) < float(size):
-                    loc_1, loc_2 = nearest_points(geo, s_geo)
+        log.debug("RulesCheck.check_gerber_clearance(). Polygons: %s x %s" % (str(len_1), str(len_3)))
 
-                    dx = loc_1.x - loc_2.x
-                    dy = loc_1.y - loc_2.y
-                    loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
-
-                    if dist in min_dict:
-                        min_dict[dist].append(loc)
-                    else:
-                        min_dict[dist] = [loc]
+        min_dict = RulesCheck.find_clearance_violations(list(total_geo_grb_1), list(total_geo_grb_3), size)
 
         points_list = set()
         for dist in min_dict.keys():
@@ -386,24 +417,7 @@ class RulesCheck(AppTool):
                     for geo in geometry:
                         total_geo.append(geo)
 
-        min_dict = {}
-        idx = 1
-        for geo in total_geo:
-            for s_geo in total_geo[idx:]:
-
-                # minimize the number of distances by not taking into considerations those that are too small
-                dist = geo.distance(s_geo)
-                loc_1, loc_2 = nearest_points(geo, s_geo)
-
-                dx = loc_1.x - loc_2.x
-                dy = loc_1.y - loc_2.y
-                loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
-
-                if dist in min_dict:
-                    min_dict[dist].append(loc)
-                else:
-                    min_dict[dist] = [loc]
-            idx += 1
+        min_dict = RulesCheck.find_clearance_violations(total_geo, total_geo, size, same_list=True)
 
         points_list = set()
         for dist in min_dict.keys():
@@ -68,6 +68,8 @@ from appObjects.AppObject import AppObject
 from appParsers.ParseExcellon import Excellon
 from appParsers.ParseGerber import Gerber
 from camlib import to_dict, dict2obj, ET, ParseError, Geometry, CNCjob
+from appCommon.ProjectArchive import write_project_archive, verify_project_archive, is_project_archive, \
+    ProjectArchiveReader
 
 # FlatCAM appGUI
 from appGUI.PlotCanvas import *
@@ -4425,6 +4427,9 @@ class App(QtCore.QObject):
             "tools_cr_trace_size_val", "tools_cr_c2c_val", "tools_cr_c2o_val", "tools_cr_s2s_val", "tools_cr_s2sm_val",
             "tools_cr_s2o_val", "tools_cr_sm2sm_val", "tools_cr_ri_val", "tools_cr_h2h_val", "tools_cr_dh_val",
 
+            # Optimal Tool
+            "tools_opt_ceiling",
+
             # QRCode Tool
             "tools_qrcode_border_size",
 
@@ -7231,6 +7236,7 @@ class App(QtCore.QObject):
                 return 'fail'
         else:
             try:
+                self.f_handlers.make_source_file(obj)
                 file = StringIO(obj.source_file)
             except (AttributeError, TypeError):
                 self.inform.emit('[WARNING_NOTCL] %s' %
@@ -9925,27 +9931,45 @@ class MenuFileHandlers(QtCore.QObject):
 
                 footer = 'M02*\n'
 
-                gerber_code = obj.export_gerber(gwhole, gfract, g_zeros=gzeros, factor=factor)
-
-                exported_gerber = header
-                exported_gerber += gerber_code
-                exported_gerber += footer
-
                 if local_use is None:
+                    if not obj.apertures:
+                        log.debug("App.export_gerber.make_gerber() --> Gerber Object is empty: no apertures.")
+                        return 'fail'
+
+                    # the Gerber code is written in chunks, as it is made, into a temporary file that replaces the
+                    # Gerber file only when it is complete
+                    tmp_filename = filename + '.tmp'
                     try:
-                        with open(filename, 'w') as fp:
-                            fp.write(exported_gerber)
+                        with open(tmp_filename, 'w') as fp:
+                            fp.write(header)
+                            ret = obj.write_gerber_code(fp, gwhole, gfract, g_zeros=gzeros, factor=factor)
+                            if ret != 'fail':
+                                fp.write(footer)
+                        if ret == 'fail':
+                            return 'fail'
+                        os.replace(tmp_filename, filename)
                     except PermissionError:
                         self.inform.emit('[WARNING] %s' %
                                          _("Permission denied, saving not possible.\n"
                                            "Most likely another app is holding the file open and not accessible."))
                         return 'fail'
+                    finally:
+                        # after a failed export; after the rename there is no temporary file left
+                        try:
+                            os.remove(tmp_filename)
+                        except OSError:
+                            pass
 
                     if self.defaults["global_open_style"] is False:
                         self.app.file_opened.emit("Gerber", filename)
                     self.app.file_saved.emit("Gerber", filename)
                     self.inform.emit('[success] %s: %s' % (_("Gerber file exported to"), filename))
                 else:
+                    gerber_code = obj.export_gerber(gwhole, gfract, g_zeros=gzeros, factor=factor)
+
+                    exported_gerber = header
+                    exported_gerber += gerber_code
+                    exported_gerber += footer
                     return exported_gerber
             except Exception as e:
                 log.debug("App.export_gerber.make_gerber() --> %s" % str(e))
@@ -10554,23 +10578,46 @@ class MenuFileHandlers(QtCore.QObject):
                 self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), filename))
                 return
 
-        try:
-            d = json.load(f, object_hook=dict2obj)
-        except Exception as e:
-            self.app.log.error(
-                "Failed to parse project file, trying to see if it loads as an LZMA archive: %s because %s" %
-                (filename, str(e)))
+        if is_project_archive(filename):
+            # Project archive: the objects are deserialized one by one, while they are recreated
             f.close()
+            try:
+                reader = ProjectArchiveReader(filename)
+            except Exception as e:
+                self.app.log.error("Failed to open project file: %s with error: %s" % (filename, str(e)))
+                self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), filename))
+                return
 
-            # Open and parse a compressed Project file
             try:
-                with lzma.open(filename) as f:
-                    file_content = f.read().decode('utf-8')
-                    d = json.loads(file_content, object_hook=dict2obj)
+                d = {
+                    'options': reader.options,
+                    'objs': reader.objects(),
+                    'version': reader.version
+                }
             except Exception as e:
+                reader.close()
                 self.app.log.error("Failed to open project file: %s with error: %s" % (filename, str(e)))
                 self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), filename))
                 return
+        else:
+            reader = None
+            try:
+                d = json.load(f, object_hook=dict2obj)
+            except Exception as e:
+                self.app.log.error(
+                    "Failed to parse project file, trying to see if it loads as an LZMA archive: %s because %s" %
+                    (filename, str(e)))
+                f.close()
+
+                # Open and parse a compressed Project file
+                try:
+                    with lzma.open(filename) as f:
+                        file_content = f.read().decode('utf-8')
+                        d = json.loads(file_content, object_hook=dict2obj)
+                except Exception as e:
+                    self.app.log.error("Failed to open project file: %s with error: %s" % (filename, str(e)))
+                    self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), filename))
+                    return
 
         # Clear the current project
         # # NOT THREAD SAFE # ##
@@ -10594,26 +10641,42 @@ class MenuFileHandlers(QtCore.QObject):
         # Re create objects
         self.app.log.debug(" **************** Started PROEJCT loading... **************** ")
 
-        for obj in d['objs']:
-            def obj_init(obj_inst, app_inst):
-                try:
-                    obj_inst.from_dict(obj)
-                except Exception as erro:
-                    app_inst.log('MenuFileHandlers.open_project() --> ' + str(erro))
-                    return 'fail'
+        # the objects of a project archive are read while they are recreated; a damaged archive (a corrupted stream
+        # or an object that can't be parsed) stops the loading and the archive is closed in any case
+        try:
+            for obj in d['objs']:
+                def obj_init(obj_inst, app_inst):
+                    try:
+                        obj_inst.from_dict(obj)
+                    except Exception as erro:
+                        app_inst.log('MenuFileHandlers.open_project() --> ' + str(erro))
+                        return 'fail'
 
-            self.app.log.debug(
-                "Recreating from opened project an %s object: %s" % (obj['kind'].capitalize(), obj['options']['name']))
+                self.app.log.debug("Recreating from opened project an %s object: %s" %
+                                   (obj['kind'].capitalize(), obj['options']['name']))
 
-            # for some reason, setting ui_title does not work when this method is called from Tcl Shell
-            # it's because the TclCommand is run in another thread (it inherit TclCommandSignaled)
-            if cli is None:
-                self.app.ui.set_ui_title(name="{} {}: {}".format(
-                    _("Loading Project ... restoring"), obj['kind'].upper(), obj['options']['name']))
+                # for some reason, setting ui_title does not work when this method is called from Tcl Shell
+                # it's because the TclCommand is run in another thread (it inherit TclCommandSignaled)
+                if cli is None:
+                    self.app.ui.set_ui_title(name="{} {}: {}".format(
+                        _("Loading Project ... restoring"), obj['kind'].upper(), obj['options']['name']))
 
-            self.app.app_obj.new_object(obj['kind'], obj['options']['name'], obj_init, plot=plot)
+                self.app.app_obj.new_object(obj['kind'], obj['options']['name'], obj_init, plot=plot)
+        except Exception as e:
+            self.app.log.error("Failed to read project file: %s with error: %s" % (filename, str(e)))
+            self.inform.emit('[ERROR_NOTCL] %s: %s' % (_("Failed to open project file"), filename))
+            self.app.block_autosave = False
+            return
+        finally:
+            if reader is not None:
+                reader.close()
 
-        self.inform.emit('[success] %s: %s' % (_("Project loaded from"), filename))
+        if reader is not None and reader.failed:
+            # the objects whose streams do not match the checksums from the manifest were not loaded
+            self.inform.emit('[ERROR_NOTCL] %s: %s' %
+                             (_("Failed to open project file"), ', '.join(str(n) for n in reader.failed)))
+        else:
+            self.inform.emit('[success] %s: %s' % (_("Project loaded from"), filename))
 
         self.app.should_we_save = False
         self.app.file_opened.emit("project", filename)
@@ -10655,58 +10718,35 @@ class MenuFileHandlers(QtCore.QObject):
             except Exception as e:
                 self.app.log.debug("save_project() --> There was no active object. Skipping read_form. %s" % str(e))
 
-            # Serialize the whole project
-            d = {
-                "objs":     [obj.to_dict() for obj in self.app.collection.get_list()],
-                "options":  self.app.options,
-                "version":  self.app.version
-            }
+            # Serialize the whole project, one object at a time, into a project archive
+            compressed = self.defaults["global_save_compressed"] is True
+            try:
+                manifest = write_project_archive(
+                    filename,
+                    objs=(obj.to_dict() for obj in self.app.collection.get_list()),
+                    options=self.app.options,
+                    version=self.app.version,
+                    compressed=compressed,
+                    compression_level=self.defaults['global_compression_level']
+                )
+            except IOError:
+                self.app.log.error("Failed to open file for saving: %s", filename)
+                self.inform.emit('[ERROR_NOTCL] %s' % _("The object is used by another application."))
+                return
+
+            # verification of the saved project; the archive was written in a temporary file and renamed only after
+            # it was complete so it is enough to check the streams sizes against the ones recorded in the manifest
+            if verify_project_archive(filename, manifest) is False:
+                if silent is False:
+                    self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
+                                     (_("Failed to verify project file"), filename, _("Retry to save it.")))
+                return
 
-            if self.defaults["global_save_compressed"] is True:
-                with lzma.open(filename, "w", preset=int(self.defaults['global_compression_level'])) as f:
-                    g = json.dumps(d, default=to_dict, indent=2, sort_keys=True).encode('utf-8')
-                    # # Write
-                    f.write(g)
+            if compressed:
                 self.inform.emit('[success] %s: %s' % (_("Project saved to"), filename))
             else:
-                # Open file
-                try:
-                    f = open(filename, 'w')
-                except IOError:
-                    self.app.log.error("Failed to open file for saving: %s", filename)
-                    self.inform.emit('[ERROR_NOTCL] %s' % _("The object is used by another application."))
-                    return
-
-                # Write
-                json.dump(d, f, default=to_dict, indent=2, sort_keys=True)
-                f.close()
-
-                # verification of the saved project
-                # Open and parse
-                try:
-                    saved_f = open(filename, 'r')
-                except IOError:
-                    if silent is False:
-                        self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
-                                         (_("Failed to verify project file"), filename, _("Retry to save it.")))
-                    return
-
-                try:
-                    saved_d = json.load(saved_f, object_hook=dict2obj)
-                except Exception:
-                    if silent is False:
-                        self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
-                                         (_("Failed to parse saved project file"), filename, _("Retry to save it.")))
-                    f.close()
-                    return
-                saved_f.close()
-
                 if silent is False:
-                    if 'version' in saved_d:
-                        self.inform.emit('[success] %s: %s' % (_("Project saved to"), filename))
-                    else:
-                        self.inform.emit('[ERROR_NOTCL] %s: %s %s' %
-                                         (_("Failed to parse saved project file"), filename, _("Retry to save it.")))
+                    self.inform.emit('[success] %s: %s' % (_("Project saved to"), filename))
 
                 tb_settings = QSettings("Open Source", "FlatCAM")
                 lock_state = self.app.ui.lock_action.isChecked()
@@ -10720,6 +10760,26 @@ class MenuFileHandlers(QtCore.QObject):
             # t.start()
             self.app.start_delayed_quit(delay=500, filename=filename, should_quit=quit_action)
 
+    def make_source_file(self, obj):
+        """
+        Makes the source code of a Gerber, Excellon or Geometry object that is made only when it is first needed (its
+        source_file is None), like the one of a panel made by the Panelize Tool, which needs the geometry of all the
+        panel instances.
+
+        :param obj:     FlatCAM object
+        :return:        None
+        """
+        if obj.source_file is not None:
+            return
+
+        obj_name = obj.options['name']
+        if obj.kind == 'gerber':
+            obj.source_file = self.export_gerber(obj_name=obj_name, filename=None, local_use=obj, use_thread=False)
+        elif obj.kind == 'excellon':
+            obj.source_file = self.export_excellon(obj_name=obj_name, filename=None, local_use=obj, use_thread=False)
+        elif obj.kind == 'geometry':
+            obj.source_file = self.export_dxf(obj_name=obj_name, filename=None, local_use=obj, use_thread=False)
+
     def save_source_file(self, obj_name, filename):
         """
         Exports a FlatCAM Object to an Gerber/Excellon file.
@@ -10737,6 +10797,7 @@ class MenuFileHandlers(QtCore.QObject):
 
         obj = self.app.collection.get_by_name(obj_name)
 
+        self.make_source_file(obj)
         file_string = StringIO(obj.source_file)
         time_string = "{:%A, %d %B %Y at %H:%M}".format(datetime.now())
 
@@ -14,6 +14,9 @@ from numpy.linalg import solve, norm
 
 import platform
 from copy import deepcopy
+from functools import wraps
+import operator
+import threading
 
 import traceback
 from decimal import Decimal
@@ -54,10 +57,10 @@ from appCommon.Common import GracefulException as grace
 
 from appParsers.ParseSVG import *
 from appParsers.ParseDXF import *
-
-if platform.architecture()[0] == '64bit':
-    from ortools.constraint_solver import pywrapcp
-    from ortools.constraint_solver import routing_enums_pb2
+from appParsers.ParseGCode import get_dialect, parse_gcode, is_foreign_gcode
+from appCommon import PathOptimizer
+from appCommon.AffineTransform import transform_geometry, mirror_matrix, rotate_matrix, skew_matrix
+from appCommon.Panel import GEOMETRY_KEYS, copy_structure
 
 import logging
 
@@ -507,6 +510,42 @@ class ApertureMacro:
         return self.geometry
 
 
+def invalidates_bounds(method):
+    """
+    Decorator for the methods that change the geometry of a Geometry object: the cached bounds of the object are
+    dropped after the method runs.
+
+    :param method:  method of a Geometry object
+    :return:        the decorated method
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.invalidate_bounds()
+
+    return wrapper
+
+
+def geometry_elements(geometry, elements):
+    """
+    Collects the elements of a (nested) list, tuple or dict of geometries.
+
+    :param geometry:    a Shapely geometry or a (nested) list, tuple or dict of geometries
+    :param elements:    list where the elements that are not lists, tuples or dicts are added
+    :return:            None
+    """
+    if isinstance(geometry, (list, tuple)):
+        for geo in geometry:
+            geometry_elements(geo, elements)
+    elif isinstance(geometry, dict):
+        for geo in geometry.values():
+            geometry_elements(geo, elements)
+    else:
+        elements.append(geometry)
+
+
 class Geometry(object):
     """
     Base geometry class.
@@ -517,6 +556,14 @@ class Geometry(object):
         # "geo_steps_per_circle": 128
     }
 
+    # the panel of the object (appCommon.Panel.Panel) while its geometry is the one of the panel source;
+    # None when the geometry is stored in full
+    panel = None
+    # made by set_panel(): panel_lock is held while the pending panel is read and while the expanded geometry replaces
+    # the source geometry; panel_expand_lock lets one thread at a time expand the panel
+    panel_lock = None
+    panel_expand_lock = None
+
     def __init__(self, geo_steps_per_circle=None):
         # Units (in or mm)
         self.units = self.app.defaults["units"]
@@ -738,10 +785,236 @@ class Geometry(object):
 
         self.solid_geometry = unary_union(diffs)
 
+    @property
+    def solid_geometry(self):
+        """
+        The geometry of the object. While the object is a pending panel (self.panel is not None) any read or write of
+        it expands the panel first, with materialize_panel(), and the geometry of all the instances is kept from then
+        on. The code that only needs the geometry of the panel source and the offsets of the instances (the bounds,
+        the plot, the element counts shown in the UI) uses panel_geometry() and geometry_count() instead, which do not
+        expand the panel.
+        """
+        if self.panel is not None:
+            self.materialize_panel()
+        return self._solid_geometry
+
+    @solid_geometry.setter
+    def solid_geometry(self, geometry):
+        if self.panel is not None:
+            self.materialize_panel()
+        self._solid_geometry = geometry
+        self.invalidate_bounds()
+
+    @property
+    def follow_geometry(self):
+        """
+        The follow geometry of the object (Gerber). Like solid_geometry, reading or writing it expands a pending panel.
+        """
+        if self.panel is not None:
+            self.materialize_panel()
+        return self._follow_geometry
+
+    @follow_geometry.setter
+    def follow_geometry(self, geometry):
+        if self.panel is not None:
+            self.materialize_panel()
+        self._follow_geometry = geometry
+
+    def set_panel(self, panel, source):
+        """
+        Makes this object a panel of the source object without copying the geometry: the geometry of the source is
+        shared and the geometry of the instances is made only when it is read or changed (see materialize_panel()).
+        The bounds and the plot of the FlatCAM objects use the source geometry with the offsets of the instances.
+
+        :param panel:   appCommon.Panel.Panel with the offsets of the instances
+        :param source:  the object that is panelized
+        :return:        None
+        """
+        self.solid_geometry = copy_structure(source.solid_geometry)
+        self.follow_geometry = copy_structure(getattr(source, 'follow_geometry', None))
+        for attr in ('tools', 'apertures'):
+            storage = getattr(source, attr, None)
+            if isinstance(storage, dict):
+                setattr(self, attr, {key: panel.share(value, self) for key, value in storage.items()})
+
+        if self.panel_lock is None:
+            self.panel_lock = threading.RLock()
+            self.panel_expand_lock = threading.RLock()
+        self.panel = panel
+        self.invalidate_bounds()
+
+    def materialize_panel(self):
+        """
+        Makes the geometry of all the instances of a pending panel, in the solid geometry, the follow geometry and the
+        tools and apertures dictionaries, and stores the object in full.
+
+        The panel stays pending while its geometry is expanded, so the other threads that draw it or read its bounds
+        and counts (panel_geometry(), geometry_count()) keep getting the source geometry with the offsets. The
+        expanded geometry replaces the source geometry at the end, in one step under panel_lock. The threads that need
+        the full geometry meanwhile wait here until the expansion is done.
+
+        :return:    None
+        """
+        if self.panel is None:
+            return
+
+        with self.panel_expand_lock:
+            panel = self.panel
+            if panel is None:
+                # expanded by another thread
+                return
+
+            log.debug("camlib.Geometry.materialize_panel() --> %d instances" % len(panel))
+
+            solid_geometry = panel.expand(self._solid_geometry)
+            follow_geometry = panel.expand(self._follow_geometry)
+            dicts = [(storage, {key: panel.expand(value) for key, value in dict.items(storage) if key in GEOMETRY_KEYS})
+                     for storage in panel.dicts()]
+
+            with self.panel_lock:
+                self._solid_geometry = solid_geometry
+                self._follow_geometry = follow_geometry
+                for storage, values in dicts:
+                    dict.update(storage, values)
+                    storage.owner = None
+                self.panel = None
+
+        self.invalidate_bounds()
+
+    def _pending_geometry(self, name, storage=None):
+        """
+        :param name:    name of the attribute or key in the storage dictionary
+        :param storage: a tool or an aperture dictionary; None for an attribute of the object
+        :return:        (geometry, panel) of a pending panel, read together; (None, None) when the geometry is stored
+                        in full
+        """
+        if self.panel is None:
+            return None, None
+
+        with self.panel_lock:
+            panel = self.panel
+            if panel is None:
+                return None, None
+            if storage is None:
+                return getattr(self, '_' + name), panel
+            return dict.__getitem__(storage, name), panel
+
+    def panel_geometry(self, name, storage=None):
+        """
+        The geometry of an attribute of the object or of a key of a tool or an aperture dictionary, for drawing. The
+        geometry of a pending panel is not expanded: the source geometry is returned with the offsets of the instances.
+
+        :param name:    name of the attribute or key in the storage dictionary
+        :param storage: a tool or an aperture dictionary; None for an attribute of the object
+        :return:        (geometry, offsets); offsets is None when the geometry is stored in full
+        """
+        geometry, panel = self._pending_geometry(name, storage)
+        if panel is None:
+            return (getattr(self, name) if storage is None else storage[name]), None
+        return geometry, panel.offsets
+
+    def geometry_count(self, name, storage=None):
+        """
+        Number of elements of the geometry of an attribute of the object or of a key of a tool or an aperture
+        dictionary. The geometry of a pending panel is not expanded.
+
+        :param name:    name of the attribute or key in the storage dictionary
+        :param storage: a tool or an aperture dictionary; None for an attribute of the object
+        :return:        number of elements; 0 if there is no such geometry
+        :rtype:         int
+        """
+        if storage is not None and name not in storage:
+            return 0
+
+        geometry, panel = self._pending_geometry(name, storage)
+        if panel is not None:
+            return panel.count(geometry)
+
+        geometry = getattr(self, name) if storage is None else storage[name]
+        try:
+            return len(geometry)
+        except TypeError:
+            return 0 if geometry is None else 1
+
+    def invalidate_bounds(self):
+        """
+        Drops the cached bounds. Called when the geometry is replaced and by the methods that change it (decorated
+        with invalidates_bounds).
+
+        :return:    None
+        """
+        self._bounds_cache = None
+        self.bounds_changed()
+
+    def bounds_changed(self):
+        """
+        Called when the bounds of the geometry may have changed. Overridden by the FlatCAM objects to let the
+        collection know.
+
+        :return:    None
+        """
+        pass
+
+    def bounds_key(self):
+        """
+        The geometry from which the bounds are made: the elements of the solid geometry and of the solid geometry of
+        each tool, so the cached bounds are not used after the geometry is replaced, added to or changed in place
+        (an element of a list replaced) without invalidate_bounds() being called. The elements are kept and compared
+        by identity, not by value, and their id() is not used because it can be reused by a new geometry.
+
+        :return:    the key: the parameters that change the bounds and the list of the geometry elements
+        :rtype:     tuple
+        """
+        params = [getattr(self, 'multigeo', None), getattr(self, 'multitool', None)]
+        elements = []
+        geometry_elements(self.solid_geometry, elements)
+        for attr in ('tools', 'cnc_tools', 'exc_cnc_tools'):
+            tools = getattr(self, attr, None)
+            if isinstance(tools, dict):
+                for tool, tool_dict in tools.items():
+                    if isinstance(tool_dict, dict):
+                        params.append((attr, tool, len(elements)))
+                        geometry_elements(tool_dict.get('solid_geometry'), elements)
+        return tuple(params), elements
+
+    def cached_bounds(self):
+        """
+        The bounds found by the last call of bounds(), if the geometry did not change since.
+
+        :return:    (xmin, ymin, xmax, ymax) or None if the bounds have to be found again
+        :rtype:     tuple
+        """
+        cache = getattr(self, '_bounds_cache', None)
+        if cache is None:
+            return None
+
+        (params, elements), bounds = cache
+        new_params, new_elements = self.bounds_key()
+        if params != new_params or len(elements) != len(new_elements) or \
+                not all(map(operator.is_, elements, new_elements)):
+            self.invalidate_bounds()
+            return None
+        return bounds
+
+    def cache_bounds(self, bounds):
+        """
+        Keeps the bounds to be returned by the next calls of bounds(), until the geometry changes.
+
+        :param bounds:  (xmin, ymin, xmax, ymax)
+        :return:        the bounds
+        :rtype:         tuple
+        """
+        if bounds is not None:
+            bounds = tuple(bounds)
+            self._bounds_cache = (self.bounds_key(), bounds)
+        return bounds
+
     def bounds(self, flatten=False):
         """
         Returns coordinates of rectangular bounds
         of geometry: (xmin, ymin, xmax, ymax).
+        The bounds are cached until the geometry changes.
+
         :param flatten: will flatten the solid_geometry if True
         :return:
         """
@@ -750,10 +1023,19 @@ class Geometry(object):
 
         log.debug("camlib.Geometry.bounds()")
 
+        panel = self.panel
+        if panel is not None:
+            return panel.bounds()
+
         if self.solid_geometry is None:
             log.debug("solid_geometry is None")
             return 0, 0, 0, 0
 
+        if not flatten:
+            cached = self.cached_bounds()
+            if cached is not None:
+                return cached
+
         def bounds_rec(obj):
             if type(obj) is list:
                 gminx = np.Inf
@@ -805,14 +1087,14 @@ class Geometry(object):
                 maxx_list.append(maxx)
                 maxy_list.append(maxy)
 
-            return min(minx_list), min(miny_list), max(maxx_list), max(maxy_list)
+            return self.cache_bounds((min(minx_list), min(miny_list), max(maxx_list), max(maxy_list)))
         else:
             if flatten:
                 self.flatten(reset=True)
                 self.solid_geometry = self.flat_geometry
 
             bounds_coords = bounds_rec(self.solid_geometry)
-            return bounds_coords
+            return self.cache_bounds(bounds_coords)
 
         # try:
         #     # from here: http://rightfootin.blogspot.com/2006/09/more-on-python-flatten.html
@@ -1950,6 +2232,7 @@ class Geometry(object):
 
         return geoms
 
+    @invalidates_bounds
     def scale(self, xfactor, yfactor, point=None):
         """
         Scales all of the object's geometry by a given factor. Override
@@ -1964,6 +2247,7 @@ class Geometry(object):
         """
         return
 
+    @invalidates_bounds
     def offset(self, vect):
         """
         Offset the geometry by the given vector. Override this method.
@@ -2201,6 +2485,7 @@ class Geometry(object):
 
         return optimized_geometry
 
+    @invalidates_bounds
     def convert_units(self, obj_units):
         """
         Converts the units of the object to ``units`` by scaling all
@@ -2241,6 +2526,9 @@ class Geometry(object):
         :return:    A dictionary-encoded copy of the object.
         :rtype:     dict
         """
+        # the project holds the geometry of all the instances of a panel
+        self.materialize_panel()
+
         d = {}
         for attr in self.ser_attrs:
             d[attr] = getattr(self, attr)
@@ -2342,6 +2630,26 @@ class Geometry(object):
         svg_elem = geom.svg(scale_factor=scale_stroke_factor)
         return svg_elem
 
+    @invalidates_bounds
+    def affine_transform(self, matrix):
+        """
+        Applies an affine transformation to all the geometry of the object, in one pass. A chain of transformations
+        composed with appCommon.AffineTransform.compose() is applied in one pass, too.
+
+        :param matrix:  3x3 affine matrix (see appCommon.AffineTransform)
+        :return:        None
+        """
+        log.debug("camlib.Geometry.affine_transform()")
+
+        if getattr(self, 'multigeo', False) is True:
+            tools_geo = {tool: self.tools[tool]['solid_geometry'] for tool in self.tools}
+            self.solid_geometry, tools_geo = transform_geometry([self.solid_geometry, tools_geo], matrix)
+            for tool, geo in tools_geo.items():
+                self.tools[tool]['solid_geometry'] = geo
+        else:
+            self.solid_geometry = transform_geometry(self.solid_geometry, matrix)
+
+    @invalidates_bounds
     def mirror(self, axis, point):
         """
         Mirrors the object around a specified axis passign through
@@ -2355,58 +2663,15 @@ class Geometry(object):
         """
         log.debug("camlib.Geometry.mirror()")
 
-        px, py = point
-        xscale, yscale = {"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis]
-
-        def mirror_geom(obj):
-            if type(obj) is list:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(mirror_geom(g))
-                return new_obj
-            else:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.scale(obj, xscale, yscale, origin=(px, py))
-                except AttributeError:
-                    return obj
-
         try:
-            if self.multigeo is True:
-                for tool in self.tools:
-                    # variables to display the percentage of work done
-                    self.geo_len = 0
-                    try:
-                        self.geo_len = len(self.tools[tool]['solid_geometry'])
-                    except TypeError:
-                        self.geo_len = 1
-                    self.old_disp_number = 0
-                    self.el_count = 0
-
-                    self.tools[tool]['solid_geometry'] = mirror_geom(self.tools[tool]['solid_geometry'])
-            else:
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(self.solid_geometry)
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                self.solid_geometry = mirror_geom(self.solid_geometry)
+            self.affine_transform(mirror_matrix(axis, point))
             self.app.inform.emit('[success] %s...' % _('Object was mirrored'))
         except AttributeError:
             self.app.inform.emit('[ERROR_NOTCL] %s %s' % (_("Failed."), _("No object is selected.")))
 
-
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def rotate(self, angle, point):
         """
         Rotate an object by an angle (in degrees) around the provided coordinates.
@@ -2416,64 +2681,21 @@ class Geometry(object):
         counter-clockwise and negative are clockwise rotations.
 
         :param point:
-        The point of origin can be a keyword 'center' for the bounding box
-        center (default), 'centroid' for the geometry's centroid, a Point object
-        or a coordinate tuple (x0, y0).
+        The point of origin, a coordinate tuple (x0, y0).
 
         See shapely manual for more information: http://toblerity.org/shapely/manual.html#affine-transformations
         """
         log.debug("camlib.Geometry.rotate()")
 
-        px, py = point
-
-        def rotate_geom(obj):
-            try:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(rotate_geom(g))
-                return new_obj
-            except TypeError:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.rotate(obj, angle, origin=(px, py))
-                except AttributeError:
-                    return obj
-
         try:
-            if self.multigeo is True:
-                for tool in self.tools:
-                    # variables to display the percentage of work done
-                    self.geo_len = 0
-                    try:
-                        self.geo_len = len(self.tools[tool]['solid_geometry'])
-                    except TypeError:
-                        self.geo_len = 1
-                    self.old_disp_number = 0
-                    self.el_count = 0
-
-                    self.tools[tool]['solid_geometry'] = rotate_geom(self.tools[tool]['solid_geometry'])
-            else:
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(self.solid_geometry)
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                self.solid_geometry = rotate_geom(self.solid_geometry)
+            self.affine_transform(rotate_matrix(angle, point))
             self.app.inform.emit('[success] %s...' % _('Object was rotated'))
         except AttributeError:
             self.app.inform.emit('[ERROR_NOTCL] %s %s' % (_("Failed."), _("No object is selected.")))
 
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def skew(self, angle_x, angle_y, point):
         """
         Shear/Skew the geometries of an object by angles along x and y dimensions.
@@ -2481,9 +2703,7 @@ class Geometry(object):
         :param angle_x:
         :param angle_y:
         angle_x, angle_y : float, float
-            The shear angle(s) for the x and y axes respectively. These can be
-            specified in either degrees (default) or radians by setting
-            use_radians=True.
+            The shear angle(s) for the x and y axes respectively, in degrees.
 
         :param point:   Origin point for Skew
         point: tuple of coordinates (x,y)
@@ -2492,63 +2712,15 @@ class Geometry(object):
         """
         log.debug("camlib.Geometry.skew()")
 
-        px, py = point
-
-        def skew_geom(obj):
-            try:
-                new_obj = []
-                for g in obj:
-                    new_obj.append(skew_geom(g))
-                return new_obj
-            except TypeError:
-                try:
-                    self.el_count += 1
-                    disp_number = int(np.interp(self.el_count, [0, self.geo_len], [0, 100]))
-                    if self.old_disp_number < disp_number <= 100:
-                        self.app.proc_container.update_view_text(' %d%%' % disp_number)
-                        self.old_disp_number = disp_number
-
-                    return affinity.skew(obj, angle_x, angle_y, origin=(px, py))
-                except AttributeError:
-                    return obj
-
         try:
-            if self.multigeo is True:
-                for tool in self.tools:
-                    # variables to display the percentage of work done
-                    self.geo_len = 0
-                    try:
-                        self.geo_len = len(self.tools[tool]['solid_geometry'])
-                    except TypeError:
-                        self.geo_len = 1
-                    self.old_disp_number = 0
-                    self.el_count = 0
-
-                    self.tools[tool]['solid_geometry'] = skew_geom(self.tools[tool]['solid_geometry'])
-            else:
-                # variables to display the percentage of work done
-                self.geo_len = 0
-                try:
-                    self.geo_len = len(self.solid_geometry)
-                except TypeError:
-                    self.geo_len = 1
-                self.old_disp_number = 0
-                self.el_count = 0
-
-                self.solid_geometry = skew_geom(self.solid_geometry)
+            self.affine_transform(skew_matrix(angle_x, angle_y, point))
             self.app.inform.emit('[success] %s...' % _('Object was skewed'))
         except AttributeError:
             self.app.inform.emit('[ERROR_NOTCL] %s %s' % (_("Failed."), _("No object is selected.")))
 
         self.app.proc_container.new_text = ''
 
-        # if type(self.solid_geometry) == list:
-        #     self.solid_geometry = [affinity.skew(g, angle_x, angle_y, origin=(px, py))
-        #                            for g in self.solid_geometry]
-        # else:
-        #     self.solid_geometry = affinity.skew(self.solid_geometry, angle_x, angle_y,
-        #                                         origin=(px, py))
-
+    @invalidates_bounds
     def buffer(self, distance, join, factor):
         """
 
@@ -2651,6 +2823,9 @@ class CNCjob(Geometry):
         "excellon_optimization_type": "B",
     }
 
+    # number of tool paths plotted as one shape by plot2() in the VisPy canvas
+    plot_batch_size = 500
+
     settings = QtCore.QSettings("Open Source", "FlatCAM")
     if settings.contains("machinist"):
         machinist_setting = settings.value('machinist', type=int)
@@ -2794,6 +2969,7 @@ class CNCjob(Geometry):
         """
         return self.__dict__
 
+    @invalidates_bounds
     def convert_units(self, units):
         """
         Will convert the parameters in the class that are relevant, from metric to imperial and reverse
@@ -2844,6 +3020,37 @@ class CNCjob(Geometry):
             self.app.log.error('Exception occurred within a preprocessor: ' + traceback.format_exc())
             return ''
 
+    def doformat_linear(self, p, points, **kwargs):
+        """
+        Make the G-Code for a run of linear moves, one move to each point. If the preprocessor has a template for the
+        linear moves (PreProc.linear_template()) all the lines are formatted from it, else each line is made with
+        doformat(p.linear_code).
+
+        :param p:       the preprocessor
+        :type p:        appPreProcessor.PreProc
+        :param points:  the (x, y) coordinates of the moves
+        :type points:   list
+        :param kwargs:  keyword args which will update attributes of the current class, the same for all the moves
+        :type kwargs:   dict
+        :return:        Gcode lines
+        :rtype:         str
+        """
+        template = None
+
+        # the template can be used only if it comes from the same class as the linear_code() method, otherwise it may
+        # be the template of a linear_code() that was overridden in a derived preprocessor
+        mro = type(p).__mro__
+        code_cls = next((c for c in mro if 'linear_code' in c.__dict__), None)
+        template_cls = next((c for c in mro if 'linear_template' in c.__dict__), None)
+        if code_cls is template_cls:
+            template = self.doformat2(p.linear_template, **kwargs) or None
+
+        if template is None:
+            return ''.join([self.doformat(p.linear_code, x=pt[0], y=pt[1], **kwargs) for pt in points])
+
+        template += "\n"
+        return ''.join([template % (pt[0], pt[1]) for pt in points])
+
     def parse_custom_toolchange_code(self, data):
         """
         Will parse a text and get a toolchange sequence in text format suitable to be included in a Gcode file.
@@ -2871,193 +3078,83 @@ class CNCjob(Geometry):
                 text = text.replace(match, str(value))
             return text
 
-    # Distance callback
-    class CreateDistanceCallback(object):
-        """Create callback to calculate distances between points."""
-
-        def __init__(self, locs, manager):
-            self.manager = manager
-            self.matrix = {}
-
-            if locs:
-                size = len(locs)
-
-                for from_node in range(size):
-                    self.matrix[from_node] = {}
-                    for to_node in range(size):
-                        if from_node == to_node:
-                            self.matrix[from_node][to_node] = 0
-                        else:
-                            x1 = locs[from_node][0]
-                            y1 = locs[from_node][1]
-                            x2 = locs[to_node][0]
-                            y2 = locs[to_node][1]
-                            self.matrix[from_node][to_node] = distance_euclidian(x1, y1, x2, y2)
-
-        # def Distance(self, from_node, to_node):
-        #     return int(self.matrix[from_node][to_node])
-        def Distance(self, from_index, to_index):
-            # Convert from routing variable Index to distance matrix NodeIndex.
-            from_node = self.manager.IndexToNode(from_index)
-            to_node = self.manager.IndexToNode(to_index)
-            return self.matrix[from_node][to_node]
-
     @staticmethod
     def create_tool_data_array(points):
         # Create the data.
         return [(pt.coords.xy[0][0], pt.coords.xy[1][0]) for pt in points]
 
     def optimized_ortools_meta(self, locations, start=None, opt_time=0):
-        optimized_path = []
-
-        tsp_size = len(locations)
-        num_routes = 1  # The number of routes, which is 1 in the TSP.
-        # Nodes are indexed from 0 to tsp_size - 1. The depot is the starting node of the route.
-
-        depot = 0 if start is None else start
+        """
+        Order the locations with the OR-tools Guided Local Search metaheuristic. The solver starts from the path made
+        by the TSA optimization and each location can be followed only by one of its nearest neighbours.
 
-        # Create routing model.
-        if tsp_size == 0:
+        :param locations:   List of tuples with x, y coordinates
+        :type locations:    list
+        :param start:       index of the start location
+        :type start:        int
+        :param opt_time:    search time limit in seconds; 0 for the default of 3 seconds
+        :return:            List of the indexes of the locations in the optimized order
+        :rtype:             list
+        """
+        if not locations:
             log.warning('OR-tools metaheuristics - Specify an instance greater than 0.')
-            return optimized_path
-
-        manager = pywrapcp.RoutingIndexManager(tsp_size, num_routes, depot)
-        routing = pywrapcp.RoutingModel(manager)
-        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-        search_parameters.local_search_metaheuristic = (
-            routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH)
-
-        # Set search time limit in milliseconds.
-        if float(opt_time) != 0:
-            search_parameters.time_limit.seconds = int(
-                float(opt_time))
-        else:
-            search_parameters.time_limit.seconds = 3
-
-        # Callback to the distance function. The callback takes two
-        # arguments (the from and to node indices) and returns the distance between them.
-        dist_between_locations = self.CreateDistanceCallback(locs=locations, manager=manager)
-
-        # if there are no distances then go to the next tool
-        if not dist_between_locations:
-            return
-
-        dist_callback = dist_between_locations.Distance
-        transit_callback_index = routing.RegisterTransitCallback(dist_callback)
-        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-
-        # Solve, returns a solution if any.
-        assignment = routing.SolveWithParameters(search_parameters)
-
-        if assignment:
-            # Solution cost.
-            log.info("OR-tools metaheuristics - Total distance: " + str(assignment.ObjectiveValue()))
-
-            # Inspect solution.
-            # Only one route here; otherwise iterate from 0 to routing.vehicles() - 1.
-            route_number = 0
-            node = routing.Start(route_number)
-            start_node = node
-
-            while not routing.IsEnd(node):
-                if self.app.abort_flag:
-                    # graceful abort requested by the user
-                    raise grace
+            return []
 
-                optimized_path.append(node)
-                node = assignment.Value(routing.NextVar(node))
-        else:
-            log.warning('OR-tools metaheuristics - No solution found.')
+        depot = 0 if start is None else start
+        opt_time = float(opt_time) if float(opt_time) != 0 else 3
 
+        optimized_path = PathOptimizer.ortools_path(locations, depot, time_limit=opt_time, metaheuristic=True)
+        if self.app.abort_flag:
+            # graceful abort requested by the user
+            raise grace
         return optimized_path
-        # ############################################# ##
-
-    def optimized_ortools_basic(self, locations, start=None):
-        optimized_path = []
 
-        tsp_size = len(locations)
-        num_routes = 1  # The number of routes, which is 1 in the TSP.
-
-        # Nodes are indexed from 0 to tsp_size - 1. The depot is the starting node of the route.
-        depot = 0 if start is None else start
+    def optimized_ortools_basic(self, locations, start=None, opt_time=0):
+        """
+        Order the locations with the OR-tools local search. The solver starts from the path made by the
+        TSA optimization and each location can be followed only by one of its nearest neighbours.
 
-        # Create routing model.
-        if tsp_size == 0:
+        :param locations:   List of tuples with x, y coordinates
+        :type locations:    list
+        :param start:       index of the start location
+        :type start:        int
+        :param opt_time:    search time limit in seconds; 0 for the default of 3 seconds
+        :return:            List of the indexes of the locations in the optimized order
+        :rtype:             list
+        """
+        if not locations:
             log.warning('Specify an instance greater than 0.')
-            return optimized_path
-
-        manager = pywrapcp.RoutingIndexManager(tsp_size, num_routes, depot)
-        routing = pywrapcp.RoutingModel(manager)
-        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-
-        # Callback to the distance function. The callback takes two
-        # arguments (the from and to node indices) and returns the distance between them.
-        dist_between_locations = self.CreateDistanceCallback(locs=locations, manager=manager)
-
-        # if there are no distances then go to the next tool
-        if not dist_between_locations:
-            return
+            return []
 
-        dist_callback = dist_between_locations.Distance
-        transit_callback_index = routing.RegisterTransitCallback(dist_callback)
-        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-
-        # Solve, returns a solution if any.
-        assignment = routing.SolveWithParameters(search_parameters)
-
-        if assignment:
-            # Solution cost.
-            log.info("Total distance: " + str(assignment.ObjectiveValue()))
-
-            # Inspect solution.
-            # Only one route here; otherwise iterate from 0 to routing.vehicles() - 1.
-            route_number = 0
-            node = routing.Start(route_number)
-            start_node = node
-
-            while not routing.IsEnd(node):
-                optimized_path.append(node)
-                node = assignment.Value(routing.NextVar(node))
-        else:
-            log.warning('No solution found.')
+        depot = 0 if start is None else start
+        opt_time = float(opt_time) if float(opt_time) != 0 else 3
 
-        return optimized_path
-        # ############################################# ##
+        return PathOptimizer.ortools_path(locations, depot, time_limit=opt_time, metaheuristic=False)
 
-    def optimized_travelling_salesman(self, points, start=None):
+    def optimized_travelling_salesman(self, points, start=None, opt_time=None):
         """
-        As solving the problem in the brute force way is too slow,
-        this function implements a simple heuristic: always
-        go to the nearest city.
-
-        Even if this algorithm is extremely simple, it works pretty well
-        giving a solution only about 25%% longer than the optimal one (cit. Wikipedia),
-        and runs very fast in O(N^2) time complexity.
+        As solving the problem in the brute force way is too slow, this function goes always to the nearest point
+        not yet visited, found with a grid of the points, and then shortens the path with 2-opt and Or-opt moves.
 
-        >>> optimized_travelling_salesman([[i,j] for i in range(5) for j in range(5)])
-        [[0, 0], [0, 1], [0, 2], [0, 3], [0, 4], [1, 4], [1, 3], [1, 2], [1, 1], [1, 0], [2, 0], [2, 1], [2, 2],
-        [2, 3], [2, 4], [3, 4], [3, 3], [3, 2], [3, 1], [3, 0], [4, 0], [4, 1], [4, 2], [4, 3], [4, 4]]
         >>> optimized_travelling_salesman([[0,0],[10,0],[6,0]])
         [[0, 0], [6, 0], [10, 0]]
 
-        :param points:  List of tuples with x, y coordinates
-        :type points:   list
-        :param start:   a tuple with a x,y coordinates of the start point
-        :type start:    tuple
-        :return:        List of points ordered in a optimized way
-        :rtype:         list
+        :param points:      List of tuples with x, y coordinates
+        :type points:       list
+        :param start:       a tuple with a x,y coordinates of the start point, one of the points
+        :type start:        tuple
+        :param opt_time:    time budget in seconds for shortening the path; None for no limit
+        :return:            List of points ordered in a optimized way
+        :rtype:             list
         """
+        if not points:
+            return []
 
-        if start is None:
-            start = points[0]
-        must_visit = points
-        path = [start]
-        # must_visit.remove(start)
-        while must_visit:
-            nearest = min(must_visit, key=lambda x: distance(path[-1], x))
-            path.append(nearest)
-            must_visit.remove(nearest)
-        return path
+        start_index = 0 if start is None else points.index(start)
+        time_limit = float(opt_time) if opt_time else None
+
+        optimized_path = PathOptimizer.optimized_path(points, start_index, time_limit=time_limit)
+        return [points[idx] for idx in optimized_path.tolist()]
 
     def geo_optimized_rtree(self, geometry):
         locations = []
@@ -3130,7 +3227,7 @@ class CNCjob(Geometry):
         log.debug("Creating CNC Job from Excellon for tool: %s" % str(tool))
 
         self.exc_tools = deepcopy(tools)
-        t_gcode = ''
+        t_gcode = []
 
         # holds the temporary coordinates of the processed drill point
         locx, locy = first_pt
@@ -3146,7 +3243,7 @@ class CNCjob(Geometry):
         elif opt_type == 'B':
             log.debug("Using OR-Tools Basic drill path optimization.")
         elif opt_type == 'T':
-            log.debug("Using Travelling Salesman drill path optimization.")
+            log.debug("Using Travelling Salesman (nearest neighbour and 2-opt) drill path optimization.")
         else:
             log.debug("Using no path optimization.")
 
@@ -3270,13 +3367,15 @@ class CNCjob(Geometry):
             # if there are no locations then go to the next tool
             if not locations:
                 return 'fail'
-            optimized_path = self.optimized_ortools_basic(locations=locations)
+            opt_time = self.app.defaults["excellon_search_time"]
+            optimized_path = self.optimized_ortools_basic(locations=locations, opt_time=opt_time)
         elif opt_type == 'T':
             locations = self.create_tool_data_array(points=points)
             # if there are no locations then go to the next tool
             if not locations:
                 return 'fail'
-            optimized_path = self.optimized_travelling_salesman(locations)
+            opt_time = self.app.defaults["excellon_search_time"]
+            optimized_path = self.optimized_travelling_salesman(locations, opt_time=opt_time)
         else:
             # it's actually not optimized path but here we build a list of (x,y) coordinates
             # out of the tool's drills
@@ -3304,15 +3403,15 @@ class CNCjob(Geometry):
             # t_gcode += start_gcode
 
         # do the ToolChange event
-        t_gcode += self.doformat(p.z_feedrate_code)
-        t_gcode += self.doformat(p.toolchange_code, toolchangexy=(temp_locx, temp_locy))
-        t_gcode += self.doformat(p.z_feedrate_code)
+        t_gcode.append(self.doformat(p.z_feedrate_code))
+        t_gcode.append(self.doformat(p.toolchange_code, toolchangexy=(temp_locx, temp_locy)))
+        t_gcode.append(self.doformat(p.z_feedrate_code))
 
         # Spindle start
-        t_gcode += self.doformat(p.spindle_code)
+        t_gcode.append(self.doformat(p.spindle_code))
         # Dwell time
         if self.dwell is True:
-            t_gcode += self.doformat(p.dwell_code)
+            t_gcode.append(self.doformat(p.dwell_code))
 
         current_tooldia = self.app.dec_format(float(tools[tool]["tooldia"]), self.decimals)
         self.app.inform.emit(
@@ -3362,26 +3461,26 @@ class CNCjob(Geometry):
 
                     if travel[0] is not None:
                         # move to next point
-                        t_gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        t_gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                         # raise to safe Z (travel[0]) each time because safe Z may be different
                         self.z_move = travel[0]
-                        t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                        t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                         # restore z_move
                         self.z_move = tool_dict['tools_drill_travelz']
                     else:
                         if prev_z is not None:
                             # move to next point
-                            t_gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                            t_gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                             # we assume that previously the z_move was altered therefore raise to
                             # the travel_z (z_move)
                             self.z_move = tool_dict['tools_drill_travelz']
-                            t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                            t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                         else:
                             # move to next point
-                            t_gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                            t_gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                     # store prev_z
                     prev_z = travel[0]
@@ -3398,33 +3497,33 @@ class CNCjob(Geometry):
                         if abs(doc) < abs(self.z_cut) < (abs(doc) + self.z_depthpercut):
                             self.z_cut = doc
                         # Move down the drill bit
-                        t_gcode += self.doformat(p.down_code, x=locx, y=locy)
+                        t_gcode.append(self.doformat(p.down_code, x=locx, y=locy))
 
                         # Update the distance travelled down with the current one
                         self.measured_down_distance += abs(self.z_cut) + abs(self.z_move)
 
                         if self.f_retract is False:
-                            t_gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                            t_gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                             self.measured_up_to_zero_distance += abs(self.z_cut)
                             self.measured_lift_distance += abs(self.z_move)
                         else:
                             self.measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
 
-                        t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                        t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                 else:
-                    t_gcode += self.doformat(p.down_code, x=locx, y=locy)
+                    t_gcode.append(self.doformat(p.down_code, x=locx, y=locy))
 
                     self.measured_down_distance += abs(self.z_cut) + abs(self.z_move)
 
                     if self.f_retract is False:
-                        t_gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                        t_gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                         self.measured_up_to_zero_distance += abs(self.z_cut)
                         self.measured_lift_distance += abs(self.z_move)
                     else:
                         self.measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
 
-                    t_gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                    t_gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                 self.measured_distance += abs(distance_euclidian(locx, locy, temp_locx, temp_locy))
                 temp_locx = locx
@@ -3445,12 +3544,12 @@ class CNCjob(Geometry):
         self.z_cut = deepcopy(old_zcut)
 
         if is_last:
-            t_gcode += self.doformat(p.spindle_stop_code)
+            t_gcode.append(self.doformat(p.spindle_stop_code))
             # Move to End position
-            t_gcode += self.doformat(p.end_code, x=0, y=0)
+            t_gcode.append(self.doformat(p.end_code, x=0, y=0))
 
         self.app.inform.emit('%s %s' % (_("Finished G-Code generation for tool:"), str(tool)))
-        return t_gcode, (locx, locy), start_gcode
+        return ''.join(t_gcode), (locx, locy), start_gcode
 
     # used in Geometry (and soon in Tool Milling)
     def geometry_tool_gcode_gen(self, tool, tools, first_pt, tolerance, is_first=False, is_last=False,
@@ -3478,7 +3577,7 @@ class CNCjob(Geometry):
 
         log.debug("geometry_tool_gcode_gen()")
 
-        t_gcode = ''
+        t_gcode = []
         temp_solid_geometry = []
 
         # The Geometry from which we create GCode
@@ -3503,7 +3602,7 @@ class CNCjob(Geometry):
 
         # Optimization type. Can be: 'M', 'B', 'T', 'R', 'No'
         opt_type = tool_dict['optimization_type']
-        opt_time = tool_dict['search_time'] if 'search_time' in tool_dict else 'R'
+        opt_time = tool_dict['search_time'] if 'search_time' in tool_dict else 0
 
         if opt_type == 'M':
             log.debug("Using OR-Tools Metaheuristic Guided Local Search path optimization.")
@@ -3679,13 +3778,13 @@ class CNCjob(Geometry):
             # if there are no locations then go to the next tool
             if not locations:
                 return 'fail'
-            optimized_locations = self.optimized_ortools_basic(locations=locations)
+            optimized_locations = self.optimized_ortools_basic(locations=locations, opt_time=opt_time)
             optimized_path = [(locations[loc], geo_storage[locations[loc]]) for loc in optimized_locations]
         elif opt_type == 'T':
             # if there are no locations then go to the next tool
             if not locations:
                 return 'fail'
-            optimized_locations = self.optimized_travelling_salesman(locations)
+            optimized_locations = self.optimized_travelling_salesman(locations, opt_time=opt_time)
             optimized_path = [(loc, geo_storage[loc]) for loc in optimized_locations]
         elif opt_type == 'R':
             optimized_path = self.geo_optimized_rtree(temp_solid_geometry)
@@ -3731,28 +3830,28 @@ class CNCjob(Geometry):
             # t_gcode += start_gcode
 
         # Toolchange code
-        t_gcode += self.doformat(p.feedrate_code)  # sets the feed rate
+        t_gcode.append(self.doformat(p.feedrate_code))  # sets the feed rate
         if toolchange:
-            t_gcode += self.doformat(p.toolchange_code)
+            t_gcode.append(self.doformat(p.toolchange_code))
 
             if 'laser' not in self.pp_geometry_name.lower():
-                t_gcode += self.doformat(p.spindle_code)  # Spindle start
+                t_gcode.append(self.doformat(p.spindle_code))  # Spindle start
             else:
                 # for laser this will disable the laser
-                t_gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
+                t_gcode.append(self.doformat(p.lift_code, x=self.oldx, y=self.oldy))  # Move (up) to travel height
 
             if self.dwell:
-                t_gcode += self.doformat(p.dwell_code)  # Dwell time
+                t_gcode.append(self.doformat(p.dwell_code))  # Dwell time
         else:
-            t_gcode += self.doformat(p.lift_code, x=0, y=0)  # Move (up) to travel height
-            t_gcode += self.doformat(p.startz_code, x=0, y=0)
+            t_gcode.append(self.doformat(p.lift_code, x=0, y=0))  # Move (up) to travel height
+            t_gcode.append(self.doformat(p.startz_code, x=0, y=0))
 
             if 'laser' not in self.pp_geometry_name.lower():
-                t_gcode += self.doformat(p.spindle_code)  # Spindle start
+                t_gcode.append(self.doformat(p.spindle_code))  # Spindle start
 
             if self.dwell is True:
-                t_gcode += self.doformat(p.dwell_code)  # Dwell time
-        t_gcode += self.doformat(p.feedrate_code)  # sets the feed rate
+                t_gcode.append(self.doformat(p.dwell_code))  # Dwell time
+        t_gcode.append(self.doformat(p.feedrate_code))  # sets the feed rate
 
         # ## Iterate over geometry paths getting the nearest each time.
         path_count = 0
@@ -3780,9 +3879,9 @@ class CNCjob(Geometry):
                 # calculate the cut distance
                 total_cut = total_cut + geo.length
 
-                t_gcode += self.create_gcode_single_pass(geo, current_tooldia, self.extracut,
-                                                         self.extracut_length, self.tolerance,
-                                                         z_move=self.z_move, old_point=current_pt)
+                t_gcode.append(self.create_gcode_single_pass(geo, current_tooldia, self.extracut,
+                                                             self.extracut_length, self.tolerance,
+                                                             z_move=self.z_move, old_point=current_pt))
 
             # --------- Multi-pass ---------
             else:
@@ -3799,7 +3898,7 @@ class CNCjob(Geometry):
                 gc, geo = self.create_gcode_multi_pass(geo, current_tooldia, self.extracut,
                                                        self.extracut_length, self.tolerance,
                                                        z_move=self.z_move, postproc=p, old_point=current_pt)
-                t_gcode += gc
+                t_gcode.append(gc)
 
             # calculate the total distance
             total_travel = total_travel + abs(distance(pt1=current_pt, pt2=pt))
@@ -3819,14 +3918,14 @@ class CNCjob(Geometry):
 
         # Finish
         if is_last:
-            t_gcode += self.doformat(p.spindle_stop_code)
-            t_gcode += self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1])
-            t_gcode += self.doformat(p.end_code, x=0, y=0)
+            t_gcode.append(self.doformat(p.spindle_stop_code))
+            t_gcode.append(self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1]))
+            t_gcode.append(self.doformat(p.end_code, x=0, y=0))
             self.app.inform.emit(
                 '%s... %s %s.' % (_("Finished G-Code generation"), str(path_count), _("paths traced"))
             )
 
-        self.gcode = t_gcode
+        self.gcode = ''.join(t_gcode)
         return self.gcode, start_gcode
 
     # used by the Tcl command Drillcncjob
@@ -4037,21 +4136,21 @@ class CNCjob(Geometry):
         # Initialization
         # #############################################################################################################
         # #############################################################################################################
-        gcode = ''
+        gcode = []
         start_gcode = ''
         if is_first:
             start_gcode = self.doformat(p.start_code)
 
         if use_ui is False:
-            gcode += self.doformat(p.z_feedrate_code)
+            gcode.append(self.doformat(p.z_feedrate_code))
 
         if self.toolchange is False:
             if self.xy_toolchange is not None:
-                gcode += self.doformat(p.lift_code, x=self.xy_toolchange[0], y=self.xy_toolchange[1])
-                gcode += self.doformat(p.startz_code, x=self.xy_toolchange[0], y=self.xy_toolchange[1])
+                gcode.append(self.doformat(p.lift_code, x=self.xy_toolchange[0], y=self.xy_toolchange[1]))
+                gcode.append(self.doformat(p.startz_code, x=self.xy_toolchange[0], y=self.xy_toolchange[1]))
             else:
-                gcode += self.doformat(p.lift_code, x=0.0, y=0.0)
-                gcode += self.doformat(p.startz_code, x=0.0, y=0.0)
+                gcode.append(self.doformat(p.lift_code, x=0.0, y=0.0))
+                gcode.append(self.doformat(p.startz_code, x=0.0, y=0.0))
 
         if self.xy_toolchange is not None:
             self.oldx = self.xy_toolchange[0]
@@ -4121,7 +4220,7 @@ class CNCjob(Geometry):
                     self.z_feedrate = self.exc_tools[tool]['data']['tools_drill_feedrate_z']
                     self.feedrate = self.exc_tools[tool]['data']['tools_drill_feedrate_z']
                     self.z_cut = self.exc_tools[tool]['data']['tools_drill_cutz']
-                    gcode += self.doformat(p.z_feedrate_code)
+                    gcode.append(self.doformat(p.z_feedrate_code))
 
                     if self.machinist_setting == 0:
                         if self.z_cut > 0:
@@ -4173,11 +4272,13 @@ class CNCjob(Geometry):
                     # if there are no locations then go to the next tool
                     if not locations:
                         continue
-                    optimized_path = self.optimized_ortools_basic(locations=locations)
+                    opt_time = self.app.defaults["excellon_search_time"]
+                    optimized_path = self.optimized_ortools_basic(locations=locations, opt_time=opt_time)
                 elif used_excellon_optimization_type == 'T':
                     for point in points[tool]:
                         altPoints.append((point.coords.xy[0][0], point.coords.xy[1][0]))
-                    optimized_path = self.optimized_travelling_salesman(altPoints)
+                    opt_time = self.app.defaults["excellon_search_time"]
+                    optimized_path = self.optimized_travelling_salesman(altPoints, opt_time=opt_time)
                 else:
                     # it's actually not optimized path but here we build a list of (x,y) coordinates
                     # out of the tool's drills
@@ -4200,12 +4301,12 @@ class CNCjob(Geometry):
 
                 # Tool change sequence (optional)
                 if self.toolchange:
-                    gcode += self.doformat(p.toolchange_code, toolchangexy=(self.oldx, self.oldy))
+                    gcode.append(self.doformat(p.toolchange_code, toolchangexy=(self.oldx, self.oldy)))
                 # Spindle start
-                gcode += self.doformat(p.spindle_code)
+                gcode.append(self.doformat(p.spindle_code))
                 # Dwell time
                 if self.dwell is True:
-                    gcode += self.doformat(p.dwell_code)
+                    gcode.append(self.doformat(p.dwell_code))
 
                 current_tooldia = float('%.*f' % (self.decimals, float(self.exc_tools[tool]["tooldia"])))
 
@@ -4257,26 +4358,26 @@ class CNCjob(Geometry):
 
                             if travel[0] is not None:
                                 # move to next point
-                                gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                                 # raise to safe Z (travel[0]) each time because safe Z may be different
                                 self.z_move = travel[0]
-                                gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                                 # restore z_move
                                 self.z_move = self.exc_tools[tool]['data']['tools_drill_travelz']
                             else:
                                 if prev_z is not None:
                                     # move to next point
-                                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                                     # we assume that previously the z_move was altered therefore raise to
                                     # the travel_z (z_move)
                                     self.z_move = self.exc_tools[tool]['data']['tools_drill_travelz']
-                                    gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                                    gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                                 else:
                                     # move to next point
-                                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                             # store prev_z
                             prev_z = travel[0]
@@ -4292,32 +4393,32 @@ class CNCjob(Geometry):
                                 self.z_cut -= self.z_depthpercut
                                 if abs(doc) < abs(self.z_cut) < (abs(doc) + self.z_depthpercut):
                                     self.z_cut = doc
-                                gcode += self.doformat(p.down_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.down_code, x=locx, y=locy))
 
                                 measured_down_distance += abs(self.z_cut) + abs(self.z_move)
 
                                 if self.f_retract is False:
-                                    gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                                    gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                                     measured_up_to_zero_distance += abs(self.z_cut)
                                     measured_lift_distance += abs(self.z_move)
                                 else:
                                     measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
 
-                                gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                         else:
-                            gcode += self.doformat(p.down_code, x=locx, y=locy)
+                            gcode.append(self.doformat(p.down_code, x=locx, y=locy))
 
                             measured_down_distance += abs(self.z_cut) + abs(self.z_move)
 
                             if self.f_retract is False:
-                                gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                                 measured_up_to_zero_distance += abs(self.z_cut)
                                 measured_lift_distance += abs(self.z_move)
                             else:
                                 measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
 
-                            gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                            gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                         measured_distance += abs(distance_euclidian(locx, locy, self.oldx, self.oldy))
                         self.oldx = locx
@@ -4357,7 +4458,7 @@ class CNCjob(Geometry):
                 self.z_feedrate = self.exc_tools[one_tool]['data']['tools_drill_feedrate_z']
                 self.feedrate = self.exc_tools[one_tool]['data']['tools_drill_feedrate_z']
                 self.z_cut = self.exc_tools[one_tool]['data']['tools_drill_cutz']
-                gcode += self.doformat(p.z_feedrate_code)
+                gcode.append(self.doformat(p.z_feedrate_code))
 
                 if self.machinist_setting == 0:
                     if self.z_cut > 0:
@@ -4409,11 +4510,13 @@ class CNCjob(Geometry):
                 # if there are no locations then go to the next tool
                 if not locations:
                     return 'fail'
-                optimized_path = self.optimized_ortools_basic(locations=locations)
+                opt_time = self.app.defaults["excellon_search_time"]
+                optimized_path = self.optimized_ortools_basic(locations=locations, opt_time=opt_time)
             elif used_excellon_optimization_type == 'T':
                 for point in all_points:
                     altPoints.append((point.coords.xy[0][0], point.coords.xy[1][0]))
-                optimized_path = self.optimized_travelling_salesman(altPoints)
+                opt_time = self.app.defaults["excellon_search_time"]
+                optimized_path = self.optimized_travelling_salesman(altPoints, opt_time=opt_time)
             else:
                 # it's actually not optimized path but here we build a list of (x,y) coordinates
                 # out of the tool's drills
@@ -4435,10 +4538,10 @@ class CNCjob(Geometry):
                 raise grace
 
             # Spindle start
-            gcode += self.doformat(p.spindle_code)
+            gcode.append(self.doformat(p.spindle_code))
             # Dwell time
             if self.dwell is True:
-                gcode += self.doformat(p.dwell_code)
+                gcode.append(self.doformat(p.dwell_code))
 
             current_tooldia = float('%.*f' % (self.decimals, float(self.exc_tools[one_tool]["tooldia"])))
 
@@ -4490,26 +4593,26 @@ class CNCjob(Geometry):
 
                         if travel[0] is not None:
                             # move to next point
-                            gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                            gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                             # raise to safe Z (travel[0]) each time because safe Z may be different
                             self.z_move = travel[0]
-                            gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                            gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                             # restore z_move
                             self.z_move = self.exc_tools[one_tool]['data']['tools_drill_travelz']
                         else:
                             if prev_z is not None:
                                 # move to next point
-                                gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                                 # we assume that previously the z_move was altered therefore raise to
                                 # the travel_z (z_move)
                                 self.z_move = self.exc_tools[one_tool]['data']['tools_drill_travelz']
-                                gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                             else:
                                 # move to next point
-                                gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                         # store prev_z
                         prev_z = travel[0]
@@ -4525,32 +4628,32 @@ class CNCjob(Geometry):
                             self.z_cut -= self.z_depthpercut
                             if abs(doc) < abs(self.z_cut) < (abs(doc) + self.z_depthpercut):
                                 self.z_cut = doc
-                            gcode += self.doformat(p.down_code, x=locx, y=locy)
+                            gcode.append(self.doformat(p.down_code, x=locx, y=locy))
 
                             measured_down_distance += abs(self.z_cut) + abs(self.z_move)
 
                             if self.f_retract is False:
-                                gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                                gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                                 measured_up_to_zero_distance += abs(self.z_cut)
                                 measured_lift_distance += abs(self.z_move)
                             else:
                                 measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
 
-                            gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                            gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                     else:
-                        gcode += self.doformat(p.down_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.down_code, x=locx, y=locy))
 
                         measured_down_distance += abs(self.z_cut) + abs(self.z_move)
 
                         if self.f_retract is False:
-                            gcode += self.doformat(p.up_to_zero_code, x=locx, y=locy)
+                            gcode.append(self.doformat(p.up_to_zero_code, x=locx, y=locy))
                             measured_up_to_zero_distance += abs(self.z_cut)
                             measured_lift_distance += abs(self.z_move)
                         else:
                             measured_lift_distance += abs(self.z_cut) + abs(self.z_move)
 
-                        gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                     measured_distance += abs(distance_euclidian(locx, locy, self.oldx, self.oldy))
                     self.oldx = locx
@@ -5192,9 +5295,9 @@ class CNCjob(Geometry):
         #     return 'fail'
 
         # Spindle stop
-        gcode += self.doformat(p.spindle_stop_code)
+        gcode.append(self.doformat(p.spindle_stop_code))
         # Move to End position
-        gcode += self.doformat(p.end_code, x=0, y=0)
+        gcode.append(self.doformat(p.end_code, x=0, y=0))
 
         # #############################################################################################################
         # ############################# Calculate DISTANCE and ESTIMATED TIME #########################################
@@ -5216,10 +5319,10 @@ class CNCjob(Geometry):
         # #############################################################################################################
         # ############################# Store the GCODE for further usage ############################################
         # #############################################################################################################
-        self.gcode = gcode
+        self.gcode = ''.join(gcode)
 
         self.app.inform.emit('%s ...' % _("Finished G-Code generation"))
-        return gcode, start_gcode
+        return self.gcode, start_gcode
 
     # no longer used
     def generate_from_multitool_geometry(self, geometry, append=True, tooldia=None, offset=0.0, tolerance=0, z_cut=1.0,
@@ -5813,8 +5916,8 @@ class CNCjob(Geometry):
             if geo_shape is not None:
                 storage.insert(geo_shape)
 
-        if not append:
-            self.gcode = ""
+        # the G-Code lines are collected in a list and joined at the end
+        gcode = [self.gcode] if append else []
 
         # tell preprocessor the number of tool (for toolchange)
         self.tool = tool_no
@@ -5839,34 +5942,34 @@ class CNCjob(Geometry):
             start_gcode = self.doformat(p.start_code)
 
         # self.gcode = self.doformat(p.start_code)
-        self.gcode += self.doformat(p.feedrate_code)  # sets the feed rate
+        gcode.append(self.doformat(p.feedrate_code))  # sets the feed rate
 
         if toolchange is False:
             # all the x and y parameters in self.doformat() are used only by some preprocessors not by all
-            self.gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
-            self.gcode += self.doformat(p.startz_code, x=self.oldx, y=self.oldy)
+            gcode.append(self.doformat(p.lift_code, x=self.oldx, y=self.oldy))  # Move (up) to travel height
+            gcode.append(self.doformat(p.startz_code, x=self.oldx, y=self.oldy))
 
         if toolchange:
             # if "line_xyz" in self.pp_geometry_name:
             #     self.gcode += self.doformat(p.toolchange_code, x=self.xy_toolchange[0], y=self.xy_toolchange[1])
             # else:
             #     self.gcode += self.doformat(p.toolchange_code)
-            self.gcode += self.doformat(p.toolchange_code)
+            gcode.append(self.doformat(p.toolchange_code))
 
             if 'laser' not in self.pp_geometry_name:
-                self.gcode += self.doformat(p.spindle_code)  # Spindle start
+                gcode.append(self.doformat(p.spindle_code))  # Spindle start
             else:
                 # for laser this will disable the laser
-                self.gcode += self.doformat(p.lift_code, x=self.oldx, y=self.oldy)  # Move (up) to travel height
+                gcode.append(self.doformat(p.lift_code, x=self.oldx, y=self.oldy))  # Move (up) to travel height
 
             if self.dwell is True:
-                self.gcode += self.doformat(p.dwell_code)  # Dwell time
+                gcode.append(self.doformat(p.dwell_code))  # Dwell time
         else:
             if 'laser' not in self.pp_geometry_name:
-                self.gcode += self.doformat(p.spindle_code)  # Spindle start
+                gcode.append(self.doformat(p.spindle_code))  # Spindle start
 
             if self.dwell is True:
-                self.gcode += self.doformat(p.dwell_code)  # Dwell time
+                gcode.append(self.doformat(p.dwell_code))  # Dwell time
 
         total_travel = 0.0
         total_cut = 0.0
@@ -5914,8 +6017,8 @@ class CNCjob(Geometry):
                 if not multidepth:
                     # calculate the cut distance
                     total_cut += geo.length
-                    self.gcode += self.create_gcode_single_pass(geo, current_tooldia, extracut, self.extracut_length,
-                                                                tolerance, z_move=z_move, old_point=current_pt)
+                    gcode.append(self.create_gcode_single_pass(geo, current_tooldia, extracut, self.extracut_length,
+                                                                tolerance, z_move=z_move, old_point=current_pt))
 
                 # --------- Multi-pass ---------
                 else:
@@ -5932,7 +6035,7 @@ class CNCjob(Geometry):
                     gc, geo = self.create_gcode_multi_pass(geo, current_tooldia, extracut, self.extracut_length,
                                                            tolerance, z_move=z_move, postproc=p,
                                                            old_point=current_pt)
-                    self.gcode += gc
+                    gcode.append(gc)
 
                 # calculate the travel distance
                 total_travel += abs(distance(pt1=current_pt, pt2=pt))
@@ -5956,13 +6059,14 @@ class CNCjob(Geometry):
         self.routing_time += total_cut / self.feedrate
 
         # Finish
-        self.gcode += self.doformat(p.spindle_stop_code)
-        self.gcode += self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1])
-        self.gcode += self.doformat(p.end_code, x=0, y=0)
+        gcode.append(self.doformat(p.spindle_stop_code))
+        gcode.append(self.doformat(p.lift_code, x=current_pt[0], y=current_pt[1]))
+        gcode.append(self.doformat(p.end_code, x=0, y=0))
         self.app.inform.emit(
             '%s... %s %s.' % (_("Finished G-Code generation"), str(path_count), _("paths traced"))
         )
 
+        self.gcode = ''.join(gcode)
         return self.gcode, start_gcode
 
     def generate_gcode_from_solderpaste_geo(self, **kwargs):
@@ -6220,7 +6324,7 @@ class CNCjob(Geometry):
         """
         p = postproc
 
-        gcode_multi_pass = ''
+        gcode_multi_pass = []
 
         if isinstance(self.z_cut, Decimal):
             z_cut = self.z_cut
@@ -6247,16 +6351,16 @@ class CNCjob(Geometry):
             # is inconsequential.
             if type(geometry) == LineString or type(geometry) == LinearRing:
                 if extracut is False or not geometry.is_ring:
-                    gcode_multi_pass += self.linear2gcode(geometry, cdia, tolerance=tolerance, z_cut=depth, up=False,
-                                                          z_move=z_move, old_point=old_point)
+                    gcode_multi_pass.append(self.linear2gcode(geometry, cdia, tolerance=tolerance, z_cut=depth,
+                                                              up=False, z_move=z_move, old_point=old_point))
                 else:
-                    gcode_multi_pass += self.linear2gcode_extra(geometry, cdia, extracut_length, tolerance=tolerance,
-                                                                z_move=z_move, z_cut=depth, up=False,
-                                                                old_point=old_point)
+                    gcode_multi_pass.append(self.linear2gcode_extra(geometry, cdia, extracut_length,
+                                                                    tolerance=tolerance, z_move=z_move, z_cut=depth,
+                                                                    up=False, old_point=old_point))
 
             # Ignore multi-pass for points.
             elif type(geometry) == Point:
-                gcode_multi_pass += self.point2gcode(geometry, cdia, z_move=z_move, old_point=old_point)
+                gcode_multi_pass.append(self.point2gcode(geometry, cdia, z_move=z_move, old_point=old_point))
                 break  # Ignoring ...
             else:
                 log.warning("G-code generation not implemented for %s" % (str(type(geometry))))
@@ -6272,8 +6376,8 @@ class CNCjob(Geometry):
                 geometry = LineString(list(geometry.coords)[::-1])
 
         # Lift the tool
-        gcode_multi_pass += self.doformat(p.lift_code, x=old_point[0], y=old_point[1])
-        return gcode_multi_pass, geometry
+        gcode_multi_pass.append(self.doformat(p.lift_code, x=old_point[0], y=old_point[1]))
+        return ''.join(gcode_multi_pass), geometry
 
     def codes_split(self, gline):
         """
@@ -6285,67 +6389,16 @@ class CNCjob(Geometry):
         :return:            Dictionary with parsed line.
         :rtype:             dict
         """
+        return self.gcode_dialect().parse_line(gline)
 
-        command = {}
-
-        if 'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name:
-            match_z = re.search(r"^Z(\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?)*;$", gline)
-            if match_z:
-                command['G'] = 0
-                command['X'] = float(match_z.group(1).replace(" ", "")) * 0.025
-                command['Y'] = float(match_z.group(2).replace(" ", "")) * 0.025
-                command['Z'] = float(match_z.group(3).replace(" ", "")) * 0.025
-
-        elif 'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name:
-            match_pa = re.search(r"^PA(\s*-?\d+\.\d+?),(\s*\s*-?\d+\.\d+?)*;$", gline)
-            if match_pa:
-                command['G'] = 0
-                command['X'] = float(match_pa.group(1).replace(" ", "")) / 40
-                command['Y'] = float(match_pa.group(2).replace(" ", "")) / 40
-            match_pen = re.search(r"^(P[U|D])", gline)
-            if match_pen:
-                if match_pen.group(1) == 'PU':
-                    # the value does not matter, only that it is positive so the gcode_parse() know it is > 0,
-                    # therefore the move is of kind T (travel)
-                    command['Z'] = 1
-                else:
-                    command['Z'] = 0
-
-        elif 'laser' in self.pp_excellon_name.lower() or 'laser' in self.pp_geometry_name.lower() or \
-                (self.pp_solderpaste_name is not None and 'paste' in self.pp_solderpaste_name.lower()):
-            match_lsr = re.search(r"X([\+-]?\d+.[\+-]?\d+)\s*Y([\+-]?\d+.[\+-]?\d+)", gline)
-            if match_lsr:
-                command['X'] = float(match_lsr.group(1).replace(" ", ""))
-                command['Y'] = float(match_lsr.group(2).replace(" ", ""))
-
-            match_lsr_pos = re.search(r"^(M0?[3-5])", gline)
-            if match_lsr_pos:
-                if 'M05' in match_lsr_pos.group(1) or 'M5' in match_lsr_pos.group(1):
-                    # the value does not matter, only that it is positive so the gcode_parse() know it is > 0,
-                    # therefore the move is of kind T (travel)
-                    command['Z'] = 1
-                else:
-                    command['Z'] = 0
+    def gcode_dialect(self):
+        """
+        The dialect of the G-Code made by the preprocessors of this job.
 
-            match_lsr_pos_2 = re.search(r"^(M10[6|7])", gline)
-            if match_lsr_pos_2:
-                if 'M107' in match_lsr_pos_2.group(1):
-                    command['Z'] = 1
-                else:
-                    command['Z'] = 0
-        elif self.pp_solderpaste_name is not None:
-            if 'Paste' in self.pp_solderpaste_name:
-                match_paste = re.search(r"X([\+-]?\d+.[\+-]?\d+)\s*Y([\+-]?\d+.[\+-]?\d+)", gline)
-                if match_paste:
-                    command['X'] = float(match_paste.group(1).replace(" ", ""))
-                    command['Y'] = float(match_paste.group(2).replace(" ", ""))
-        else:
-            match = re.search(r'^\s*([A-Z])\s*([\+\-\.\d\s]+)', gline)
-            while match:
-                command[match.group(1)] = float(match.group(2).replace(" ", ""))
-                gline = gline[match.end():]
-                match = re.search(r'^\s*([A-Z])\s*([\+\-\.\d\s]+)', gline)
-        return command
+        :return:    the dialect used to parse the G-Code
+        :rtype:     appParsers.ParseGCode.GCodeDialect
+        """
+        return get_dialect(self.pp_geometry_name, self.pp_excellon_name, self.pp_solderpaste_name)
 
     def gcode_parse(self, force_parsing=None):
         """
@@ -6366,14 +6419,6 @@ class CNCjob(Geometry):
         :rtype:                 dict
         """
 
-        kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-        # Results go here
-        geometry = []
-
-        # Last known instruction
-        current = {'X': 0.0, 'Y': 0.0, 'Z': 0.0, 'G': 0}
-
         # Current path: temporary storage until tool is
         # lifted or lowered.
         if self.toolchange_xy_type == "excellon":
@@ -6398,133 +6443,35 @@ class CNCjob(Geometry):
                     if len(pos_xy) != 2:
                         pos_xy = (0, 0)
 
-        path = [pos_xy]
-        # path = [(0, 0)]
-
-        gcode_lines_list = self.gcode.splitlines()
-        self.app.inform.emit('%s: %d' % (_("Parsing GCode file. Number of lines"), len(gcode_lines_list)))
-
-        # Process every instruction
-        for line in gcode_lines_list:
-            if force_parsing is False or force_parsing is None:
-                if '%MO' in line or '%' in line or 'MOIN' in line or 'MOMM' in line:
-                    return "fail"
-
-            gobj = self.codes_split(line)
-
-            # ## Units
-            if 'G' in gobj and (gobj['G'] == 20.0 or gobj['G'] == 21.0):
-                self.units = {20.0: "IN", 21.0: "MM"}[gobj['G']]
-                continue
-
-            # TODO take into consideration the tools and update the travel line thickness
-            if 'T' in gobj:
-                pass
-
-            # ## Changing height
-            if 'Z' in gobj:
-                if 'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name:
-                    pass
-                elif 'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name:
-                    pass
-                elif 'laser' in self.pp_excellon_name or 'laser' in self.pp_geometry_name:
-                    pass
-                elif ('X' in gobj or 'Y' in gobj) and gobj['Z'] != current['Z']:
-                    if self.pp_geometry_name == 'line_xyz' or self.pp_excellon_name == 'line_xyz':
-                        pass
-                    else:
-                        log.warning("Non-orthogonal motion: From %s" % str(current))
-                        log.warning("  To: %s" % str(gobj))
-
-                current['Z'] = gobj['Z']
-                # Store the path into geometry and reset path
-                if len(path) > 1:
-                    geometry.append({"geom": LineString(path),
-                                     "kind": kind})
-                    path = [path[-1]]  # Start with the last point of last path.
-
-                # create the geometry for the holes created when drilling Excellon drills
-                if self.origin_kind == 'excellon':
-                    if current['Z'] < 0:
-                        current_drill_point_coords = (
-                            float('%.*f' % (self.decimals, current['X'])),
-                            float('%.*f' % (self.decimals, current['Y']))
-                        )
-
-                        # find the drill diameter knowing the drill coordinates
-                        break_loop = False
-                        for tool, tool_dict in self.exc_tools.items():
-                            if 'drills' in tool_dict:
-                                for drill_pt in tool_dict['drills']:
-                                    point_in_dict_coords = (
-                                        float('%.*f' % (self.decimals, drill_pt.x)),
-                                        float('%.*f' % (self.decimals, drill_pt.y))
-                                    )
-                                    if point_in_dict_coords == current_drill_point_coords:
-                                        dia = self.exc_tools[tool]['tooldia']
-                                        kind = ['C', 'F']
-                                        geometry.append(
-                                            {
-                                                "geom": Point(current_drill_point_coords).buffer(dia / 2.0).exterior,
-                                                "kind": kind
-                                            }
-                                        )
-                                        break_loop = True
-                                        break
-                                if break_loop:
-                                    break
-
-            if 'G' in gobj:
-                current['G'] = int(gobj['G'])
-
-            if 'X' in gobj or 'Y' in gobj:
-                if 'X' in gobj:
-                    x = gobj['X']
-                    # current['X'] = x
-                else:
-                    x = current['X']
-
-                if 'Y' in gobj:
-                    y = gobj['Y']
-                else:
-                    y = current['Y']
-
-                kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-                if current['Z'] > 0:
-                    kind[0] = 'T'
-                if current['G'] > 0:
-                    kind[1] = 'S'
-
-                if current['G'] in [0, 1]:  # line
-                    path.append((x, y))
-
-                arcdir = [None, None, "cw", "ccw"]
-                if current['G'] in [2, 3]:  # arc
-                    center = [gobj['I'] + current['X'], gobj['J'] + current['Y']]
-                    radius = np.sqrt(gobj['I'] ** 2 + gobj['J'] ** 2)
-                    start = np.arctan2(-gobj['J'], -gobj['I'])
-                    stop = np.arctan2(-center[1] + y, -center[0] + x)
-                    path += arc(center, radius, start, stop, arcdir[current['G']], int(self.steps_per_circle))
+        if force_parsing is False or force_parsing is None:
+            if is_foreign_gcode(self.gcode):
+                return "fail"
 
-                current['X'] = x
-                current['Y'] = y
+        self.app.inform.emit('%s: %d' % (_("Parsing GCode file. Number of lines"), self.gcode.count('\n') + 1))
+
+        # the diameter of the drill holes created when drilling Excellon drills, found knowing the drill coordinates
+        drill_dia = None
+        if self.origin_kind == 'excellon':
+            drills_index = {}
+            for tool, tool_dict in self.exc_tools.items():
+                for drill_pt in tool_dict.get('drills', []):
+                    point_in_dict_coords = (
+                        float('%.*f' % (self.decimals, drill_pt.x)),
+                        float('%.*f' % (self.decimals, drill_pt.y))
+                    )
+                    if point_in_dict_coords not in drills_index:
+                        drills_index[point_in_dict_coords] = tool_dict['tooldia']
+            drill_dia = drills_index.get
 
-            # Update current instruction
-            for code in gobj:
-                current[code] = gobj[code]
+        parsed = parse_gcode(self.gcode, self.gcode_dialect(), start_pt=pos_xy,
+                             steps_per_circle=int(self.steps_per_circle), drill_dia=drill_dia,
+                             line_xyz='line_xyz' in (self.pp_geometry_name, self.pp_excellon_name),
+                             decimals=self.decimals)
+        if parsed.units is not None:
+            self.units = parsed.units
 
         self.app.inform.emit('%s...' % _("Creating Geometry from the parsed GCode file. "))
-        # There might not be a change in height at the
-        # end, therefore, see here too if there is
-        # a final path.
-        if len(path) > 1:
-            geometry.append(
-                {
-                    "geom": LineString(path),
-                    "kind": kind
-                }
-            )
+        geometry = parsed.to_geometry()
 
         self.gcode_parsed = geometry
         return geometry
@@ -6554,123 +6501,26 @@ class CNCjob(Geometry):
         :rtype:                 list
         """
 
-        kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-        # Results go here
-        geometry = []
-
-        # Last known instruction
-        current = {'X': 0.0, 'Y': 0.0, 'Z': 0.0, 'G': 0}
-
-        # Current path: temporary storage until tool is
-        # lifted or lowered.
-        pos_xy = start_pt
-
-        path = [pos_xy]
-        # path = [(0, 0)]
+        if force_parsing is False or force_parsing is None:
+            if is_foreign_gcode(gcode):
+                return "fail"
 
-        gcode_lines_list = gcode.splitlines()
         self.app.inform.emit(
             '%s: %s. %s: %d' % (_("Parsing GCode file for tool diameter"),
                                 str(dia), _("Number of lines"),
-                                len(gcode_lines_list))
+                                gcode.count('\n') + 1)
         )
 
-        # Process every instruction
-        for line in gcode_lines_list:
-            if force_parsing is False or force_parsing is None:
-                if '%MO' in line or '%' in line or 'MOIN' in line or 'MOMM' in line:
-                    return "fail"
-
-            gobj = self.codes_split(line)
-
-            # ## Units
-            if 'G' in gobj and (gobj['G'] == 20.0 or gobj['G'] == 21.0):
-                self.units = {20.0: "IN", 21.0: "MM"}[gobj['G']]
-                continue
-
-            # TODO take into consideration the tools and update the travel line thickness
-            if 'T' in gobj:
-                pass
-
-            # ## Changing height
-            if 'Z' in gobj:
-                if 'Roland' in self.pp_excellon_name or 'Roland' in self.pp_geometry_name:
-                    pass
-                elif 'hpgl' in self.pp_excellon_name or 'hpgl' in self.pp_geometry_name:
-                    pass
-                elif 'laser' in self.pp_excellon_name or 'laser' in self.pp_geometry_name:
-                    pass
-                elif ('X' in gobj or 'Y' in gobj) and gobj['Z'] != current['Z']:
-                    if self.pp_geometry_name == 'line_xyz' or self.pp_excellon_name == 'line_xyz':
-                        pass
-                    else:
-                        log.warning("Non-orthogonal motion: From %s" % str(current))
-                        log.warning("  To: %s" % str(gobj))
-
-                current['Z'] = gobj['Z']
-                # Store the path into geometry and reset path
-                if len(path) > 1:
-                    geometry.append({"geom": LineString(path),
-                                     "kind": kind})
-                    path = [path[-1]]  # Start with the last point of last path.
-
-                # create the geometry for the holes created when drilling Excellon drills
-                if current['Z'] < 0:
-                    current_drill_point_coords = (
-                        float('%.*f' % (self.decimals, current['X'])),
-                        float('%.*f' % (self.decimals, current['Y']))
-                    )
-
-                    kind = ['C', 'F']
-                    geometry.append(
-                        {
-                            "geom": Point(current_drill_point_coords).buffer(dia/2.0).exterior,
-                            "kind": kind
-                        }
-                    )
-
-            if 'G' in gobj:
-                current['G'] = int(gobj['G'])
-
-            if 'X' in gobj or 'Y' in gobj:
-                x = gobj['X'] if 'X' in gobj else current['X']
-                y = gobj['Y'] if 'Y' in gobj else current['Y']
-
-                kind = ["C", "F"]  # T=travel, C=cut, F=fast, S=slow
-
-                if current['Z'] > 0:
-                    kind[0] = 'T'
-                if current['G'] > 0:
-                    kind[1] = 'S'
-                if current['G'] in [0, 1]:  # line
-                    path.append((x, y))
-
-                arcdir = [None, None, "cw", "ccw"]
-                if current['G'] in [2, 3]:  # arc
-                    center = [gobj['I'] + current['X'], gobj['J'] + current['Y']]
-                    radius = np.sqrt(gobj['I'] ** 2 + gobj['J'] ** 2)
-                    start = np.arctan2(-gobj['J'], -gobj['I'])
-                    stop = np.arctan2(-center[1] + y, -center[0] + x)
-                    path += arc(center, radius, start, stop, arcdir[current['G']], int(self.steps_per_circle))
-
-                current['X'] = x
-                current['Y'] = y
-
-            # Update current instruction
-            for code in gobj:
-                current[code] = gobj[code]
+        # the drill holes are created with the diameter of the tool
+        parsed = parse_gcode(gcode, self.gcode_dialect(), start_pt=start_pt,
+                             steps_per_circle=int(self.steps_per_circle), drill_dia=dia,
+                             line_xyz='line_xyz' in (self.pp_geometry_name, self.pp_excellon_name),
+                             decimals=self.decimals)
+        if parsed.units is not None:
+            self.units = parsed.units
 
         self.app.inform.emit('%s: %s' % (_("Creating Geometry from the parsed GCode file for tool diameter"), str(dia)))
-        # There might not be a change in height at the end, therefore, see here too if there is a final path.
-        if len(path) > 1:
-            geometry.append(
-                {
-                    "geom": LineString(path),
-                    "kind": kind
-                }
-            )
-        return geometry
+        return parsed.to_geometry()
 
     # def plot(self, tooldia=None, dpi=75, margin=0.1,
     #          color={"T": ["#F0E24D", "#B5AB3A"], "C": ["#5E6CFF", "#4650BD"]},
@@ -6711,6 +6561,9 @@ class CNCjob(Geometry):
               color=None, alpha={"T": 0.3, "C": 1.0}, tool_tolerance=0.0005, obj=None, visible=False, kind='all'):
         """
         Plots the G-code job onto the given axes.
+        In the VisPy canvas the tool paths of the same kind are added in batches of plot_batch_size paths, as one
+        shape for each batch. If the "cncjob_fast_preview" preference is set, the tool paths are not buffered and the
+        center lines are drawn with the width of the tool.
 
         :param tooldia:             Tool diameter.
         :type tooldia:              float
@@ -6752,78 +6605,113 @@ class CNCjob(Geometry):
         if isinstance(tooldia, list):
             tooldia = tooldia[0] if tooldia[0] is not None else self.tooldia
 
+        # the VisPy shape collection gets the paths in batches, one shape for each batch of paths of the same kind
+        batched = self.app.is_legacy is False
+        batches = {'C': [], 'T': []}
+
+        def add_batch(geo_kind, face=True):
+            geos = batches[geo_kind]
+            if not geos:
+                return
+            if not face:
+                obj.add_shape(shape=MultiLineString(geos), color=color[geo_kind][1], visible=visible)
+            elif isinstance(geos[0], Polygon):
+                obj.add_shape(shape=MultiPolygon(geos), color=color[geo_kind][1], face_color=color[geo_kind][0],
+                              visible=visible, layer=1 if geo_kind == 'C' else 2)
+            else:
+                # fast preview: the center lines drawn with the width of the tool
+                obj.add_shape(shape=MultiLineString(geos), color=color[geo_kind][1], face_color=color[geo_kind][0],
+                              visible=visible, layer=1 if geo_kind == 'C' else 2, width=tooldia)
+            batches[geo_kind] = []
+
         if tooldia == 0:
             for geo in gcode_parsed:
-                if kind == 'all':
-                    obj.add_shape(shape=geo['geom'], color=color[geo['kind'][0]][1], visible=visible)
-                elif kind == 'travel':
-                    if geo['kind'][0] == 'T':
-                        obj.add_shape(shape=geo['geom'], color=color['T'][1], visible=visible)
-                elif kind == 'cut':
-                    if geo['kind'][0] == 'C':
-                        obj.add_shape(shape=geo['geom'], color=color['C'][1], visible=visible)
+                geo_kind = geo['kind'][0]
+                if (kind == 'travel' and geo_kind != 'T') or (kind == 'cut' and geo_kind != 'C'):
+                    continue
+
+                if batched:
+                    batches[geo_kind].append(geo['geom'])
+                    if len(batches[geo_kind]) >= self.plot_batch_size:
+                        add_batch(geo_kind, face=False)
+                else:
+                    obj.add_shape(shape=geo['geom'], color=color[geo_kind][1], visible=visible)
+
+            for geo_kind in batches:
+                add_batch(geo_kind, face=False)
         else:
             path_num = 0
 
             self.coordinates_type = self.app.defaults["cncjob_coords_type"]
             if self.coordinates_type == "G90":
                 # For Absolute coordinates type G90
+                if tooldia not in obj.annotations_dict:
+                    obj.annotations_dict[tooldia] = {
+                        'pos': [],
+                        'text': []
+                    }
+                annotations = obj.annotations_dict[tooldia]
+                # index of the annotated positions
+                annotated = set(annotations['pos'])
+
+                fast_preview = batched and self.app.defaults["cncjob_fast_preview"]
+
                 for geo in gcode_parsed:
-                    if geo['kind'][0] == 'T':
-                        start_position = geo['geom'].coords[0]
-
-                        if tooldia not in obj.annotations_dict:
-                            obj.annotations_dict[tooldia] = {
-                                'pos': [],
-                                'text': []
-                            }
-                        if start_position not in obj.annotations_dict[tooldia]['pos']:
-                            path_num += 1
-                            obj.annotations_dict[tooldia]['pos'].append(start_position)
-                            obj.annotations_dict[tooldia]['text'].append(str(path_num))
-
-                        end_position = geo['geom'].coords[-1]
-
-                        if tooldia not in obj.annotations_dict:
-                            obj.annotations_dict[tooldia] = {
-                                'pos': [],
-                                'text': []
-                            }
-                        if end_position not in obj.annotations_dict[tooldia]['pos']:
-                            path_num += 1
-                            obj.annotations_dict[tooldia]['pos'].append(end_position)
-                            obj.annotations_dict[tooldia]['text'].append(str(path_num))
+                    geo_kind = geo['kind'][0]
+                    if geo_kind == 'T':
+                        for position in (geo['geom'].coords[0], geo['geom'].coords[-1]):
+                            if position not in annotated:
+                                path_num += 1
+                                annotated.add(position)
+                                annotations['pos'].append(position)
+                                annotations['text'].append(str(path_num))
+
+                    if (kind == 'travel' and geo_kind != 'T') or (kind == 'cut' and geo_kind != 'C'):
+                        continue
 
                     # plot the geometry of Excellon objects
                     if self.origin_kind == 'excellon':
                         try:
                             # if the geos are travel lines
-                            if geo['kind'][0] == 'T':
-                                poly = geo['geom'].buffer(distance=(tooldia / 1.99999999),
-                                                          resolution=self.steps_per_circle)
+                            if geo_kind == 'T':
+                                if fast_preview:
+                                    batches[geo_kind].append(geo['geom'])
+                                    poly = None
+                                else:
+                                    poly = geo['geom'].buffer(distance=(tooldia / 1.99999999),
+                                                              resolution=self.steps_per_circle)
                             else:
                                 poly = Polygon(geo['geom'])
 
-                            poly = poly.simplify(tool_tolerance)
+                            if poly is not None:
+                                poly = poly.simplify(tool_tolerance)
                         except Exception:
                             # deal here with unexpected plot errors due of LineStrings not valid
                             continue
+                    elif fast_preview:
+                        batches[geo_kind].append(geo['geom'])
+                        poly = None
                     else:
                         # plot the geometry of any objects other than Excellon
                         poly = geo['geom'].buffer(distance=(tooldia / 1.99999999), resolution=self.steps_per_circle)
                         poly = poly.simplify(tool_tolerance)
 
-                    if kind == 'all':
-                        obj.add_shape(shape=poly, color=color[geo['kind'][0]][1], face_color=color[geo['kind'][0]][0],
-                                      visible=visible, layer=1 if geo['kind'][0] == 'C' else 2)
-                    elif kind == 'travel':
-                        if geo['kind'][0] == 'T':
-                            obj.add_shape(shape=poly, color=color['T'][1], face_color=color['T'][0],
-                                          visible=visible, layer=2)
-                    elif kind == 'cut':
-                        if geo['kind'][0] == 'C':
-                            obj.add_shape(shape=poly, color=color['C'][1], face_color=color['C'][0],
-                                          visible=visible, layer=1)
+                    if poly is None:
+                        pass
+                    elif batched:
+                        if isinstance(poly, MultiPolygon):
+                            batches[geo_kind] += list(poly.geoms)
+                        elif isinstance(poly, Polygon) and not poly.is_empty:
+                            batches[geo_kind].append(poly)
+                    else:
+                        obj.add_shape(shape=poly, color=color[geo_kind][1], face_color=color[geo_kind][0],
+                                      visible=visible, layer=1 if geo_kind == 'C' else 2)
+
+                    if len(batches[geo_kind]) >= self.plot_batch_size:
+                        add_batch(geo_kind)
+
+                for geo_kind in batches:
+                    add_batch(geo_kind)
             else:
                 self.app.inform.emit('[ERROR_NOTCL] %s...' % _('G91 coordinates not implemented'))
                 return 'fail'
@@ -7017,7 +6905,7 @@ class CNCjob(Geometry):
         else:
             target_linear = linear
 
-        gcode = ""
+        gcode = []
 
         # path = list(target_linear.coords)
         path = self.segment(target_linear.coords)
@@ -7047,26 +6935,26 @@ class CNCjob(Geometry):
 
                 if travel[0] is not None:
                     # move to next point
-                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                     # raise to safe Z (travel[0]) each time because safe Z may be different
                     self.z_move = travel[0]
-                    gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                     # restore z_move
                     self.z_move = z_move
                 else:
                     if prev_z is not None:
                         # move to next point
-                        gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                         # we assume that previously the z_move was altered therefore raise to
                         # the travel_z (z_move)
                         self.z_move = z_move
-                        gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                     else:
                         # move to next point
-                        gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                 # store prev_z
                 prev_z = travel[0]
@@ -7076,39 +6964,34 @@ class CNCjob(Geometry):
         # Move down to cutting depth
         if down:
             # Different feedrate for vertical cut?
-            gcode += self.doformat(p.z_feedrate_code)
+            gcode.append(self.doformat(p.z_feedrate_code))
             # gcode += self.doformat(p.feedrate_code)
-            gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut)
-            gcode += self.doformat(p.feedrate_code, feedrate=feedrate)
+            gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut))
+            gcode.append(self.doformat(p.feedrate_code, feedrate=feedrate))
 
         # Cutting...
         prev_x = first_x
         prev_y = first_y
-        for pt in path[1:]:
+        if len(path) > 1:
             if self.app.abort_flag:
                 # graceful abort requested by the user
                 raise grace
 
-            if self.coordinates_type == "G90":
-                # For Absolute coordinates type G90
-                next_x = pt[0]
-                next_y = pt[1]
-            else:
+            if self.coordinates_type != "G90":
                 # For Incremental coordinates type G91
                 # next_x = pt[0] - prev_x
                 # next_y = pt[1] - prev_y
                 self.app.inform.emit('[ERROR_NOTCL] %s...' % _('G91 coordinates not implemented'))
-                next_x = pt[0]
-                next_y = pt[1]
 
-            gcode += self.doformat(p.linear_code, x=next_x, y=next_y, z=z_cut)  # Linear motion to point
-            prev_x = pt[0]
-            prev_y = pt[1]
+            # Linear motion to each point, the coordinates are used as they are for both G90 and G91 coordinates type
+            gcode.append(self.doformat_linear(p, path[1:], z=z_cut))
+            prev_x = path[-1][0]
+            prev_y = path[-1][1]
 
         # Up to travelling height.
         if up:
-            gcode += self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move)  # Stop cutting
-        return gcode
+            gcode.append(self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move))  # Stop cutting
+        return ''.join(gcode)
 
     def linear2gcode_extra(self, linear, dia, extracut_length, tolerance=0, down=True, up=True,
                            z_cut=None, z_move=None, zdownrate=None,
@@ -7163,7 +7046,7 @@ class CNCjob(Geometry):
         else:
             target_linear = linear
 
-        gcode = ""
+        gcode = []
 
         path = list(target_linear.coords)
         p = self.pp_geometry
@@ -7191,26 +7074,26 @@ class CNCjob(Geometry):
 
                 if travel[0] is not None:
                     # move to next point
-                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                     # raise to safe Z (travel[0]) each time because safe Z may be different
                     self.z_move = travel[0]
-                    gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                     # restore z_move
                     self.z_move = z_move
                 else:
                     if prev_z is not None:
                         # move to next point
-                        gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                         # we assume that previously the z_move was altered therefore raise to
                         # the travel_z (z_move)
                         self.z_move = z_move
-                        gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                     else:
                         # move to next point
-                        gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                        gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                 # store prev_z
                 prev_z = travel[0]
@@ -7221,37 +7104,31 @@ class CNCjob(Geometry):
         if down:
             # Different feedrate for vertical cut?
             if self.z_feedrate is not None:
-                gcode += self.doformat(p.z_feedrate_code)
+                gcode.append(self.doformat(p.z_feedrate_code))
                 # gcode += self.doformat(p.feedrate_code)
-                gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut)
-                gcode += self.doformat(p.feedrate_code, feedrate=feedrate)
+                gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut))
+                gcode.append(self.doformat(p.feedrate_code, feedrate=feedrate))
             else:
-                gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut)  # Start cutting
+                gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=z_cut))  # Start cutting
 
         # Cutting...
         prev_x = first_x
         prev_y = first_y
-        for pt in path[1:]:
+        if len(path) > 1:
             if self.app.abort_flag:
                 # graceful abort requested by the user
                 raise grace
 
-            if self.coordinates_type == "G90":
-                # For Absolute coordinates type G90
-                next_x = pt[0]
-                next_y = pt[1]
-            else:
-                # For Incremental coordinates type G91
+            if self.coordinates_type != "G90":
                 # For Incremental coordinates type G91
                 # next_x = pt[0] - prev_x
                 # next_y = pt[1] - prev_y
                 self.app.inform.emit('[ERROR_NOTCL] %s...' % _('G91 coordinates not implemented'))
-                next_x = pt[0]
-                next_y = pt[1]
 
-            gcode += self.doformat(p.linear_code, x=next_x, y=next_y, z=z_cut)  # Linear motion to point
-            prev_x = next_x
-            prev_y = next_y
+            # Linear motion to each point, the coordinates are used as they are for both G90 and G91 coordinates type
+            gcode.append(self.doformat_linear(p, path[1:], z=z_cut))
+            prev_x = path[-1][0]
+            prev_y = path[-1][1]
 
         # this line is added to create an extra cut over the first point in patch
         # to make sure that we remove the copper leftovers
@@ -7276,28 +7153,26 @@ class CNCjob(Geometry):
             new_y = extra_path[0][1]
 
             # this is an extra line therefore lift the milling bit
-            gcode += self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move)  # lift
+            gcode.append(self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move))  # lift
 
             # move fast to the new first point
-            gcode += self.doformat(p.rapid_code, x=new_x, y=new_y)
+            gcode.append(self.doformat(p.rapid_code, x=new_x, y=new_y))
 
             # lower the milling bit
             # Different feedrate for vertical cut?
             if self.z_feedrate is not None:
-                gcode += self.doformat(p.z_feedrate_code)
-                gcode += self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut)
-                gcode += self.doformat(p.feedrate_code, feedrate=feedrate)
+                gcode.append(self.doformat(p.z_feedrate_code))
+                gcode.append(self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut))
+                gcode.append(self.doformat(p.feedrate_code, feedrate=feedrate))
             else:
-                gcode += self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut)  # Start cutting
+                gcode.append(self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut))  # Start cutting
 
             # start cutting the extra line
-            last_pt = extra_path[0]
-            for pt in extra_path[1:]:
-                gcode += self.doformat(p.linear_code, x=pt[0], y=pt[1])
-                last_pt = pt
+            gcode.append(self.doformat_linear(p, extra_path[1:]))
+            last_pt = extra_path[-1]
 
             # go back to the original point
-            gcode += self.doformat(p.linear_code, x=path[0][0], y=path[0][1])
+            gcode.append(self.doformat(p.linear_code, x=path[0][0], y=path[0][1]))
             last_pt = path[0]
         else:
             # go to the point that is 5% in length before the end (therefore 95% length from start of the line),
@@ -7315,23 +7190,22 @@ class CNCjob(Geometry):
             new_y = extra_path[0][1]
 
             # this is an extra line therefore lift the milling bit
-            gcode += self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move)  # lift
+            gcode.append(self.doformat(p.lift_code, x=prev_x, y=prev_y, z_move=z_move))  # lift
 
             # move fast to the new first point
-            gcode += self.doformat(p.rapid_code, x=new_x, y=new_y)
+            gcode.append(self.doformat(p.rapid_code, x=new_x, y=new_y))
 
             # lower the milling bit
             # Different feedrate for vertical cut?
             if self.z_feedrate is not None:
-                gcode += self.doformat(p.z_feedrate_code)
-                gcode += self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut)
-                gcode += self.doformat(p.feedrate_code, feedrate=feedrate)
+                gcode.append(self.doformat(p.z_feedrate_code))
+                gcode.append(self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut))
+                gcode.append(self.doformat(p.feedrate_code, feedrate=feedrate))
             else:
-                gcode += self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut)  # Start cutting
+                gcode.append(self.doformat(p.down_code, x=new_x, y=new_y, z_cut=z_cut))  # Start cutting
 
             # start cutting the extra line
-            for pt in extra_path[1:]:
-                gcode += self.doformat(p.linear_code, x=pt[0], y=pt[1])
+            gcode.append(self.doformat_linear(p, extra_path[1:]))
 
             # ---------------------------------------------
             # second half
@@ -7340,10 +7214,8 @@ class CNCjob(Geometry):
             extra_path = list(extra_line.coords)
 
             # start cutting the extra line
-            last_pt = extra_path[0]
-            for pt in extra_path[1:]:
-                gcode += self.doformat(p.linear_code, x=pt[0], y=pt[1])
-                last_pt = pt
+            gcode.append(self.doformat_linear(p, extra_path[1:]))
+            last_pt = extra_path[-1]
 
             # ---------------------------------------------
             # back to original start point, cutting
@@ -7352,10 +7224,8 @@ class CNCjob(Geometry):
             extra_path = list(extra_line.coords)[::-1]
 
             # start cutting the extra line
-            last_pt = extra_path[0]
-            for pt in extra_path[1:]:
-                gcode += self.doformat(p.linear_code, x=pt[0], y=pt[1])
-                last_pt = pt
+            gcode.append(self.doformat_linear(p, extra_path[1:]))
+            last_pt = extra_path[-1]
 
         # if extracut_length == 0.0:
         #     gcode += self.doformat(p.linear_code, x=path[1][0], y=path[1][1])
@@ -7377,9 +7247,9 @@ class CNCjob(Geometry):
 
         # Up to travelling height.
         if up:
-            gcode += self.doformat(p.lift_code, x=last_pt[0], y=last_pt[1], z_move=z_move)  # Stop cutting
+            gcode.append(self.doformat(p.lift_code, x=last_pt[0], y=last_pt[1], z_move=z_move))  # Stop cutting
 
-        return gcode
+        return ''.join(gcode)
 
     def point2gcode(self, point, dia, z_move=None, old_point=(0, 0)):
         """
@@ -7395,7 +7265,7 @@ class CNCjob(Geometry):
         :return:                    G-code to cut on the Point feature.
         :rtype:                     str
         """
-        gcode = ""
+        gcode = []
 
         if self.app.abort_flag:
             # graceful abort requested by the user
@@ -7429,26 +7299,26 @@ class CNCjob(Geometry):
 
             if travel[0] is not None:
                 # move to next point
-                gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                 # raise to safe Z (travel[0]) each time because safe Z may be different
                 self.z_move = travel[0]
-                gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
 
                 # restore z_move
                 self.z_move = z_move
             else:
                 if prev_z is not None:
                     # move to next point
-                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
                     # we assume that previously the z_move was altered therefore raise to
                     # the travel_z (z_move)
                     self.z_move = z_move
-                    gcode += self.doformat(p.lift_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.lift_code, x=locx, y=locy))
                 else:
                     # move to next point
-                    gcode += self.doformat(p.rapid_code, x=locx, y=locy)
+                    gcode.append(self.doformat(p.rapid_code, x=locx, y=locy))
 
             # store prev_z
             prev_z = travel[0]
@@ -7456,14 +7326,14 @@ class CNCjob(Geometry):
         # gcode += self.doformat(p.linear_code, x=first_x, y=first_y)  # Move to first point
 
         if self.z_feedrate is not None:
-            gcode += self.doformat(p.z_feedrate_code)
-            gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=self.z_cut)
-            gcode += self.doformat(p.feedrate_code)
+            gcode.append(self.doformat(p.z_feedrate_code))
+            gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=self.z_cut))
+            gcode.append(self.doformat(p.feedrate_code))
         else:
-            gcode += self.doformat(p.down_code, x=first_x, y=first_y, z_cut=self.z_cut)  # Start cutting
+            gcode.append(self.doformat(p.down_code, x=first_x, y=first_y, z_cut=self.z_cut))  # Start cutting
 
-        gcode += self.doformat(p.lift_code, x=first_x, y=first_y)  # Stop cutting
-        return gcode
+        gcode.append(self.doformat(p.lift_code, x=first_x, y=first_y))  # Stop cutting
+        return ''.join(gcode)
 
     def export_svg(self, scale_stroke_factor=0.00):
         """
@@ -7542,6 +7412,10 @@ class CNCjob(Geometry):
 
         log.debug("camlib.CNCJob.bounds()")
 
+        cached = self.cached_bounds()
+        if cached is not None:
+            return cached
+
         def bounds_rec(obj):
             if type(obj) is list:
                 cminx = np.Inf
@@ -7621,9 +7495,10 @@ class CNCjob(Geometry):
                         maxy = max(maxy, maxy_)
 
             bounds_coords = minx, miny, maxx, maxy
-        return bounds_coords
+        return self.cache_bounds(bounds_coords)
 
     # TODO This function should be replaced at some point with a "real" function. Until then it's an ugly hack ...
+    @invalidates_bounds
     def scale(self, xfactor, yfactor=None, point=None):
         """
         Scales all the geometry on the XY plane in the object by the
@@ -7809,6 +7684,7 @@ class CNCjob(Geometry):
         self.create_geometry()
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def offset(self, vect):
         """
         Offsets all the geometry on the XY plane in the object by the
@@ -7918,6 +7794,7 @@ class CNCjob(Geometry):
 
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def mirror(self, axis, point):
         """
         Mirror the geometry of an object by an given axis around the coordinates of the 'point'
@@ -7955,6 +7832,7 @@ class CNCjob(Geometry):
         self.create_geometry()
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def skew(self, angle_x, angle_y, point):
         """
         Shear/Skew the geometries of an object by angles along x and y dimensions.
@@ -7998,6 +7876,7 @@ class CNCjob(Geometry):
         self.create_geometry()
         self.app.proc_container.new_text = ''
 
+    @invalidates_bounds
     def rotate(self, angle, point):
         """
         Rotate the geometry of an object by an given angle around the coordinates of the 'point'
@@ -94,6 +94,7 @@ class FlatCAMDefaults:
         "global_send_stats": True,
         "global_worker_number": int((os.cpu_count()) / 2) if os.cpu_count() > 4 else 2,
         "global_tolerance": 0.005,
+        "global_tessellation_cache": 128,
 
         "global_save_compressed": True,
         "global_compression_level": 3,
@@ -381,6 +382,7 @@ class FlatCAMDefaults:
         # CNC Job Options
         "cncjob_plot_kind": 'all',
         "cncjob_annotation": True,
+        "cncjob_fast_preview": False,
 
         # CNC Job Advanced Options
         "cncjob_annotation_fontsize": 9,
@@ -486,6 +488,7 @@ class FlatCAMDefaults:
         "tools_ncc_tipangle": 30,
         "tools_ncc_newdia": 0.1,
         "tools_ncc_plotting": 'normal',
+        "tools_ncc_multiprocessing": True,
         "tools_ncc_check_valid": True,
 
         # Cutout Tool
@@ -627,6 +630,7 @@ class FlatCAMDefaults:
 
         # Optimal Tool
         "tools_opt_precision": 4,
+        "tools_opt_ceiling": 1.0,
 
         # Check Rules Tool
         "tools_cr_trace_size": True,
@@ -235,6 +235,9 @@ M0""".format(z_toolchange=self.coordinate_format % (p.coords_decimals, z_toolcha
     def linear_code(self, p):
         return ('G01 ' + self.position_code(p)).format(**p)
 
+    def linear_template(self, p):
+        return 'G01 X%.{0}f Y%.{0}f'.format(p.coords_decimals)
+
     def end_code(self, p):
         coords_xy = p['xy_end']
         gcode = ('G00 Z' + self.feedrate_format % (p.fr_decimals, p.z_end) + "\n")
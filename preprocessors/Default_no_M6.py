@@ -220,6 +220,9 @@ G00 Z{z_toolchange}
     def linear_code(self, p):
         return ('G01 ' + self.position_code(p)).format(**p)
 
+    def linear_template(self, p):
+        return 'G01 X%.{0}f Y%.{0}f'.format(p.coords_decimals)
+
     def end_code(self, p):
         end_coords_xy = p['xy_end']
         gcode = ('G00 Z' + self.feedrate_format % (p.fr_decimals, p.z_end) + "\n")
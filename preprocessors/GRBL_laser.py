@@ -82,6 +82,10 @@ class GRBL_laser(PreProc):
         return ('G01 ' + self.position_code(p)).format(**p) + \
                ' F' + str(self.feedrate_format % (p.fr_decimals, p.feedrate))
 
+    def linear_template(self, p):
+        return 'G01 X%.{0}f Y%.{0}f'.format(p.coords_decimals) + \
+               ' F' + str(self.feedrate_format % (p.fr_decimals, p.feedrate))
+
     def end_code(self, p):
         coords_xy = p['xy_end']
         gcode = ('G00 Z' + self.feedrate_format % (p.fr_decimals, p.z_end) + "\n")
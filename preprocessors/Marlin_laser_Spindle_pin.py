@@ -91,6 +91,9 @@ class Marlin_laser_Spindle_pin(PreProc):
     def linear_code(self, p):
         return ('G1 ' + self.position_code(p)).format(**p) + " " + self.inline_feedrate_code(p)
 
+    def linear_template(self, p):
+        return 'G1 X%.{0}f Y%.{0}f'.format(p.coords_decimals) + " " + self.inline_feedrate_code(p)
+
     def end_code(self, p):
         coords_xy = p['xy_end']
         gcode = ('G0 Z' + self.feedrate_format % (p.fr_decimals, p.z_end) + " " + self.feedrate_rapid_code(p) + "\n")
@@ -214,6 +214,11 @@ M0""".format(x_toolchange=self.coordinate_format % (p.coords_decimals, x_toolcha
         g += ' Z' + self.coordinate_format % (p.coords_decimals, p.z_cut)
         return g
 
+    def linear_template(self, p):
+        g = 'G01 X%.{0}f Y%.{0}f'.format(p.coords_decimals)
+        g += ' Z' + self.coordinate_format % (p.coords_decimals, p.z_cut)
+        return g
+
     def end_code(self, p):
         coords_xy = p['xy_end']
         if coords_xy and coords_xy != '':
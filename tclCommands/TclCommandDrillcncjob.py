@@ -77,9 +77,11 @@ class TclCommandDrillcncjob(TclCommandSignaled):
             ('dwelltime', 'Time to pause to allow the spindle to reach the full speed.\n'
                           'If it is not used in command then it will not be included'),
             ('pp', 'This is the Excellon preprocessor name: case_sensitive, no_quotes'),
-            ('opt_type', 'Name of move optimization type. B by default for Basic OR-Tools, M for Metaheuristic OR-Tools'
-                         'T from Travelling Salesman Algorithm. B and M works only for 64bit version of FlatCAM and '
-                         'T works only for 32bit version of FlatCAM'),
+            ('opt_type', 'Name of move optimization type. B by default for Basic OR-Tools, '
+                         'M for Metaheuristic OR-Tools, T for Travelling Salesman Algorithm (nearest neighbour path '
+                         'shortened with 2-opt moves). '
+                         'B and M works only for 64bit version of FlatCAM and improve the T path. '
+                         'T works for both 32bit and 64bit versions of FlatCAM'),
             ('diatol', 'Tolerance. Percentange (0.0 ... 100.0) within which dias in drilled_dias will be judged to be '
                        'the same as the ones in the tools from the Excellon object. E.g: if in drill_dias we have a '
                        'diameter with value 1.0, in the Excellon we have a tool with dia = 1.05 and we set a tolerance '
@@ -0,0 +1,21 @@
+from copy import deepcopy
+from types import SimpleNamespace
+
+from defaults import FlatCAMDefaults
+
+
+def app_stub(**kwargs):
+    """
+    Minimal application context needed by the FlatCAM objects, parsers and tools, without GUI.
+
+    :param kwargs:  attributes added to the context or replacing the default ones
+    :return:        the application context
+    :rtype:         SimpleNamespace
+    """
+    app = SimpleNamespace(defaults=deepcopy(FlatCAMDefaults.factory_defaults), decimals=4, abort_flag=False,
+                          is_legacy=False,
+                          plotcanvas=SimpleNamespace(new_shape_collection=lambda **kw: None),
+                          inform=SimpleNamespace(emit=lambda *args: None),
+                          proc_container=SimpleNamespace(update_view_text=lambda *args: None, new_text=''))
+    app.__dict__.update(kwargs)
+    return app
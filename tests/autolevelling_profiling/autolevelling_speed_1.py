@@ -0,0 +1,50 @@
+# This script measures the time needed by level_gcode() to level a job of many moves with the height map of a grid of
+# probe points (bilinear interpolation) and of random probe points (Delaunay triangulation), and the time needed by the
+# bilinearInterpolator to interpolate the same heights one point at a time.
+# Run python autolevelling_speed_1.py [number_of_moves]
+
+import sys
+import time
+from io import StringIO
+
+import numpy as np
+
+sys.path.append('../../')
+
+from appCommon.AutoLevelling import GridHeightMap, DelaunayHeightMap, level_gcode
+from appCommon.bilinearInterpolator import bilinearInterpolator
+
+nr_moves = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+rng = np.random.default_rng(0)
+
+# a job of short cuts over a 100 x 100 mm board, in the G-Code made by the default preprocessor; the cuts are up to
+# 10 mm long
+xy = np.abs(100 - np.abs(np.cumsum(rng.uniform(-1, 1, (nr_moves, 2)), axis=0) % 200 - 100))
+lines = ['G21', 'G90', 'G94', 'G01 F100.00', 'G00 Z2.0000']
+for idx, (x, y) in enumerate(xy.tolist()):
+    if idx % 10 == 0:
+        lines += ['G00 Z2.0000', 'G00 X%.4f Y%.4f' % (x, y), 'G01 Z-0.1000']
+    else:
+        lines.append('G01 X%.4f Y%.4f' % (x, y))
+lines += ['G00 Z2.0000', 'M05']
+gcode = '\n'.join(lines)
+
+grid_points = [(x, y, rng.uniform(-0.1, 0.1)) for y in np.linspace(0, 100, 10) for x in np.linspace(0, 100, 10)]
+random_points = np.column_stack((rng.uniform(0, 100, (100, 2)), rng.uniform(-0.1, 0.1, 100)))
+
+for name, height_map_class, points in (('bilinear', GridHeightMap, grid_points),
+                                       ('Delaunay', DelaunayHeightMap, random_points)):
+    t_start = time.perf_counter()
+    height_map = height_map_class(points)
+    levelled = level_gcode([gcode], height_map, seg_x=5.0, seg_y=5.0)[0]
+    t_level = time.perf_counter() - t_start
+    print("%s: %d moves levelled into %d lines in %.3f sec" %
+          (name, nr_moves, levelled.count('\n') + 1, t_level))
+
+# the heights of the move end points, one by one
+reference = bilinearInterpolator(StringIO('\n'.join('%f,%f,%f' % pt for pt in grid_points)))
+t_start = time.perf_counter()
+for pt in xy:
+    reference.Interpolate(pt)
+print("bilinearInterpolator: %d heights in %.3f sec" % (nr_moves, time.perf_counter() - t_start))
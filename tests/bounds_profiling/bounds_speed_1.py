@@ -0,0 +1,90 @@
+# This script measures the time of ObjectCollection.get_bounds() for a project of Geometry objects with nested lists
+# of geometry: the first call, that finds the bounds of all the objects, the next calls, that use the collection
+# bounds, and the calls after one object is moved, inside the collection bounds and on their edge; only the bounds of
+# the moved object are found again.
+# Run python bounds_speed_1.py [number_of_objects] [polygons_per_object]
+
+import os
+import sys
+import time
+import logging
+from types import SimpleNamespace
+
+from PyQt5 import QtWidgets
+from shapely.geometry import box
+import shapely.affinity as affinity
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from camlib import Geometry
+from appObjects.ObjectCollection import ObjectCollection, TreeItem
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+qt_app = QtWidgets.QApplication(sys.argv[:1])
+
+logging.getLogger('base').setLevel(logging.ERROR)
+logging.getLogger('base2').setLevel(logging.ERROR)
+
+nr_objects = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+nr_polygons = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+app = app_stub(resource_location='../../assets/resources', ui=SimpleNamespace(keyPressEvent=lambda *args: None))
+Geometry.app = app
+collection = ObjectCollection(app)
+
+
+class ProjectGeometry(Geometry):
+    # lets the collection know about the changes, like the FlatCAM objects
+    def bounds_changed(self):
+        collection.on_object_bounds_changed(self)
+
+    def offset(self, vect):
+        self.solid_geometry = [[affinity.translate(geo, vect[0], vect[1]) for geo in geo_list]
+                               for geo_list in self.solid_geometry]
+
+
+# the objects are placed on a 10 x 10 grid; their geometry is a list of lists of small squares
+objects = []
+group = collection.group_items['geometry']
+for nr in range(nr_objects):
+    x0, y0 = (nr % 10) * 60.0, (nr // 10) * 60.0
+    obj = ProjectGeometry()
+    obj.multigeo = False
+    obj.solid_geometry = [[box(x0 + (i % 50), y0 + (i // 50) % 50, x0 + (i % 50) + 0.5, y0 + (i // 50) % 50 + 0.5)
+                           for i in range(j, j + 100)] for j in range(0, nr_polygons, 100)]
+    TreeItem(None, None, obj, group)
+    objects.append(obj)
+
+t_start = time.perf_counter()
+bounds = collection.get_bounds()
+t_first = time.perf_counter() - t_start
+
+nr_calls = 1000
+t_start = time.perf_counter()
+for __ in range(nr_calls):
+    assert collection.get_bounds() == bounds
+t_next = (time.perf_counter() - t_start) / nr_calls
+
+# an object inside the project is moved a little, then the object on the right edge is moved to the left
+objects[nr_objects // 2 + 5].offset((1.0, 1.0))
+t_start = time.perf_counter()
+inside_bounds = collection.get_bounds()
+t_inside = time.perf_counter() - t_start
+
+objects[9].offset((-100.0, 0.0))
+t_start = time.perf_counter()
+edge_bounds = collection.get_bounds()
+t_edge = time.perf_counter() - t_start
+
+# the same bounds found again from all the objects, without the cached bounds
+collection.collection_bounds = None
+for obj in objects:
+    obj.invalidate_bounds()
+assert collection.get_bounds() == edge_bounds
+
+print("Objects: %d, polygons per object: %d, bounds: %s" % (nr_objects, nr_polygons, str(bounds)))
+print("First get_bounds(): %.4f sec" % t_first)
+print("Next get_bounds(): %.6f sec" % t_next)
+print("get_bounds() after the offset of an object inside the bounds: %.4f sec" % t_inside)
+print("get_bounds() after the offset of an object on the edge of the bounds: %.4f sec" % t_edge)
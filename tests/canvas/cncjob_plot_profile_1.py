@@ -0,0 +1,54 @@
+# This script measures the time needed to plot the tool paths of a CNCJob (CNCjob.plot2()) into a VisPy shape
+# collection and to redraw the collection, with the tool paths plotted as polygons and in the fast preview mode.
+# Run python cncjob_plot_profile_1.py [number_of_paths]
+
+import sys
+import time
+from types import SimpleNamespace
+
+from shapely.geometry import LineString
+from vispy.gloo.context import FakeCanvas
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from camlib import CNCjob
+from appGUI.VisPyVisuals import ShapeCollectionVisual
+
+nr_paths = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+CNCjob.app = app_stub(preprocessors={'default': None})
+defaults = CNCjob.app.defaults
+
+# a zig-zag cut followed by a travel move, on a grid
+gcode_parsed = []
+for i in range(nr_paths):
+    x0, y0 = (i % 200) * 1.0, (i // 200) * 1.0
+    pts = [(x0 + 0.08 * j, y0 + 0.3 * (j % 2)) for j in range(11)]
+    gcode_parsed.append({'geom': LineString(pts), 'kind': ['C', 'F']})
+    gcode_parsed.append({'geom': LineString([pts[-1], ((i + 1) % 200 * 1.0, (i + 1) // 200 * 1.0)]),
+                         'kind': ['T', 'F']})
+
+# the visuals need a GL context only to record the GL commands
+canvas = FakeCanvas()
+
+cnc = CNCjob(steps_per_circle=16)
+cnc.origin_kind = 'geometry'
+
+print("Paths: %d" % len(gcode_parsed))
+for fast_preview in (False, True):
+    defaults['cncjob_fast_preview'] = fast_preview
+    collection = ShapeCollectionVisual(layers=3, pool=None)
+    obj = SimpleNamespace(annotations_dict={},
+                          add_shape=lambda **kwargs: collection.add(tolerance=None, **kwargs))
+
+    t0 = time.perf_counter()
+    cnc.plot2(tooldia=0.1, obj=obj, visible=True, gcode_parsed=gcode_parsed, kind='all')
+    t1 = time.perf_counter()
+    collection.redraw()
+    t2 = time.perf_counter()
+
+    print("Fast preview: %s, shapes %d, annotations %d" %
+          (str(fast_preview), len(collection.data), len(obj.annotations_dict[0.1]['pos'])))
+    print("    Plot: %.3f sec" % (t1 - t0))
+    print("    Redraw: %.3f sec" % (t2 - t1))
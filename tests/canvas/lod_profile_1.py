@@ -0,0 +1,57 @@
+# This script measures the cost of making the levels of detail of the shapes in ShapeCollectionVisual and the time
+# needed to switch the levels when the pixel size changes (zoom), with the number of vertices drawn at each pixel size,
+# for a Gerber-like set of pads and traces.
+# Run python lod_profile_1.py [number_of_shapes]
+
+import sys
+import time
+
+from shapely.geometry import Point, LineString
+from vispy.gloo.context import FakeCanvas
+
+sys.path.append('../../')
+
+from appGUI.VisPyVisuals import ShapeCollectionVisual, tessellation_cache
+
+nr_shapes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+shapes = []
+for i in range(nr_shapes):
+    x, y = (i % 400) * 2.54, (i // 400) * 2.54
+    if i % 2:
+        shapes.append(Point(x, y).buffer(0.6, resolution=16))
+    else:
+        shapes.append(LineString([(x, y), (x + 1.27, y + 1.27), (x + 2.54, y + 1.27)]).buffer(0.2, resolution=16))
+
+# the visuals need a GL context only to record the GL commands
+canvas = FakeCanvas()
+
+# each collection makes its own buffers
+tessellation_cache.max_size = 0
+
+
+def plot(lod):
+    collection = ShapeCollectionVisual(layers=1, pool=None, lod=lod)
+    t_start = time.perf_counter()
+    for geo in shapes:
+        collection.add(shape=geo, color='#000000FF', face_color='#BBF268BF', layer=0, tolerance=0.005)
+    collection.redraw()
+    return collection, time.perf_counter() - t_start
+
+
+def vertices(collection):
+    return sum(buf.size - buf.free_count for buf in collection._mesh_buffers + collection._line_buffers)
+
+
+full_collection, t_full = plot(lod=False)
+lod_collection, t_lod = plot(lod=True)
+
+print("Shapes: %d" % nr_shapes)
+print("Plot, full detail only: %.3f sec, vertices: %d" % (t_full, vertices(full_collection)))
+print("Plot, with the levels of detail: %.3f sec" % t_lod)
+for pixel_size in (0.01, 0.05, 0.2, 0.5, 2.0, 0.01):
+    t0 = time.perf_counter()
+    lod_collection.set_view(pixel_size=pixel_size)
+    t1 = time.perf_counter()
+    print("Pixel size %.2f: switch %.3f sec, vertices: %d, shapes smaller than a pixel: %d" %
+          (pixel_size, t1 - t0, vertices(lod_collection), len(lod_collection._undrawn)))
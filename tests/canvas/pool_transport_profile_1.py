@@ -0,0 +1,57 @@
+# This script measures the time needed to translate the shapes into buffers in the process pool, for a Gerber-like set
+# of pads and traces, with one task for each shape (the Shapely geometry pickled to the pool and the buffers pickled
+# back) and with the batches of ShapeBatch (WKB to the pool, buffers back packed in a shared memory block).
+# Run python pool_transport_profile_1.py [number_of_shapes]
+
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+from shapely.geometry import Point, LineString
+
+sys.path.append('../../')
+
+from appGUI.VisPyVisuals import ShapeBatch, BATCH_SIZE, _update_shape_buffers, _set_shape_buffers
+
+
+def shape_data():
+    data = {}
+    for i in range(nr_shapes):
+        x, y = (i % 400) * 2.54, (i // 400) * 2.54
+        if i % 2:
+            geo = Point(x, y).buffer(0.6, resolution=8)
+        else:
+            geo = LineString([(x, y), (x + 1.27, y + 1.27), (x + 2.54, y + 1.27)]).buffer(0.2, resolution=4)
+        data[i] = {'geometry': geo, 'color': '#000000FF', 'face_color': '#BBF268BF', 'tolerance': None,
+                   'width': None, 'lod': False}
+    return data
+
+
+if __name__ == '__main__':
+    nr_shapes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    pool = Pool()
+
+    data = shape_data()
+    t0 = time.perf_counter()
+    results = [pool.map_async(_update_shape_buffers, [data[key]]) for key in data]
+    per_shape = [result.get()[0] for result in results]
+    t1 = time.perf_counter()
+
+    data = shape_data()
+    t2 = time.perf_counter()
+    keys = list(data)
+    batches = [ShapeBatch(pool, data, keys[i:i + BATCH_SIZE]) for i in range(0, len(keys), BATCH_SIZE)]
+    batched = [_set_shape_buffers(data[key], *batch.get(key)) for batch in batches for key in batch.keys]
+    t3 = time.perf_counter()
+
+    pool.close()
+    pool.join()
+
+    # both ways must make the same buffers
+    assert all(np.array_equal(a[name], b[name]) for a, b in zip(per_shape, batched)
+               for name in ('line_pts', 'mesh_vertices', 'mesh_tris'))
+
+    print("Shapes: %d" % nr_shapes)
+    print("Process pool, one task for each shape: %.3f sec" % (t1 - t0))
+    print("Process pool, batches of %d shapes: %.3f sec" % (BATCH_SIZE, t3 - t2))
@@ -0,0 +1,52 @@
+# This script measures the time needed by ShapeCollectionVisual to translate the shapes into buffers and to redraw
+# (merge the buffers of all the shapes and set them into the visuals), for a Gerber-like set of pads and traces.
+# It measures also hiding and showing again the shapes of one object out of 40.
+# Run python shape_collection_profile_1.py [number_of_shapes]
+
+import sys
+import time
+
+from shapely.geometry import Point, LineString
+from vispy.gloo.context import FakeCanvas
+
+sys.path.append('../../')
+
+from appGUI.VisPyVisuals import ShapeCollectionVisual
+
+nr_shapes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+shapes = []
+for i in range(nr_shapes):
+    x, y = (i % 400) * 2.54, (i // 400) * 2.54
+    if i % 2:
+        shapes.append(Point(x, y).buffer(0.6, resolution=8))
+    else:
+        shapes.append(LineString([(x, y), (x + 1.27, y + 1.27), (x + 2.54, y + 1.27)]).buffer(0.2, resolution=4))
+
+# the visuals need a GL context only to record the GL commands
+canvas = FakeCanvas()
+
+collection = ShapeCollectionVisual(layers=1, pool=None)
+
+t0 = time.perf_counter()
+for geo in shapes:
+    collection.add(shape=geo, color='#000000FF', face_color='#BBF268BF', layer=0, tolerance=None)
+t1 = time.perf_counter()
+collection.redraw()
+t2 = time.perf_counter()
+collection.update_color(new_mesh_color='#FF000080', new_line_color='#00FF00FF')
+t3 = time.perf_counter()
+
+# hide and show again the shapes of one object out of 40
+object_keys = list(collection.data.keys())[:nr_shapes // 40]
+collection.update_visibility(False, indexes=object_keys)
+collection.redraw([])
+collection.update_visibility(True, indexes=object_keys)
+collection.redraw([])
+t4 = time.perf_counter()
+
+print("Shapes: %d" % nr_shapes)
+print("Buffers: %.3f sec" % (t1 - t0))
+print("Redraw: %.3f sec" % (t2 - t1))
+print("Update color: %.3f sec" % (t3 - t2))
+print("Toggle visibility: %.3f sec" % (t4 - t3))
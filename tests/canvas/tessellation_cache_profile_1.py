@@ -0,0 +1,61 @@
+# This script measures the time needed by ShapeCollectionVisual to plot again the same shapes (clear the collection
+# and add the shapes again, like FlatCAMObj.plot() does), with the tessellation cache and without it.
+# Run python tessellation_cache_profile_1.py [number_of_shapes]
+
+import sys
+import time
+
+import numpy as np
+from shapely.geometry import Point, LineString
+from vispy.gloo.context import FakeCanvas
+
+sys.path.append('../../')
+
+from appGUI.VisPyVisuals import ShapeCollectionVisual, tessellation_cache
+
+nr_shapes = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+shapes = []
+for i in range(nr_shapes):
+    x, y = (i % 400) * 2.54, (i // 400) * 2.54
+    if i % 2:
+        shapes.append(Point(x, y).buffer(0.6, resolution=8))
+    else:
+        shapes.append(LineString([(x, y), (x + 1.27, y + 1.27), (x + 2.54, y + 1.27)]).buffer(0.2, resolution=4))
+
+# the visuals need a GL context only to record the GL commands
+canvas = FakeCanvas()
+
+collection = ShapeCollectionVisual(layers=1, pool=None)
+
+
+def plot(color):
+    t_start = time.perf_counter()
+    collection.clear()
+    for geo in shapes:
+        collection.add(shape=geo, color='#000000FF', face_color=color, layer=0, tolerance=None)
+    collection.redraw()
+    return time.perf_counter() - t_start
+
+
+def buffers():
+    return collection._mesh_buffers[0].pos.copy(), collection._line_buffers[0].pos.copy()
+
+
+tessellation_cache.max_size = 0
+t_no_cache = plot('#BBF268BF')
+no_cache_buffers = buffers()
+
+tessellation_cache.max_size = 512 * 1024 * 1024
+t_first = plot('#BBF268BF')
+t_cached = plot('#FF000080')
+cached_buffers = buffers()
+
+# the cached buffers must make the same vertices
+assert all(np.array_equal(a, b) for a, b in zip(no_cache_buffers, cached_buffers))
+
+print("Shapes: %d, cached: %.1f MB, hits: %d, misses: %d" %
+      (nr_shapes, tessellation_cache.size / 1024 / 1024, tessellation_cache.hits, tessellation_cache.misses))
+print("Plot without cache: %.3f sec" % t_no_cache)
+print("First plot, filling the cache: %.3f sec" % t_first)
+print("Plot again with another color, from the cache: %.3f sec" % t_cached)
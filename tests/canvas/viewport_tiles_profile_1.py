@@ -0,0 +1,54 @@
+# This script measures the time needed by ShapeCollectionVisual to load the tiles of the view (R-tree query of the
+# shapes and writing their buffers) when zooming in and panning over a Gerber-like set of pads and traces, and the
+# number of shapes drawn for each view. Panning back to a cached tile does not query the R-tree again.
+# Run python viewport_tiles_profile_1.py [number_of_shapes]
+
+import sys
+import time
+
+from shapely.geometry import Point, LineString
+from vispy.gloo.context import FakeCanvas
+
+sys.path.append('../../')
+
+from appGUI.VisPyVisuals import ShapeCollectionVisual, tessellation_cache
+
+nr_shapes = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+shapes = []
+for i in range(nr_shapes):
+    x, y = (i % 400) * 2.54, (i // 400) * 2.54
+    if i % 2:
+        shapes.append(Point(x, y).buffer(0.6, resolution=8))
+    else:
+        shapes.append(LineString([(x, y), (x + 1.27, y + 1.27), (x + 2.54, y + 1.27)]).buffer(0.2, resolution=4))
+
+# the visuals need a GL context only to record the GL commands
+canvas = FakeCanvas()
+
+tessellation_cache.max_size = 0
+
+collection = ShapeCollectionVisual(layers=1, pool=None, tiles=True)
+
+t0 = time.perf_counter()
+for geo in shapes:
+    collection.add(shape=geo, color='#000000FF', face_color='#BBF268BF', layer=0, tolerance=None)
+collection.redraw()
+t1 = time.perf_counter()
+
+print("Shapes: %d" % nr_shapes)
+print("Plot: %.3f sec" % (t1 - t0))
+
+views = [
+    ('fit', (0, 0, 1016, nr_shapes / 400 * 2.54)),
+    ('zoom in', (100, 100, 150, 140)),
+    ('pan', (140, 100, 190, 140)),
+    ('pan', (180, 100, 230, 140)),
+    ('pan back', (100, 100, 150, 140)),
+    ('zoom out', (0, 0, 1016, nr_shapes / 400 * 2.54)),
+]
+for name, rect in views:
+    t_start = time.perf_counter()
+    collection.set_view(rect=rect)
+    print("%s %s: %.4f sec, shapes drawn: %d" %
+          (name, rect, time.perf_counter() - t_start, len(collection.data) - len(collection._undrawn)))
@@ -0,0 +1,59 @@
+# This script measures the time needed by ToolCopperThieving.grid_fill() to fill the copper free areas of a board
+# with dots, compared with making every dot of the grid and testing each one against every area.
+# Run python copper_thieving_speed_1.py [dot_diameter] [dot_spacing]
+
+import sys
+import time
+from types import SimpleNamespace
+
+from shapely.geometry import Point, LineString, MultiPolygon, box
+from shapely.ops import unary_union
+import shapely.affinity as affinity
+
+sys.path.append('../../')
+
+from appTools.ToolCopperThieving import ToolCopperThieving
+
+dot_dia = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+dot_spacing = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+
+# pads and traces with the clearance around them
+pads = [Point((i % 30) * 3.1, (i // 30) * 2.7).buffer(0.9) for i in range(600)]
+traces = [LineString([(0, j * 5.3), (90, j * 5.3 + 4)]).buffer(0.3) for j in range(10)]
+clearance = unary_union(pads + traces).buffer(0.5)
+bounding_box = box(-3, -3, 95, 60)
+regions = [geo for geo in bounding_box.difference(clearance).geoms if geo.area >= 0.1]
+x0, y0, x1, y1 = bounding_box.bounds
+
+# the grid_fill() method needs only the abort flag of the app and the other static methods
+tool = SimpleNamespace(app=SimpleNamespace(abort_flag=False),
+                       grid_positions=ToolCopperThieving.grid_positions,
+                       place_template=ToolCopperThieving.place_template)
+
+
+def each_dot():
+    radius = dot_dia / 2.0
+    dots = []
+    for new_x in ToolCopperThieving.grid_positions(x0 + radius, x1 - radius, dot_dia + dot_spacing):
+        for new_y in ToolCopperThieving.grid_positions(y0 + radius, y1 - radius, dot_dia + dot_spacing):
+            dots.append(Point((new_x, new_y)).buffer(radius, resolution=64))
+    dots_geo = MultiPolygon(dots)
+    dots_geo = affinity.translate(dots_geo, xoff=bounding_box.centroid.x - dots_geo.centroid.x,
+                                  yoff=bounding_box.centroid.y - dots_geo.centroid.y)
+    return [dot_geo for dot_geo in dots_geo.geoms for geo_t in regions if dot_geo.within(geo_t)]
+
+
+t0 = time.perf_counter()
+grid_dots = ToolCopperThieving.grid_fill(tool, Point((0, 0)).buffer(dot_dia / 2.0, resolution=64), dot_dia,
+                                         dot_spacing, (x0, y0, x1, y1), bounding_box.centroid, regions)
+t1 = time.perf_counter()
+single_dots = each_dot()
+t2 = time.perf_counter()
+
+# both ways must keep the same dots, in the same order
+assert len(grid_dots) == len(single_dots)
+assert all(a.centroid.distance(b.centroid) < 1e-6 for a, b in zip(grid_dots, single_dots))
+
+print("Areas: %d, dots: %d" % (len(regions), len(grid_dots)))
+print("Template grid fill: %.3f sec" % (t1 - t0))
+print("Each dot tested against each area: %.3f sec" % (t2 - t1))
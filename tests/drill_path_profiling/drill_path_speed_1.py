@@ -0,0 +1,72 @@
+# This script measures the time needed to order the drills of a 4 x 5 panel of boards (vias and rows of pins) with
+# the drill path optimizations of the CNCjob and reports the length of the travel between the drills.
+# The old nearest neighbour search, which compares each drill with all the drills left, is run only on the drills of
+# one board because it is too slow for the whole panel.
+# Run python drill_path_speed_1.py [number_of_drills] [search_time]
+
+import sys
+import math
+import time
+import logging
+
+import numpy as np
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from camlib import CNCjob
+from appPreProcessor import load_preprocessors
+from appCommon.PathOptimizer import path_length
+
+log = logging.getLogger('base')
+log.setLevel(logging.ERROR)
+
+app = app_stub(log=log, data_path='../../')
+app.preprocessors = load_preprocessors(app)
+CNCjob.app = app
+
+nr_drills = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+search_time = float(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+# one board of 80 x 60 mm: random vias and rows of pins at 2.54 mm
+rng = np.random.default_rng(0)
+per_board = nr_drills // 20
+vias = rng.random((per_board // 2, 2)) * [80, 60]
+pin_nr = np.arange(per_board - per_board // 2)
+pins = np.column_stack(((pin_nr % 25) * 2.54 + 10, (pin_nr // 25) * 2.54 % 55 + 2))
+board = np.concatenate((vias, pins))
+panel = np.concatenate([board + [col * 90, row * 70] for col in range(4) for row in range(5)])
+
+board_drills = [tuple(pt) for pt in board.tolist()]
+panel_drills = [tuple(pt) for pt in panel.tolist()]
+
+
+def old_travelling_salesman(points):
+    path = [points[0]]
+    must_visit = points[1:]
+    while must_visit:
+        nearest = min(must_visit, key=lambda x: math.hypot(path[-1][0] - x[0], path[-1][1] - x[1]))
+        path.append(nearest)
+        must_visit.remove(nearest)
+    return path
+
+
+def run(name, drills, func):
+    t_start = time.perf_counter()
+    ordered = func(drills)
+    duration = time.perf_counter() - t_start
+    if ordered and not isinstance(ordered[0], tuple):
+        ordered = [drills[idx] for idx in ordered]
+    assert sorted(ordered) == sorted(drills)
+    print("%-40s drills: %6d, length: %10.1f mm, time: %7.3f sec" %
+          (name, len(drills), path_length(ordered, range(len(ordered))), duration))
+
+
+cnc = CNCjob()
+
+run("Old nearest neighbour, one board", board_drills, old_travelling_salesman)
+run("TSA, one board", board_drills, lambda pts: cnc.optimized_travelling_salesman(pts, opt_time=search_time))
+run("OR-tools Basic, one board", board_drills, lambda pts: cnc.optimized_ortools_basic(pts, opt_time=search_time))
+run("OR-tools Metaheuristic, one board", board_drills, lambda pts: cnc.optimized_ortools_meta(pts, opt_time=search_time))
+run("TSA, panel", panel_drills, lambda pts: cnc.optimized_travelling_salesman(pts, opt_time=search_time))
+run("OR-tools Metaheuristic, panel", panel_drills, lambda pts: cnc.optimized_ortools_meta(pts, opt_time=search_time))
@@ -0,0 +1,54 @@
+# This script measures the time needed by ExclusionAreas.travel_coordinates() to check the travels of a drilling job
+# (a grid of holes drilled row by row) against 40 exclusion areas, half of them avoided by going around them and half
+# by going over them.
+# Run python travel_coordinates_speed_1.py [number_of_travels]
+
+import sys
+import time
+import logging
+
+import numpy as np
+from shapely.geometry import Point, box
+
+sys.path.append('../../')
+
+from appCommon.Common import ExclusionAreas
+from tests.app_stub import app_stub
+
+log = logging.getLogger('base')
+log.setLevel(logging.ERROR)
+
+app = app_stub(log=log, plotcanvas=None)
+
+nr_travels = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+exc_areas = ExclusionAreas(app)
+rng = np.random.default_rng(0)
+for i in range(40):
+    x, y = rng.random(2) * 250
+    if i % 4 == 0:
+        shape = Point(x, y).buffer(rng.random() * 5 + 2, resolution=4)
+    else:
+        shape = box(x, y, x + rng.random() * 10 + 2, y + rng.random() * 10 + 2)
+    exc_areas.exclusion_areas_storage.append({
+        "obj_type": "excellon",
+        "shape": shape,
+        "strategy": "around" if i % 2 else "over",
+        "overz": 5.0
+    })
+
+# holes at 0.8 mm pitch, row by row
+side = int(np.sqrt(nr_travels)) + 1
+holes = [((i % side) * 250.0 / side, (i // side) * 250.0 / side) for i in range(nr_travels + 1)]
+
+t_start = time.perf_counter()
+rerouted = 0
+for start_pt, end_pt in zip(holes[:-1], holes[1:]):
+    travels = exc_areas.travel_coordinates(start_point=start_pt, end_point=end_pt, tooldia=0.8)
+    if len(travels) > 1:
+        rerouted += 1
+t_end = time.perf_counter()
+
+print("Travels: %d, exclusion areas: %d, rerouted travels: %d" %
+      (nr_travels, len(exc_areas.exclusion_areas_storage), rerouted))
+print("Travel coordinates: %.3f sec" % (t_end - t_start))
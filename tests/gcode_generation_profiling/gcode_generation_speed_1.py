@@ -0,0 +1,73 @@
+# This script measures the time needed by CNCjob.generate_from_geometry_2() to make the G-Code for an isolation-like
+# job, with the runs of linear moves formatted in bulk from the preprocessor template and with each move made by the
+# preprocessor linear_code().
+# Run python gcode_generation_speed_1.py [number_of_paths] [preprocessor_name]
+
+import sys
+import time
+import logging
+from types import SimpleNamespace
+
+from shapely.geometry import Point, LineString
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from camlib import CNCjob
+from appPreProcessor import load_preprocessors
+from appCommon.Common import ExclusionAreas
+
+log = logging.getLogger('base')
+log.setLevel(logging.ERROR)
+
+app = app_stub(log=log, data_path='../../')
+app.preprocessors = load_preprocessors(app)
+app.exc_areas = ExclusionAreas(app)
+CNCjob.app = app
+
+nr_paths = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+pp_name = sys.argv[2] if len(sys.argv) > 2 else 'default'
+
+# pads outlines and short traces
+paths = []
+for i in range(nr_paths):
+    x, y = (i % 100) * 2.54, (i // 100) * 2.54
+    if i % 3 == 2:
+        paths.append(LineString([(x, y), (x + 1.27, y + 1.27), (x + 2.54, y + 1.27)]))
+    else:
+        paths.append(Point(x, y).buffer(0.8, resolution=16).exterior)
+geometry = SimpleNamespace(solid_geometry=paths, options={'name': 'geometry'})
+
+
+# the same preprocessor without the template for the linear moves
+class PerMove(type(app.preprocessors[pp_name])):
+    def linear_template(self, p):
+        return None
+
+
+def generate(name):
+    cnc = CNCjob(steps_per_circle=16)
+    cnc.coords_decimals = 4
+    cnc.fr_decimals = 2
+    cnc.options = {'name': 'job', 'type': 'Geometry', 'tool_dia': 0.1, 'xmin': 0, 'ymin': 0, 'xmax': 254, 'ymax': 254}
+    cnc.segx = cnc.segy = 0
+    cnc.z_pdepth = -1.0
+    cnc.feedrate_probe = 10.0
+
+    t_start = time.perf_counter()
+    gcode, start_gcode = cnc.generate_from_geometry_2(geometry, tooldia=0.1, z_cut=-0.1, z_move=2.0, feedrate=100,
+                                                      feedrate_z=50, feedrate_rapid=1000, spindlespeed=1000,
+                                                      extracut=True, extracut_length=0.2, multidepth=True,
+                                                      depthpercut=0.04, pp_geometry_name=name, is_first=True)
+    return start_gcode + gcode, time.perf_counter() - t_start
+
+
+gc_template, t_template = generate(pp_name)
+gc_per_move, t_per_move = generate('PerMove')
+
+# both ways must make the same G-Code; only the preprocessor name from the header is different
+assert gc_template == gc_per_move.replace('Preprocessor Geometry: PerMove', 'Preprocessor Geometry: %s' % pp_name)
+
+print("Paths: %d, G-Code lines: %d, preprocessor: %s" % (nr_paths, gc_template.count('\n'), pp_name))
+print("Generate, bulk formatted linear moves: %.3f sec" % t_template)
+print("Generate, linear moves made one by one: %.3f sec" % t_per_move)
@@ -0,0 +1,50 @@
+# This script measures the time needed by CNCjob.gcode_parse() to parse a G-Code program and create the tool paths
+# and compares it with the line by line parsing of the program with CNCjob.codes_split().
+# Run python gcode_parsing_speed_1.py [gcode_file | number_of_lines]
+
+import sys
+import time
+import random
+import logging
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from camlib import CNCjob
+
+log = logging.getLogger('base')
+log.setLevel(logging.ERROR)
+
+CNCjob.app = app_stub(preprocessors={'default': None})
+
+arg = sys.argv[1] if len(sys.argv) > 1 else '1000000'
+if arg.isdigit():
+    # a milling job: travel, plunge, a zig-zag cut with arcs and retract
+    random.seed(0)
+    lines = ["G21", "G90", "G94", "G01 F120.00", "G00 Z2.0000"]
+    while len(lines) < int(arg):
+        x, y = random.uniform(0, 100), random.uniform(0, 100)
+        lines += ["G00 X%.4f Y%.4f" % (x, y), "G01 Z-0.1000"]
+        for j in range(8):
+            lines.append("G01 X%.4f Y%.4f" % (x + 0.5 * j, y + 0.3 * (j % 2)))
+        lines += ["G02 X%.4f Y%.4f I0.5000 J0.0000" % (x + 4.5, y), "G00 Z2.0000"]
+    gcode = '\n'.join(lines)
+else:
+    with open(arg) as f:
+        gcode = f.read()
+
+cnc = CNCjob(steps_per_circle=16)
+cnc.origin_kind = 'geometry'
+cnc.toolchange_xy_type = 'geometry'
+cnc.gcode = gcode
+
+t0 = time.perf_counter()
+for gline in gcode.splitlines():
+    cnc.codes_split(gline)
+t1 = time.perf_counter()
+geometry = cnc.gcode_parse()
+t2 = time.perf_counter()
+
+print("Lines: %d, paths: %d" % (gcode.count('\n') + 1, len(geometry)))
+print("Line by line codes split: %.3f sec" % (t1 - t0))
+print("Parse and create the tool paths: %.3f sec" % (t2 - t1))
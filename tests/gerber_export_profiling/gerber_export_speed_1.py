@@ -0,0 +1,73 @@
+# This script measures the time needed to write the Gerber code of a panelized copper layer (regions made of many
+# vertices) with GerberWriter, which formats the coordinates in bulk and writes them in chunks, and with the coordinates
+# formatted one by one and added to a single string, as GerberObject.export_gerber() did before.
+# Run python gerber_export_speed_1.py [number_of_regions]
+
+import os
+import sys
+import time
+import tempfile
+
+from shapely.geometry import Point
+
+sys.path.append('../../')
+
+from appCommon.GerberWriter import GerberWriter
+
+nr_regions = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+whole, fract = 2, 4
+
+# pads with 65 vertices each
+regions = [Point((i % 200) * 2.54 + 1, (i // 200) * 2.54 + 1).buffer(0.8, resolution=16) for i in range(nr_regions)]
+nr_vertices = sum(len(poly.exterior.coords) for poly in regions)
+
+
+def lz_format(x, y):
+    x_form = "{:.{dec}f}".format(x, dec=fract).replace('.', '')
+    y_form = "{:.{dec}f}".format(y, dec=fract).replace('.', '')
+    return x_form, y_form
+
+
+def per_point():
+    gerber_code = ''
+    for poly in regions:
+        gerber_code += 'G36*\n'
+        geo_coords = list(poly.exterior.coords)
+        x_formatted, y_formatted = lz_format(geo_coords[0][0], geo_coords[0][1])
+        gerber_code += "X{xform}Y{yform}D02*\n".format(xform=x_formatted, yform=y_formatted)
+        for coord in geo_coords[1:]:
+            x_formatted, y_formatted = lz_format(coord[0], coord[1])
+            gerber_code += "X{xform}Y{yform}D01*\n".format(xform=x_formatted, yform=y_formatted)
+        gerber_code += 'D02*\n'
+        gerber_code += 'G37*\n'
+    with open(path_per_point, 'w') as fp:
+        fp.write(gerber_code)
+
+
+def bulk():
+    with open(path_bulk, 'w') as fp:
+        writer = GerberWriter(fp, whole, fract, zeros='L')
+        for poly in regions:
+            writer.write('G36*\n')
+            writer.path(poly.exterior.coords)
+            writer.write('D02*\nG37*\n')
+        writer.flush()
+
+
+with tempfile.TemporaryDirectory() as folder:
+    path_per_point = os.path.join(folder, 'per_point.gbr')
+    path_bulk = os.path.join(folder, 'bulk.gbr')
+
+    t0 = time.perf_counter()
+    per_point()
+    t1 = time.perf_counter()
+    bulk()
+    t2 = time.perf_counter()
+
+    with open(path_per_point) as f_per_point, open(path_bulk) as f_bulk:
+        assert f_per_point.read() == f_bulk.read()
+    size = os.path.getsize(path_bulk)
+
+print("Regions: %d, vertices: %d, file size: %.1f MB" % (nr_regions, nr_vertices, size / 1e6))
+print("Write, coordinates formatted one by one: %.3f sec" % (t1 - t0))
+print("Write, GerberWriter: %.3f sec" % (t2 - t1))
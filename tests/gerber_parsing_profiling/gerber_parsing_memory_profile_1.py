@@ -0,0 +1,31 @@
+# This script measures the parse time and the peak memory used by Gerber.parse_file().
+# Run python gerber_parsing_memory_profile_1.py [gerber_file]
+
+import sys
+import time
+import tracemalloc
+import logging
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from appParsers.ParseGerber import Gerber
+
+log = logging.getLogger('base')
+log.setLevel(logging.WARNING)
+
+Gerber.app = app_stub()
+
+filename = sys.argv[1] if len(sys.argv) > 1 else "gerber1.gbr"
+
+g = Gerber()
+tracemalloc.start()
+t0 = time.perf_counter()
+g.parse_file(filename)
+t1 = time.perf_counter()
+current, peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
+print("File: %s, source size: %d chars" % (filename, len(g.source_file)))
+print("Parse time: %.3f sec" % (t1 - t0))
+print("Peak memory: %.2f MB" % (peak / 1048576))
@@ -0,0 +1,43 @@
+# This script measures the Gerber.parse_lines() throughput, in lines per second, for the Gerber files in
+# tests/gerber_files and for the files given as arguments.
+# Run python gerber_parsing_speed_1.py [gerber_file ...]
+
+import os
+import sys
+import glob
+import time
+import logging
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from appParsers.ParseGerber import Gerber, gerber_statements
+
+log = logging.getLogger('base')
+log.setLevel(logging.ERROR)
+
+Gerber.app = app_stub()
+
+files = sys.argv[1:] if len(sys.argv) > 1 else sorted(glob.glob('../gerber_files/*') + ['gerber1.gbr'])
+repeats = 3
+
+total_lines = 0
+total_time = 0.0
+for filename in files:
+    with open(filename, 'r') as f:
+        lines = list(gerber_statements(f))
+
+    best = None
+    for __ in range(repeats):
+        g = Gerber()
+        t0 = time.perf_counter()
+        g.parse_lines(lines)
+        duration = time.perf_counter() - t0
+        best = duration if best is None else min(best, duration)
+
+    total_lines += len(lines)
+    total_time += best
+    print("%-30s %8d lines %10.4f sec %12.0f lines/sec" % (os.path.basename(filename), len(lines), best,
+                                                            len(lines) / best))
+
+print("%-30s %8d lines %10.4f sec %12.0f lines/sec" % ('TOTAL', total_lines, total_time, total_lines / total_time))
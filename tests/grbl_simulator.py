@@ -0,0 +1,136 @@
+# A GRBL controller simulated on a pseudo-terminal, for the tests of the G-Code streaming. It has the 128 bytes serial
+# receive buffer and the planner buffer of GRBL: a line is parsed and answered with 'ok' when there is room for it in
+# the planner buffer and the planner executes one line every line_time seconds, so the receive buffer fills up when
+# the host sends faster than the machine moves. Only on POSIX systems (pty).
+
+import os
+import re
+import pty
+import time
+import select
+import threading
+from collections import deque
+
+REALTIME_COMMANDS = b'!~?\x18'
+
+
+class GrblSimulator:
+
+    def __init__(self, rx_buffer_size=128, planner_size=16, line_time=0.0, latency=0.0, error_words=(),
+                 probe_height=None):
+        """
+
+        :param rx_buffer_size:  the size of the serial receive buffer
+        :param planner_size:    the number of lines in the planner buffer
+        :param line_time:       the time needed to execute a line, in seconds
+        :param latency:         the time between the parsing of a line and the arrival of its answer at the host
+        :param error_words:     the lines that have one of these words are answered with 'error:20'
+        :param probe_height:    function of (x, y) that returns the Z found by the probing (G38.2) lines
+        """
+        self.rx_buffer_size = rx_buffer_size
+        self.planner_size = planner_size
+        self.line_time = line_time
+        self.latency = latency
+        self.error_words = error_words
+        self.probe_height = probe_height
+
+        self.master, self.slave = pty.openpty()
+        self.port_name = os.ttyname(self.slave)
+
+        # what the simulator got: the lines in order, the real time commands, the maximum receive buffer fill
+        self.received_lines = []
+        self.realtime = []
+        self.max_rx_bytes = 0
+        self.executed = 0
+        self.hold = False
+
+        self.position = {'X': 0.0, 'Y': 0.0, 'Z': 0.0}
+        self.word_re = re.compile(r'([XYZ])([+-]?\d*\.?\d+)')
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    @property
+    def overflow(self):
+        return self.max_rx_bytes > self.rx_buffer_size
+
+    def answer(self, line):
+        if any(word in line for word in self.error_words):
+            return b'error:20\r\n'
+
+        for axis, value in self.word_re.findall(line):
+            self.position[axis] = float(value)
+
+        if 'G38.2' in line and self.probe_height is not None:
+            self.position['Z'] = self.probe_height(self.position['X'], self.position['Y'])
+            return ('[PRB:%.3f,%.3f,%.3f:1]\r\nok\r\n' % (self.position['X'], self.position['Y'],
+                                                          self.position['Z'])).encode('ascii')
+        return b'ok\r\n'
+
+    def run(self):
+        rx = bytearray()
+        planner = deque()
+        replies = deque()
+        t_done = None
+
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self.master], [], [], 0.0005)
+            if readable:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    break
+                for char in data:
+                    if char not in REALTIME_COMMANDS:
+                        rx.append(char)
+                        continue
+
+                    self.realtime.append(bytes([char]))
+                    if char == ord('!'):
+                        self.hold = True
+                    elif char == ord('~'):
+                        self.hold = False
+                    elif char == ord('?'):
+                        state = 'Hold:0' if self.hold else ('Run' if planner else 'Idle')
+                        replies.append((time.perf_counter(), ('<%s|MPos:%.3f,%.3f,%.3f|FS:0,0>\r\n' % (
+                            state, self.position['X'], self.position['Y'], self.position['Z'])).encode('ascii')))
+                    else:
+                        rx.clear()
+                        planner.clear()
+                        replies.clear()
+                        self.hold = False
+                        replies.append((time.perf_counter(), b"\r\nGrbl 1.1h ['$' for help]\r\n"))
+                self.max_rx_bytes = max(self.max_rx_bytes, len(rx))
+
+            now = time.perf_counter()
+
+            # the lines are parsed when there is room for them in the planner buffer
+            while len(planner) < self.planner_size and b'\n' in rx:
+                end = rx.index(b'\n')
+                line = rx[:end].decode('ascii').strip()
+                del rx[:end + 1]
+                self.received_lines.append(line)
+                replies.append((now + self.latency, self.answer(line)))
+                planner.append(line)
+
+            # the planner executes the lines, unless the machine is in feed hold
+            if planner and not self.hold:
+                if t_done is None:
+                    t_done = now + self.line_time
+                if now >= t_done:
+                    planner.popleft()
+                    self.executed += 1
+                    t_done = None
+
+            while replies and replies[0][0] <= now:
+                os.write(self.master, replies.popleft()[1])
@@ -0,0 +1,57 @@
+# This script measures the time needed to send a job of short moves to the GRBL simulator (tests/grbl_simulator.py)
+# one line at a time, waiting for the answer of each line, and with the GrblStreamer, which keeps the receive buffer
+# of the controller full. The simulator answers each line after the given latency and executes a line in line_time.
+# Only on POSIX systems.
+# Run python grbl_streaming_speed_1.py [number_of_lines] [latency_ms] [line_time_ms]
+
+import sys
+import time
+
+import serial
+
+sys.path.append('../../')
+
+from appCommon.GrblStreamer import GrblStreamer
+from tests.grbl_simulator import GrblSimulator
+
+nr_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.004
+line_time = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.001
+
+gcode = '\n'.join('G01 X%.4f Y%.4f' % (i * 0.01, (i % 20) * 0.01) for i in range(nr_lines))
+
+
+def send_and_wait(port, lines):
+    for line in lines:
+        port.write((line + '\n').encode('ascii'))
+        answer = b''
+        while not answer.endswith(b'\n'):
+            answer += port.readline()
+
+
+def run(name, send):
+    simulator = GrblSimulator(line_time=line_time, latency=latency).start()
+    port = serial.Serial(simulator.port_name, 115200, timeout=0.05)
+
+    t_start = time.perf_counter()
+    send(port)
+    # the end of the job is the end of the motion
+    while simulator.executed < nr_lines:
+        time.sleep(0.0005)
+    t_job = time.perf_counter() - t_start
+
+    port.close()
+    simulator.stop()
+    print("%s: %d lines in %.3f sec, %.0f lines/sec, receive buffer max %d bytes" %
+          (name, nr_lines, t_job, nr_lines / t_job, simulator.max_rx_bytes))
+
+
+def stream(port):
+    streamer = GrblStreamer(port, gcode)
+    streamer.start()
+    streamer.wait()
+
+
+print("Latency: %.1f ms, line execution time: %.1f ms" % (latency * 1000, line_time * 1000))
+run("Send and wait", lambda port: send_and_wait(port, gcode.splitlines()))
+run("Streaming", stream)
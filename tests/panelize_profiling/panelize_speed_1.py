@@ -0,0 +1,138 @@
+# This script measures the time and the memory needed to panelize a Gerber object and to plot the panel: once like
+# the Panelize Tool did before, with one shapely.affinity.translate() call for each geometry of each instance and with
+# a copy of the apertures, and once with a panel that shares the source geometry (camlib.Geometry.set_panel()) and is
+# plotted by drawing the source shapes at the offsets of the instances. The time needed to expand the panel (when the
+# geometry of the instances is needed by the G-Code generation or by the export) is measured too.
+# Run python panelize_speed_1.py [number_of_pads] [rows] [columns]
+
+import sys
+import time
+import logging
+import tracemalloc
+from copy import deepcopy
+
+from shapely.geometry import Point, LineString
+import shapely.affinity as affinity
+from vispy.gloo.context import FakeCanvas
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from appParsers.ParseGerber import Gerber
+from appCommon.Panel import Panel
+from appGUI.VisPyVisuals import ShapeCollectionVisual
+
+logging.getLogger('base').setLevel(logging.ERROR)
+logging.getLogger('base2').setLevel(logging.ERROR)
+
+nr_pads = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+rows = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+columns = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+Gerber.app = app_stub()
+
+# round pads with 65 vertices and the tracks between them, stored in the apertures, too
+source = Gerber()
+solid_geometry, follow_geometry = [], []
+source.apertures = {'10': {'type': 'C', 'size': 1.6, 'geometry': []}, '11': {'type': 'C', 'size': 0.3, 'geometry': []}}
+for i in range(nr_pads):
+    center = Point((i % 100) * 2.54, (i // 100) * 2.54)
+    pad = center.buffer(0.8, resolution=16)
+    track = LineString([(center.x, center.y), (center.x + 2.54, center.y)])
+    source.apertures['10']['geometry'].append({'solid': pad, 'follow': center})
+    source.apertures['11']['geometry'].append({'solid': track.buffer(0.15), 'follow': track})
+    solid_geometry.append(pad)
+    follow_geometry.append(center)
+source.solid_geometry = solid_geometry
+source.follow_geometry = follow_geometry
+
+xmin, ymin, xmax, ymax = source.bounds()
+step_x, step_y = xmax - xmin + 2.0, ymax - ymin + 2.0
+
+
+def panelize_copies():
+    # the Panelize Tool before: every geometry of every instance is translated and stored
+    panel_obj = Gerber()
+    panel_obj.apertures = {ap: deepcopy(ap_dict) for ap, ap_dict in source.apertures.items()}
+    for ap in panel_obj.apertures:
+        panel_obj.apertures[ap]['geometry'] = []
+    panel_solid = []
+    current_y = 0.0
+    for row in range(rows):
+        current_x = 0.0
+        for col in range(columns):
+            for geo in source.solid_geometry:
+                panel_solid.append(affinity.translate(geo, xoff=current_x, yoff=current_y))
+            for ap in source.apertures:
+                for el in source.apertures[ap]['geometry']:
+                    new_el = {key: affinity.translate(geo, xoff=current_x, yoff=current_y) for key, geo in el.items()}
+                    panel_obj.apertures[ap]['geometry'].append(new_el)
+            current_x += step_x
+        current_y += step_y
+    panel_obj.solid_geometry = panel_solid
+    return panel_obj
+
+
+def panelize_instances():
+    panel_obj = Gerber()
+    panel_obj.set_panel(Panel.grid(rows, columns, step_x, step_y, source.bounds()), source)
+    return panel_obj
+
+
+def measure(function):
+    # the memory is measured in a second run because tracing the memory slows down the run
+    t_start = time.perf_counter()
+    result = function()
+    duration = time.perf_counter() - t_start
+
+    tracemalloc.start()
+    __ = function()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, duration, memory
+
+
+# the visuals need a GL context only to record the GL commands
+canvas = FakeCanvas()
+collection = ShapeCollectionVisual(layers=1, pool=None)
+
+
+def plot(panel_obj):
+    # like GerberObject.plot(): the shapes of a pending panel are drawn at the offsets of the instances
+    t_start = time.perf_counter()
+    collection.clear()
+    geometry, offsets = panel_obj.panel_geometry('solid_geometry')
+    for geo in geometry:
+        collection.add(shape=geo, color='#000000FF', face_color='#BBF268BF', layer=0, tolerance=None,
+                       offsets=offsets)
+    collection.redraw()
+    return time.perf_counter() - t_start
+
+
+copies, t_copies, mem_copies = measure(panelize_copies)
+instanced, t_instanced, mem_instanced = measure(panelize_instances)
+
+# the source object was plotted before it was panelized so its shapes are in the tessellation cache
+plot(source)
+t_plot_copies = plot(copies)
+t_plot_instanced = plot(instanced)
+assert instanced.panel is not None
+assert instanced.bounds() == copies.bounds()
+
+t_start = time.perf_counter()
+instanced.materialize_panel()
+t_expand = time.perf_counter() - t_start
+
+# the expanded panel has the same geometry as the copies
+assert all(a.equals_exact(b, 1e-9) for a, b in zip(instanced.solid_geometry, copies.solid_geometry))
+assert all(a['solid'].equals_exact(b['solid'], 1e-9) for a, b in zip(instanced.apertures['11']['geometry'],
+                                                                    copies.apertures['11']['geometry']))
+
+print("Pads: %d, panel: %d x %d, geometries in the panel: %d" %
+      (nr_pads, rows, columns, len(copies.solid_geometry) + sum(len(ap['geometry'])
+                                                                for ap in copies.apertures.values())))
+print("Panelize with copies: %.3f sec, %.1f MB" % (t_copies, mem_copies / 1024 / 1024))
+print("Panelize with instances: %.4f sec, %.2f MB" % (t_instanced, mem_instanced / 1024 / 1024))
+print("Plot the copies: %.3f sec" % t_plot_copies)
+print("Plot the instances: %.3f sec" % t_plot_instanced)
+print("Expand the instances: %.3f sec" % t_expand)
@@ -0,0 +1,80 @@
+# This script compares the save time, the open time and the file size of a project saved as LZMA compressed JSON
+# (the old project format) and of the same project saved as a project archive (appCommon.ProjectArchive).
+# Run python project_save_open_profile_1.py [gerber_file] [copies]
+
+import os
+import sys
+import time
+import lzma
+import tempfile
+import logging
+
+import simplejson as json
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from appParsers.ParseGerber import Gerber
+from camlib import to_dict, dict2obj
+from appCommon.ProjectArchive import write_project_archive, ProjectArchiveReader
+
+log = logging.getLogger('base')
+log.setLevel(logging.WARNING)
+
+Gerber.app = app_stub()
+
+filename = sys.argv[1] if len(sys.argv) > 1 else "../gerber_parsing_profiling/gerber1.gbr"
+copies = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+g = Gerber()
+g.parse_file(filename)
+g.create_geometry()
+
+objs = []
+for nr in range(copies):
+    obj_dict = g.to_dict()
+    obj_dict['kind'] = 'gerber'
+    obj_dict['options'] = {'name': 'gerber_%d' % nr}
+    objs.append(obj_dict)
+
+project = {
+    "objs": objs,
+    "options": {'units': 'MM'},
+    "version": 8.994
+}
+
+tmp_dir = tempfile.mkdtemp()
+json_file = os.path.join(tmp_dir, 'project_json.FlatPrj')
+archive_file = os.path.join(tmp_dir, 'project_archive.FlatPrj')
+
+# old format: LZMA compressed JSON
+t0 = time.perf_counter()
+with lzma.open(json_file, "w", preset=3) as f:
+    f.write(json.dumps(project, default=to_dict, indent=2, sort_keys=True).encode('utf-8'))
+t1 = time.perf_counter()
+with lzma.open(json_file) as f:
+    old_d = json.loads(f.read().decode('utf-8'), object_hook=dict2obj)
+t2 = time.perf_counter()
+
+# project archive
+t3 = time.perf_counter()
+write_project_archive(archive_file, objs=iter(objs), options=project['options'], version=project['version'],
+                      compressed=True, compression_level=3)
+t4 = time.perf_counter()
+with ProjectArchiveReader(archive_file) as reader:
+    new_objs = list(reader.objects())
+t5 = time.perf_counter()
+
+# both formats must restore the same objects
+for old_obj, new_obj in zip(old_d['objs'], new_objs):
+    assert json.dumps(old_obj, default=to_dict, sort_keys=True) == json.dumps(new_obj, default=to_dict, sort_keys=True)
+
+print("File: %s, %d objects" % (filename, copies))
+print("LZMA JSON:       save %.3f sec, open %.3f sec, size %.2f MB" %
+      (t1 - t0, t2 - t1, os.path.getsize(json_file) / 1048576))
+print("Project archive: save %.3f sec, open %.3f sec, size %.2f MB" %
+      (t4 - t3, t5 - t4, os.path.getsize(archive_file) / 1048576))
+
+os.remove(json_file)
+os.remove(archive_file)
+os.rmdir(tmp_dir)
@@ -0,0 +1,79 @@
+# This script compares the indexed clearance check used by the Rules Check Tool with the check of every pair of
+# polygons, on a synthetic board made out of pads.
+# Run python drc_clearance_profile_1.py [number_of_pads]
+
+import sys
+import time
+import random
+
+sys.path.append('../../')
+
+from shapely.geometry import box, Point
+from shapely.ops import nearest_points
+
+from appTools.ToolRulesCheck import RulesCheck
+
+
+def make_board(nr_pads, pitch=1.27, seed=5):
+    """
+    A grid of rectangular and round pads with a small random jitter so some of them violate the clearance.
+    """
+    random.seed(seed)
+    cols = int(nr_pads ** 0.5) + 1
+    pads = []
+    for i in range(nr_pads):
+        x = (i % cols) * pitch + random.uniform(-0.05, 0.05)
+        y = (i // cols) * pitch + random.uniform(-0.05, 0.05)
+        if i % 2:
+            pads.append(box(x - 0.5, y - 0.5, x + 0.5, y + 0.5))
+        else:
+            pads.append(Point(x, y).buffer(0.5, 16))
+    return pads
+
+
+def check_all_pairs(geo_list, size):
+    min_dict = {}
+    idx = 1
+    for geo in geo_list:
+        for s_geo in geo_list[idx:]:
+            dist = geo.distance(s_geo)
+            if float(dist) < float(size):
+                loc_1, loc_2 = nearest_points(geo, s_geo)
+
+                dx = loc_1.x - loc_2.x
+                dy = loc_1.y - loc_2.y
+                loc = min(loc_1.x, loc_2.x) + (abs(dx) / 2), min(loc_1.y, loc_2.y) + (abs(dy) / 2)
+
+                if dist in min_dict:
+                    min_dict[dist].append(loc)
+                else:
+                    min_dict[dist] = [loc]
+        idx += 1
+    return min_dict
+
+
+clearance = 0.3
+nr_pads = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+# checking every pair is quadratic so it is done on a smaller board and the result is compared
+nr_pads_all_pairs = min(nr_pads, 1500)
+
+board = make_board(nr_pads_all_pairs)
+t0 = time.perf_counter()
+res_all = check_all_pairs(board, clearance)
+t_all = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+res_indexed = RulesCheck.find_clearance_violations(board, board, clearance, same_list=True)
+t_indexed = time.perf_counter() - t0
+
+print("%d pads. All pairs: %.3f sec. Indexed: %.3f sec. Same result: %s. Violations: %d" % (
+    nr_pads_all_pairs, t_all, t_indexed, res_all == res_indexed, sum(len(v) for v in res_indexed.values())))
+
+board = make_board(nr_pads)
+t0 = time.perf_counter()
+res_indexed = RulesCheck.find_clearance_violations(board, board, clearance, same_list=True)
+t_indexed = time.perf_counter() - t0
+estimated = t_all * (nr_pads * (nr_pads - 1)) / (nr_pads_all_pairs * (nr_pads_all_pairs - 1))
+
+print("%d pads. All pairs (estimated): %.1f sec. Indexed: %.3f sec. Violations: %d" % (
+    nr_pads, estimated, t_indexed, sum(len(v) for v in res_indexed.values())))
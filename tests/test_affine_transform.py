@@ -0,0 +1,87 @@
+import unittest
+
+from shapely.geometry import Point, LineString, MultiPolygon, Polygon
+import shapely.affinity as affinity
+
+from appCommon import AffineTransform
+from appCommon.AffineTransform import transform_geometry, compose, scale_matrix, translate_matrix, mirror_matrix, \
+    rotate_matrix, skew_matrix
+
+
+class AffineTransformTest(unittest.TestCase):
+
+    def setUp(self):
+        square = Polygon([(0, 0), (4, 0), (4, 3), (0, 3)], [[(1, 1), (2, 1), (2, 2), (1, 2)]])
+        self.geometry = [square, LineString([(0, 0), (3, 5), (7, 1)]), Point(2, 3),
+                         MultiPolygon([square, affinity.translate(square, 10, 0)])]
+
+    def assert_same(self, geos, expected):
+        self.assertEqual(len(geos), len(expected))
+        for geo, exp in zip(geos, expected):
+            self.assertEqual(geo.geom_type, exp.geom_type)
+            self.assertTrue(geo.equals_exact(exp, 1e-9))
+
+    def test_same_as_affinity(self):
+        cases = [
+            (scale_matrix(2, -3, (1, 2)), lambda g: affinity.scale(g, 2, -3, origin=(1, 2))),
+            (translate_matrix(5, -1), lambda g: affinity.translate(g, 5, -1)),
+            (mirror_matrix('X', (1, 2)), lambda g: affinity.scale(g, 1, -1, origin=(1, 2))),
+            (mirror_matrix('Y', (1, 2)), lambda g: affinity.scale(g, -1, 1, origin=(1, 2))),
+            (rotate_matrix(33, (4, -2)), lambda g: affinity.rotate(g, 33, origin=(4, -2))),
+            (skew_matrix(15, -20, (3, 3)), lambda g: affinity.skew(g, 15, -20, origin=(3, 3))),
+        ]
+        for matrix, reference in cases:
+            self.assert_same(transform_geometry(self.geometry, matrix), [reference(g) for g in self.geometry])
+
+    def test_compose(self):
+        matrix = compose(translate_matrix(5, 0), rotate_matrix(90, (0, 0)), scale_matrix(2, 2))
+        expected = [affinity.scale(affinity.rotate(affinity.translate(g, 5, 0), 90, origin=(0, 0)), 2, 2,
+                                   origin=(0, 0)) for g in self.geometry]
+        self.assert_same(transform_geometry(self.geometry, matrix), expected)
+
+    def test_structure(self):
+        # the Excellon slots are tuples and the Gerber apertures geometry is a list of dicts
+        structure = {
+            '10': {'drills': [Point(1, 1)], 'slots': [(Point(0, 0), Point(2, 0))], 'size': 0.8},
+            '11': [{'solid': self.geometry[0], 'follow': self.geometry[1]}, None, [[Point(3, 3)]]]
+        }
+        result = transform_geometry(structure, translate_matrix(1, 1))
+
+        self.assertEqual(result['10']['size'], 0.8)
+        self.assertIsInstance(result['10']['slots'][0], tuple)
+        self.assertTrue(result['10']['slots'][0][1].equals(Point(3, 1)))
+        self.assertTrue(result['10']['drills'][0].equals(Point(2, 2)))
+        self.assertIsNone(result['11'][1])
+        self.assertTrue(result['11'][2][0][0].equals(Point(4, 4)))
+        self.assertTrue(result['11'][0]['solid'].equals(affinity.translate(self.geometry[0], 1, 1)))
+
+        # the source structure is not changed
+        self.assertTrue(structure['10']['drills'][0].equals(Point(1, 1)))
+
+    @unittest.skipIf(AffineTransform.shapely_transform is None, "the bulk transform needs Shapely 2")
+    def test_bulk_same_as_fallback(self):
+        # the shapely.transform() path of Shapely 2 gives the same geometry as one affine_transform() for each geometry
+        matrix = compose(rotate_matrix(30, (1, 1)), skew_matrix(10, 5), translate_matrix(-3, 2))
+        structure = [self.geometry, {'drills': [Point(1, 1)], 'slots': [(Point(0, 0), Point(2, 0))]}, None, 0.5]
+        bulk = transform_geometry(structure, matrix)
+
+        shapely_transform = AffineTransform.shapely_transform
+        AffineTransform.shapely_transform = None
+        try:
+            fallback = transform_geometry(structure, matrix)
+        finally:
+            AffineTransform.shapely_transform = shapely_transform
+
+        self.assert_same(bulk[0], fallback[0])
+        self.assert_same(bulk[1]['drills'] + list(bulk[1]['slots'][0]),
+                         fallback[1]['drills'] + list(fallback[1]['slots'][0]))
+        self.assertIsInstance(bulk[1]['slots'][0], tuple)
+        self.assertEqual(bulk[2:], [None, 0.5])
+
+    def test_empty(self):
+        self.assertEqual(transform_geometry([], translate_matrix(1, 1)), [])
+        self.assertTrue(transform_geometry(Polygon(), translate_matrix(1, 1)).is_empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from io import StringIO
+
+import numpy as np
+from shapely.geometry import MultiPoint, Point
+from shapely.ops import triangulate
+
+from appCommon.AutoLevelling import GridHeightMap, DelaunayHeightMap, level_gcode
+from appCommon.bilinearInterpolator import bilinearInterpolator
+
+
+class GridHeightMapTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        # a 5 x 5 grid of probe points with a rounding error in their coordinates
+        self.points = np.array([(x + rng.normal(0, 1e-5), y + rng.normal(0, 1e-5), rng.uniform(-0.2, 0.2))
+                                for y in np.linspace(0, 40, 5) for x in np.linspace(0, 40, 5)])
+        self.queries = rng.uniform(-10, 50, (500, 2))
+
+    def test_same_as_reference(self):
+        csv = StringIO('\n'.join('%f,%f,%f' % tuple(pt) for pt in self.points))
+        reference = bilinearInterpolator(csv)
+        expected = [reference.Interpolate(pt) for pt in self.queries]
+
+        height_map = GridHeightMap(self.points)
+        heights = height_map(self.queries[:, 0], self.queries[:, 1])
+
+        np.testing.assert_allclose(heights, expected, atol=1e-4)
+
+    def test_probe_points_heights(self):
+        height_map = GridHeightMap(self.points)
+        heights = height_map(self.points[:, 0], self.points[:, 1])
+
+        np.testing.assert_allclose(heights, self.points[:, 2], atol=1e-5)
+
+    def test_incomplete_grid(self):
+        self.assertRaises(ValueError, GridHeightMap, self.points[:-1])
+
+
+class DelaunayHeightMapTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.points = np.column_stack((rng.uniform(0, 50, (40, 2)), rng.uniform(-0.2, 0.2, 40)))
+        self.queries = rng.uniform(-10, 60, (500, 2))
+
+    def reference(self, x, y):
+        # barycentric interpolation in the triangle that has the point, the nearest probe point outside of them
+        heights = {(px, py): pz for px, py, pz in self.points.tolist()}
+        for tri in triangulate(MultiPoint(self.points[:, :2].tolist())):
+            if tri.buffer(1e-9).contains(Point(x, y)):
+                (x0, y0), (x1, y1), (x2, y2) = tri.exterior.coords[:3]
+                det = (x1 - x0) * (y2 - y0) - (x2 - x0) * (y1 - y0)
+                l1 = ((x - x0) * (y2 - y0) - (x2 - x0) * (y - y0)) / det
+                l2 = ((x1 - x0) * (y - y0) - (x - x0) * (y1 - y0)) / det
+                return heights[(x0, y0)] * (1 - l1 - l2) + heights[(x1, y1)] * l1 + heights[(x2, y2)] * l2
+        return self.points[np.argmin(np.hypot(self.points[:, 0] - x, self.points[:, 1] - y)), 2]
+
+    def test_same_as_reference(self):
+        expected = [self.reference(x, y) for x, y in self.queries]
+
+        height_map = DelaunayHeightMap(self.points)
+        heights = height_map(self.queries[:, 0], self.queries[:, 1])
+
+        np.testing.assert_allclose(heights, expected, atol=1e-9)
+
+    def test_single_point(self):
+        height_map = DelaunayHeightMap([(1, 1, 0.5)])
+
+        np.testing.assert_allclose(height_map([0, 10], [0, -5]), [0.5, 0.5])
+
+
+class LevelGCodeTest(unittest.TestCase):
+
+    def setUp(self):
+        # a tilted plane: height = 0.01 * x + 0.02 * y
+        self.height_map = GridHeightMap([(x, y, 0.01 * x + 0.02 * y) for y in (0, 10) for x in (0, 10)])
+
+    def test_level(self):
+        gcode = "G21\nG90\nG00 Z2.0000\nG00 X0.0000 Y0.0000\nG01 Z-0.1000\nG01 F100.00\n" \
+                "G01 X10.0000 Y0.0000 ; cut\nG00 Z2.0000\nM05"
+        tool_gcode = "G00 X10.0000 Y10.0000\nG01 Z-0.1000\r\nG02 X0.0000 Y10.0000 I-5.0000 J0.0000"
+
+        levelled = level_gcode([gcode, tool_gcode], self.height_map, seg_x=4.0, seg_y=0.0, decimals=4)
+
+        self.assertEqual(levelled[0],
+                         "G21\nG90\nG00 Z2.0000\nG00 X0.0000 Y0.0000 Z2.0000\nG01 Z-0.1000\nG01 F100.00\n"
+                         "G1 X3.3333 Y0.0000 Z-0.0667\nG1 X6.6667 Y0.0000 Z-0.0333\n"
+                         "G01 X10.0000 Y0.0000 Z0.0000 ; cut\nG00 Z2.1000\nM05")
+        self.assertEqual(levelled[1], "G00 X10.0000 Y10.0000 Z2.3000\nG01 Z0.2000\n"
+                                      "G02 X0.0000 Y10.0000 I-5.0000 J0.0000 Z0.1000")
+
+    def test_incremental(self):
+        self.assertRaises(ValueError, level_gcode, ["G91\nG01 X1 Z-1"], self.height_map)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from shapely.geometry import box
+
+from tests.app_stub import app_stub
+from camlib import Geometry
+
+app = app_stub()
+
+
+class BoundsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        Geometry.app = app
+        self.geo = Geometry()
+        self.geo.multigeo = False
+        self.geo.solid_geometry = [[box(0, 0, 1, 1), box(2, 2, 3, 3)], box(4, 0, 5, 1)]
+
+    def test_cached(self):
+        self.assertEqual(self.geo.bounds(), (0, 0, 5, 3))
+        self.assertIsNotNone(self.geo.cached_bounds())
+
+    def test_in_place_changes(self):
+        self.assertEqual(self.geo.bounds(), (0, 0, 5, 3))
+
+        # an element replaced in a nested list, with the same length
+        self.geo.solid_geometry[0][1] = box(2, 2, 3, 10)
+        self.assertEqual(self.geo.bounds(), (0, 0, 5, 10))
+
+        # an element replaced in the top list
+        self.geo.solid_geometry[1] = box(-4, 0, 5, 1)
+        self.assertEqual(self.geo.bounds(), (-4, 0, 5, 10))
+
+        # an element added
+        self.geo.solid_geometry.append(box(0, 0, 20, 1))
+        self.assertEqual(self.geo.bounds(), (-4, 0, 20, 10))
+
+    def test_multigeo(self):
+        self.geo.multigeo = True
+        self.geo.tools = {1: {'solid_geometry': [box(0, 0, 1, 1)]}, 2: {'solid_geometry': [box(5, 5, 6, 6)]}}
+        self.assertEqual(self.geo.bounds(), (0, 0, 6, 6))
+
+        self.geo.tools[2]['solid_geometry'][0] = box(5, 5, 7, 7)
+        self.assertEqual(self.geo.bounds(), (0, 0, 7, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
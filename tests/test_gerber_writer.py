@@ -0,0 +1,61 @@
+import unittest
+from io import StringIO
+
+from shapely.geometry import Point, LineString, Polygon, MultiLineString, GeometryCollection
+
+from appCommon.GerberWriter import GerberWriter
+from appObjects.FlatCAMGerber import GerberObject
+
+
+class GerberWriterTest(unittest.TestCase):
+
+    def write(self, fn, zeros='L'):
+        fp = StringIO()
+        writer = GerberWriter(fp, 2, 4, zeros=zeros)
+        fn(writer)
+        writer.flush()
+        return fp.getvalue().splitlines()
+
+    def test_path(self):
+        lines = self.write(lambda writer: writer.path([(0, 0), (1.5, 0), (1.5, 0), (1.5, -2)]))
+        self.assertEqual(lines, ['X00000Y00000D02*', 'X15000Y00000D01*', 'X15000Y-20000D01*'])
+
+    def test_flash(self):
+        lines = self.write(lambda writer: writer.flash([(1, 2), (1, 2)]), zeros='T')
+        self.assertEqual(lines, ['X010000Y020000D03*', 'X010000Y020000D03*'])
+
+    def test_zero_length_path(self):
+        # a dot: the path is still drawn, with one draw to the same point
+        lines = self.write(lambda writer: writer.path([(5, 5), (5, 5)]))
+        self.assertEqual(lines, ['X50000Y50000D02*', 'X50000Y50000D01*'])
+
+        # a path shorter than the resolution keeps its last draw
+        lines = self.write(lambda writer: writer.path([(1, 1), (1.00001, 1), (1.00002, 1)]))
+        self.assertEqual(lines, ['X10000Y10000D02*', 'X10000Y10000D01*'])
+
+    def test_text_between_runs(self):
+        def fn(writer):
+            writer.write('D10*\n')
+            writer.path([(0, 0), (0, 0)])
+            writer.write('D11*\n')
+            writer.flash([(1, 1)])
+        self.assertEqual(self.write(fn),
+                         ['D10*', 'X00000Y00000D02*', 'X00000Y00000D01*', 'D11*', 'X10000Y10000D03*'])
+
+    def test_follow_polygons_skipped(self):
+        # the polygons of the 'follow' geometry are the outlines of the regions, they are not drawn
+        square = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+        geo = GeometryCollection([square, LineString([(0, 0), (2, 0)]), Point(3, 3)])
+        lines = self.write(lambda writer: GerberObject.write_gerber_geometry(writer, geo, polygons=False))
+        self.assertEqual(lines, ['X00000Y00000D02*', 'X20000Y00000D01*', 'X30000Y30000D03*'])
+
+        lines = self.write(lambda writer: GerberObject.write_gerber_geometry(writer, square))
+        self.assertEqual(len(lines), 5)
+
+        lines = self.write(lambda writer: GerberObject.write_gerber_geometry(
+            writer, MultiLineString([[(0, 0), (1, 0)], [(0, 1), (1, 1)]]), polygons=False))
+        self.assertEqual(len(lines), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
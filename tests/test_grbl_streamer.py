@@ -0,0 +1,131 @@
+import os
+import time
+import unittest
+
+import serial
+
+from appCommon.GrblStreamer import GrblStreamer
+
+if os.name == 'posix':
+    from tests.grbl_simulator import GrblSimulator
+
+
+def make_gcode(nr_lines):
+    lines = ['G21', 'G90', 'G94 ; units and modes', 'G01 F100.00', 'G00 Z2.0000']
+    for i in range(nr_lines):
+        lines.append('G01 X%.4f Y%.4f (cut)' % (i * 0.1, (i % 10) * 0.1))
+    lines.append('M05')
+    return '\n'.join(lines)
+
+
+@unittest.skipUnless(os.name == 'posix', "The GRBL simulator needs a pseudo-terminal.")
+class GrblStreamerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = None
+        self.port = None
+
+    def tearDown(self):
+        if self.port is not None:
+            self.port.close()
+        if self.simulator is not None:
+            self.simulator.stop()
+
+    def connect(self, **kwargs):
+        self.simulator = GrblSimulator(**kwargs).start()
+        self.port = serial.Serial(self.simulator.port_name, 115200, timeout=0.05)
+
+    def test_stream(self):
+        self.connect(line_time=0.0005)
+        gcode = make_gcode(500)
+        progress = []
+
+        streamer = GrblStreamer(self.port, gcode, on_progress=progress.append, progress_interval=0.05)
+        streamer.start()
+        self.assertTrue(streamer.wait(timeout=30))
+
+        expected = [GrblStreamer.clean_line(line) for line in gcode.splitlines()]
+        self.assertEqual(self.simulator.received_lines, [line for line in expected if line])
+        self.assertFalse(self.simulator.overflow)
+
+        status = streamer.status()
+        self.assertEqual(status['state'], 'finished')
+        self.assertEqual(status['lines_done'], status['lines_total'])
+        self.assertEqual(status['line_nr'], len(gcode.splitlines()))
+        self.assertEqual(status['queue_lines'], 0)
+        self.assertGreater(status['lines_per_sec'], 0)
+
+        # the receive buffer of the controller was kept full
+        self.assertGreater(max(st['queue_lines'] for st in progress), 1)
+        self.assertGreater(self.simulator.max_rx_bytes, 100)
+
+    def test_errors_and_messages(self):
+        self.connect(error_words=('G99',), probe_height=lambda x, y: -1.0 - 0.01 * x)
+        gcode = 'G21\nG90\nG0 X10 Y5\nG38.2 Z-5 F10\nG99\nG0 Z2\n'
+
+        streamer = GrblStreamer(self.port, gcode)
+        streamer.start()
+        self.assertTrue(streamer.wait(timeout=10))
+
+        self.assertEqual(streamer.status()['state'], 'finished')
+        self.assertEqual(streamer.errors, [(5, 'error:20')])
+        self.assertIn((4, '[PRB:10.000,5.000,-1.100:1]'), streamer.messages)
+
+    def test_pause_resume(self):
+        self.connect(line_time=0.001)
+        streamer = GrblStreamer(self.port, make_gcode(2000))
+        streamer.start()
+        time.sleep(0.2)
+
+        streamer.pause()
+        time.sleep(0.2)
+        sent = streamer.status()['lines_sent']
+        time.sleep(0.2)
+        self.assertEqual(streamer.status()['lines_sent'], sent)
+        self.assertEqual(streamer.status()['state'], 'paused')
+        self.assertLess(sent, streamer.status()['lines_total'])
+
+        streamer.resume()
+        self.assertTrue(streamer.wait(timeout=30))
+        self.assertEqual(streamer.status()['state'], 'finished')
+
+    def test_feed_hold(self):
+        self.connect(line_time=0.001)
+        streamer = GrblStreamer(self.port, make_gcode(2000))
+        streamer.start()
+        time.sleep(0.2)
+
+        streamer.feed_hold()
+        time.sleep(0.2)
+        executed = self.simulator.executed
+        time.sleep(0.2)
+        # the machine does not move during the feed hold
+        self.assertEqual(self.simulator.executed, executed)
+        self.assertEqual(streamer.status()['state'], 'hold')
+
+        streamer.cycle_start()
+        self.assertTrue(streamer.wait(timeout=30))
+        self.assertEqual(self.simulator.realtime, [b'!', b'~'])
+        self.assertEqual(streamer.status()['state'], 'finished')
+
+    def test_stop(self):
+        self.connect(line_time=0.001)
+        streamer = GrblStreamer(self.port, make_gcode(5000))
+        streamer.start()
+        time.sleep(0.1)
+
+        streamer.stop(reset=True)
+        self.assertEqual(streamer.status()['state'], 'stopped')
+        self.assertIn(b'\x18', self.simulator.realtime)
+
+
+class CleanLineTest(unittest.TestCase):
+
+    def test_clean_line(self):
+        self.assertEqual(GrblStreamer.clean_line('G01 X1.0000 Y2.0000 ; cut'), 'G01X1.0000Y2.0000')
+        self.assertEqual(GrblStreamer.clean_line('(Tool: 1) G00 Z2.0 (move)'), 'G00Z2.0')
+        self.assertEqual(GrblStreamer.clean_line('(header comment'), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
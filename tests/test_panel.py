@@ -0,0 +1,192 @@
+import json
+import threading
+import unittest
+from copy import deepcopy
+
+import numpy as np
+from shapely.geometry import Point, LineString
+import shapely.affinity as affinity
+from vispy.gloo.context import FakeCanvas
+
+from tests.app_stub import app_stub
+from appParsers.ParseGerber import Gerber
+from appParsers.ParseExcellon import Excellon
+from appCommon.Panel import Panel, PanelDict
+from appGUI.VisPyVisuals import ShapeCollectionVisual, _shape_buffers, _set_shape_buffers
+
+app = app_stub()
+
+
+class PanelTest(unittest.TestCase):
+
+    def setUp(self):
+        Gerber.app = app
+        Excellon.app = app
+
+        self.gerber = Gerber()
+        pads = [Point(0, 0).buffer(1), Point(5, 2).buffer(1)]
+        self.gerber.apertures = {'10': {'type': 'C', 'size': 2.0,
+                                        'geometry': [{'solid': pad, 'follow': pad.centroid} for pad in pads]}}
+        self.gerber.solid_geometry = pads
+        self.gerber.follow_geometry = [pad.centroid for pad in pads]
+
+        self.excellon = Excellon()
+        self.excellon.tools = {1: {'tooldia': 0.8, 'drills': [Point(1, 1), Point(2, 1)],
+                                   'slots': [(Point(0, 0), Point(1, 0))],
+                                   'solid_geometry': [Point(1, 1).buffer(0.4), Point(2, 1).buffer(0.4)]}}
+        self.excellon.solid_geometry = list(self.excellon.tools[1]['solid_geometry'])
+
+    def make_panel(self, source, panel_obj):
+        panel = Panel.grid(2, 3, 10.0, 20.0, source.bounds())
+        panel_obj.set_panel(panel, source)
+        return panel
+
+    def test_grid(self):
+        panel = Panel.grid(2, 3, 10.0, 20.0, (0, 0, 5, 5))
+        self.assertEqual(panel.offsets.tolist(), [[0, 0], [10, 0], [20, 0], [0, 20], [10, 20], [20, 20]])
+        self.assertEqual(panel.bounds(), (0, 0, 25, 25))
+
+    def test_pending(self):
+        panel_obj = Gerber()
+        self.make_panel(self.gerber, panel_obj)
+
+        # the bounds, the aperture parameters and the number of elements don't expand the panel
+        self.assertEqual(panel_obj.bounds(), (-1.0, -1.0, 26.0, 23.0))
+        self.assertEqual(panel_obj.apertures['10']['size'], 2.0)
+        panel_obj.apertures['10']['size'] = 2.5
+        self.assertEqual(panel_obj.geometry_count('geometry', panel_obj.apertures['10']), 12)
+        geometry, offsets = panel_obj.panel_geometry('solid_geometry')
+        self.assertEqual(len(geometry), 2)
+        self.assertEqual(len(offsets), 6)
+        self.assertIsNotNone(panel_obj.panel)
+
+        # the source is not changed
+        self.assertEqual(self.gerber.apertures['10']['size'], 2.0)
+
+    def test_expand(self):
+        panel_obj = Gerber()
+        panel = self.make_panel(self.gerber, panel_obj)
+
+        geometry = panel_obj.apertures['10']['geometry']
+        self.assertIsNone(panel_obj.panel)
+        self.assertEqual(len(geometry), 12)
+        self.assertEqual(len(panel_obj.solid_geometry), 12)
+        self.assertEqual(len(panel_obj.follow_geometry), 12)
+
+        # the instances are in the order of the offsets, each with all the source elements
+        for idx, (dx, dy) in enumerate(panel.offsets):
+            for nr, pad in enumerate(self.gerber.solid_geometry):
+                moved = affinity.translate(pad, dx, dy)
+                self.assertTrue(panel_obj.solid_geometry[2 * idx + nr].equals(moved))
+                self.assertTrue(geometry[2 * idx + nr]['solid'].equals(moved))
+        self.assertEqual(panel_obj.bounds(), panel.bounds())
+
+    def test_excellon(self):
+        panel_obj = Excellon()
+        self.make_panel(self.excellon, panel_obj)
+
+        self.assertEqual(panel_obj.geometry_count('drills', panel_obj.tools[1]), 12)
+        self.assertEqual(panel_obj.geometry_count('slots', panel_obj.tools[1]), 6)
+        self.assertIn('drills', panel_obj.tools[1])
+        self.assertIsNotNone(panel_obj.panel)
+
+        # writing a geometry key expands the panel before
+        panel_obj.tools[1]['slots'] = []
+        self.assertIsNone(panel_obj.panel)
+        self.assertEqual(len(panel_obj.tools[1]['drills']), 12)
+        self.assertTrue(panel_obj.tools[1]['drills'][7].equals(Point(2, 21)))
+
+    def test_copies(self):
+        panel_obj = Excellon()
+        self.make_panel(self.excellon, panel_obj)
+
+        # a deep copy of a pending tool dictionary is pending too
+        tools = deepcopy(panel_obj.tools)
+        self.assertIsInstance(tools[1], PanelDict)
+        self.assertIsNotNone(panel_obj.panel)
+
+        # the copies and the serialization hold the geometry of all the instances
+        self.assertEqual(len(dict(tools[1])['drills']), 12)
+        self.assertEqual(len({**panel_obj.tools[1]}['drills']), 12)
+        self.assertEqual(len(json.loads(json.dumps(panel_obj.tools, default=lambda geo: geo.wkt))['1']['slots']), 6)
+
+    def test_source_changed(self):
+        panel_obj = Gerber()
+        self.make_panel(self.gerber, panel_obj)
+
+        # the source lists are not shared with the panel
+        self.gerber.solid_geometry.append(LineString([(0, 0), (100, 100)]))
+        self.assertEqual(len(panel_obj.solid_geometry), 12)
+
+    def test_read_while_expanding(self):
+        panel_obj = Gerber()
+        panel = self.make_panel(self.gerber, panel_obj)
+
+        # the expansion is held after the first geometry is expanded
+        expanding, resume = threading.Event(), threading.Event()
+        expand = panel.expand
+
+        def held_expand(geometry):
+            expanding.set()
+            resume.wait(5)
+            return expand(geometry)
+        panel.expand = held_expand
+
+        worker = threading.Thread(target=panel_obj.materialize_panel)
+        worker.start()
+        self.assertTrue(expanding.wait(5))
+
+        # meanwhile the panel is still pending for the plot, the bounds and the counts
+        geometry, offsets = panel_obj.panel_geometry('solid_geometry')
+        self.assertEqual(len(geometry), 2)
+        self.assertEqual(len(offsets), 6)
+        self.assertEqual(panel_obj.geometry_count('solid_geometry'), 12)
+        self.assertEqual(panel_obj.bounds(), panel.bounds())
+
+        # and a read of the full geometry waits for the expansion
+        read = []
+        reader = threading.Thread(target=lambda: read.append(len(panel_obj.apertures['10']['geometry'])))
+        reader.start()
+        resume.set()
+        worker.join(5)
+        reader.join(5)
+        self.assertEqual(read, [12])
+        self.assertIsNone(panel_obj.panel)
+        self.assertIsNone(panel_obj.panel_geometry('solid_geometry')[1])
+        self.assertEqual(len(panel_obj.solid_geometry), 12)
+
+    def test_instanced_buffers(self):
+        pad = Point(0, 0).buffer(1)
+        offsets = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 5.0]])
+        data = {'geometry': pad, 'color': '#000000FF', 'face_color': '#BBF268BF', 'tolerance': None,
+                'offsets': offsets}
+        instanced = _set_shape_buffers(data, *_shape_buffers(data))
+
+        for idx, (dx, dy) in enumerate(offsets):
+            moved = {'geometry': affinity.translate(pad, dx, dy), 'color': '#000000FF', 'face_color': '#BBF268BF',
+                     'tolerance': None}
+            line_pts, mesh_vertices, mesh_tris, __, __ = _shape_buffers(moved)
+            count = len(line_pts)
+            self.assertTrue(np.allclose(instanced['line_pts'][idx * count:(idx + 1) * count], line_pts))
+            tris = instanced['mesh_tris'][idx * len(mesh_tris):(idx + 1) * len(mesh_tris)]
+            self.assertTrue(np.allclose(instanced['mesh_vertices'][tris], mesh_vertices[mesh_tris], atol=1e-5))
+        self.assertEqual(instanced['geo_bounds'], (-1.0, -1.0, 11.0, 6.0))
+        self.assertEqual(instanced['instance_bounds'].tolist(),
+                         [[-1.0, -1.0, 1.0, 1.0], [9.0, -1.0, 11.0, 1.0], [-1.0, 4.0, 1.0, 6.0]])
+
+    def test_instanced_view(self):
+        # the visuals need a GL context only to record the GL commands
+        self.canvas = FakeCanvas()
+
+        # a shape drawn at the corners of a panel is found only in the views over one of its instances
+        collection = ShapeCollectionVisual(layers=1, pool=None, tiles=True)
+        panel_key = collection.add(shape=Point(0, 0).buffer(1), color='#000000FF', face_color='#BBF268BF', layer=0,
+                                   offsets=np.array([[0.0, 0.0], [100.0, 0.0], [0.0, 100.0], [100.0, 100.0]]))
+        center_key = collection.add(shape=Point(50, 50).buffer(1), color='#000000FF', face_color='#BBF268BF', layer=0)
+        collection.redraw()
+        self.assertEqual(collection._query_index((95, 95, 105, 105)), [panel_key])
+        self.assertEqual(collection._query_index((45, 45, 55, 55)), [center_key])
+        self.assertEqual(sorted(collection._query_index((-5, -5, 105, 105))), sorted([panel_key, center_key]))
+
+if __name__ == '__main__':
+    unittest.main()
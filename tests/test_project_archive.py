@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+import simplejson as json
+from shapely.geometry import Point, LineString, LinearRing, Polygon, MultiPolygon
+
+from tests.app_stub import app_stub
+from camlib import to_dict
+from appParsers.ParseGerber import Gerber
+from appCommon.ProjectArchive import write_project_archive, verify_project_archive, is_project_archive, \
+    ProjectArchiveReader
+
+app = app_stub()
+
+
+class ProjectArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        Gerber.app = app
+
+        gerber = Gerber()
+        pad = Point(1, 1).buffer(0.5)
+        square = Polygon([(0, 0), (4, 0), (4, 4), (0, 4)], [[(1, 1), (2, 1), (2, 2), (1, 2)]])
+        gerber.apertures = {
+            '10': {'type': 'C', 'size': 1.0, 'geometry': [{'solid': pad, 'follow': Point(1, 1)}]},
+            '0': {'type': 'REG', 'size': 0.0, 'geometry': [{'solid': square, 'follow': square.exterior}]}
+        }
+        gerber.solid_geometry = MultiPolygon([pad, square])
+        gerber.follow_geometry = [Point(1, 1), LinearRing([(0, 0), (4, 0), (4, 4)]), LineString()]
+
+        self.objs = []
+        for nr in range(3):
+            obj_dict = gerber.to_dict()
+            obj_dict['kind'] = 'gerber'
+            obj_dict['options'] = {'name': 'gerber_%d' % nr}
+            self.objs.append(obj_dict)
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, 'project.FlatPrj')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def save(self):
+        return write_project_archive(self.filename, objs=iter(self.objs), options={'units': 'MM'}, version=8.994)
+
+    def test_round_trip(self):
+        manifest = self.save()
+        self.assertTrue(is_project_archive(self.filename))
+        self.assertTrue(verify_project_archive(self.filename, manifest))
+        self.assertFalse(os.path.exists(self.filename + '.tmp'))
+
+        with ProjectArchiveReader(self.filename) as reader:
+            self.assertEqual(reader.options, {'units': 'MM'})
+            self.assertEqual(reader.version, 8.994)
+            self.assertEqual(len(reader), 3)
+            objs = list(reader.objects())
+            self.assertEqual(reader.failed, [])
+
+        # the objects are the same, geometry types included (the LinearRing and the empty geometry)
+        self.assertEqual(len(objs), 3)
+        for saved, opened in zip(self.objs, objs):
+            self.assertEqual(json.dumps(saved, default=to_dict, sort_keys=True),
+                             json.dumps(opened, default=to_dict, sort_keys=True))
+        follow = objs[0]['follow_geometry']
+        self.assertIsInstance(follow[1], LinearRing)
+        self.assertTrue(follow[2].is_empty)
+
+    def test_checksum(self):
+        self.save()
+
+        # replace the object stream of the second object with other valid JSON
+        damaged = os.path.join(self.tmp_dir, 'damaged.FlatPrj')
+        with zipfile.ZipFile(self.filename) as src, zipfile.ZipFile(damaged, 'w') as dst:
+            for info in src.infolist():
+                data = src.read(info.filename)
+                if info.filename == 'objs/0001.json':
+                    data = b'{}'
+                dst.writestr(info, data)
+
+        with ProjectArchiveReader(damaged) as reader:
+            objs = list(reader.objects())
+        self.assertEqual(len(objs), 2)
+        self.assertEqual(reader.failed, ['gerber_1'])
+
+    def test_damaged_stream(self):
+        self.save()
+
+        # a stream whose compressed data is damaged raises while it is read and the archive is closed
+        with zipfile.ZipFile(self.filename) as zf:
+            info = zf.getinfo('objs/0001.wkb')
+        with open(self.filename, 'r+b') as f:
+            f.seek(info.header_offset + 30 + len(info.filename) + 10)
+            f.write(b'\xff' * 16)
+
+        reader = ProjectArchiveReader(self.filename)
+        with self.assertRaises(Exception):
+            with reader:
+                list(reader.objects())
+        self.assertIsNone(reader.zf.fp)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+# This script measures the time needed to align a Gerber object (an offset followed by a rotation, like the dual
+# point alignment of the Align Objects tool) and to apply a chain of five transformations (scale, offset, mirror,
+# rotate and skew) to it: once with one shapely.affinity call for each geometry and each transformation, like the
+# transformation methods did before, and once with Gerber.affine_transform() and the chained matrix.
+# Run python transform_speed_1.py [number_of_pads]
+
+import sys
+import time
+import logging
+from copy import deepcopy
+
+from shapely.geometry import Point, LineString
+import shapely.affinity as affinity
+
+sys.path.append('../../')
+
+from tests.app_stub import app_stub
+from appParsers.ParseGerber import Gerber
+from appCommon.AffineTransform import compose, scale_matrix, translate_matrix, mirror_matrix, rotate_matrix, \
+    skew_matrix
+
+logging.getLogger('base').setLevel(logging.ERROR)
+logging.getLogger('base2').setLevel(logging.ERROR)
+
+nr_pads = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+Gerber.app = app_stub()
+
+# round pads with 65 vertices and the tracks between them, stored in the apertures, too
+source = Gerber()
+solid_geometry, follow_geometry = [], []
+source.apertures = {'10': {'type': 'C', 'size': 1.6, 'geometry': []}, '11': {'type': 'C', 'size': 0.3, 'geometry': []}}
+for i in range(nr_pads):
+    center = Point((i % 200) * 2.54, (i // 200) * 2.54)
+    pad = center.buffer(0.8, resolution=16)
+    track = LineString([(center.x, center.y), (center.x + 2.54, center.y)])
+    source.apertures['10']['geometry'].append({'solid': pad, 'follow': center})
+    source.apertures['11']['geometry'].append({'solid': track.buffer(0.15), 'follow': track})
+    solid_geometry.append(pad)
+    follow_geometry.append(center)
+source.solid_geometry = solid_geometry
+source.follow_geometry = follow_geometry
+
+chains = {
+    'align (offset, rotate)': [('offset', (12.5, -3.2)), ('rotate', (1.5, (20, 20)))],
+    'scale, offset, mirror, rotate, skew': [('scale', (1.02, 0.98, (0, 0))), ('offset', (12.5, -3.2)),
+                                            ('mirror', ('X', (0, 50))), ('rotate', (90, (20, 20))),
+                                            ('skew', (0.5, 0.2, (0, 0)))]
+}
+
+affinity_ops = {
+    'scale': lambda geo, xf, yf, pt: affinity.scale(geo, xf, yf, origin=pt),
+    'offset': lambda geo, dx, dy: affinity.translate(geo, xoff=dx, yoff=dy),
+    'mirror': lambda geo, axis, pt: affinity.scale(geo, *{"X": (1.0, -1.0), "Y": (-1.0, 1.0)}[axis], origin=pt),
+    'rotate': lambda geo, angle, pt: affinity.rotate(geo, angle, origin=pt),
+    'skew': lambda geo, ax, ay, pt: affinity.skew(geo, ax, ay, origin=pt)
+}
+matrix_ops = {'scale': scale_matrix, 'offset': translate_matrix, 'mirror': mirror_matrix, 'rotate': rotate_matrix,
+              'skew': skew_matrix}
+
+
+def per_geometry(obj, chain):
+    # each transformation walks the geometry and transforms each geometry, like the old scale_geom() closures
+    for op, args in chain:
+        obj.solid_geometry = [affinity_ops[op](geo, *args) for geo in obj.solid_geometry]
+        obj.follow_geometry = [affinity_ops[op](geo, *args) for geo in obj.follow_geometry]
+        for apid in obj.apertures:
+            obj.apertures[apid]['geometry'] = [{key: affinity_ops[op](geo, *args) for key, geo in geo_el.items()}
+                                               for geo_el in obj.apertures[apid]['geometry']]
+
+
+def chained(obj, chain):
+    obj.affine_transform(compose(*[matrix_ops[op](*args) for op, args in chain]))
+
+
+nr_geos = 2 * nr_pads + sum(2 * len(ap['geometry']) for ap in source.apertures.values())
+print("%d geometries" % nr_geos)
+for name, chain in chains.items():
+    results = {}
+    for method in (per_geometry, chained):
+        obj = deepcopy(source)
+        t0 = time.perf_counter()
+        method(obj, chain)
+        results[method.__name__] = (time.perf_counter() - t0, obj)
+
+    old, new = results['per_geometry'][1], results['chained'][1]
+    assert all(a.equals_exact(b, 1e-9) for a, b in zip(old.solid_geometry, new.solid_geometry))
+    print("%-36s per geometry %8.3f sec    chained %8.3f sec    speedup %.1fx" % (
+        name, results['per_geometry'][0], results['chained'][0],
+        results['per_geometry'][0] / results['chained'][0]))